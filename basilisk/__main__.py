@@ -66,6 +66,99 @@ def parse_args():
 	return parser.parse_args()
 
 
+def parse_batch_args(argv: list[str]) -> argparse.Namespace:
+	"""Parse the arguments of the headless ``batch`` command.
+
+	The command completes the prompts of a JSONL file without starting the
+	graphical interface, see ``basilisk.batch_runner``.
+
+	Args:
+		argv: Arguments following the ``batch`` command name.
+
+	Returns:
+		argparse.Namespace: Parsed command-line arguments with their values.
+	"""
+	from basilisk.batch_runner import DEFAULT_CONCURRENCY
+
+	parser = argparse.ArgumentParser(
+		prog=f"{APP_NAME} batch",
+		description="Complete the prompts of a JSONL file without the GUI",
+	)
+	parser.add_argument(
+		"input", help="JSONL file of prompts, - to read standard input"
+	)
+	target = parser.add_mutually_exclusive_group()
+	target.add_argument(
+		"--profile", "-p", help="Name of the conversation profile to use"
+	)
+	target.add_argument(
+		"--account", "-a", help="Name or ID of the account to use"
+	)
+	parser.add_argument(
+		"--model", "-M", help="Model ID, overrides the profile model"
+	)
+	parser.add_argument("--system", "-s", help="System prompt")
+	parser.add_argument("--temperature", type=float, default=None)
+	parser.add_argument("--top-p", type=float, default=None)
+	parser.add_argument("--max-tokens", type=int, default=None)
+	parser.add_argument(
+		"--stream",
+		action=argparse.BooleanOptionalAction,
+		default=None,
+		help="Receive the responses as streams",
+	)
+	parser.add_argument(
+		"--concurrency",
+		"-c",
+		type=int,
+		default=DEFAULT_CONCURRENCY,
+		help="Maximum number of requests sent at the same time",
+	)
+	parser.add_argument(
+		"--output",
+		"-o",
+		default=None,
+		help="JSONL file of the results, standard output by default",
+	)
+	parser.add_argument(
+		"--save",
+		action="store_true",
+		help="Also save each result as a conversation in the database",
+	)
+	parser.add_argument(
+		"--provider-batch",
+		action="store_true",
+		help="Submit the prompts as one job of the provider batch API, "
+		"whose results are saved as conversations",
+	)
+	parser.add_argument(
+		"--wait",
+		action="store_true",
+		help="With --provider-batch, wait until the results are saved",
+	)
+	parser.add_argument(
+		"--language",
+		"-l",
+		type=str,
+		default=None,
+		help="Set the application language",
+	)
+	parser.add_argument(
+		"--log_level",
+		"-L",
+		type=str,
+		default=None,
+		help="Set the log level (DEBUG, INFO, WARNING, ERROR, CRITICAL)",
+	)
+	parser.add_argument(
+		"--no-env-account",
+		"-n",
+		help="Do not load accounts from environment variables",
+		action="store_true",
+	)
+	return parser.parse_args(argv)
+
+
 def action_on_already_running() -> None:
 	"""Handle actions when the Basilisk application is already running.
 
@@ -83,6 +176,13 @@ if __name__ == "__main__":
 	# Enable multiprocessing support for frozen executables
 	multiprocessing.freeze_support()
 
+	if len(sys.argv) > 1 and sys.argv[1] == "batch":
+		# Headless mode: no single instance lock and no wx
+		from basilisk.batch_runner import run_batch
+
+		global_vars.args = parse_batch_args(sys.argv[2:])
+		sys.exit(run_batch(global_vars.args))
+
 	global_vars.args = parse_args()
 	singleton_instance = SingletonInstance()
 	if not singleton_instance.acquire():
@@ -18,8 +18,8 @@ if TYPE_CHECKING:
 	import accessible_output3.outputs.auto
 
 import basilisk.config as config
-from basilisk.completion_handler import COMMON_PATTERN
 from basilisk.decorators import measure_time
+from basilisk.stream_buffer import COMMON_PATTERN
 
 log = logging.getLogger(__name__)
 RE_SPEECH_STREAM_BUFFER = re.compile(rf"{COMMON_PATTERN}")
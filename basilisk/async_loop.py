@@ -0,0 +1,146 @@
+"""Dedicated thread running the asyncio event loop shared by async engines.
+
+Async provider requests are scheduled on one loop thread instead of a thread
+per request, so concurrent streams share a single thread and the connection
+pool of each async SDK client. Results are forwarded to the UI through the
+usual ``wx.CallAfter`` callbacks.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from functools import cache
+from typing import Any, Coroutine, Optional
+
+from basilisk.provider_engine.cancellation import CancellationToken
+
+log = logging.getLogger(__name__)
+
+
+class LoopTask:
+	"""Handle on a coroutine scheduled on the loop thread.
+
+	Exposes the subset of the ``threading.Thread`` interface used to track
+	running tasks, so callers can hold either kind of task.
+	"""
+
+	def __init__(self, future: concurrent.futures.Future):
+		"""Wrap the future returned when scheduling the coroutine.
+
+		Args:
+			future: Future of the coroutine running on the loop.
+		"""
+		self.future = future
+
+	@property
+	def ident(self) -> int:
+		"""Identifier of the task, used in log messages."""
+		return id(self.future)
+
+	def is_alive(self) -> bool:
+		"""Whether the coroutine is still running."""
+		return not self.future.done()
+
+	def join(self, timeout: Optional[float] = None) -> None:
+		"""Wait for the coroutine to finish.
+
+		Args:
+			timeout: Maximum number of seconds to wait, None to wait forever.
+		"""
+		concurrent.futures.wait([self.future], timeout=timeout)
+
+
+class AsyncLoopThread:
+	"""Run an asyncio event loop in a daemon thread started on first use."""
+
+	def __init__(self, name: str = "basilisk-async-loop"):
+		"""Initialize the loop thread without starting it.
+
+		Args:
+			name: Name of the loop thread.
+		"""
+		self.name = name
+		self._loop: Optional[asyncio.AbstractEventLoop] = None
+		self._thread: Optional[threading.Thread] = None
+		self._lock = threading.Lock()
+
+	@property
+	def loop(self) -> asyncio.AbstractEventLoop:
+		"""The running event loop, started if needed."""
+		with self._lock:
+			if self._loop is None or self._loop.is_closed():
+				self._start()
+			return self._loop
+
+	def _start(self) -> None:
+		self._loop = asyncio.new_event_loop()
+		started = threading.Event()
+		self._thread = threading.Thread(
+			target=self._run,
+			args=(self._loop, started),
+			name=self.name,
+			daemon=True,
+		)
+		self._thread.start()
+		started.wait()
+		log.debug("Async loop thread started")
+
+	@staticmethod
+	def _run(loop: asyncio.AbstractEventLoop, started: threading.Event) -> None:
+		asyncio.set_event_loop(loop)
+		loop.call_soon(started.set)
+		try:
+			loop.run_forever()
+		finally:
+			loop.run_until_complete(loop.shutdown_asyncgens())
+			loop.close()
+
+	def submit(
+		self,
+		coro: Coroutine[Any, Any, Any],
+		cancel_token: Optional[CancellationToken] = None,
+	) -> LoopTask:
+		"""Schedule a coroutine on the loop from any thread.
+
+		Args:
+			coro: The coroutine to run.
+			cancel_token: Optional token cancelling the coroutine's task,
+				which closes the request awaited by the coroutine.
+
+		Returns:
+			A handle on the scheduled coroutine.
+		"""
+		future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+		if cancel_token is not None:
+			cancel_token.add_callback(future.cancel)
+		return LoopTask(future)
+
+	def stop(self, timeout: float = 2.0) -> None:
+		"""Cancel the pending tasks and stop the loop thread.
+
+		Args:
+			timeout: Maximum number of seconds to wait for the thread.
+		"""
+		with self._lock:
+			loop, thread = self._loop, self._thread
+			self._loop = self._thread = None
+		if loop is None or loop.is_closed():
+			return
+
+		def cancel_all():
+			for task in asyncio.all_tasks(loop):
+				task.cancel()
+			loop.call_soon(loop.stop)
+
+		loop.call_soon_threadsafe(cancel_all)
+		thread.join(timeout)
+		log.debug("Async loop thread stopped")
+
+
+@cache
+def get_async_loop() -> AsyncLoopThread:
+	"""Return the loop thread shared by the application."""
+	return AsyncLoopThread()
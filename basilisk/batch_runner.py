@@ -0,0 +1,620 @@
+"""Headless runner completing prompts read from a JSONL file.
+
+``python -m basilisk batch prompts.jsonl`` completes every prompt of the file
+with the engine of a conversation profile or account, without starting the
+graphical interface. Each input line is a JSON object::
+
+	{"id": "cat", "prompt": "Describe this image", "attachments": ["cat.png"]}
+
+Only ``prompt`` is required; ``id`` defaults to the line number and
+``system`` overrides the system prompt of the run. Requests are sent by a
+pool of worker threads, and each result is written as a JSON line as soon
+as it is received, and optionally saved as a new conversation.
+
+With ``--provider-batch``, the prompts are instead submitted as one job of
+the provider batch API, answered within hours at a lower price. The job is
+recorded in the conversation database and its results are saved as
+conversations by the application, or by the command with ``--wait``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, TextIO
+
+from upath import UPath
+
+import basilisk.config as config
+from basilisk.completion_retry import CompletionRetrier
+from basilisk.completion_scheduler import completion_slot
+from basilisk.conversation import (
+	AttachmentFile,
+	Conversation,
+	ImageFile,
+	Message,
+	MessageBlock,
+	MessageRoleEnum,
+	SystemMessage,
+)
+from basilisk.conversation.attached_file import get_mime_type
+from basilisk.provider_ai_model import AIModelInfo
+
+if TYPE_CHECKING:
+	from basilisk.conversation.database import ConversationDatabase
+	from basilisk.provider_engine.base_engine import BaseEngine
+	from basilisk.services.batch_service import BatchService
+
+log = logging.getLogger(__name__)
+
+# Number of requests sent at the same time when not set on the command line
+DEFAULT_CONCURRENCY = 4
+
+
+class BatchInputError(ValueError):
+	"""Raised when the prompt file or the run options are invalid."""
+
+
+@dataclass(frozen=True)
+class BatchPrompt:
+	"""A prompt of the input file.
+
+	Attributes:
+		id: Identifier of the prompt, copied to its result.
+		prompt: Text of the request.
+		attachments: Paths or URLs of the files attached to the request.
+		system: System prompt of the request, overriding the run one.
+	"""
+
+	id: str
+	prompt: str
+	attachments: list[str] = field(default_factory=list)
+	system: Optional[str] = None
+
+
+@dataclass
+class BatchResult:
+	"""Outcome of a prompt.
+
+	Attributes:
+		prompt: The completed prompt.
+		block: The completed message block, None on error.
+		error: Reason why the completion failed, if any.
+		conversation_id: Database ID of the saved conversation, if any.
+	"""
+
+	prompt: BatchPrompt
+	block: Optional[MessageBlock] = None
+	error: Optional[str] = None
+	conversation_id: Optional[int] = None
+
+	def to_dict(self) -> dict:
+		"""Return the JSON object written for this result."""
+		data = {"id": self.prompt.id}
+		if self.block is not None:
+			data["provider"] = self.block.model.provider_id
+			data["model"] = self.block.model.model_id
+			data["response"] = self.block.response.content
+			if self.block.response.citations:
+				data["citations"] = self.block.response.citations
+		if self.conversation_id is not None:
+			data["conversation_id"] = self.conversation_id
+		if self.error is not None:
+			data["error"] = self.error
+		return data
+
+
+def read_prompts(lines: Iterable[str]) -> Iterator[BatchPrompt]:
+	"""Parse the prompts of a JSONL input.
+
+	Blank lines are skipped. A line holding a JSON string is a prompt
+	without options.
+
+	Args:
+		lines: Lines of the input file.
+
+	Yields:
+		The prompts, in file order.
+
+	Raises:
+		BatchInputError: If a line is not a valid prompt.
+	"""
+	for line_number, line in enumerate(lines, start=1):
+		line = line.strip()
+		if not line:
+			continue
+		try:
+			data = json.loads(line)
+		except json.JSONDecodeError as e:
+			raise BatchInputError(f"line {line_number}: {e}") from e
+		if isinstance(data, str):
+			data = {"prompt": data}
+		if not isinstance(data, dict) or not isinstance(
+			data.get("prompt"), str
+		):
+			raise BatchInputError(f"line {line_number}: missing prompt")
+		attachments = data.get("attachments") or []
+		if isinstance(attachments, str):
+			attachments = [attachments]
+		yield BatchPrompt(
+			id=str(data.get("id", line_number)),
+			prompt=data["prompt"],
+			attachments=[str(path) for path in attachments],
+			system=data.get("system"),
+		)
+
+
+def build_attachment(
+	path: str, base_dir: Path, supported_formats: set[str]
+) -> AttachmentFile:
+	"""Create the attachment of a prompt.
+
+	Args:
+		path: URL, absolute path, or path relative to the input file.
+		base_dir: Directory of the input file.
+		supported_formats: MIME types accepted by the engine.
+
+	Returns:
+		An ImageFile for images, an AttachmentFile otherwise.
+
+	Raises:
+		BatchInputError: If the engine does not support the file type.
+	"""
+	location = UPath(path)
+	if location.protocol in ("", "file") and not location.is_absolute():
+		location = UPath(base_dir / path)
+	mime_type = get_mime_type(location)
+	if mime_type not in supported_formats:
+		raise BatchInputError(f"unsupported attachment type: {path}")
+	if mime_type.startswith("image/"):
+		return ImageFile(location=location)
+	return AttachmentFile(location=location)
+
+
+class BatchRunner:
+	"""Completes prompts with an engine using a pool of worker threads.
+
+	Attributes:
+		engine: The engine sending the requests.
+		model_id: ID of the model completing the prompts.
+		concurrency: Maximum number of requests sent at the same time.
+	"""
+
+	def __init__(
+		self,
+		engine: BaseEngine,
+		model_id: str,
+		system_prompt: Optional[str] = None,
+		temperature: Optional[float] = None,
+		top_p: Optional[float] = None,
+		max_tokens: Optional[int] = None,
+		stream: bool = False,
+		concurrency: int = DEFAULT_CONCURRENCY,
+		base_dir: Optional[Path] = None,
+	):
+		"""Initialize the runner.
+
+		Args:
+			engine: The engine sending the requests.
+			model_id: ID of the model completing the prompts.
+			system_prompt: System prompt of the prompts without their own.
+			temperature: Sampling temperature, the model default if None.
+			top_p: Nucleus sampling value, 1 if None.
+			max_tokens: Maximum output tokens, the model default if None.
+			stream: Whether to receive the responses as streams.
+			concurrency: Maximum number of requests sent at the same time.
+			base_dir: Directory the relative attachment paths are resolved
+				from, the working directory if None.
+
+		Raises:
+			BatchInputError: If the engine does not know the model or the
+				concurrency is not positive.
+		"""
+		if concurrency < 1:
+			raise BatchInputError("concurrency must be at least 1")
+		model = engine.get_model(model_id)
+		if model is None:
+			raise BatchInputError(
+				f"unknown model {model_id} for {engine.account.provider.id}"
+			)
+		self.engine = engine
+		self.model_id = model_id
+		self.concurrency = concurrency
+		self._system_prompt = system_prompt
+		if temperature is None:
+			temperature = model.default_temperature
+		self._temperature = temperature
+		self._top_p = top_p if top_p is not None else 1
+		self._max_tokens = max_tokens or 0
+		self._stream = stream
+		self._base_dir = base_dir or Path.cwd()
+
+	def build_block(self, prompt: BatchPrompt) -> MessageBlock:
+		"""Build the message block of a prompt.
+
+		Raises:
+			BatchInputError: If an attachment is not supported.
+		"""
+		attachments = [
+			build_attachment(
+				path, self._base_dir, self.engine.supported_attachment_formats
+			)
+			for path in prompt.attachments
+		]
+		return MessageBlock(
+			request=Message(
+				role=MessageRoleEnum.USER,
+				content=prompt.prompt,
+				attachments=attachments or None,
+			),
+			model=AIModelInfo(
+				provider_id=self.engine.account.provider.id,
+				model_id=self.model_id,
+			),
+			temperature=self._temperature,
+			top_p=self._top_p,
+			max_tokens=self._max_tokens,
+			stream=self._stream,
+		)
+
+	def system_message(self, prompt: BatchPrompt) -> Optional[SystemMessage]:
+		"""Return the system message of a prompt, if any."""
+		content = prompt.system or self._system_prompt
+		return SystemMessage(content=content) if content else None
+
+	def complete(self, prompt: BatchPrompt) -> MessageBlock:
+		"""Send a prompt and wait for its whole response.
+
+		Args:
+			prompt: The prompt to complete, without history.
+
+		Returns:
+			The message block holding the response.
+		"""
+		block = self.build_block(prompt)
+		retrier = CompletionRetrier(self.engine)
+		with completion_slot(self.engine, block):
+			response = retrier.completion(
+				new_block=block,
+				conversation=Conversation(),
+				system_message=self.system_message(prompt),
+				stream=block.stream,
+			)
+			if not block.stream:
+				return self.engine.completion_response_without_stream(
+					response=response, new_block=block
+				)
+			text = []
+			citations = []
+			for chunk in retrier.iter_stream(response):
+				if isinstance(chunk, str):
+					text.append(chunk)
+				elif isinstance(chunk, tuple) and chunk[0] == "citation":
+					citations.append(chunk[1])
+		block.response = Message(
+			role=MessageRoleEnum.ASSISTANT,
+			content="".join(text),
+			citations=citations or None,
+		)
+		return block
+
+	def _run_one(self, prompt: BatchPrompt) -> BatchResult:
+		try:
+			return BatchResult(prompt, block=self.complete(prompt))
+		except Exception as e:
+			log.warning("Prompt %s failed", prompt.id, exc_info=True)
+			return BatchResult(prompt, error=str(e) or type(e).__name__)
+
+	def run(self, prompts: Iterable[BatchPrompt]) -> Iterator[BatchResult]:
+		"""Complete prompts concurrently.
+
+		At most ``concurrency`` prompts are waiting for a response at a time;
+		the next prompts are read only when a slot is free.
+
+		Args:
+			prompts: The prompts to complete.
+
+		Yields:
+			The result of each prompt, in completion order. A failed prompt
+			yields a result with an error instead of stopping the run.
+		"""
+		prompts = iter(prompts)
+		with ThreadPoolExecutor(
+			max_workers=self.concurrency, thread_name_prefix="BatchRunner"
+		) as executor:
+			pending = set()
+			try:
+				for prompt in prompts:
+					pending.add(executor.submit(self._run_one, prompt))
+					if len(pending) < self.concurrency:
+						continue
+					done = next(as_completed(pending))
+					pending.remove(done)
+					yield done.result()
+				for future in as_completed(pending):
+					yield future.result()
+			finally:
+				for future in pending:
+					future.cancel()
+
+
+def resolve_engine(
+	profile_name: Optional[str] = None,
+	account_name: Optional[str] = None,
+	model_id: Optional[str] = None,
+) -> tuple[BaseEngine, str, Optional[config.ConversationProfile]]:
+	"""Resolve the engine and model of a run from the configuration.
+
+	The account is the one given by name or ID, else the profile one. When
+	neither is given, the default profile is used, or the default account
+	when there is no default profile.
+
+	Args:
+		profile_name: Name of a conversation profile.
+		account_name: Name or ID of an account.
+		model_id: ID of the model, overriding the profile one.
+
+	Returns:
+		The engine, the model ID and the profile used, if any.
+
+	Raises:
+		BatchInputError: If the profile, account or model cannot be resolved.
+	"""
+	from basilisk.services.account_model_service import AccountModelService
+
+	service = AccountModelService()
+	profiles = config.conversation_profiles()
+	profile = None
+	if profile_name:
+		profile = profiles.get_profile(name=profile_name)
+		if profile is None:
+			raise BatchInputError(f"profile not found: {profile_name}")
+	elif not account_name:
+		profile = profiles.default_profile
+	account = None
+	if account_name:
+		account = next(
+			(
+				acc
+				for acc in config.accounts()
+				if account_name in (acc.name, str(acc.id))
+			),
+			None,
+		)
+		if account is None:
+			raise BatchInputError(f"account not found: {account_name}")
+	elif profile is not None:
+		account, profile_model_id = service.resolve_account_and_model(
+			profile, fall_back_default_account=True
+		)
+		model_id = model_id or profile_model_id
+	elif len(config.accounts()):
+		account = config.accounts().default_account
+	if account is None:
+		raise BatchInputError("no account configured")
+	if not model_id:
+		raise BatchInputError("no model given, use --model or a profile")
+	return service.get_engine(account), model_id, profile
+
+
+def _open_input(path: str) -> TextIO:
+	if path == "-":
+		return sys.stdin
+	return open(path, encoding="utf-8")
+
+
+def _option(
+	value: Optional[object],
+	profile: Optional[config.ConversationProfile],
+	name: str,
+):
+	"""Return a command-line option, else the profile setting."""
+	if value is not None or profile is None:
+		return value
+	return getattr(profile, name)
+
+
+def _open_conversation_db() -> ConversationDatabase:
+	from basilisk.conversation.database import ConversationDatabase
+
+	return ConversationDatabase(ConversationDatabase.get_db_path())
+
+
+def save_result(
+	conv_db: ConversationDatabase,
+	result: BatchResult,
+	system: Optional[SystemMessage],
+) -> int:
+	"""Save a completed prompt as a new conversation.
+
+	Args:
+		conv_db: The conversation database.
+		result: A result without error.
+		system: The system message of the prompt.
+
+	Returns:
+		The database ID of the conversation.
+	"""
+	conversation = Conversation(title=f"Batch {result.prompt.id}")
+	conversation.add_block(result.block, system)
+	return conv_db.save_conversation(conversation)
+
+
+def submit_provider_batch(
+	runner: BatchRunner,
+	prompts: Iterable[BatchPrompt],
+	service: BatchService,
+	name: Optional[str] = None,
+) -> int:
+	"""Submit prompts as one job of the provider batch API.
+
+	Args:
+		runner: The runner whose engine and settings complete the prompts.
+		prompts: The prompts to complete.
+		service: The service recording the job and saving its results.
+		name: Optional name of the job, used to title the conversations.
+
+	Returns:
+		The database ID of the job.
+
+	Raises:
+		BatchInputError: If the prompts have different system prompts or an
+			attachment is not supported.
+	"""
+	prompts = list(prompts)
+	systems = [runner.system_message(prompt) for prompt in prompts]
+	if any(system != systems[0] for system in systems[1:]):
+		raise BatchInputError(
+			"a provider batch needs the same system prompt for every prompt"
+		)
+	return service.submit(
+		runner.engine,
+		[runner.build_block(prompt) for prompt in prompts],
+		system_message=systems[0] if systems else None,
+		name=name,
+	)
+
+
+def _run_provider_batch(args: argparse.Namespace, runner: BatchRunner) -> int:
+	"""Submit the prompts of the run as a provider batch job.
+
+	The job line is written once the job is submitted, or once its results
+	are saved with ``--wait``.
+
+	Returns:
+		0 if the job was submitted or completed, 1 if it failed, 2 if it
+		could not be submitted.
+	"""
+	from basilisk.services.batch_service import BatchJobStatus, BatchService
+
+	conv_db = _open_conversation_db()
+	service = BatchService(lambda: conv_db)
+	try:
+		with _open_input(args.input) as lines:
+			job_id = submit_provider_batch(
+				runner,
+				read_prompts(lines),
+				service,
+				name=None if args.input == "-" else Path(args.input).stem,
+			)
+		if args.wait:
+			service.wait()
+		job = conv_db.get_batch_job(job_id)
+	except ValueError as e:
+		sys.stderr.write(f"error: {e}\n")
+		return 2
+	finally:
+		service.stop()
+		conv_db.close()
+	data = {
+		"job_id": job_id,
+		"status": job["status"],
+		"requests": job["item_count"],
+	}
+	if job["status"] != BatchJobStatus.SUBMITTED:
+		data["saved"] = job["done_count"] - job["error_count"]
+	if job["error"]:
+		data["error"] = job["error"]
+	output = (
+		open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+	)
+	try:
+		output.write(json.dumps(data) + "\n")
+	finally:
+		if output is not sys.stdout:
+			output.close()
+	return 1 if job["status"] == BatchJobStatus.FAILED else 0
+
+
+def _setup_translation(language: Optional[str]) -> None:
+	"""Install the translation of a language, falling back to the default.
+
+	The system locale may not be a language, such as ``C`` when ``LANG`` is
+	unset in a shell or a scheduled task.
+
+	Args:
+		language: The configured language, ``auto`` for the system locale.
+	"""
+	from babel import Locale, UnknownLocaleError
+
+	from basilisk.consts import DEFAULT_LANG
+	from basilisk.localization import get_app_locale, setup_translation
+
+	try:
+		app_locale = get_app_locale(language)
+	except (UnknownLocaleError, ValueError, TypeError) as e:
+		# Babel messages may add hints on the next lines
+		reason = str(e).splitlines()[0]
+		sys.stderr.write(f"error: {reason}, using {DEFAULT_LANG} instead\n")
+		app_locale = Locale.parse(DEFAULT_LANG)
+	setup_translation(app_locale)
+
+
+def run_batch(args: argparse.Namespace) -> int:
+	"""Run the batch command.
+
+	Args:
+		args: Options parsed by ``parse_batch_args``.
+
+	Returns:
+		0 if every prompt was completed, 1 if some failed, 2 if the run
+		could not start.
+	"""
+	conf = config.conf()
+	logging.basicConfig(
+		level=(args.log_level or conf.general.log_level.name).upper(),
+		format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+		stream=sys.stderr,
+	)
+	_setup_translation(args.language or conf.general.language)
+	try:
+		engine, model_id, profile = resolve_engine(
+			args.profile, args.account, args.model
+		)
+		runner = BatchRunner(
+			engine,
+			model_id,
+			system_prompt=_option(args.system, profile, "system_prompt"),
+			temperature=_option(args.temperature, profile, "temperature"),
+			top_p=_option(args.top_p, profile, "top_p"),
+			max_tokens=_option(args.max_tokens, profile, "max_tokens"),
+			stream=bool(_option(args.stream, profile, "stream_mode")),
+			concurrency=args.concurrency,
+			base_dir=Path.cwd()
+			if args.input == "-"
+			else Path(args.input).resolve().parent,
+		)
+	except BatchInputError as e:
+		sys.stderr.write(f"error: {e}\n")
+		return 2
+	if args.provider_batch:
+		return _run_provider_batch(args, runner)
+	conv_db = _open_conversation_db() if args.save else None
+	output = (
+		open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+	)
+	failed = 0
+	try:
+		with _open_input(args.input) as lines:
+			for result in runner.run(read_prompts(lines)):
+				if result.error is None and conv_db is not None:
+					result.conversation_id = save_result(
+						conv_db, result, runner.system_message(result.prompt)
+					)
+				failed += result.error is not None
+				output.write(json.dumps(result.to_dict()) + "\n")
+				output.flush()
+	except BatchInputError as e:
+		sys.stderr.write(f"error: {e}\n")
+		return 2
+	finally:
+		if output is not sys.stdout:
+			output.close()
+		if conv_db is not None:
+			conv_db.close()
+	return 1 if failed else 0
@@ -0,0 +1,236 @@
+"""Opt-in cache of completion responses stored in the conversation database.
+
+Identical requests (title generation, regenerating a block with unchanged
+settings, scripted prompts at temperature 0) are answered from the cache
+instead of the provider. The cache key hashes everything the engines send:
+provider, endpoint, model, sampling parameters, the system message and the
+messages of the history, in the same order as ``BaseEngine.get_messages``.
+Attachments are identified by the hash of the content sent to the provider,
+so their payload is never hashed twice.
+
+Cached responses are replayed as a stream of text chunks, so streaming
+consumers see the same sequence of callbacks as for a provider stream.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Optional
+
+import basilisk.config as config
+from basilisk.conversation.conversation_model import (
+	Conversation,
+	Message,
+	MessageBlock,
+	MessageRoleEnum,
+	SystemMessage,
+)
+
+if TYPE_CHECKING:
+	from basilisk.conversation.attached_file import AttachmentFile, ImageFile
+	from basilisk.conversation.database import ConversationDatabase
+	from basilisk.provider_engine.base_engine import BaseEngine
+
+log = logging.getLogger(__name__)
+
+# Size of the text chunks of a replayed response
+REPLAY_CHUNK_SIZE = 64
+
+# Completion arguments that do not change the provider response
+_IGNORED_OPTIONS = frozenset({"stream", "cancel_token"})
+
+
+@dataclass(frozen=True)
+class CachedCompletion:
+	"""A response read from the completion cache.
+
+	Attributes:
+		content: The response text.
+		citations: The response citations, if any.
+	"""
+
+	content: str
+	citations: Optional[list[dict[str, Any]]] = None
+
+	def iter_stream(
+		self, chunk_size: int = REPLAY_CHUNK_SIZE
+	) -> Iterator[str | tuple[str, Any]]:
+		"""Replay the response as the chunks of a completion stream.
+
+		Args:
+			chunk_size: Number of characters of each text chunk.
+
+		Yields:
+			Text chunks, then a ``("citation", data)`` chunk per citation.
+		"""
+		for start in range(0, len(self.content), chunk_size):
+			yield self.content[start : start + chunk_size]
+		for citation in self.citations or ():
+			yield ("citation", citation)
+
+	def to_message(self) -> Message:
+		"""Build the assistant message of the response.
+
+		Returns:
+			The assistant message holding the cached content and citations.
+		"""
+		return Message(
+			role=MessageRoleEnum.ASSISTANT,
+			content=self.content,
+			citations=self.citations,
+		)
+
+
+def _attachment_key(attachment: AttachmentFile | ImageFile) -> str:
+	return attachment.content_hash or str(attachment.location)
+
+
+def _message_key(message: Message) -> dict[str, Any]:
+	return {
+		"role": message.role.value,
+		"content": message.content,
+		"attachments": [
+			_attachment_key(attachment)
+			for attachment in message.attachments or ()
+		],
+	}
+
+
+def completion_cache_key(
+	engine: BaseEngine,
+	conversation: Conversation,
+	new_block: MessageBlock,
+	system_message: Optional[SystemMessage],
+	stop_block_index: Optional[int] = None,
+	**options: Any,
+) -> str:
+	"""Compute the cache key of a completion request.
+
+	Args:
+		engine: The engine sending the request.
+		conversation: The conversation providing the history.
+		new_block: The block to complete.
+		system_message: Optional system message.
+		stop_block_index: Optional index of the first history block ignored.
+		**options: Other completion arguments, such as the web search mode.
+
+	Returns:
+		The SHA-256 hex digest of the normalized request.
+	"""
+	history = []
+	for i, block in enumerate(conversation.messages):
+		if stop_block_index is not None and i >= stop_block_index:
+			break
+		if not block.response:
+			continue
+		history.append(_message_key(block.request))
+		history.append(_message_key(block.response))
+	payload = {
+		"engine": type(engine).__name__,
+		"base_url": str(engine.api_base_url or ""),
+		"provider": new_block.model.provider_id,
+		"model": new_block.model.model_id,
+		"temperature": new_block.temperature,
+		"top_p": new_block.top_p,
+		"max_tokens": new_block.max_tokens,
+		"system": system_message.content if system_message else None,
+		"history": history,
+		"request": _message_key(new_block.request),
+		"options": {
+			key: value
+			for key, value in options.items()
+			if key not in _IGNORED_OPTIONS
+		},
+	}
+	serialized = json.dumps(payload, sort_keys=True, default=str)
+	return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+	"""Read and write completion responses in the conversation database.
+
+	Every operation is a no-op when the cache is disabled in the settings or
+	the database is unavailable, and database errors are only logged: the
+	cache never makes a completion fail.
+	"""
+
+	def __init__(
+		self, conv_db_getter: Callable[[], Optional[ConversationDatabase]]
+	):
+		"""Initialize the cache.
+
+		Args:
+			conv_db_getter: Callable that returns the ConversationDatabase
+				singleton (deferred to avoid import-time wx dependency).
+		"""
+		self._get_conv_db = conv_db_getter
+
+	@property
+	def enabled(self) -> bool:
+		"""Whether completion responses are cached."""
+		return config.conf().conversation.completion_cache_enabled
+
+	def lookup(
+		self, engine: BaseEngine, **completion_args: Any
+	) -> tuple[Optional[str], Optional[CachedCompletion]]:
+		"""Look up the response of a completion request.
+
+		Args:
+			engine: The engine sending the request.
+			**completion_args: The arguments of ``BaseEngine.completion``.
+
+		Returns:
+			A tuple of (cache key, cached response). The key is None when the
+			cache is disabled, the response is None on a cache miss.
+		"""
+		if not self.enabled:
+			return None, None
+		try:
+			conv_db = self._get_conv_db()
+			if conv_db is None:
+				return None, None
+			cache_key = completion_cache_key(engine, **completion_args)
+			entry = conv_db.get_cached_completion(
+				cache_key,
+				config.conf().conversation.completion_cache_ttl_seconds,
+			)
+		except Exception:
+			log.error("Failed to read the completion cache", exc_info=True)
+			return None, None
+		if entry is None:
+			log.debug("Completion cache miss %s", cache_key[:12])
+			return cache_key, None
+		log.debug("Completion cache hit %s", cache_key[:12])
+		content, citations = entry
+		return cache_key, CachedCompletion(content, citations)
+
+	def store(self, cache_key: str, block: MessageBlock) -> None:
+		"""Store the response of a completed block and evict old entries.
+
+		Args:
+			cache_key: Key returned by ``lookup`` for the request.
+			block: The completed block.
+		"""
+		if not block.response or not block.response.content:
+			return
+		conversation_conf = config.conf().conversation
+		try:
+			conv_db = self._get_conv_db()
+			if conv_db is None:
+				return
+			conv_db.store_cached_completion(
+				cache_key,
+				block.model.provider_id,
+				block.model.model_id,
+				block.response.content,
+				block.response.citations,
+			)
+			conv_db.prune_completion_cache(
+				conversation_conf.completion_cache_ttl_seconds,
+				conversation_conf.completion_cache_max_entries,
+			)
+		except Exception:
+			log.error("Failed to write the completion cache", exc_info=True)
@@ -7,15 +7,26 @@ both streaming and non-streaming completion modes.
 
 from __future__ import annotations
 
+import asyncio
 import logging
-import re
 import threading
 import time
+from contextlib import AsyncExitStack, ExitStack
 from typing import TYPE_CHECKING, Any, Callable, Optional
 
 import wx
 
+import basilisk.config as config
 from basilisk import global_vars
+from basilisk.async_loop import LoopTask, get_async_loop
+from basilisk.completion_cache import CachedCompletion, CompletionCache
+from basilisk.completion_metrics import CompletionTimer, metrics_scope
+from basilisk.completion_retry import CompletionRetrier
+from basilisk.completion_scheduler import (
+	SchedulerStats,
+	async_completion_slot,
+	completion_slot,
+)
 from basilisk.conversation.conversation_model import (
 	Conversation,
 	Message,
@@ -24,7 +35,18 @@ from basilisk.conversation.conversation_model import (
 	SystemMessage,
 )
 from basilisk.decorators import ensure_no_task_running
+from basilisk.provider_engine.async_base_engine import AsyncBaseEngine
+from basilisk.provider_engine.cancellation import (
+	CancellationToken,
+	cancellation_scope,
+)
 from basilisk.sound_manager import play_sound, stop_sound
+from basilisk.stream_buffer import (
+	ChunkedText,
+	StreamCoalescingBuffer,
+	StreamFlushPolicy,
+)
+from basilisk.stream_ui_pump import StreamUIPump, get_stream_ui_pump
 from basilisk.views.enhanced_error_dialog import show_enhanced_error_dialog
 
 if TYPE_CHECKING:
@@ -32,9 +54,6 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
-COMMON_PATTERN = r"[\n;:.?!)»\"\]}]"
-RE_STREAM_BUFFER = re.compile(rf".*{COMMON_PATTERN}.*")
-
 
 class CompletionHandler:
 	"""Handles completion requests for both streaming and non-streaming modes.
@@ -56,6 +75,13 @@ class CompletionHandler:
 		on_non_stream_finish: Optional[
 			Callable[[MessageBlock, Optional[SystemMessage]], None]
 		] = None,
+		flush_policy: Optional[StreamFlushPolicy] = None,
+		ui_pump: Optional[StreamUIPump] = None,
+		get_completion_cache: Optional[
+			Callable[[], Optional[CompletionCache]]
+		] = None,
+		on_queued: Optional[Callable[[SchedulerStats], None]] = None,
+		on_retry: Optional[Callable[[int, int, float], None]] = None,
 	):
 		"""Initialize the completion handler.
 
@@ -67,6 +93,11 @@ class CompletionHandler:
 			on_stream_start: Callback called when streaming starts (new_block, system_message)
 			on_stream_finish: Callback called when streaming finishes (new_block)
 			on_non_stream_finish: Callback called when non-streaming finishes (new_block, system_message)
+			flush_policy: Policy deciding when streamed text is forwarded to the UI
+			ui_pump: Pump applying streamed text to the UI, shared by default
+			get_completion_cache: Callable returning the completion cache to use, or None to always send requests
+			on_queued: Callback called when the request waits for the rate limits of its account (queue state)
+			on_retry: Callback called when a failed request is sent again (failed attempt, maximum attempts, delay in seconds)
 		"""
 		self.on_completion_start = on_completion_start
 		self.on_completion_end = on_completion_end
@@ -75,10 +106,19 @@ class CompletionHandler:
 		self.on_stream_start = on_stream_start
 		self.on_stream_finish = on_stream_finish
 		self.on_non_stream_finish = on_non_stream_finish
-		self.task: Optional[threading.Thread] = None
-		self._stop_completion = False
+		self.task: Optional[threading.Thread | LoopTask] = None
+		self._cancel_token: Optional[CancellationToken] = None
 		self.last_time = 0
-		self.stream_buffer: str = ""
+		self.flush_policy = flush_policy or StreamFlushPolicy()
+		self.stream_buffer = StreamCoalescingBuffer(self.flush_policy)
+		self._response_text = ChunkedText()
+		self._emit_lock = threading.Lock()
+		self.ui_pump = ui_pump or get_stream_ui_pump()
+		self.get_completion_cache = get_completion_cache
+		self.on_queued = on_queued
+		self.on_retry = on_retry
+		self._timer = CompletionTimer()
+		self._retrier: Optional[CompletionRetrier] = None
 
 	@ensure_no_task_running
 	def start_completion(
@@ -100,10 +140,15 @@ class CompletionHandler:
 			stream: Whether to use streaming mode
 			**kwargs: Additional arguments for the completion
 		"""
-		self._stop_completion = False
+		self._cancel_token = CancellationToken()
+		self._timer = CompletionTimer()
+		self._retrier = CompletionRetrier(
+			engine, cancel_token=self._cancel_token, on_retry=self._on_retry
+		)
 
 		completion_args = {
 			"engine": engine,
+			"cancel_token": self._cancel_token,
 			"system_message": system_message,
 			"conversation": conversation,
 			"new_block": new_block,
@@ -114,10 +159,16 @@ class CompletionHandler:
 		if self.on_completion_start:
 			self.on_completion_start()
 
-		self.task = threading.Thread(
-			target=self._handle_completion, kwargs=completion_args
-		)
-		self.task.start()
+		if self._use_async_engine(engine):
+			self.task = get_async_loop().submit(
+				self._ahandle_completion(**completion_args),
+				cancel_token=self._cancel_token,
+			)
+		else:
+			self.task = threading.Thread(
+				target=self._handle_completion, kwargs=completion_args
+			)
+			self.task.start()
 		logger.debug("Completion task %s started", self.task.ident)
 
 	def stop_completion(self, skip_callbacks: bool = False):
@@ -128,10 +179,15 @@ class CompletionHandler:
 				Useful when cleaning up resources before destroying the tab.
 		"""
 		if self.is_running():
-			self._stop_completion = True
+			# Closes the provider stream, unblocking the worker thread
+			self._cancel_token.cancel()
 			logger.debug("Stopping completion task: %s", self.task.ident)
 			self.task.join(timeout=0.05)
 			self.task = None
+		if skip_callbacks:
+			self.ui_pump.discard(self)
+		else:
+			self.ui_pump.flush(self)
 		if self.on_completion_end and not skip_callbacks:
 			wx.CallAfter(self.on_completion_end, False)
 
@@ -139,63 +195,376 @@ class CompletionHandler:
 		"""Check if a completion is currently running."""
 		return self.task and self.task.is_alive()
 
-	def _handle_completion(self, engine: BaseEngine, **kwargs: dict[str, Any]):
+	@staticmethod
+	def _use_async_engine(engine: BaseEngine) -> bool:
+		"""Tell whether the completion runs on the shared event loop.
+
+		Args:
+			engine: The engine to use for completion
+
+		Returns:
+			True if the engine has an async client and the option is enabled
+		"""
+		return (
+			isinstance(engine, AsyncBaseEngine)
+			and config.conf().network.use_async_engine
+		)
+
+	def _handle_completion(
+		self,
+		engine: BaseEngine,
+		cancel_token: CancellationToken,
+		**kwargs: dict[str, Any],
+	):
 		"""Handle the completion request in a background thread.
 
 		Args:
 			engine: The engine to use for completion
+			cancel_token: Token cancelled when the completion is stopped
+			kwargs: The keyword arguments for the completion request
+		"""
+		with cancellation_scope(cancel_token), metrics_scope(self._timer):
+			self._run_completion(engine, cancel_token, **kwargs)
+
+	def _run_completion(
+		self,
+		engine: BaseEngine,
+		cancel_token: CancellationToken,
+		**kwargs: dict[str, Any],
+	):
+		"""Send the completion request and handle its response.
+
+		Args:
+			engine: The engine to use for completion
+			cancel_token: Token cancelled when the completion is stopped
+			kwargs: The keyword arguments for the completion request
+		"""
+		# The account slot is held until the response is fully read
+		with ExitStack() as slot:
+			try:
+				play_sound("progress", loop=True)
+				cache_key, response = self._lookup_cache(engine, kwargs)
+				if response is None:
+					slot.enter_context(
+						completion_slot(
+							engine,
+							kwargs["new_block"],
+							cancel_token,
+							self._on_queued,
+						)
+					)
+					response = self._retrier.completion(**kwargs)
+				self._mark_request_sent(response)
+			except Exception as e:
+				self._report_error(e, cancel_token, "Error during completion")
+				return
+
+			handle_func = (
+				self._handle_streaming_completion
+				if kwargs.get("stream", False)
+				else self._handle_non_streaming_completion
+			)
+			kwargs["engine"] = engine
+			kwargs["response"] = response
+			try:
+				success = handle_func(cancel_token=cancel_token, **kwargs)
+			except Exception as e:
+				self._report_error(
+					e, cancel_token, "Error handling completion response"
+				)
+				return
+
+		if success:
+			self._store_in_cache(cache_key, response, kwargs["new_block"])
+			wx.CallAfter(self._completion_finished_success)
+
+	async def _ahandle_completion(
+		self,
+		engine: AsyncBaseEngine,
+		cancel_token: CancellationToken,
+		**kwargs: dict[str, Any],
+	):
+		"""Handle the completion request on the shared event loop.
+
+		Stopping the completion cancels this coroutine's task, which closes
+		the request being awaited. The token is also made current, so the
+		blocking work done in worker threads, such as attachment uploads,
+		is interrupted too.
+
+		Args:
+			engine: The engine to use for completion
+			cancel_token: Token cancelled when the completion is stopped
+			kwargs: The keyword arguments for the completion request
+		"""
+		with cancellation_scope(cancel_token):
+			await self._arun_completion(engine, cancel_token, **kwargs)
+
+	async def _arun_completion(
+		self,
+		engine: AsyncBaseEngine,
+		cancel_token: CancellationToken,
+		**kwargs: dict[str, Any],
+	):
+		"""Send the async completion request and handle its response.
+
+		Args:
+			engine: The engine to use for completion
+			cancel_token: Token cancelled when the completion is stopped
 			kwargs: The keyword arguments for the completion request
 		"""
+		async with AsyncExitStack() as slot:
+			try:
+				play_sound("progress", loop=True)
+				cache_key, response = await asyncio.to_thread(
+					self._lookup_cache, engine, kwargs
+				)
+				if response is None:
+					await slot.enter_async_context(
+						async_completion_slot(
+							engine, kwargs["new_block"], self._on_queued
+						)
+					)
+					with metrics_scope(self._timer):
+						response = await self._retrier.acompletion(**kwargs)
+				self._mark_request_sent(response)
+			except Exception as e:
+				self._report_error(e, cancel_token, "Error during completion")
+				return
+
+			kwargs["engine"] = engine
+			kwargs["response"] = response
+			try:
+				with metrics_scope(self._timer):
+					if not kwargs.get("stream", False):
+						success = self._handle_non_streaming_completion(
+							cancel_token=cancel_token, **kwargs
+						)
+					elif isinstance(response, CachedCompletion):
+						success = self._handle_streaming_completion(
+							cancel_token=cancel_token, **kwargs
+						)
+					else:
+						success = await self._ahandle_streaming_completion(
+							cancel_token=cancel_token, **kwargs
+						)
+			except Exception as e:
+				self._report_error(
+					e, cancel_token, "Error handling completion response"
+				)
+				return
+
+		if success:
+			await asyncio.to_thread(
+				self._store_in_cache, cache_key, response, kwargs["new_block"]
+			)
+			wx.CallAfter(self._completion_finished_success)
+
+	def _lookup_cache(
+		self, engine: BaseEngine, kwargs: dict[str, Any]
+	) -> tuple[Optional[str], Optional[CachedCompletion]]:
+		"""Look up the response of the request in the completion cache.
+
+		Args:
+			engine: The engine to use for completion
+			kwargs: The keyword arguments for the completion request
+
+		Returns:
+			A tuple of (cache key, cached response), see ``CompletionCache.lookup``
+		"""
+		cache = (
+			self.get_completion_cache() if self.get_completion_cache else None
+		)
+		if cache is None:
+			return None, None
+		return cache.lookup(engine, **kwargs)
+
+	def _on_queued(self, stats: SchedulerStats):
+		"""Report that the request waits for the rate limits of its account.
+
+		Args:
+			stats: Queue state of the account when the request started waiting
+		"""
+		logger.debug(
+			"Completion queued for %s: %d active, %d queued",
+			stats.label,
+			stats.active,
+			stats.queued,
+		)
+		if self.on_queued:
+			wx.CallAfter(self.on_queued, stats)
+
+	def _on_retry(self, attempt: int, max_attempts: int, delay: float):
+		"""Report that a failed request will be sent again.
+
+		Args:
+			attempt: Number of the failed attempt
+			max_attempts: Maximum number of attempts
+			delay: Seconds before the request is sent again
+		"""
+		if self.on_retry:
+			wx.CallAfter(self.on_retry, attempt, max_attempts, delay)
+
+	def _mark_request_sent(self, response: Any):
+		"""Record that the request was answered by the provider or the cache.
+
+		Args:
+			response: The completion response
+		"""
+		self._timer.cached = isinstance(response, CachedCompletion)
+		self._timer.mark_request_sent()
+
+	def _finish_metrics(self, engine: BaseEngine, new_block: MessageBlock):
+		"""Store the latency metrics of the request in the completed block.
+
+		Args:
+			engine: The engine used for completion
+			new_block: The completed message block
+		"""
 		try:
-			play_sound("progress", loop=True)
-			response = engine.completion(**kwargs)
-		except Exception as e:
-			logger.error("Error during completion", exc_info=True)
-			wx.CallAfter(self._handle_error, str(e))
+			new_block.metrics = self._timer.build_metrics(
+				new_block, engine.account.provider.id
+			)
+		except Exception:
+			logger.error("Failed to build completion metrics", exc_info=True)
 			return
-
-		handle_func = (
-			self._handle_streaming_completion
-			if kwargs.get("stream", False)
-			else self._handle_non_streaming_completion
+		metrics = new_block.metrics
+		logger.debug(
+			"Completion metrics: prepare %s ms, request %s ms, "
+			"first chunk %s ms, total %s ms, %d chunks, UI %s ms",
+			metrics.prepare_ms,
+			metrics.request_ms,
+			metrics.first_chunk_ms,
+			metrics.total_ms,
+			metrics.chunk_count,
+			metrics.ui_apply_ms,
 		)
-		kwargs["engine"] = engine
-		kwargs["response"] = response
+
+	def _finish_usage(self, engine: BaseEngine, new_block: MessageBlock):
+		"""Attribute the token usage of the completed block to its account.
+
+		Args:
+			engine: The engine used for completion
+			new_block: The completed message block
+		"""
+		if new_block.usage is None:
+			return
 		try:
-			success = handle_func(**kwargs)
-		except Exception as e:
-			logger.error("Error handling completion response", exc_info=True)
-			wx.CallAfter(self._handle_error, str(e))
+			engine.account_usage(new_block)
+		except Exception:
+			logger.error("Failed to price the token usage", exc_info=True)
 			return
+		usage = new_block.usage
+		logger.debug(
+			"Token usage: %d input (%d cached), %d output (%d reasoning), "
+			"cost %s",
+			usage.input_tokens,
+			usage.cached_input_tokens,
+			usage.output_tokens,
+			usage.reasoning_tokens,
+			usage.cost,
+		)
 
-		if success:
-			wx.CallAfter(self._completion_finished_success)
+	def _store_in_cache(
+		self, cache_key: Optional[str], response: Any, new_block: MessageBlock
+	):
+		"""Store a provider response in the completion cache.
+
+		Args:
+			cache_key: Key returned by the cache lookup, None if disabled
+			response: The completion response
+			new_block: The completed message block
+		"""
+		if cache_key is None or isinstance(response, CachedCompletion):
+			return
+		cache = (
+			self.get_completion_cache() if self.get_completion_cache else None
+		)
+		if cache is not None:
+			cache.store(cache_key, new_block)
+
+	def _report_error(
+		self, error: Exception, cancel_token: CancellationToken, message: str
+	):
+		"""Log a completion error and report it unless it was stopped.
+
+		Errors raised after the completion was stopped come from the closed
+		response and are not reported.
+
+		Args:
+			error: The exception being handled
+			cancel_token: Token cancelled when the completion is stopped
+			message: Message logged with the exception
+		"""
+		if cancel_token.cancelled:
+			logger.debug("Completion cancelled", exc_info=True)
+			return
+		logger.error(message, exc_info=True)
+		wx.CallAfter(self._handle_error, str(error))
 
 	def _handle_stream_chunk(
 		self, chunk: str | tuple[str, Any], message_block: MessageBlock
 	):
 		if isinstance(chunk, str):
-			self.stream_buffer += chunk
+			self._timer.record_chunk()
+			with self._emit_lock:
+				text = self.stream_buffer.append(chunk)
+				if text:
+					self._emit_stream_text(text)
 		elif isinstance(chunk, tuple):
 			chunk_type, chunk_data = chunk
 			if chunk_type == "citation":
 				if not message_block.response.citations:
 					message_block.response.citations = []
 				message_block.response.citations.append(chunk_data)
+			elif chunk_type == "response_id":
+				message_block.response_id = chunk_data
+			elif chunk_type == "usage":
+				usage = message_block.usage
+				message_block.usage = (
+					chunk_data if usage is None else usage.merged(chunk_data)
+				)
 			else:
 				logger.warning(
 					"Unknown chunk type in streaming response: %s", chunk_type
 				)
 
-		if RE_STREAM_BUFFER.match(self.stream_buffer):
-			self.flush_stream_buffer(message_block)
+	def _emit_stream_text(self, text: str) -> None:
+		"""Record flushed text in the response and forward it to the UI.
+
+		Must be called with ``_emit_lock`` held so the UI receives text in
+		the same order as the response.
+		"""
+		self._response_text.append(text)
+		self.ui_pump.post(self, text, self._handle_stream_buffer)
 
-	def flush_stream_buffer(self, message_block: MessageBlock) -> None:
-		"""Flush the stream buffer to the message block."""
-		if self.stream_buffer:
-			message_block.response.content += self.stream_buffer
-			wx.CallAfter(self._handle_stream_buffer, self.stream_buffer)
-			self.stream_buffer = ""
+	@property
+	def streamed_text(self) -> str:
+		"""Text of the streamed response flushed so far.
+
+		The block content is only set when the stream ends, so the response
+		is not joined again on each flush. Readers needing the partial
+		response while it streams read this property instead.
+		"""
+		with self._emit_lock:
+			return self._response_text.text
+
+	def flush_stream_buffer(self) -> None:
+		"""Flush all buffered stream text to the response and the UI."""
+		with self._emit_lock:
+			text = self.stream_buffer.flush()
+			if text:
+				self._emit_stream_text(text)
+
+	def _release_overdue_text(self) -> None:
+		"""Forward buffered text older than the latency budget.
+
+		Polled by the UI pump on each frame, so text is not held back while
+		the provider pauses between chunks.
+		"""
+		with self._emit_lock:
+			text = self.stream_buffer.take_if_due()
+			if text:
+				self._emit_stream_text(text)
 
 	def _handle_streaming_completion(
 		self,
@@ -203,6 +572,7 @@ class CompletionHandler:
 		response: Any,
 		new_block: MessageBlock,
 		system_message: Optional[SystemMessage],
+		cancel_token: CancellationToken,
 		**kwargs: dict[str, Any],
 	) -> bool:
 		"""Handle streaming completion response.
@@ -212,28 +582,97 @@ class CompletionHandler:
 			response: The completion response
 			new_block: The message block being completed
 			system_message: Optional system message
+			cancel_token: Token cancelled when the completion is stopped
 			kwargs: Additional completion arguments
 
 		Returns:
 			True if streaming was handled successfully, False if stopped
 		"""
+		if isinstance(response, CachedCompletion):
+			chunks = response.iter_stream()
+		else:
+			# Sent again if the stream fails before its first chunk
+			chunks = self._retrier.iter_stream(response)
+		self._begin_stream(new_block, system_message)
+		try:
+			for chunk in chunks:
+				if cancel_token.cancelled or global_vars.app_should_exit:
+					logger.debug("Stopping completion")
+					return False
+				self._handle_stream_chunk(chunk, new_block)
+			self.flush_stream_buffer()
+		finally:
+			self._end_stream(new_block)
+
+		# Notify that streaming has finished
+		wx.CallAfter(self._stream_finished, engine, new_block)
+		return True
+
+	async def _ahandle_streaming_completion(
+		self,
+		engine: AsyncBaseEngine,
+		response: Any,
+		new_block: MessageBlock,
+		system_message: Optional[SystemMessage],
+		cancel_token: CancellationToken,
+		**kwargs: dict[str, Any],
+	) -> bool:
+		"""Handle async streaming completion response on the event loop.
+
+		Args:
+			engine: The engine used for completion
+			response: The async completion stream
+			new_block: The message block being completed
+			system_message: Optional system message
+			cancel_token: Token cancelled when the completion is stopped
+			kwargs: Additional completion arguments
+
+		Returns:
+			True if streaming was handled successfully, False if stopped
+		"""
+		self._begin_stream(new_block, system_message)
+		try:
+			async for chunk in self._retrier.aiter_stream(response):
+				if cancel_token.cancelled or global_vars.app_should_exit:
+					logger.debug("Stopping completion")
+					return False
+				self._handle_stream_chunk(chunk, new_block)
+			self.flush_stream_buffer()
+		finally:
+			self._end_stream(new_block)
+
+		wx.CallAfter(self._stream_finished, engine, new_block)
+		return True
+
+	def _begin_stream(
+		self, new_block: MessageBlock, system_message: Optional[SystemMessage]
+	):
+		"""Reset the stream state and notify that streaming has started.
+
+		Args:
+			new_block: The message block being completed
+			system_message: Optional system message
+		"""
 		new_block.response = Message(role=MessageRoleEnum.ASSISTANT, content="")
+		self.stream_buffer = StreamCoalescingBuffer(self.flush_policy)
+		self._response_text = ChunkedText()
 
-		# Notify that streaming has started
 		if self.on_stream_start:
 			wx.CallAfter(self.on_stream_start, new_block, system_message)
+		self.ui_pump.register_source(self, self._release_overdue_text)
 
-		for chunk in engine.completion_response_with_stream(response):
-			if self._stop_completion or global_vars.app_should_exit:
-				logger.debug("Stopping completion")
-				return False
-			self._handle_stream_chunk(chunk, new_block)
+	def _end_stream(self, new_block: MessageBlock):
+		"""Stop polling the stream buffer and store the response text.
 
-		# Notify that streaming has finished
-		self.flush_stream_buffer(new_block)
-		if self.on_stream_finish:
-			wx.CallAfter(self.on_stream_finish, new_block)
-		return True
+		Args:
+			new_block: The message block being completed
+		"""
+		self.ui_pump.unregister_source(self)
+		self._timer.mark_end()
+		# The response text is joined once, when the stream ends
+		with self._emit_lock:
+			new_block.response.content = self._response_text.text
+		new_block.mark_stream_completed()
 
 	def _handle_non_streaming_completion(
 		self,
@@ -241,6 +680,7 @@ class CompletionHandler:
 		response: Any,
 		new_block: MessageBlock,
 		system_message: Optional[SystemMessage],
+		cancel_token: CancellationToken,
 		**kwargs: dict[str, Any],
 	) -> bool:
 		"""Handle non-streaming completion response.
@@ -250,14 +690,25 @@ class CompletionHandler:
 			response: The completion response
 			new_block: The message block being completed
 			system_message: Optional system message
+			cancel_token: Token cancelled when the completion is stopped
 			kwargs: Additional completion arguments
 
 		Returns:
 			True if non-streaming completion was handled successfully, False if stopped
 		"""
-		completed_block = engine.completion_response_without_stream(
-			response=response, new_block=new_block, **kwargs
-		)
+		if cancel_token.cancelled:
+			logger.debug("Discarding response of a stopped completion")
+			return False
+		if isinstance(response, CachedCompletion):
+			new_block.response = response.to_message()
+			completed_block = new_block
+		else:
+			completed_block = engine.completion_response_without_stream(
+				response=response, new_block=new_block, **kwargs
+			)
+		self._timer.mark_end()
+		self._finish_metrics(engine, completed_block)
+		self._finish_usage(engine, completed_block)
 
 		# Notify that non-streaming completion has finished
 		if self.on_non_stream_finish:
@@ -267,14 +718,29 @@ class CompletionHandler:
 
 		return True
 
+	def _stream_finished(self, engine: BaseEngine, new_block: MessageBlock):
+		"""Apply the remaining streamed text, then notify the stream end.
+
+		Args:
+			engine: The engine used for completion
+			new_block: The completed message block
+		"""
+		self.ui_pump.flush(self)
+		self._finish_metrics(engine, new_block)
+		self._finish_usage(engine, new_block)
+		if self.on_stream_finish:
+			self.on_stream_finish(new_block)
+
 	def _handle_stream_buffer(self, buffer: str):
-		"""Handle a streaming chunk on the main thread.
+		"""Handle streamed text batched by the UI pump on the main thread.
 
 		Args:
 			buffer: The streaming buffer content
 		"""
 		if self.on_stream_chunk:
+			start = time.perf_counter()
 			self.on_stream_chunk(buffer)
+			self._timer.add_phase("ui", time.perf_counter() - start)
 
 		# Play periodic sound during streaming
 		new_time = time.time()
@@ -0,0 +1,200 @@
+"""Latency measurement of completion requests.
+
+A ``CompletionTimer`` follows one completion from the moment it is started:
+message preparation, sending the request, the first streamed chunk, the gaps
+between chunks, the end of the response and the time the UI spent applying
+the streamed text. The resulting ``CompletionMetrics`` are stored with the
+block, so providers and models can be compared on real traffic.
+
+Engines report the phases they run through ``timed_phase``, which records
+into the timer made current by ``metrics_scope`` in the requesting thread or
+task, and does nothing outside a completion.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+from basilisk.conversation.conversation_model import (
+	CompletionMetrics,
+	MessageBlock,
+)
+from basilisk.token_estimator import estimate_text_tokens
+
+_current_timer: ContextVar[CompletionTimer | None] = ContextVar(
+	"basilisk_completion_timer", default=None
+)
+
+
+def _ms(seconds: float) -> float:
+	return round(seconds * 1000, 3)
+
+
+def percentile(values: list[float], ratio: float) -> float:
+	"""Return the nearest-rank percentile of non-empty values.
+
+	Args:
+		values: The values, in any order.
+		ratio: The percentile, between 0 and 1.
+
+	Returns:
+		The smallest value greater than or equal to ``ratio`` of the values.
+	"""
+	ordered = sorted(values)
+	index = max(0, math.ceil(ratio * len(ordered)) - 1)
+	return ordered[index]
+
+
+class CompletionTimer:
+	"""Collect the timings of a single completion request.
+
+	Chunks are recorded by the worker thread and UI time by the main thread;
+	the lock keeps both consistent when the metrics are built.
+	"""
+
+	def __init__(self, clock: Callable[[], float] = time.perf_counter):
+		"""Start the timer.
+
+		Args:
+			clock: Monotonic clock returning seconds.
+		"""
+		self._clock = clock
+		self._lock = threading.Lock()
+		self.started_at = clock()
+		self.prepare_seconds: Optional[float] = None
+		self.request_seconds: Optional[float] = None
+		self.first_chunk_seconds: Optional[float] = None
+		self.end_seconds: Optional[float] = None
+		self.ui_seconds: Optional[float] = None
+		self.cached = False
+		self.upstream_provider: Optional[str] = None
+		self._last_chunk_at: Optional[float] = None
+		self._chunk_gaps: list[float] = []
+		self._chunk_count = 0
+
+	def elapsed(self) -> float:
+		"""Return the seconds elapsed since the timer started."""
+		return self._clock() - self.started_at
+
+	def add_phase(self, phase: str, seconds: float) -> None:
+		"""Add the duration of a named phase.
+
+		Args:
+			phase: ``"prepare"`` for message preparation, ``"ui"`` for the
+				time the UI spent applying the response.
+			seconds: Duration of the phase.
+		"""
+		attribute = f"{phase}_seconds"
+		with self._lock:
+			setattr(self, attribute, (getattr(self, attribute) or 0) + seconds)
+
+	def mark_request_sent(self) -> None:
+		"""Record that the provider accepted the request."""
+		self.request_seconds = self.elapsed()
+
+	def record_chunk(self) -> None:
+		"""Record the arrival of a streamed text chunk."""
+		now = self._clock()
+		with self._lock:
+			if self._last_chunk_at is None:
+				self.first_chunk_seconds = now - self.started_at
+			else:
+				self._chunk_gaps.append(now - self._last_chunk_at)
+			self._last_chunk_at = now
+			self._chunk_count += 1
+
+	def record_upstream_provider(self, name: Optional[str]) -> None:
+		"""Record the host that served the request behind an aggregator.
+
+		Args:
+			name: Name reported by the aggregator, ignored when empty.
+		"""
+		if name:
+			self.upstream_provider = name
+
+	def mark_end(self) -> None:
+		"""Record that the whole response was received."""
+		self.end_seconds = self.elapsed()
+
+	def build_metrics(
+		self, block: MessageBlock, provider_id: Optional[str] = None
+	) -> CompletionMetrics:
+		"""Build the metrics of the completed block.
+
+		Args:
+			block: The completed block.
+			provider_id: ID of the provider whose tokenizer is approximated.
+
+		Returns:
+			The metrics of the request.
+		"""
+		content = block.response.content if block.response else ""
+		with self._lock:
+			gaps = self._chunk_gaps
+			end = self.end_seconds
+			if end is None:
+				end = self.elapsed()
+			return CompletionMetrics(
+				prepare_ms=self._optional_ms(self.prepare_seconds),
+				request_ms=self._optional_ms(self.request_seconds),
+				first_chunk_ms=self._optional_ms(self.first_chunk_seconds),
+				total_ms=_ms(end),
+				chunk_count=self._chunk_count,
+				chunk_gap_mean_ms=_ms(sum(gaps) / len(gaps)) if gaps else None,
+				chunk_gap_p95_ms=_ms(percentile(gaps, 0.95)) if gaps else None,
+				chunk_gap_max_ms=_ms(max(gaps)) if gaps else None,
+				output_chars=len(content),
+				output_tokens=estimate_text_tokens(content, provider_id),
+				ui_apply_ms=self._optional_ms(self.ui_seconds),
+				cached=self.cached,
+				upstream_provider=self.upstream_provider,
+			)
+
+	@staticmethod
+	def _optional_ms(seconds: Optional[float]) -> Optional[float]:
+		return None if seconds is None else _ms(seconds)
+
+
+@contextmanager
+def metrics_scope(timer: CompletionTimer) -> Iterator[CompletionTimer]:
+	"""Make a timer the current one for the engines in this context.
+
+	Args:
+		timer: The timer of the running completion.
+
+	Yields:
+		The timer.
+	"""
+	token = _current_timer.set(timer)
+	try:
+		yield timer
+	finally:
+		_current_timer.reset(token)
+
+
+def current_timer() -> CompletionTimer | None:
+	"""Return the timer of the completion running in this context."""
+	return _current_timer.get()
+
+
+@contextmanager
+def timed_phase(phase: str) -> Iterator[None]:
+	"""Measure a phase of the current completion, if any.
+
+	Args:
+		phase: Name of the phase, see ``CompletionTimer.add_phase``.
+	"""
+	timer = _current_timer.get()
+	if timer is None:
+		yield
+		return
+	start = time.perf_counter()
+	try:
+		yield
+	finally:
+		timer.add_phase(phase, time.perf_counter() - start)
@@ -0,0 +1,458 @@
+"""Retry and hedging of the completion requests sent to the providers.
+
+A transient failure of the provider (a 5xx or overloaded response, a reset
+connection, a timeout) used to end the completion with an error, and the
+user had to send the message again. A ``CompletionRetrier`` sends the request
+again after an exponential backoff with full jitter, following the
+``RetrySettings`` of the provider of the account.
+
+A request is only sent again while nothing was received from it: once a
+stream has yielded its first chunk, a failure is reported as before, so the
+user never sees text from two different responses.
+
+Hedging, disabled by default as it may bill a request twice, sends a
+duplicate of a request still unanswered after the 95th percentile of the
+recent latencies of the model. The first response wins and the other request
+is cancelled.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import queue
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from functools import cache
+from typing import (
+	TYPE_CHECKING,
+	Any,
+	AsyncIterator,
+	Callable,
+	Hashable,
+	Iterator,
+	Optional,
+)
+
+import httpx
+
+import basilisk.config as config
+from basilisk.completion_metrics import percentile
+from basilisk.completion_scheduler import parse_wait
+from basilisk.provider_engine.cancellation import (
+	CancellationToken,
+	cancellation_scope,
+)
+
+if TYPE_CHECKING:
+	from basilisk.provider_engine.async_base_engine import AsyncBaseEngine
+	from basilisk.provider_engine.base_engine import BaseEngine
+
+log = logging.getLogger(__name__)
+
+# Statuses of the responses worth sending the request again
+TRANSIENT_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504, 529})
+# SDK errors wrapping a connection failure or a timeout
+_CONNECTION_ERROR_NAMES = frozenset({"APIConnectionError", "APITimeoutError"})
+# Latencies kept per model, and needed before hedging its requests
+LATENCY_SAMPLES = 50
+HEDGE_MIN_SAMPLES = 5
+HEDGE_QUANTILE = 0.95
+
+RetryCallback = Callable[[int, int, float], None]
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+	"""Return the HTTP status of a provider error, if it has one."""
+	response = getattr(error, "response", None)
+	for value in (
+		getattr(error, "status_code", None),
+		getattr(error, "code", None),
+		getattr(response, "status_code", None),
+	):
+		if isinstance(value, int) and value > 0:
+			return value
+	return None
+
+
+def is_transient_error(error: BaseException) -> bool:
+	"""Tell whether a failed request may succeed if sent again.
+
+	Args:
+		error: The exception raised by the provider SDK.
+
+	Returns:
+		True for connection failures, timeouts, throttled, overloaded and
+		server error responses.
+	"""
+	if isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError)):
+		return True
+	if _status_code(error) in TRANSIENT_STATUSES:
+		return True
+	if type(error).__name__ in _CONNECTION_ERROR_NAMES:
+		return True
+	# Overloaded errors sent as a stream event come with a 200 status
+	return "overloaded" in str(error).lower()
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+	"""Return the delay requested by the retry-after header of an error.
+
+	Args:
+		error: The exception raised by the provider SDK.
+
+	Returns:
+		The seconds to wait, None if the error has no such header.
+	"""
+	headers = getattr(getattr(error, "response", None), "headers", None)
+	if headers is None:
+		return None
+	milliseconds = parse_wait(headers.get("retry-after-ms"))
+	if milliseconds is not None:
+		return milliseconds / 1000
+	return parse_wait(headers.get("retry-after"))
+
+
+def get_retry_settings(provider_id: str) -> config.RetrySettings:
+	"""Return the retry settings of a provider.
+
+	Args:
+		provider_id: ID of the provider of the account.
+
+	Returns:
+		The settings of the provider, or the default ones.
+	"""
+	network = config.conf().network
+	return network.provider_retry.get(provider_id, network.retry)
+
+
+class LatencyTracker:
+	"""Recent latencies of the requests, by model."""
+
+	def __init__(self, size: int = LATENCY_SAMPLES):
+		"""Initialize an empty tracker.
+
+		Args:
+			size: Number of latencies kept per key.
+		"""
+		self._size = size
+		self._lock = threading.Lock()
+		self._samples: dict[Hashable, deque[float]] = {}
+
+	def record(self, key: Hashable, seconds: float) -> None:
+		"""Record the latency of a request.
+
+		Args:
+			key: Account, model and stream mode of the request.
+			seconds: Time the provider took to answer.
+		"""
+		with self._lock:
+			samples = self._samples.get(key)
+			if samples is None:
+				samples = self._samples[key] = deque(maxlen=self._size)
+			samples.append(seconds)
+
+	def quantile(self, key: Hashable, ratio: float) -> Optional[float]:
+		"""Return a percentile of the recent latencies.
+
+		Args:
+			key: Account, model and stream mode of the requests.
+			ratio: The percentile, between 0 and 1.
+
+		Returns:
+			The latency, None when too few requests were recorded.
+		"""
+		with self._lock:
+			samples = list(self._samples.get(key, ()))
+		if len(samples) < HEDGE_MIN_SAMPLES:
+			return None
+		return percentile(samples, ratio)
+
+
+@cache
+def get_latency_tracker() -> LatencyTracker:
+	"""Return the latency tracker shared by the completions."""
+	return LatencyTracker()
+
+
+@dataclass
+class _Outcome:
+	token: CancellationToken
+	response: Any = None
+	error: Optional[Exception] = None
+	seconds: float = 0.0
+
+
+class CompletionRetrier:
+	"""Send a completion request again after transient failures.
+
+	One retrier is used per completion: ``completion`` sends the request and
+	keeps its arguments, so ``iter_stream`` can send it again when the
+	stream fails before its first chunk.
+	"""
+
+	def __init__(
+		self,
+		engine: BaseEngine,
+		settings: Optional[config.RetrySettings] = None,
+		cancel_token: Optional[CancellationToken] = None,
+		on_retry: Optional[RetryCallback] = None,
+		tracker: Optional[LatencyTracker] = None,
+		rng: Optional[random.Random] = None,
+	):
+		"""Initialize the retrier.
+
+		Args:
+			engine: The engine sending the request.
+			settings: Retry settings, those of the provider by default.
+			cancel_token: Token cancelled when the completion is stopped.
+			on_retry: Called before waiting to send the request again, with
+				the failed attempt, the maximum attempts and the delay.
+			tracker: Latencies deciding when to hedge, shared by default.
+			rng: Random generator of the backoff jitter.
+		"""
+		self.engine = engine
+		self.settings = settings or get_retry_settings(
+			engine.account.provider.id
+		)
+		self.cancel_token = cancel_token or CancellationToken()
+		self.on_retry = on_retry
+		self.tracker = tracker or get_latency_tracker()
+		self._rng = rng or random.Random()
+		self.attempt = 0
+		self._request_kwargs: dict[str, Any] = {}
+
+	def _latency_key(self) -> Hashable:
+		new_block = self._request_kwargs["new_block"]
+		return (
+			str(self.engine.account.id),
+			new_block.model.model_id,
+			bool(self._request_kwargs.get("stream", False)),
+		)
+
+	def _retry_delay(self, error: Exception) -> float:
+		"""Return the delay before the next attempt, or raise the error.
+
+		Must be called from the ``except`` block handling the error.
+
+		Args:
+			error: The error of the failed attempt.
+
+		Returns:
+			Seconds to wait before sending the request again.
+		"""
+		if (
+			self.cancel_token.cancelled
+			or self.attempt >= self.settings.max_attempts
+			or not is_transient_error(error)
+		):
+			raise error
+		ceiling = min(
+			self.settings.max_delay_seconds,
+			self.settings.base_delay_seconds * 2 ** (self.attempt - 1),
+		)
+		delay = ceiling * self._rng.random()
+		requested = retry_after(error)
+		if requested is not None:
+			if requested > self.settings.max_delay_seconds:
+				# Report the error instead of waiting for minutes
+				raise error
+			delay = max(delay, requested)
+		log.warning(
+			"Attempt %d of %d failed (%r), sending the request again in %.1f s",
+			self.attempt,
+			self.settings.max_attempts,
+			error,
+			delay,
+		)
+		if self.on_retry:
+			self.on_retry(self.attempt, self.settings.max_attempts, delay)
+		return delay
+
+	def _before_retry(self, error: Exception) -> None:
+		delay = self._retry_delay(error)
+		cancelled = threading.Event()
+		self.cancel_token.add_callback(cancelled.set)
+		if cancelled.wait(delay):
+			raise error
+
+	def _hedge_delay(self) -> Optional[float]:
+		"""Return the delay before hedging the request, None to not hedge."""
+		if not self.settings.hedge:
+			return None
+		latency = self.tracker.quantile(self._latency_key(), HEDGE_QUANTILE)
+		if latency is None:
+			return None
+		return max(latency, self.settings.hedge_min_delay_seconds)
+
+	def completion(self, **kwargs: Any) -> Any:
+		"""Send the request, again after each transient failure.
+
+		Args:
+			kwargs: The arguments of ``BaseEngine.completion``, without the
+				cancellation token.
+
+		Returns:
+			The response of the first successful attempt.
+		"""
+		self._request_kwargs = kwargs
+		while True:
+			self.attempt += 1
+			try:
+				return self._send()
+			except Exception as e:
+				self._before_retry(e)
+
+	def _send(self) -> Any:
+		hedge_delay = self._hedge_delay()
+		if hedge_delay is not None:
+			return self._send_hedged(hedge_delay)
+		start = time.perf_counter()
+		response = self.engine.completion(
+			cancel_token=self.cancel_token, **self._request_kwargs
+		)
+		self.tracker.record(self._latency_key(), time.perf_counter() - start)
+		return response
+
+	def _start_attempt(self, outcomes: queue.SimpleQueue) -> CancellationToken:
+		"""Send the request in a thread of its own.
+
+		Args:
+			outcomes: Queue receiving the outcome of the attempt.
+
+		Returns:
+			The token cancelling this attempt only.
+		"""
+		token = CancellationToken()
+		self.cancel_token.add_callback(token.cancel)
+
+		def run():
+			outcome = _Outcome(token)
+			start = time.perf_counter()
+			try:
+				with cancellation_scope(token):
+					outcome.response = self.engine.completion(
+						cancel_token=token, **self._request_kwargs
+					)
+			except Exception as e:
+				outcome.error = e
+			outcome.seconds = time.perf_counter() - start
+			outcomes.put(outcome)
+
+		# The attempt keeps the account slot and metrics of the completion
+		context = contextvars.copy_context()
+		thread = threading.Thread(
+			target=context.run, args=(run,), name="completion-hedge"
+		)
+		thread.daemon = True
+		thread.start()
+		return token
+
+	def _send_hedged(self, hedge_delay: float) -> Any:
+		"""Send the request, and a duplicate if it is slower than usual.
+
+		Args:
+			hedge_delay: Seconds to wait for the first response.
+
+		Returns:
+			The first successful response; the other request is cancelled.
+		"""
+		# The attempts share the client, so it is created once beforehand
+		self.engine.client
+		outcomes: queue.SimpleQueue[_Outcome] = queue.SimpleQueue()
+		tokens = [self._start_attempt(outcomes)]
+		try:
+			outcome = outcomes.get(timeout=hedge_delay)
+		except queue.Empty:
+			log.debug("No response after %.1f s, hedging request", hedge_delay)
+			tokens.append(self._start_attempt(outcomes))
+			outcome = outcomes.get()
+			if outcome.error is not None:
+				# The other request may still succeed
+				outcome = outcomes.get()
+		for token in tokens:
+			if token is not outcome.token:
+				token.cancel()
+		if outcome.error is not None:
+			raise outcome.error
+		self.tracker.record(self._latency_key(), outcome.seconds)
+		return outcome.response
+
+	def iter_stream(self, response: Any) -> Iterator[Any]:
+		"""Iterate a streamed response, sending the request again if needed.
+
+		The request is sent again when the stream fails before its first
+		chunk; later failures are raised.
+
+		Args:
+			response: The response returned by ``completion``.
+
+		Yields:
+			The chunks of ``BaseEngine.completion_response_with_stream``.
+		"""
+		while True:
+			started = False
+			try:
+				for chunk in self.engine.completion_response_with_stream(
+					response
+				):
+					started = True
+					yield chunk
+				return
+			except Exception as e:
+				if started:
+					raise
+				self._before_retry(e)
+			response = self.completion(**self._request_kwargs)
+
+	async def acompletion(self, **kwargs: Any) -> Any:
+		"""Send the request with an async engine, retrying transient failures.
+
+		Requests of async engines are not hedged.
+
+		Args:
+			kwargs: The arguments of ``AsyncBaseEngine.acompletion``, without
+				the cancellation token.
+
+		Returns:
+			The response of the first successful attempt.
+		"""
+		self._request_kwargs = kwargs
+		engine: AsyncBaseEngine = self.engine
+		while True:
+			self.attempt += 1
+			try:
+				return await engine.acompletion(
+					cancel_token=self.cancel_token, **kwargs
+				)
+			except Exception as e:
+				await asyncio.sleep(self._retry_delay(e))
+
+	async def aiter_stream(self, response: Any) -> AsyncIterator[Any]:
+		"""Iterate an async streamed response, sending it again if needed.
+
+		Args:
+			response: The response returned by ``acompletion``.
+
+		Yields:
+			The chunks of ``AsyncBaseEngine.acompletion_response_with_stream``.
+		"""
+		engine: AsyncBaseEngine = self.engine
+		while True:
+			started = False
+			try:
+				async for chunk in engine.acompletion_response_with_stream(
+					response
+				):
+					started = True
+					yield chunk
+				return
+			except Exception as e:
+				if started:
+					raise
+				await asyncio.sleep(self._retry_delay(e))
+			response = await self.acompletion(**self._request_kwargs)
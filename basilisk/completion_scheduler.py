@@ -0,0 +1,700 @@
+"""Process-wide scheduler of the completion requests sent to the providers.
+
+Every conversation tab, block regeneration, title generation and history
+summary used to send its request as soon as it was started, so a burst of
+them could exceed the rate limits of an account and fail with HTTP 429. The
+``CompletionScheduler`` gives each account a queue: a request waits for a
+free slot when the account already has ``max_concurrency`` requests in
+flight, and is delayed while the request or token budget of the account is
+exhausted, instead of being sent and rejected.
+
+Budgets are learned from the responses: the ``x-ratelimit-*`` (OpenAI and
+compatible APIs) and ``anthropic-ratelimit-*`` headers configure two token
+buckets per account, and ``retry-after`` or a 429 response pauses the whole
+account. The headers are read by ``observe_rate_limits``, an httpx event hook
+recording into the account whose slot is current in the requesting thread or
+task. Queue depth and wait times are exposed through ``stats``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import logging
+import re
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cache
+from typing import (
+	TYPE_CHECKING,
+	AsyncIterator,
+	Callable,
+	Iterator,
+	Mapping,
+	Optional,
+)
+
+import basilisk.config as config
+
+if TYPE_CHECKING:
+	import httpx
+
+	from basilisk.conversation.conversation_model import MessageBlock
+	from basilisk.provider_engine.base_engine import BaseEngine
+	from basilisk.provider_engine.cancellation import CancellationToken
+
+log = logging.getLogger(__name__)
+
+# Longest sleep between two checks of a waiting request, so cancellation and
+# released slots are noticed quickly
+POLL_INTERVAL = 0.25
+# Pause of an account after a 429 response without retry-after header
+DEFAULT_RETRY_AFTER = 5.0
+# Provider rate limits are expressed per minute
+RATE_LIMIT_PERIOD = 60.0
+# Statuses whose retry-after header pauses the account
+THROTTLE_STATUSES = frozenset({429, 503, 529})
+
+# Limit, remaining and reset headers of each budget, by provider family
+_BUDGET_HEADERS = {
+	"requests": (
+		(
+			"x-ratelimit-limit-requests",
+			"x-ratelimit-remaining-requests",
+			"x-ratelimit-reset-requests",
+		),
+		(
+			"anthropic-ratelimit-requests-limit",
+			"anthropic-ratelimit-requests-remaining",
+			"anthropic-ratelimit-requests-reset",
+		),
+	),
+	"tokens": (
+		(
+			"x-ratelimit-limit-tokens",
+			"x-ratelimit-remaining-tokens",
+			"x-ratelimit-reset-tokens",
+		),
+		(
+			"anthropic-ratelimit-tokens-limit",
+			"anthropic-ratelimit-tokens-remaining",
+			"anthropic-ratelimit-tokens-reset",
+		),
+	),
+}
+
+_DURATION_RE = re.compile(r"(?:\d+(?:\.\d+)?(?:ms|h|m|s))+")
+_DURATION_PART_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+_current_limiter: ContextVar[AccountLimiter | None] = ContextVar(
+	"basilisk_account_limiter", default=None
+)
+
+
+class QueueCancelledError(Exception):
+	"""Raised when a request is cancelled while waiting in the queue."""
+
+
+def parse_wait(value: Optional[str]) -> Optional[float]:
+	"""Parse a rate limit reset or retry-after header.
+
+	Args:
+		value: Seconds (``"1.5"``), a duration (``"6m0s"``, ``"20ms"``), an
+			RFC 3339 timestamp or an HTTP date.
+
+	Returns:
+		The seconds to wait from now, None if the value cannot be parsed.
+	"""
+	if not value:
+		return None
+	value = value.strip()
+	try:
+		return max(0.0, float(value))
+	except ValueError:
+		pass
+	if _DURATION_RE.fullmatch(value):
+		return sum(
+			float(amount) * _DURATION_UNITS[unit]
+			for amount, unit in _DURATION_PART_RE.findall(value)
+		)
+	try:
+		moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+	except ValueError:
+		try:
+			moment = email.utils.parsedate_to_datetime(value)
+		except TypeError, ValueError:
+			return None
+	if moment.tzinfo is None:
+		return None
+	return max(0.0, moment.timestamp() - time.time())
+
+
+def _parse_int(value: Optional[str]) -> Optional[int]:
+	try:
+		return int(float(value)) if value is not None else None
+	except ValueError:
+		return None
+
+
+class TokenBucket:
+	"""Budget refilled continuously up to its capacity.
+
+	A bucket without capacity is unlimited; the capacity is learned from the
+	rate limit headers of the provider.
+	"""
+
+	def __init__(self, clock: Callable[[], float] = time.monotonic):
+		"""Initialize an unlimited bucket.
+
+		Args:
+			clock: Monotonic clock returning seconds.
+		"""
+		self._clock = clock
+		self.capacity: Optional[float] = None
+		self._level = 0.0
+		self._updated_at = clock()
+
+	def _refill(self) -> None:
+		now = self._clock()
+		if self.capacity is not None:
+			rate = self.capacity / RATE_LIMIT_PERIOD
+			self._level = min(
+				self.capacity, self._level + (now - self._updated_at) * rate
+			)
+		self._updated_at = now
+
+	def configure(self, capacity: float, remaining: Optional[float]) -> None:
+		"""Set the capacity and current level reported by the provider.
+
+		Args:
+			capacity: Budget allowed per minute.
+			remaining: Budget left, the current level is kept if None.
+		"""
+		self._refill()
+		if self.capacity is None:
+			self._level = capacity
+		self.capacity = capacity
+		if remaining is not None:
+			self._level = remaining
+		self._level = min(self._level, capacity)
+
+	def wait_time(self, amount: float) -> float:
+		"""Return the seconds until the bucket holds an amount.
+
+		An amount larger than the capacity waits for a full bucket.
+		"""
+		if self.capacity is None or self.capacity <= 0:
+			return 0.0
+		self._refill()
+		amount = min(amount, self.capacity)
+		if self._level >= amount:
+			return 0.0
+		return (amount - self._level) * RATE_LIMIT_PERIOD / self.capacity
+
+	def consume(self, amount: float) -> None:
+		"""Take an amount out of the bucket."""
+		if self.capacity is None:
+			return
+		self._refill()
+		self._level -= min(amount, self.capacity)
+
+
+@dataclass(frozen=True)
+class SchedulerStats:
+	"""Queue state of an account.
+
+	Attributes:
+		key: Identifier of the account.
+		label: Name of the account.
+		active: Requests in flight.
+		queued: Requests waiting for a slot or budget.
+		max_concurrency: Maximum number of requests in flight.
+		request_limit: Requests allowed per minute, None if unknown.
+		token_limit: Tokens allowed per minute, None if unknown.
+		paused_seconds: Seconds before the account accepts requests again.
+		requests: Requests started since the application started.
+		waited: Requests that had to wait.
+		total_wait_seconds: Time spent waiting by all requests.
+		max_wait_seconds: Longest wait of a request.
+		throttled: Responses asking to slow down (429 and similar).
+	"""
+
+	key: str
+	label: str
+	active: int
+	queued: int
+	max_concurrency: int
+	request_limit: Optional[float]
+	token_limit: Optional[float]
+	paused_seconds: float
+	requests: int
+	waited: int
+	total_wait_seconds: float
+	max_wait_seconds: float
+	throttled: int
+
+	@property
+	def average_wait_seconds(self) -> float:
+		"""Average wait of the requests that had to wait."""
+		return self.total_wait_seconds / self.waited if self.waited else 0.0
+
+
+class AccountLimiter:
+	"""Concurrency slots and rate limit budgets of an account.
+
+	The limiter is only accessed with the scheduler lock held.
+	"""
+
+	def __init__(
+		self,
+		key: str,
+		label: str,
+		max_concurrency: int,
+		clock: Callable[[], float] = time.monotonic,
+	):
+		"""Initialize the limiter of an account.
+
+		Args:
+			key: Identifier of the account.
+			label: Name of the account.
+			max_concurrency: Maximum number of requests in flight.
+			clock: Monotonic clock returning seconds.
+		"""
+		self.key = key
+		self.label = label
+		self.max_concurrency = max_concurrency
+		self._clock = clock
+		self.requests = TokenBucket(clock)
+		self.tokens = TokenBucket(clock)
+		self.paused_until = 0.0
+		self.active = 0
+		self.queue: deque[object] = deque()
+		self.started = 0
+		self.waited = 0
+		self.total_wait_seconds = 0.0
+		self.max_wait_seconds = 0.0
+		self.throttled = 0
+
+	def delay(self, tokens: int) -> Optional[float]:
+		"""Return the seconds before a request can be sent.
+
+		Args:
+			tokens: Estimated tokens of the request.
+
+		Returns:
+			0 if the request can be sent now, None if it waits for a slot.
+		"""
+		if self.active >= self.max_concurrency:
+			return None
+		return max(
+			self.paused_until - self._clock(),
+			self.requests.wait_time(1),
+			self.tokens.wait_time(tokens),
+			0.0,
+		)
+
+	def start(self, tokens: int, waited_seconds: float) -> None:
+		"""Take a slot and the budget of a request."""
+		self.active += 1
+		self.started += 1
+		self.requests.consume(1)
+		self.tokens.consume(tokens)
+		if waited_seconds > 0:
+			self.waited += 1
+			self.total_wait_seconds += waited_seconds
+			self.max_wait_seconds = max(self.max_wait_seconds, waited_seconds)
+
+	def update_from_headers(
+		self, status_code: int, headers: Mapping[str, str]
+	) -> None:
+		"""Learn the rate limits of the account from a response.
+
+		Args:
+			status_code: HTTP status of the response.
+			headers: Headers of the response, with lower case names.
+		"""
+		now = self._clock()
+		for name, header_sets in _BUDGET_HEADERS.items():
+			bucket = getattr(self, name)
+			for limit_header, remaining_header, reset_header in header_sets:
+				limit = _parse_int(headers.get(limit_header))
+				if not limit:
+					continue
+				remaining = _parse_int(headers.get(remaining_header))
+				bucket.configure(limit, remaining)
+				reset = parse_wait(headers.get(reset_header))
+				if remaining is not None and remaining <= 0 and reset:
+					self.pause(now + reset)
+				break
+		if status_code not in THROTTLE_STATUSES:
+			return
+		self.throttled += 1
+		retry_after = _parse_int(headers.get("retry-after-ms"))
+		if retry_after is not None:
+			retry_after /= 1000
+		else:
+			retry_after = parse_wait(headers.get("retry-after"))
+		if retry_after is None and status_code == 429:
+			retry_after = DEFAULT_RETRY_AFTER
+		if retry_after:
+			self.pause(now + retry_after)
+
+	def pause(self, until: float) -> None:
+		"""Hold the requests of the account until a monotonic time."""
+		if until > self.paused_until:
+			log.info(
+				"Pausing requests of %s for %.1f s",
+				self.label,
+				until - self._clock(),
+			)
+			self.paused_until = until
+
+	def stats(self) -> SchedulerStats:
+		"""Return the queue state of the account."""
+		return SchedulerStats(
+			key=self.key,
+			label=self.label,
+			active=self.active,
+			queued=len(self.queue),
+			max_concurrency=self.max_concurrency,
+			request_limit=self.requests.capacity,
+			token_limit=self.tokens.capacity,
+			paused_seconds=max(0.0, self.paused_until - self._clock()),
+			requests=self.started,
+			waited=self.waited,
+			total_wait_seconds=self.total_wait_seconds,
+			max_wait_seconds=self.max_wait_seconds,
+			throttled=self.throttled,
+		)
+
+
+class CompletionScheduler:
+	"""Queue the completion requests of each account.
+
+	Requests of an account are started in arrival order.
+	"""
+
+	def __init__(
+		self,
+		max_concurrency: Optional[int] = None,
+		clock: Callable[[], float] = time.monotonic,
+		poll_interval: float = POLL_INTERVAL,
+	):
+		"""Initialize an empty scheduler.
+
+		Args:
+			max_concurrency: Maximum number of requests in flight per account,
+				read from the network settings if None.
+			clock: Monotonic clock returning seconds.
+			poll_interval: Longest sleep between two checks of a waiting
+				request.
+		"""
+		self._max_concurrency = max_concurrency
+		self._clock = clock
+		self.poll_interval = poll_interval
+		self._condition = threading.Condition()
+		self._limiters: dict[str, AccountLimiter] = {}
+
+	def _get_max_concurrency(self) -> int:
+		if self._max_concurrency is not None:
+			return self._max_concurrency
+		return config.conf().network.max_concurrent_requests
+
+	def _enqueue(
+		self, key: str, label: Optional[str], ticket: object
+	) -> AccountLimiter:
+		limiter = self._limiters.get(key)
+		if limiter is None:
+			limiter = self._limiters[key] = AccountLimiter(
+				key, label or key, self._get_max_concurrency(), self._clock
+			)
+		else:
+			limiter.max_concurrency = self._get_max_concurrency()
+		limiter.queue.append(ticket)
+		return limiter
+
+	def _try_start(
+		self,
+		limiter: AccountLimiter,
+		ticket: object,
+		tokens: int,
+		waiting_since: Optional[float],
+	) -> float:
+		"""Start a queued request if it is its turn and budget allows.
+
+		Args:
+			limiter: The limiter of the account.
+			ticket: The queue entry of the request.
+			tokens: Estimated tokens of the request.
+			waiting_since: When the request started waiting, None if it did
+				not wait yet.
+
+		Returns:
+			0 if the request was started, else the seconds to wait before
+			checking again.
+		"""
+		if limiter.queue[0] is not ticket:
+			return self.poll_interval
+		delay = limiter.delay(tokens)
+		if delay is None:
+			return self.poll_interval
+		if delay > 0:
+			return min(delay, self.poll_interval)
+		limiter.queue.popleft()
+		limiter.start(
+			tokens,
+			0.0 if waiting_since is None else self._clock() - waiting_since,
+		)
+		# The next request of the queue may start too
+		self._condition.notify_all()
+		return 0.0
+
+	def _dequeue(self, limiter: AccountLimiter, ticket: object) -> None:
+		try:
+			limiter.queue.remove(ticket)
+		except ValueError:
+			return
+		self._condition.notify_all()
+
+	def acquire(
+		self,
+		key: str,
+		label: Optional[str] = None,
+		tokens: int = 0,
+		cancel_token: Optional[CancellationToken] = None,
+		on_queued: Optional[Callable[[SchedulerStats], None]] = None,
+	) -> AccountLimiter:
+		"""Wait until a request of an account can be sent.
+
+		Args:
+			key: Identifier of the account.
+			label: Name of the account.
+			tokens: Estimated tokens of the request.
+			cancel_token: Token stopping the wait when cancelled.
+			on_queued: Called once, with the lock held, if the request has to
+				wait; must not block.
+
+		Returns:
+			The limiter of the account, to pass to ``release``.
+
+		Raises:
+			QueueCancelledError: If the cancel token was cancelled.
+		"""
+		ticket = object()
+		queued_at = self._clock()
+		waiting_since = None
+		with self._condition:
+			limiter = self._enqueue(key, label, ticket)
+			try:
+				while True:
+					if cancel_token is not None and cancel_token.cancelled:
+						raise QueueCancelledError()
+					wait = self._try_start(
+						limiter, ticket, tokens, waiting_since
+					)
+					if not wait:
+						return limiter
+					if waiting_since is None:
+						waiting_since = queued_at
+						if on_queued is not None:
+							on_queued(limiter.stats())
+					self._condition.wait(wait)
+			except BaseException:
+				self._dequeue(limiter, ticket)
+				raise
+
+	def release(self, limiter: AccountLimiter) -> None:
+		"""Free the slot of a finished request.
+
+		Args:
+			limiter: The limiter returned by ``acquire``.
+		"""
+		with self._condition:
+			limiter.active -= 1
+			self._condition.notify_all()
+
+	@contextmanager
+	def slot(
+		self,
+		key: str,
+		label: Optional[str] = None,
+		tokens: int = 0,
+		cancel_token: Optional[CancellationToken] = None,
+		on_queued: Optional[Callable[[SchedulerStats], None]] = None,
+	) -> Iterator[AccountLimiter]:
+		"""Hold a slot of an account while a request runs.
+
+		The responses received in this context update the account limits.
+		See ``acquire`` for the arguments.
+
+		Yields:
+			The limiter of the account.
+		"""
+		limiter = self.acquire(key, label, tokens, cancel_token, on_queued)
+		reset_token = _current_limiter.set(limiter)
+		try:
+			yield limiter
+		finally:
+			_current_limiter.reset(reset_token)
+			self.release(limiter)
+
+	@asynccontextmanager
+	async def aslot(
+		self,
+		key: str,
+		label: Optional[str] = None,
+		tokens: int = 0,
+		on_queued: Optional[Callable[[SchedulerStats], None]] = None,
+	) -> AsyncIterator[AccountLimiter]:
+		"""Hold a slot of an account while a request runs on an event loop.
+
+		The wait does not block the loop, and ends when the task is
+		cancelled. See ``acquire`` for the arguments.
+
+		Yields:
+			The limiter of the account.
+		"""
+		ticket = object()
+		queued_at = self._clock()
+		waiting_since = None
+		with self._condition:
+			limiter = self._enqueue(key, label, ticket)
+		try:
+			while True:
+				with self._condition:
+					wait = self._try_start(
+						limiter, ticket, tokens, waiting_since
+					)
+					if wait and waiting_since is None:
+						waiting_since = queued_at
+						if on_queued is not None:
+							on_queued(limiter.stats())
+				if not wait:
+					break
+				await asyncio.sleep(wait)
+		except BaseException:
+			with self._condition:
+				self._dequeue(limiter, ticket)
+			raise
+		reset_token = _current_limiter.set(limiter)
+		try:
+			yield limiter
+		finally:
+			_current_limiter.reset(reset_token)
+			self.release(limiter)
+
+	def record_response(
+		self,
+		limiter: AccountLimiter,
+		status_code: int,
+		headers: Mapping[str, str],
+	) -> None:
+		"""Update the limits of an account from a response.
+
+		Args:
+			limiter: The limiter of the account that sent the request.
+			status_code: HTTP status of the response.
+			headers: Headers of the response, with lower case names.
+		"""
+		with self._condition:
+			limiter.update_from_headers(status_code, headers)
+			self._condition.notify_all()
+
+	def stats(self) -> list[SchedulerStats]:
+		"""Return the queue state of every account used so far."""
+		with self._condition:
+			return [limiter.stats() for limiter in self._limiters.values()]
+
+
+@cache
+def get_completion_scheduler() -> CompletionScheduler:
+	"""Return the scheduler shared by the whole application."""
+	return CompletionScheduler()
+
+
+def observe_rate_limits(response: httpx.Response) -> None:
+	"""Learn the rate limits of the current account from a response.
+
+	Meant to be used as an httpx ``response`` event hook; responses received
+	outside a scheduler slot are ignored.
+
+	Args:
+		response: The response whose headers were just received.
+	"""
+	limiter = _current_limiter.get()
+	if limiter is None:
+		return
+	try:
+		get_completion_scheduler().record_response(
+			limiter, response.status_code, response.headers
+		)
+	except Exception:
+		log.debug("Unable to read rate limit headers", exc_info=True)
+
+
+def _request_tokens(engine: BaseEngine, new_block: MessageBlock) -> int:
+	"""Estimate the tokens a request counts against the account budget."""
+	from basilisk.token_estimator import estimate_message_tokens
+
+	return estimate_message_tokens(
+		new_block.request, engine.account.provider.id
+	) + max(new_block.max_tokens, 0)
+
+
+@contextmanager
+def completion_slot(
+	engine: BaseEngine,
+	new_block: MessageBlock,
+	cancel_token: Optional[CancellationToken] = None,
+	on_queued: Optional[Callable[[SchedulerStats], None]] = None,
+) -> Iterator[AccountLimiter]:
+	"""Hold a slot of the engine's account while a completion runs.
+
+	Args:
+		engine: The engine sending the request.
+		new_block: The block being completed.
+		cancel_token: Token stopping the wait when cancelled.
+		on_queued: Called once if the request has to wait.
+
+	Yields:
+		The limiter of the account.
+	"""
+	with get_completion_scheduler().slot(
+		str(engine.account.id),
+		engine.account.name,
+		_request_tokens(engine, new_block),
+		cancel_token,
+		on_queued,
+	) as limiter:
+		yield limiter
+
+
+@asynccontextmanager
+async def async_completion_slot(
+	engine: BaseEngine,
+	new_block: MessageBlock,
+	on_queued: Optional[Callable[[SchedulerStats], None]] = None,
+) -> AsyncIterator[AccountLimiter]:
+	"""Hold a slot of the engine's account while an async completion runs.
+
+	Args:
+		engine: The engine sending the request.
+		new_block: The block being completed.
+		on_queued: Called once if the request has to wait.
+
+	Yields:
+		The limiter of the account.
+	"""
+	async with get_completion_scheduler().aslot(
+		str(engine.account.id),
+		engine.account.name,
+		_request_tokens(engine, new_block),
+		on_queued,
+	) as limiter:
+		yield limiter
@@ -2,6 +2,7 @@
 
 from .account_config import (
 	CUSTOM_BASE_URL_PATTERN,
+	KEEP_ALIVE_PATTERN,
 	Account,
 	AccountManager,
 	AccountOrganization,
@@ -18,7 +19,7 @@ from .conversation_profile import ConversationProfile
 from .conversation_profile import (
 	get_conversation_profile_config as conversation_profiles,
 )
-from .main_config import BasiliskConfig
+from .main_config import BasiliskConfig, RetrySettings
 from .main_config import get_basilisk_config as conf
 
 __all__ = [
@@ -33,7 +34,9 @@ __all__ = [
 	"ConversationProfile",
 	"conversation_profiles",
 	"CUSTOM_BASE_URL_PATTERN",
+	"KEEP_ALIVE_PATTERN",
 	"KeyStorageMethodEnum",
 	"LogLevelEnum",
 	"ReleaseChannelEnum",
+	"RetrySettings",
 ]
@@ -45,6 +45,8 @@ log = logging.getLogger(__name__)
 CUSTOM_BASE_URL_PATTERN = re.compile(
 	r"^https?://[\w.-]+(?::\d{1,5})?(?:/[\w-]+)*/?$"
 )
+# Seconds, negative to never unload, or a duration such as "10m" or "1h30m"
+KEEP_ALIVE_PATTERN = re.compile(r"^(?:-?\d+|(?:\d+(?:\.\d+)?(?:ms|s|m|h))+)$")
 
 
 class AccountOrganization(BaseModel):
@@ -144,6 +146,11 @@ class Account(BaseModel):
 		pattern=CUSTOM_BASE_URL_PATTERN,
 		description="Custom base URL for the API provider. Must be a valid HTTP/HTTPS URL.",
 	)
+	keep_alive: Optional[str] = Field(
+		default=None,
+		pattern=KEEP_ALIVE_PATTERN,
+		description="How long local models stay loaded after a request, for providers with the model keep-alive capability.",
+	)
 
 	def __init__(self, **data: Any):
 		"""Initialize an account instance. If an error occurs, log the error and raise an exception."""
@@ -19,6 +19,11 @@ from pydantic import (
 
 from basilisk.provider import Provider
 from basilisk.provider_ai_model import AIModelInfo
+from basilisk.provider_routing import (
+	ProviderRouting,
+	RoutingSort,
+	format_provider_names,
+)
 
 from .account_config import Account, AccountInfo, get_account_config
 from .config_helper import (
@@ -43,6 +48,13 @@ class ConversationProfile(BaseModel):
 	temperature: Optional[float] = Field(default=None)
 	top_p: Optional[float] = Field(default=None)
 	stream_mode: bool = Field(default=True)
+	trim_history: bool = Field(default=False)
+	max_history_tokens: Optional[int] = Field(default=None, ge=1)
+	summarize_history: bool = Field(default=False)
+	routing_sort: Optional[RoutingSort] = Field(default=None)
+	routing_only: list[str] = Field(default_factory=list)
+	routing_ignore: list[str] = Field(default_factory=list)
+	routing_allow_fallbacks: bool = Field(default=True)
 
 	def __init__(self, **data: Any):
 		"""Initialize a conversation profile with the provided data.
@@ -153,6 +165,16 @@ class ConversationProfile(BaseModel):
 		if self.ai_model_info:
 			return self.ai_model_info.provider
 
+	@property
+	def provider_routing(self) -> ProviderRouting:
+		"""Routing preferences between the upstream providers of the model."""
+		return ProviderRouting(
+			sort=self.routing_sort,
+			only=tuple(self.routing_only),
+			ignore=tuple(self.routing_ignore),
+			allow_fallbacks=self.routing_allow_fallbacks,
+		)
+
 	def set_model_info(self, provider_id: str, model_id: str):
 		"""Set the AI model information for the conversation profile.
 
@@ -198,11 +220,44 @@ class ConversationProfile(BaseModel):
 		stream_mode_value = _("yes") if self.stream_mode else _("no")
 		# Translators: Summary of a conversation profile
 		summary += _("Stream mode:") + f" {stream_mode_value}\n"
+		if self.trim_history:
+			# Translators: Summary of a conversation profile
+			budget = self.max_history_tokens or _("model context window")
+			# Translators: Summary of a conversation profile
+			summary += _("Trim history to:") + f" {budget}\n"
+		if self.summarize_history:
+			# Translators: Summary of a conversation profile
+			summary += _("Summarize old messages:") + " " + _("yes") + "\n"
+		summary += self._routing_summary_text()
 		if self.system_prompt:
 			# Translators: Summary of a conversation profile
 			summary += _("System prompt:") + f"\n{self.system_prompt}"
 		return summary
 
+	def _routing_summary_text(self) -> str:
+		"""Build the summary lines of the upstream provider routing.
+
+		Returns:
+			The lines of the routing settings differing from the defaults.
+		"""
+		summary = ""
+		if self.routing_sort:
+			sort = self.routing_sort.value
+			# Translators: Summary of a conversation profile
+			summary += _("Sort upstream providers by:") + f" {sort}\n"
+		if self.routing_only:
+			names = format_provider_names(self.routing_only)
+			# Translators: Summary of a conversation profile
+			summary += _("Only use upstream providers:") + f" {names}\n"
+		if self.routing_ignore:
+			names = format_provider_names(self.routing_ignore)
+			# Translators: Summary of a conversation profile
+			summary += _("Ignore upstream providers:") + f" {names}\n"
+		if not self.routing_allow_fallbacks:
+			# Translators: Summary of a conversation profile
+			summary += _("Upstream provider fallbacks:") + " " + _("no") + "\n"
+		return summary
+
 	def __eq__(self, value: ConversationProfile | None) -> bool:
 		"""Compare two conversation profiles for equality based on their unique identifier.
 
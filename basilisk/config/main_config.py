@@ -23,6 +23,7 @@ config_file_name = "config.yml"
 
 MODEL_METADATA_CACHE_TTL_MIN_SECONDS = 60
 MODEL_METADATA_CACHE_TTL_MAX_SECONDS = 86400
+COMPLETION_CACHE_TTL_MIN_SECONDS = 60
 
 
 class GeneralSettings(BaseModel):
@@ -58,6 +59,19 @@ class ConversationSettings(BaseModel):
 	auto_save_draft: bool = Field(default=True)
 	reopen_last_conversation: bool = Field(default=False)
 	last_active_conversation_id: int | None = Field(default=None)
+	completion_cache_enabled: bool = Field(default=False)
+	completion_cache_ttl_seconds: int = Field(
+		default=7 * 86400,
+		ge=COMPLETION_CACHE_TTL_MIN_SECONDS,
+		description="Age after which cached completion responses expire",
+	)
+	completion_cache_max_entries: int = Field(
+		default=500,
+		ge=1,
+		description="Number of cached completion responses kept",
+	)
+	upload_large_attachments: bool = Field(default=False)
+	store_responses_server_side: bool = Field(default=False)
 
 
 class ImagesSettings(BaseModel):
@@ -84,10 +98,40 @@ class ServerSettings(BaseModel):
 	enable: bool = Field(default=True)
 
 
+class RetrySettings(BaseModel):
+	"""Retry settings of the completion requests sent to a provider."""
+
+	max_attempts: int = Field(
+		default=3,
+		ge=1,
+		le=10,
+		description="Attempts made before a transient failure is reported",
+	)
+	base_delay_seconds: float = Field(default=1.0, ge=0, le=60)
+	max_delay_seconds: float = Field(default=30.0, ge=0, le=600)
+	hedge: bool = Field(
+		default=False,
+		description="Send a duplicate of requests slower than usual",
+	)
+	hedge_min_delay_seconds: float = Field(default=2.0, ge=0, le=600)
+
+
 class NetworkSettings(BaseModel):
 	"""Network settings for BasiliskLLM."""
 
 	use_system_cert_store: bool = Field(default=True)
+	use_async_engine: bool = Field(default=False)
+	max_concurrent_requests: int = Field(
+		default=4,
+		ge=1,
+		le=32,
+		description="Maximum number of requests in flight per account",
+	)
+	retry: RetrySettings = Field(default_factory=RetrySettings)
+	provider_retry: dict[str, RetrySettings] = Field(
+		default_factory=dict,
+		description="Retry settings replacing ``retry`` by provider ID",
+	)
 
 
 class BasiliskConfig(BasiliskBaseSettings):
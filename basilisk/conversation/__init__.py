@@ -10,20 +10,25 @@ from .attached_file import (
 	get_mime_type,
 	parse_supported_attachment_formats,
 )
-from .conversation_helper import PROMPT_TITLE
+from .conversation_helper import PROMPT_SUMMARY, PROMPT_TITLE
 from .conversation_model import (
+	CompletionMetrics,
 	Conversation,
+	ConversationSummary,
 	Message,
 	MessageBlock,
 	MessageRoleEnum,
 	SystemMessage,
+	TokenUsage,
 )
 
 __all__ = [
 	"AttachmentFile",
 	"AttachmentFileTypes",
 	"build_from_url",
+	"CompletionMetrics",
 	"Conversation",
+	"ConversationSummary",
 	"get_mime_type",
 	"ImageFile",
 	"Message",
@@ -31,7 +36,9 @@ __all__ = [
 	"MessageRoleEnum",
 	"NotImageError",
 	"parse_supported_attachment_formats",
+	"PROMPT_SUMMARY",
 	"PROMPT_TITLE",
 	"SystemMessage",
+	"TokenUsage",
 	"URL_PATTERN",
 ]
@@ -4,17 +4,18 @@ from __future__ import annotations
 
 import base64
 import enum
+import hashlib
 import logging
 import mimetypes
 import re
 from io import BufferedReader, BufferedWriter, BytesIO
-from typing import Any
+from typing import Any, Callable
 
-import httpx
 from PIL import Image
 from pydantic import (
 	BaseModel,
 	Field,
+	PrivateAttr,
 	SerializationInfo,
 	SerializerFunctionWrapHandler,
 	ValidationInfo,
@@ -27,6 +28,9 @@ from upath import UPath
 from upath.implementations.http import HTTPPath
 
 from basilisk.decorators import measure_time
+from basilisk.http_client_registry import http_get
+
+from .attachment_cache import PayloadEncoding, get_attachment_payload_cache
 
 log = logging.getLogger(__name__)
 
@@ -149,7 +153,7 @@ def build_from_url(url: str) -> AttachmentFile:
 		file = build_from_url("https://example.com/file.pdf")
 		image = build_from_url("https://example.com/image.jpg")
 	"""
-	r = httpx.get(url, follow_redirects=True)
+	r = http_get(url, follow_redirects=True)
 	r.raise_for_status()
 	size = r.headers.get("Content-Length")
 	if size and size.isdigit():
@@ -227,6 +231,9 @@ class AttachmentFile(BaseModel):
 	size: int | None = None
 	mime_type: str | None = None
 	db_id: int | None = Field(default=None, exclude=True)
+	_content_hashes: dict[str, tuple[tuple, str]] = PrivateAttr(
+		default_factory=dict
+	)
 
 	@field_serializer("location", mode="wrap")
 	@classmethod
@@ -456,14 +463,100 @@ class AttachmentFile(BaseModel):
 		"""
 		return self._read_file("rb")
 
+	def _resolve_content_hash(
+		self, location: UPath
+	) -> tuple[str, bytes | None]:
+		"""Get the content hash of the file at a send location.
+
+		The hash is memoized per send location and computed again when the
+		file modification time or size changed since it was computed.
+
+		Args:
+			location: The send location of the file.
+
+		Returns:
+			The SHA-256 hex digest, and the raw file content when it had to
+			be read to compute the hash.
+		"""
+		stat = location.stat()
+		# Some filesystems do not report a modification time
+		signature = (getattr(stat, "st_mtime_ns", None), stat.st_size)
+		memoized = self._content_hashes.get(str(location))
+		if memoized is not None and memoized[0] == signature:
+			return memoized[1], None
+		data = self.read_as_bytes()
+		content_hash = hashlib.sha256(data).hexdigest()
+		self._content_hashes[str(location)] = (signature, content_hash)
+		return content_hash, data
+
+	def _cached_payload(
+		self,
+		encoding: PayloadEncoding,
+		encoder: Callable[[bytes | None], str | bytes],
+	) -> str | bytes:
+		"""Get an encoded payload of the file from the payload cache.
+
+		Args:
+			encoding: The kind of payload to produce.
+			encoder: Callable building the payload, receiving the raw file
+				content when it was already read to compute the hash.
+
+		Returns:
+			The encoded payload.
+		"""
+		location = self.send_location
+		content_hash, data = self._resolve_content_hash(location)
+		return get_attachment_payload_cache().get_or_encode(
+			(content_hash, str(location), encoding), lambda: encoder(data)
+		)
+
+	@property
+	def content_hash(self) -> str | None:
+		"""Get the SHA-256 hex digest of the content sent to providers.
+
+		Returns:
+			The content hash, or None for URL attachments.
+		"""
+		if self.type == AttachmentFileTypes.URL:
+			return None
+		return self._resolve_content_hash(self.send_location)[0]
+
+	def cached_bytes(self) -> bytes:
+		"""Read the file as bytes through the attachment payload cache.
+
+		Returns:
+			The contents of the file as bytes.
+		"""
+		return self._cached_payload(
+			PayloadEncoding.BYTES,
+			lambda data: data if data is not None else self.read_as_bytes(),
+		)
+
+	def cached_plain_text(self) -> str:
+		"""Read the file as plain text through the attachment payload cache.
+
+		Returns:
+			The contents of the file as a plain text string.
+		"""
+		return self._cached_payload(
+			PayloadEncoding.TEXT, lambda _data: self.read_as_plain_text()
+		)
+
 	def encode_base64(self) -> str:
 		"""Encode the file as a base64 string.
 
+		The encoded string is cached, so the file is encoded only once per
+		session as long as its content does not change.
+
 		Returns:
 			A base64-encoded string representing the file.
 		"""
-		with self.send_location.open(mode="rb") as file:
-			return base64.b64encode(file.read()).decode("utf-8")
+		return self._cached_payload(
+			PayloadEncoding.BASE64,
+			lambda data: base64.b64encode(
+				data if data is not None else self.read_as_bytes()
+			).decode("utf-8"),
+		)
 
 	def __del__(self):
 		"""Delete the file."""
@@ -489,8 +582,12 @@ class AttachmentFile(BaseModel):
 		"""
 		if self.type == AttachmentFileTypes.URL:
 			return str(self.location)
-		base64_data = self.encode_base64()
-		return f"data:{self.mime_type};base64,{base64_data}"
+		return self._cached_payload(
+			PayloadEncoding.DATA_URL,
+			lambda _data: (
+				f"data:{self.mime_type};base64,{self.encode_base64()}"
+			),
+		)
 
 
 class ImageFile(AttachmentFile):
@@ -0,0 +1,163 @@
+"""In-memory cache for encoded attachment payloads.
+
+Provider engines rebuild the whole history on every request, which means each
+attachment would otherwise be read and encoded again on every turn. This
+module keeps the encoded payloads (base64 strings, data URLs, raw bytes, plain
+text) in a byte-bounded LRU cache keyed by the attachment content hash, its
+send location and the encoding kind, so each attachment is encoded once per
+session.
+"""
+
+from __future__ import annotations
+
+import enum
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cache
+from typing import Callable
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class PayloadEncoding(enum.StrEnum):
+	"""Kinds of encoded payloads stored in the cache."""
+
+	BASE64 = enum.auto()
+	DATA_URL = enum.auto()
+	BYTES = enum.auto()
+	TEXT = enum.auto()
+
+
+PayloadKey = tuple[str, str, PayloadEncoding]
+
+
+@dataclass(frozen=True)
+class PayloadCacheStats:
+	"""Snapshot of the payload cache counters."""
+
+	hits: int
+	misses: int
+	evictions: int
+	entries: int
+	size_bytes: int
+	max_bytes: int
+
+
+def _payload_size(payload: str | bytes) -> int:
+	"""Return the approximate memory footprint of a payload in bytes."""
+	return len(payload)
+
+
+class AttachmentPayloadCache:
+	"""Thread-safe LRU cache of encoded attachment payloads.
+
+	Entries are evicted in least-recently-used order once the total payload
+	size exceeds ``max_bytes``. Payloads larger than the whole budget are
+	returned to the caller but never stored.
+	"""
+
+	def __init__(self, max_bytes: int = DEFAULT_MAX_CACHE_BYTES):
+		"""Initialize the cache.
+
+		Args:
+			max_bytes: Maximum total size of the cached payloads in bytes.
+		"""
+		self.max_bytes = max_bytes
+		self._entries: OrderedDict[PayloadKey, str | bytes] = OrderedDict()
+		self._size_bytes = 0
+		self._hits = 0
+		self._misses = 0
+		self._evictions = 0
+		self._lock = threading.Lock()
+
+	def get(self, key: PayloadKey) -> str | bytes | None:
+		"""Return a cached payload and mark it as recently used.
+
+		Args:
+			key: The (content hash, send location, encoding) key.
+
+		Returns:
+			The cached payload, or None on a cache miss.
+		"""
+		with self._lock:
+			payload = self._entries.get(key)
+			if payload is None:
+				self._misses += 1
+				return None
+			self._entries.move_to_end(key)
+			self._hits += 1
+			return payload
+
+	def put(self, key: PayloadKey, payload: str | bytes) -> None:
+		"""Store a payload, evicting the least recently used entries.
+
+		Args:
+			key: The (content hash, send location, encoding) key.
+			payload: The encoded payload to store.
+		"""
+		size = _payload_size(payload)
+		if size > self.max_bytes:
+			log.debug(
+				"Attachment payload of %d bytes exceeds cache budget", size
+			)
+			return
+		with self._lock:
+			previous = self._entries.pop(key, None)
+			if previous is not None:
+				self._size_bytes -= _payload_size(previous)
+			self._entries[key] = payload
+			self._size_bytes += size
+			while self._size_bytes > self.max_bytes:
+				_, evicted = self._entries.popitem(last=False)
+				self._size_bytes -= _payload_size(evicted)
+				self._evictions += 1
+
+	def get_or_encode(
+		self, key: PayloadKey, encoder: Callable[[], str | bytes]
+	) -> str | bytes:
+		"""Return the cached payload for key, encoding it on a miss.
+
+		Args:
+			key: The (content hash, send location, encoding) key.
+			encoder: Callable producing the payload when it is not cached.
+
+		Returns:
+			The cached or freshly encoded payload.
+		"""
+		payload = self.get(key)
+		if payload is None:
+			payload = encoder()
+			self.put(key, payload)
+		return payload
+
+	def clear(self) -> None:
+		"""Remove every entry and reset the counters."""
+		with self._lock:
+			self._entries.clear()
+			self._size_bytes = 0
+			self._hits = 0
+			self._misses = 0
+			self._evictions = 0
+
+	@property
+	def stats(self) -> PayloadCacheStats:
+		"""Return a snapshot of the cache counters."""
+		with self._lock:
+			return PayloadCacheStats(
+				hits=self._hits,
+				misses=self._misses,
+				evictions=self._evictions,
+				entries=len(self._entries),
+				size_bytes=self._size_bytes,
+				max_bytes=self.max_bytes,
+			)
+
+
+@cache
+def get_attachment_payload_cache() -> AttachmentPayloadCache:
+	"""Return the process-wide attachment payload cache."""
+	return AttachmentPayloadCache()
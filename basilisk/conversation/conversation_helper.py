@@ -23,6 +23,12 @@ if TYPE_CHECKING:
 log = logging.getLogger(__name__)
 
 PROMPT_TITLE = "Generate a concise, relevant title in the conversation's main language based on the topics and context. Max 70 characters. Do not surround the text with quotation marks."
+PROMPT_SUMMARY = "Summarize the conversation above so that it can replace it as context for the rest of the conversation. Keep the facts, decisions, names, figures, code identifiers, open questions and the user's preferences and instructions. Drop greetings and repetitions. Write in the conversation's main language, as concise notes, without introduction."
+PROMPT_SUMMARY_UPDATE = "Update the summary of the earlier conversation with the exchanges that follow it above. Keep everything still relevant from the previous summary. Keep the facts, decisions, names, figures, code identifiers, open questions and the user's preferences and instructions. Write in the conversation's main language, as concise notes, without introduction."
+SUMMARY_CONTEXT_HEADER = "Summary of the earlier part of this conversation:"
+SUMMARY_ACKNOWLEDGEMENT = (
+	"Understood, I will continue the conversation from this summary."
+)
 
 
 def save_attachments(
@@ -3,12 +3,14 @@
 from __future__ import annotations
 
 import enum
+import hashlib
 from datetime import datetime
 from typing import Any
 
 from pydantic import (
 	BaseModel,
 	Field,
+	PrivateAttr,
 	ValidationInfo,
 	field_validator,
 	model_validator,
@@ -21,6 +23,8 @@ from basilisk.provider_ai_model import AIModelInfo
 
 from .attached_file import AttachmentFile, ImageFile
 from .conversation_helper import (
+	SUMMARY_ACKNOWLEDGEMENT,
+	SUMMARY_CONTEXT_HEADER,
 	create_bskc_file,
 	migration_steps,
 	open_bskc_file,
@@ -132,6 +136,90 @@ class SystemMessage(BaseMessage):
 		return self.role == other.role and self.content == other.content
 
 
+class CompletionMetrics(BaseModel):
+	"""Timings of the completion request that produced a block response.
+
+	Durations are in milliseconds from the start of the request, except the
+	phase durations (preparation, UI apply) and the chunk gaps.
+	"""
+
+	prepare_ms: float | None = Field(default=None, ge=0)
+	request_ms: float | None = Field(default=None, ge=0)
+	first_chunk_ms: float | None = Field(default=None, ge=0)
+	total_ms: float = Field(ge=0)
+	chunk_count: int = Field(default=0, ge=0)
+	chunk_gap_mean_ms: float | None = Field(default=None, ge=0)
+	chunk_gap_p95_ms: float | None = Field(default=None, ge=0)
+	chunk_gap_max_ms: float | None = Field(default=None, ge=0)
+	output_chars: int = Field(default=0, ge=0)
+	output_tokens: int = Field(default=0, ge=0)
+	ui_apply_ms: float | None = Field(default=None, ge=0)
+	cached: bool = Field(default=False)
+	upstream_provider: str | None = Field(default=None)
+
+	@property
+	def generation_ms(self) -> float:
+		"""Time spent generating the response after the first chunk."""
+		if self.first_chunk_ms is None:
+			return self.total_ms
+		return self.total_ms - self.first_chunk_ms
+
+	@property
+	def tokens_per_second(self) -> float | None:
+		"""Estimated output tokens per second, None if not measurable."""
+		if self.generation_ms <= 0:
+			return None
+		return self.output_tokens * 1000 / self.generation_ms
+
+	@property
+	def chars_per_second(self) -> float | None:
+		"""Output characters per second, None if not measurable."""
+		if self.generation_ms <= 0:
+			return None
+		return self.output_chars * 1000 / self.generation_ms
+
+
+class TokenUsage(BaseModel):
+	"""Tokens billed for the completion request that produced a block response.
+
+	Input tokens include those read from the provider's prompt cache and
+	output tokens include the reasoning tokens, whatever the provider
+	reports, so that the counts of all providers add up the same way.
+	"""
+
+	input_tokens: int = Field(default=0, ge=0)
+	output_tokens: int = Field(default=0, ge=0)
+	cached_input_tokens: int = Field(default=0, ge=0)
+	reasoning_tokens: int = Field(default=0, ge=0)
+	# US dollars at the catalog prices, None when the model has no pricing
+	cost: float | None = Field(default=None, ge=0)
+	account_id: str | None = Field(default=None)
+
+	def merged(self, other: TokenUsage) -> TokenUsage:
+		"""Combine two usage reports of the same streamed response.
+
+		Streams report cumulative counts, possibly split between events, so
+		each count keeps its largest value.
+
+		Args:
+			other: The later report.
+
+		Returns:
+			The combined usage.
+		"""
+		return self.model_copy(
+			update={
+				name: max(getattr(self, name), getattr(other, name))
+				for name in (
+					"input_tokens",
+					"output_tokens",
+					"cached_input_tokens",
+					"reasoning_tokens",
+				)
+			}
+		)
+
+
 class MessageBlock(BaseModel):
 	"""Represents a block of messages in a conversation. The block may contain a user message, an AI model request, and an AI model response."""
 
@@ -146,6 +234,40 @@ class MessageBlock(BaseModel):
 	created_at: datetime = Field(default_factory=datetime.now)
 	updated_at: datetime = Field(default_factory=datetime.now)
 	db_id: int | None = Field(default=None, exclude=True)
+	metrics: CompletionMetrics | None = Field(default=None, exclude=True)
+	usage: TokenUsage | None = Field(default=None, exclude=True)
+	# Server-side state of the response, stored in the conversation database
+	response_id: str | None = Field(default=None, exclude=True)
+	response_chain_digest: str | None = Field(default=None, exclude=True)
+	_edit_version: int = PrivateAttr(default=0)
+
+	@property
+	def edit_version(self) -> int:
+		"""Version number incremented each time the block is edited or removed.
+
+		It is also incremented when a streamed response completes. Provider
+		engines use it with the block identity to reuse the messages they
+		prepared for this block on previous requests.
+		"""
+		return self._edit_version
+
+	def mark_stream_completed(self) -> None:
+		"""Record that the streamed response of the block is complete.
+
+		Messages prepared while the response was streaming hold partial
+		content, so they must not be reused.
+		"""
+		self._edit_version += 1
+
+	def mark_edited(self) -> None:
+		"""Record that the block content changed after it was completed.
+
+		The response stored by the provider no longer matches the block, so
+		its ID is dropped.
+		"""
+		self._edit_version += 1
+		self.response_id = None
+		self.response_chain_digest = None
 
 	@field_validator("response", mode="after")
 	@classmethod
@@ -182,6 +304,82 @@ class MessageBlock(BaseModel):
 		return self
 
 
+class ConversationSummary(BaseModel):
+	"""Rolling summary of the oldest blocks of a conversation.
+
+	Requests sent to the provider replace the summarized blocks with the
+	summary; the blocks themselves stay in the conversation for display. The
+	digest of the summarized blocks detects when one of them was edited or
+	removed, which makes the summary stale.
+	"""
+
+	content: str
+	block_count: int = Field(ge=1)
+	digest: str
+	model: AIModelInfo
+	created_at: datetime = Field(default_factory=datetime.now)
+	_block: MessageBlock | None = PrivateAttr(default=None)
+
+	@staticmethod
+	def compute_digest(blocks: list[MessageBlock]) -> str:
+		"""Compute the digest of the messages of a list of blocks.
+
+		Args:
+			blocks: The blocks to hash.
+
+		Returns:
+			The SHA-256 hex digest of the block messages.
+		"""
+		hasher = hashlib.sha256()
+		for block in blocks:
+			for message in (block.request, block.response):
+				if message is None:
+					hasher.update(b"\x00")
+					continue
+				hasher.update(message.role.value.encode("utf-8"))
+				hasher.update(b"\x00")
+				hasher.update(message.content.encode("utf-8"))
+				hasher.update(b"\x00")
+		return hasher.hexdigest()
+
+	def covers(self, blocks: list[MessageBlock]) -> bool:
+		"""Whether the summary is up to date for the leading blocks.
+
+		Args:
+			blocks: The blocks of the conversation, oldest first.
+
+		Returns:
+			True if the first ``block_count`` blocks are unchanged since the
+			summary was generated.
+		"""
+		return len(blocks) >= self.block_count and self.digest == (
+			self.compute_digest(blocks[: self.block_count])
+		)
+
+	def as_block(self) -> MessageBlock:
+		"""Build the synthetic block sent instead of the summarized blocks.
+
+		The same block is returned on each call, so provider engines reuse
+		the messages they prepared for it.
+
+		Returns:
+			A block whose request holds the summary.
+		"""
+		if self._block is None:
+			self._block = MessageBlock(
+				request=Message(
+					role=MessageRoleEnum.USER,
+					content=f"{SUMMARY_CONTEXT_HEADER}\n\n{self.content}",
+				),
+				response=Message(
+					role=MessageRoleEnum.ASSISTANT,
+					content=SUMMARY_ACKNOWLEDGEMENT,
+				),
+				model=self.model,
+			)
+		return self._block
+
+
 class Conversation(BaseModel):
 	"""Represents a conversation between users and the bot. The conversation may contain messages and a title."""
 
@@ -190,6 +388,8 @@ class Conversation(BaseModel):
 		default_factory=PydanticOrderedSet
 	)
 	title: str | None = Field(default=None)
+	# Stored in the conversation database only: files keep the full history
+	summary: ConversationSummary | None = Field(default=None, exclude=True)
 	version: int = Field(default=BSKC_VERSION, ge=0, le=BSKC_VERSION)
 
 	@model_validator(mode="before")
@@ -266,6 +466,7 @@ class Conversation(BaseModel):
 		"""
 		system_index = block.system_index
 		self.messages.remove(block)
+		block.mark_edited()
 		if system_index is not None:
 			self._remove_orphaned_system(system_index)
 
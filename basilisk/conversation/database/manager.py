@@ -1,13 +1,15 @@
 """Database manager for conversation persistence."""
 
 import hashlib
+import json
 import logging
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
 
 from alembic import command
 from alembic.config import Config
 from platformdirs import user_data_path
-from sqlalchemy import Engine, create_engine, delete, event, func, select
+from sqlalchemy import Engine, case, create_engine, delete, event, func, select
 from sqlalchemy.orm import Session, sessionmaker
 
 from basilisk import global_vars
@@ -18,23 +20,31 @@ from basilisk.conversation.attached_file import (
 	ImageFile,
 )
 from basilisk.conversation.conversation_model import (
+	CompletionMetrics,
 	Conversation,
+	ConversationSummary,
 	Message,
 	MessageBlock,
 	MessageRoleEnum,
 	SystemMessage,
+	TokenUsage,
 )
 from basilisk.custom_types import PydanticOrderedSet
 from basilisk.provider_ai_model import AIModelInfo
 
 from .models import (
 	DBAttachment,
+	DBBatchJob,
+	DBBatchJobItem,
 	DBCitation,
+	DBCompletionCacheEntry,
 	DBConversation,
+	DBConversationSummary,
 	DBConversationSystemPrompt,
 	DBMessage,
 	DBMessageAttachment,
 	DBMessageBlock,
+	DBMessageBlockMetrics,
 	DBSystemPrompt,
 )
 
@@ -131,24 +141,39 @@ class ConversationDatabase:
 		"""
 		with self._get_session() as session:
 			with session.begin():
-				db_conv = DBConversation(title=conversation.title)
-				session.add(db_conv)
-				session.flush()
+				conv_id = self._add_conversation(session, conversation)
+		log.debug("Saved conversation %d", conv_id)
+		return conv_id
 
-				# Save system prompts
-				csp_map = self._save_system_prompts(
-					session, db_conv, conversation.systems
-				)
+	def _add_conversation(
+		self, session: Session, conversation: Conversation
+	) -> int:
+		"""Add a conversation in the current transaction.
 
-				# Save message blocks
-				for position, block in enumerate(conversation.messages):
-					self._save_block(
-						session, db_conv.id, position, block, csp_map
-					)
+		Args:
+			session: The database session.
+			conversation: The Pydantic conversation to save.
 
-				conv_id = db_conv.id
-		log.debug("Saved conversation %d", conv_id)
-		return conv_id
+		Returns:
+			The database ID of the new conversation.
+		"""
+		db_conv = DBConversation(title=conversation.title)
+		session.add(db_conv)
+		session.flush()
+
+		# Save system prompts
+		csp_map = self._save_system_prompts(
+			session, db_conv, conversation.systems
+		)
+
+		# Save message blocks
+		for position, block in enumerate(conversation.messages):
+			self._save_block(session, db_conv.id, position, block, csp_map)
+
+		if conversation.summary is not None:
+			db_conv.summary = self._make_db_summary(conversation.summary)
+
+		return db_conv.id
 
 	def _save_system_prompts(
 		self,
@@ -389,9 +414,16 @@ class ConversationDatabase:
 			max_tokens=block.max_tokens,
 			top_p=block.top_p,
 			stream=block.stream,
+			response_id=block.response_id,
+			response_chain_digest=block.response_chain_digest,
 			created_at=block.created_at,
 			updated_at=block.updated_at,
+			**(block.usage.model_dump() if block.usage else {}),
 		)
+		if block.metrics is not None:
+			db_block.metrics = DBMessageBlockMetrics(
+				**block.metrics.model_dump()
+			)
 		session.add(db_block)
 		session.flush()
 		block.db_id = db_block.id
@@ -724,15 +756,34 @@ class ConversationDatabase:
 					max_tokens=db_block.max_tokens,
 					top_p=db_block.top_p,
 					stream=db_block.stream,
+					response_id=db_block.response_id,
+					response_chain_digest=db_block.response_chain_digest,
 					created_at=db_block.created_at,
 					updated_at=db_block.updated_at,
 				)
 				block.db_id = db_block.id
+				if db_block.metrics is not None:
+					block.metrics = self._load_metrics(db_block.metrics)
+				if db_block.input_tokens is not None:
+					block.usage = self._load_usage(db_block)
 				blocks.append(block)
+			summary = None
+			if db_conv.summary is not None:
+				summary = ConversationSummary(
+					content=db_conv.summary.content,
+					block_count=db_conv.summary.block_count,
+					digest=db_conv.summary.digest,
+					model=AIModelInfo(
+						provider_id=db_conv.summary.model_provider,
+						model_id=db_conv.summary.model_id,
+					),
+					created_at=db_conv.summary.created_at,
+				)
 			return Conversation(
 				messages=blocks,
 				systems=systems,
 				title=db_conv.title,
+				summary=summary,
 				version=BSKC_VERSION,
 			)
 
@@ -834,3 +885,519 @@ class ConversationDatabase:
 			f.write(db_att.blob_data)
 
 		return self._make_attachment(db_att, mem_path, description)
+
+	@staticmethod
+	def _load_metrics(db_metrics: DBMessageBlockMetrics) -> CompletionMetrics:
+		"""Convert a DB metrics row to the block metrics."""
+		return CompletionMetrics(
+			**{
+				name: getattr(db_metrics, name)
+				for name in CompletionMetrics.model_fields
+			}
+		)
+
+	@staticmethod
+	def _load_usage(db_block: DBMessageBlock) -> TokenUsage:
+		"""Convert the usage columns of a DB block to the block usage."""
+		return TokenUsage(
+			**{
+				name: getattr(db_block, name)
+				for name in TokenUsage.model_fields
+			}
+		)
+
+	# --- Latency metrics ---
+
+	def get_latency_summary(self) -> list[dict]:
+		"""Aggregate the latency metrics of the stored blocks per model.
+
+		Responses replayed from the completion cache are left out, since
+		they say nothing about the provider. Responses of aggregators are
+		also grouped by the upstream provider that served them.
+
+		Returns:
+			List of dicts with provider_id, model_id, upstream_provider
+			(None when not routed), response_count and the averages
+			first_chunk_ms, total_ms, tokens_per_second, chunk_gap_p95_ms
+			and ui_apply_ms (None when never measured), ordered by
+			provider, model then upstream provider.
+		"""
+		metrics = DBMessageBlockMetrics
+		generation_ms = metrics.total_ms - func.coalesce(
+			metrics.first_chunk_ms, 0
+		)
+		tokens_per_second = (
+			metrics.output_tokens * 1000.0 / func.nullif(generation_ms, 0)
+		)
+		with self._get_session() as session:
+			rows = session.execute(
+				select(
+					DBMessageBlock.model_provider,
+					DBMessageBlock.model_id,
+					metrics.upstream_provider,
+					func.count().label("response_count"),
+					func.avg(metrics.first_chunk_ms).label("first_chunk_ms"),
+					func.avg(metrics.total_ms).label("total_ms"),
+					func.avg(tokens_per_second).label("tokens_per_second"),
+					func.avg(metrics.chunk_gap_p95_ms).label(
+						"chunk_gap_p95_ms"
+					),
+					func.avg(metrics.ui_apply_ms).label("ui_apply_ms"),
+				)
+				.join(metrics, metrics.message_block_id == DBMessageBlock.id)
+				.where(metrics.cached.is_(False))
+				.group_by(
+					DBMessageBlock.model_provider,
+					DBMessageBlock.model_id,
+					metrics.upstream_provider,
+				)
+				.order_by(
+					DBMessageBlock.model_provider,
+					DBMessageBlock.model_id,
+					metrics.upstream_provider,
+				)
+			).all()
+		return [
+			{
+				"provider_id": row.model_provider,
+				"model_id": row.model_id,
+				"upstream_provider": row.upstream_provider,
+				"response_count": row.response_count,
+				"first_chunk_ms": row.first_chunk_ms,
+				"total_ms": row.total_ms,
+				"tokens_per_second": row.tokens_per_second,
+				"chunk_gap_p95_ms": row.chunk_gap_p95_ms,
+				"ui_apply_ms": row.ui_apply_ms,
+			}
+			for row in rows
+		]
+
+	# --- Token usage ---
+
+	def get_usage_summary(self, since: datetime | None = None) -> list[dict]:
+		"""Aggregate the token usage of the stored blocks per day and model.
+
+		Only blocks whose provider reported usage are counted. The
+		throughput is computed on the responses with latency metrics.
+
+		Args:
+			since: Only count the blocks created from this time, if set.
+
+		Returns:
+			List of dicts with day (a date), account_id, provider_id,
+			model_id, response_count, the sums input_tokens,
+			cached_input_tokens, output_tokens, reasoning_tokens and cost
+			(None when no response was priced), and tokens_per_second
+			(None when never measured), newest day first, then ordered by
+			account, provider and model.
+		"""
+		block = DBMessageBlock
+		metrics = DBMessageBlockMetrics
+		day = func.date(block.created_at)
+		generation_ms = metrics.total_ms - func.coalesce(
+			metrics.first_chunk_ms, 0
+		)
+		measured_tokens = case(
+			(metrics.message_block_id.is_not(None), block.output_tokens)
+		)
+		query = (
+			select(
+				day.label("day"),
+				block.account_id,
+				block.model_provider,
+				block.model_id,
+				func.count().label("response_count"),
+				func.sum(block.input_tokens).label("input_tokens"),
+				func.sum(block.cached_input_tokens).label(
+					"cached_input_tokens"
+				),
+				func.sum(block.output_tokens).label("output_tokens"),
+				func.sum(block.reasoning_tokens).label("reasoning_tokens"),
+				func.sum(block.cost).label("cost"),
+				(
+					func.sum(measured_tokens)
+					* 1000.0
+					/ func.nullif(func.sum(generation_ms), 0)
+				).label("tokens_per_second"),
+			)
+			.outerjoin(metrics, metrics.message_block_id == block.id)
+			.where(block.input_tokens.is_not(None))
+			.group_by(
+				day, block.account_id, block.model_provider, block.model_id
+			)
+			.order_by(
+				day.desc(),
+				block.account_id,
+				block.model_provider,
+				block.model_id,
+			)
+		)
+		if since is not None:
+			query = query.where(block.created_at >= since)
+		with self._get_session() as session:
+			rows = session.execute(query).all()
+		return [
+			{
+				"day": date.fromisoformat(row.day),
+				"account_id": row.account_id,
+				"provider_id": row.model_provider,
+				"model_id": row.model_id,
+				"response_count": row.response_count,
+				"input_tokens": row.input_tokens,
+				"cached_input_tokens": row.cached_input_tokens,
+				"output_tokens": row.output_tokens,
+				"reasoning_tokens": row.reasoning_tokens,
+				"cost": row.cost,
+				"tokens_per_second": row.tokens_per_second,
+			}
+			for row in rows
+		]
+
+	# --- Conversation summary ---
+
+	@staticmethod
+	def _make_db_summary(summary: ConversationSummary) -> DBConversationSummary:
+		"""Convert a conversation summary to a DB row."""
+		return DBConversationSummary(
+			content=summary.content,
+			block_count=summary.block_count,
+			digest=summary.digest,
+			model_provider=summary.model.provider_id,
+			model_id=summary.model.model_id,
+			created_at=summary.created_at,
+		)
+
+	def save_conversation_summary(
+		self, conv_id: int, summary: ConversationSummary | None
+	):
+		"""Replace the rolling summary of a conversation.
+
+		Args:
+			conv_id: The database conversation ID.
+			summary: The new summary, or None to remove it.
+		"""
+		with self._get_session() as session:
+			with session.begin():
+				db_conv = session.get(DBConversation, conv_id)
+				if db_conv is None:
+					return
+				db_conv.summary = None
+				session.flush()
+				if summary is not None:
+					db_conv.summary = self._make_db_summary(summary)
+		log.debug("Saved summary of conversation %d", conv_id)
+
+	# --- Completion cache ---
+
+	def get_cached_completion(
+		self, cache_key: str, max_age_seconds: int
+	) -> tuple[str, list[dict] | None] | None:
+		"""Get a cached response and mark it as recently used.
+
+		Args:
+			cache_key: Hash of the completion request.
+			max_age_seconds: Maximum age of the entry, older ones are ignored.
+
+		Returns:
+			A tuple of (content, citations), or None on a cache miss.
+		"""
+		now = datetime.now(timezone.utc)
+		cutoff = now - timedelta(seconds=max_age_seconds)
+		with self._get_session() as session:
+			with session.begin():
+				entry = session.execute(
+					select(DBCompletionCacheEntry).where(
+						DBCompletionCacheEntry.cache_key == cache_key,
+						DBCompletionCacheEntry.created_at >= cutoff,
+					)
+				).scalar_one_or_none()
+				if entry is None:
+					return None
+				entry.last_used_at = now
+				entry.hit_count += 1
+				citations = (
+					json.loads(entry.citations) if entry.citations else None
+				)
+				return entry.content, citations
+
+	def store_cached_completion(
+		self,
+		cache_key: str,
+		model_provider: str,
+		model_id: str,
+		content: str,
+		citations: list[dict] | None = None,
+	):
+		"""Store a response in the completion cache, replacing any previous one.
+
+		Args:
+			cache_key: Hash of the completion request.
+			model_provider: Provider ID of the model that answered.
+			model_id: ID of the model that answered.
+			content: The response text.
+			citations: The response citations, if any.
+		"""
+		now = datetime.now(timezone.utc)
+		citations_json = json.dumps(citations) if citations else None
+		with self._get_session() as session:
+			with session.begin():
+				entry = session.execute(
+					select(DBCompletionCacheEntry).where(
+						DBCompletionCacheEntry.cache_key == cache_key
+					)
+				).scalar_one_or_none()
+				if entry is None:
+					entry = DBCompletionCacheEntry(cache_key=cache_key)
+					session.add(entry)
+				entry.model_provider = model_provider
+				entry.model_id = model_id
+				entry.content = content
+				entry.citations = citations_json
+				entry.created_at = now
+				entry.last_used_at = now
+
+	def prune_completion_cache(
+		self, max_age_seconds: int, max_entries: int
+	) -> int:
+		"""Evict expired entries, then the least recently used ones.
+
+		Args:
+			max_age_seconds: Entries created before this many seconds are
+				deleted.
+			max_entries: Maximum number of entries kept.
+
+		Returns:
+			Number of deleted entries.
+		"""
+		cutoff = datetime.now(timezone.utc) - timedelta(seconds=max_age_seconds)
+		with self._get_session() as session:
+			with session.begin():
+				deleted = session.execute(
+					delete(DBCompletionCacheEntry).where(
+						DBCompletionCacheEntry.created_at < cutoff
+					)
+				).rowcount
+				overflow_ids = (
+					select(DBCompletionCacheEntry.id)
+					.order_by(DBCompletionCacheEntry.last_used_at.desc())
+					.offset(max_entries)
+				)
+				deleted += session.execute(
+					delete(DBCompletionCacheEntry).where(
+						DBCompletionCacheEntry.id.in_(overflow_ids)
+					)
+				).rowcount
+		if deleted:
+			log.debug("Evicted %d completion cache entries", deleted)
+		return deleted
+
+	def clear_completion_cache(self) -> int:
+		"""Delete every completion cache entry.
+
+		Returns:
+			Number of deleted entries.
+		"""
+		with self._get_session() as session:
+			with session.begin():
+				deleted = session.execute(
+					delete(DBCompletionCacheEntry)
+				).rowcount
+		log.debug("Cleared %d completion cache entries", deleted)
+		return deleted
+
+	# --- Batch jobs ---
+
+	def create_batch_job(
+		self,
+		account_id: str,
+		provider_id: str,
+		provider_batch_id: str,
+		status: str,
+		requests: dict[str, MessageBlock],
+		name: str | None = None,
+		system_prompt: str | None = None,
+	) -> int:
+		"""Record a batch submitted to a provider.
+
+		Args:
+			account_id: ID of the account the batch was submitted with.
+			provider_id: ID of the provider.
+			provider_batch_id: ID of the batch on the provider side.
+			status: Initial status of the job.
+			requests: The blocks of the batch by request custom ID.
+			name: Optional name of the job, used to title the conversations.
+			system_prompt: Optional system prompt of every request.
+
+		Returns:
+			The database ID of the job.
+		"""
+		with self._get_session() as session:
+			with session.begin():
+				job = DBBatchJob(
+					account_id=account_id,
+					provider_id=provider_id,
+					provider_batch_id=provider_batch_id,
+					status=status,
+					name=name,
+					system_prompt=system_prompt,
+					items=[
+						DBBatchJobItem(
+							custom_id=custom_id,
+							request=block.model_dump_json(exclude={"response"}),
+						)
+						for custom_id, block in requests.items()
+					],
+				)
+				session.add(job)
+				session.flush()
+				job_id = job.id
+		log.debug("Saved batch job %d (%d requests)", job_id, len(requests))
+		return job_id
+
+	@staticmethod
+	def _batch_job_dict(job: DBBatchJob) -> dict:
+		return {
+			"id": job.id,
+			"account_id": job.account_id,
+			"provider_id": job.provider_id,
+			"provider_batch_id": job.provider_batch_id,
+			"name": job.name,
+			"system_prompt": job.system_prompt,
+			"status": job.status,
+			"error": job.error,
+			"item_count": len(job.items),
+			"done_count": sum(1 for item in job.items if item.done),
+			"error_count": sum(1 for item in job.items if item.error),
+			"created_at": job.created_at,
+			"updated_at": job.updated_at,
+		}
+
+	def get_batch_job(self, job_id: int) -> dict | None:
+		"""Get a batch job.
+
+		Args:
+			job_id: The database ID of the job.
+
+		Returns:
+			Dict with id, account_id, provider_id, provider_batch_id, name,
+			system_prompt, status, error, item_count, done_count,
+			error_count, created_at and updated_at; None if not found.
+		"""
+		with self._get_session() as session:
+			job = session.get(DBBatchJob, job_id)
+			return self._batch_job_dict(job) if job else None
+
+	def list_batch_jobs(self, statuses: list[str] | None = None) -> list[dict]:
+		"""List batch jobs, oldest first.
+
+		Args:
+			statuses: Only list the jobs with one of these statuses.
+
+		Returns:
+			List of dicts, as returned by ``get_batch_job``.
+		"""
+		with self._get_session() as session:
+			query = select(DBBatchJob).order_by(DBBatchJob.id)
+			if statuses is not None:
+				query = query.where(DBBatchJob.status.in_(statuses))
+			return [
+				self._batch_job_dict(job)
+				for job in session.execute(query).scalars()
+			]
+
+	def get_pending_batch_requests(
+		self, job_id: int
+	) -> dict[str, MessageBlock]:
+		"""Get the requests of a job whose result is not saved yet.
+
+		Args:
+			job_id: The database ID of the job.
+
+		Returns:
+			The blocks of the pending requests by custom ID.
+		"""
+		with self._get_session() as session:
+			items = session.execute(
+				select(DBBatchJobItem)
+				.where(
+					DBBatchJobItem.job_id == job_id,
+					DBBatchJobItem.done.is_(False),
+				)
+				.order_by(DBBatchJobItem.id)
+			).scalars()
+			return {
+				item.custom_id: MessageBlock.model_validate_json(item.request)
+				for item in items
+			}
+
+	def save_batch_result(
+		self,
+		job_id: int,
+		custom_id: str,
+		conversation: Conversation | None = None,
+		error: str | None = None,
+	) -> int | None:
+		"""Save the result of a batch request as a new conversation.
+
+		The conversation is saved in the same transaction that marks the
+		request done, so a result is never saved twice.
+
+		Args:
+			job_id: The database ID of the job.
+			custom_id: Custom ID of the request.
+			conversation: The conversation holding the completed block, None
+				if the request failed.
+			error: Reason why the request failed, if any.
+
+		Returns:
+			The database ID of the conversation, None if none was saved.
+		"""
+		with self._get_session() as session:
+			with session.begin():
+				item = session.execute(
+					select(DBBatchJobItem).where(
+						DBBatchJobItem.job_id == job_id,
+						DBBatchJobItem.custom_id == custom_id,
+					)
+				).scalar_one_or_none()
+				if item is None or item.done:
+					return None
+				if conversation is not None:
+					item.conversation_id = self._add_conversation(
+						session, conversation
+					)
+				item.error = error
+				item.done = True
+				return item.conversation_id
+
+	def set_batch_job_status(
+		self, job_id: int, status: str, error: str | None = None
+	):
+		"""Update the status of a batch job.
+
+		Args:
+			job_id: The database ID of the job.
+			status: The new status.
+			error: Reason why the job failed, if any.
+		"""
+		with self._get_session() as session:
+			with session.begin():
+				job = session.get(DBBatchJob, job_id)
+				if job is None:
+					return
+				job.status = status
+				job.error = error
+		log.debug("Batch job %d is %s", job_id, status)
+
+	def delete_batch_job(self, job_id: int):
+		"""Delete a batch job, keeping the conversations of its results.
+
+		Args:
+			job_id: The database ID of the job.
+		"""
+		with self._get_session() as session:
+			with session.begin():
+				job = session.get(DBBatchJob, job_id)
+				if job is not None:
+					session.delete(job)
+		log.debug("Deleted batch job %d", job_id)
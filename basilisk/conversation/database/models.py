@@ -39,6 +39,9 @@ class DBConversation(Base):
 		cascade="all, delete-orphan",
 		order_by="DBMessageBlock.position",
 	)
+	summary: Mapped["DBConversationSummary | None"] = relationship(
+		cascade="all, delete-orphan"
+	)
 
 	__table_args__ = (Index("ix_conversations_updated", updated_at.desc()),)
 
@@ -98,6 +101,15 @@ class DBMessageBlock(Base):
 	max_tokens: Mapped[int] = mapped_column(default=4096)
 	top_p: Mapped[float] = mapped_column(default=1.0)
 	stream: Mapped[bool] = mapped_column(default=False)
+	response_id: Mapped[str | None] = mapped_column(default=None)
+	response_chain_digest: Mapped[str | None] = mapped_column(default=None)
+	# Token usage reported by the provider, NULL when not reported
+	account_id: Mapped[str | None] = mapped_column(default=None)
+	input_tokens: Mapped[int | None] = mapped_column(default=None)
+	output_tokens: Mapped[int | None] = mapped_column(default=None)
+	cached_input_tokens: Mapped[int | None] = mapped_column(default=None)
+	reasoning_tokens: Mapped[int | None] = mapped_column(default=None)
+	cost: Mapped[float | None] = mapped_column(default=None)
 	created_at: Mapped[datetime] = mapped_column(
 		default=lambda: datetime.now(timezone.utc)
 	)
@@ -115,6 +127,9 @@ class DBMessageBlock(Base):
 	system_prompt_link: Mapped["DBConversationSystemPrompt | None"] = (
 		relationship()
 	)
+	metrics: Mapped["DBMessageBlockMetrics | None"] = relationship(
+		cascade="all, delete-orphan"
+	)
 
 	__table_args__ = (
 		UniqueConstraint("conversation_id", "position"),
@@ -210,3 +225,118 @@ class DBCitation(Base):
 	end_index: Mapped[int | None] = mapped_column(default=None)
 
 	message: Mapped["DBMessage"] = relationship(back_populates="citations")
+
+
+class DBMessageBlockMetrics(Base):
+	"""Stores the latency metrics of the request that completed a block."""
+
+	__tablename__ = "message_block_metrics"
+
+	message_block_id: Mapped[int] = mapped_column(
+		ForeignKey("message_blocks.id", ondelete="CASCADE"), primary_key=True
+	)
+	prepare_ms: Mapped[float | None] = mapped_column(default=None)
+	request_ms: Mapped[float | None] = mapped_column(default=None)
+	first_chunk_ms: Mapped[float | None] = mapped_column(default=None)
+	total_ms: Mapped[float]
+	chunk_count: Mapped[int] = mapped_column(default=0)
+	chunk_gap_mean_ms: Mapped[float | None] = mapped_column(default=None)
+	chunk_gap_p95_ms: Mapped[float | None] = mapped_column(default=None)
+	chunk_gap_max_ms: Mapped[float | None] = mapped_column(default=None)
+	output_chars: Mapped[int] = mapped_column(default=0)
+	output_tokens: Mapped[int] = mapped_column(default=0)
+	ui_apply_ms: Mapped[float | None] = mapped_column(default=None)
+	cached: Mapped[bool] = mapped_column(default=False)
+	upstream_provider: Mapped[str | None] = mapped_column(default=None)
+
+
+class DBConversationSummary(Base):
+	"""Stores the rolling summary of the oldest blocks of a conversation."""
+
+	__tablename__ = "conversation_summaries"
+
+	conversation_id: Mapped[int] = mapped_column(
+		ForeignKey("conversations.id", ondelete="CASCADE"), primary_key=True
+	)
+	content: Mapped[str]
+	block_count: Mapped[int]
+	digest: Mapped[str]
+	model_provider: Mapped[str]
+	model_id: Mapped[str]
+	created_at: Mapped[datetime] = mapped_column(
+		default=lambda: datetime.now(timezone.utc)
+	)
+
+
+class DBCompletionCacheEntry(Base):
+	"""Stores a provider response by hash of the request that produced it."""
+
+	__tablename__ = "completion_cache"
+
+	id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+	cache_key: Mapped[str] = mapped_column(unique=True)
+	model_provider: Mapped[str]
+	model_id: Mapped[str]
+	content: Mapped[str]
+	citations: Mapped[str | None] = mapped_column(default=None)
+	hit_count: Mapped[int] = mapped_column(default=0)
+	created_at: Mapped[datetime] = mapped_column(
+		default=lambda: datetime.now(timezone.utc)
+	)
+	last_used_at: Mapped[datetime] = mapped_column(
+		default=lambda: datetime.now(timezone.utc)
+	)
+
+	__table_args__ = (Index("ix_completion_cache_last_used", "last_used_at"),)
+
+
+class DBBatchJob(Base):
+	"""Stores a batch of requests submitted to a provider batch API."""
+
+	__tablename__ = "batch_jobs"
+
+	id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+	account_id: Mapped[str]
+	provider_id: Mapped[str]
+	provider_batch_id: Mapped[str]
+	name: Mapped[str | None] = mapped_column(default=None)
+	system_prompt: Mapped[str | None] = mapped_column(default=None)
+	status: Mapped[str]
+	error: Mapped[str | None] = mapped_column(default=None)
+	created_at: Mapped[datetime] = mapped_column(
+		default=lambda: datetime.now(timezone.utc)
+	)
+	updated_at: Mapped[datetime] = mapped_column(
+		default=lambda: datetime.now(timezone.utc),
+		onupdate=lambda: datetime.now(timezone.utc),
+	)
+
+	items: Mapped[list["DBBatchJobItem"]] = relationship(
+		back_populates="job",
+		cascade="all, delete-orphan",
+		order_by="DBBatchJobItem.id",
+	)
+
+	__table_args__ = (Index("ix_batch_jobs_status", "status"),)
+
+
+class DBBatchJobItem(Base):
+	"""Stores a request of a batch job and the conversation of its result."""
+
+	__tablename__ = "batch_job_items"
+
+	id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+	job_id: Mapped[int] = mapped_column(
+		ForeignKey("batch_jobs.id", ondelete="CASCADE")
+	)
+	custom_id: Mapped[str]
+	request: Mapped[str]
+	done: Mapped[bool] = mapped_column(default=False)
+	conversation_id: Mapped[int | None] = mapped_column(
+		ForeignKey("conversations.id", ondelete="SET NULL"), default=None
+	)
+	error: Mapped[str | None] = mapped_column(default=None)
+
+	job: Mapped["DBBatchJob"] = relationship(back_populates="items")
+
+	__table_args__ = (UniqueConstraint("job_id", "custom_id"),)
@@ -0,0 +1,251 @@
+"""Selection of the history blocks sent with a completion request.
+
+Long conversations eventually exceed the context window of the model, and the
+provider rejects the request. A ``HistoryWindowPolicy`` keeps the request
+within a token budget: the newest blocks are kept first, the oldest blocks that
+do not fit even without their attachments are dropped, and the attachments of
+the oldest requests are replaced by a short note while the request is still
+over budget. Token counts come from the local estimator, so the budget
+keeps a safety margin below the context window.
+
+With summarization enabled, the blocks covered by the rolling summary of the
+conversation are replaced by the summary, so the request size stays flat
+however long the conversation grows.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional
+
+from basilisk.token_estimator import estimate_message_tokens
+
+from .conversation_model import (
+	Conversation,
+	Message,
+	MessageBlock,
+	SystemMessage,
+)
+
+if TYPE_CHECKING:
+	from basilisk.provider_ai_model import ProviderAIModel
+
+log = logging.getLogger(__name__)
+
+# Share of the context window used when the budget is derived from it, to
+# absorb estimation errors
+CONTEXT_WINDOW_SAFETY_RATIO = 0.9
+
+
+@dataclass(frozen=True)
+class HistoryWindowPolicy:
+	"""Token budget and compaction applied to the history of a request.
+
+	Attributes:
+		trim: Whether the oldest blocks are dropped to fit the budget.
+		max_input_tokens: Maximum number of input tokens, None to derive it
+			from the context window of the model.
+		keep_attachments_blocks: Number of newest history blocks whose
+			attachments are always sent when they fit.
+		summarize: Whether the oldest blocks are replaced by a rolling
+			summary of the conversation.
+		summary_threshold_tokens: Estimated tokens of the history not yet
+			summarized above which the summary is updated.
+		summary_keep_blocks: Number of newest blocks never summarized.
+	"""
+
+	trim: bool = True
+	max_input_tokens: Optional[int] = None
+	keep_attachments_blocks: int = 2
+	summarize: bool = False
+	summary_threshold_tokens: int = 16000
+	summary_keep_blocks: int = 4
+
+	def input_budget(
+		self, model: Optional[ProviderAIModel], new_block: MessageBlock
+	) -> Optional[int]:
+		"""Compute the number of input tokens available for a request.
+
+		Args:
+			model: The model of the request, if known.
+			new_block: The block to complete.
+
+		Returns:
+			The token budget, or None when it is unknown.
+		"""
+		if self.max_input_tokens:
+			return self.max_input_tokens
+		if model is None or model.context_window <= 0:
+			return None
+		reserved_output = new_block.max_tokens or max(
+			model.max_output_tokens, 0
+		)
+		return int(
+			(model.context_window - reserved_output)
+			* CONTEXT_WINDOW_SAFETY_RATIO
+		)
+
+
+@dataclass
+class HistoryWindow:
+	"""History blocks selected for a completion request.
+
+	Attributes:
+		blocks: The blocks to send, oldest first.
+		stubbed: IDs of the blocks whose request attachments are omitted.
+		dropped: Number of oldest blocks left out.
+		estimated_tokens: Estimated input tokens of the request with the
+			selected blocks, None when not estimated.
+	"""
+
+	blocks: list[MessageBlock]
+	stubbed: set[int] = field(default_factory=set)
+	dropped: int = 0
+	estimated_tokens: Optional[int] = None
+
+	def is_stubbed(self, block: MessageBlock) -> bool:
+		"""Whether the attachments of a block request are omitted."""
+		return id(block) in self.stubbed
+
+
+def history_blocks(
+	blocks: list[MessageBlock], stop_block_index: Optional[int] = None
+) -> list[MessageBlock]:
+	"""Return the answered blocks preceding a position in a conversation.
+
+	Args:
+		blocks: The blocks of the conversation.
+		stop_block_index: Optional index of the first block ignored.
+
+	Returns:
+		The blocks that can be sent as history.
+	"""
+	if stop_block_index is not None:
+		blocks = blocks[:stop_block_index]
+	return [block for block in blocks if block.response]
+
+
+def summarized_history(
+	conversation: Conversation, stop_block_index: Optional[int] = None
+) -> list[MessageBlock]:
+	"""Return the history blocks with the summarized ones replaced.
+
+	The summary is only used when it is up to date for the blocks preceding
+	the stop index; otherwise every answered block is returned.
+
+	Args:
+		conversation: The conversation providing the history.
+		stop_block_index: Optional index of the first block ignored.
+
+	Returns:
+		The blocks that can be sent as history, starting with the synthetic
+		summary block when the summary applies.
+	"""
+	blocks = conversation.messages
+	if stop_block_index is not None:
+		blocks = blocks[:stop_block_index]
+	summary = conversation.summary
+	if summary is None or not summary.covers(blocks):
+		return history_blocks(blocks)
+	return [summary.as_block(), *history_blocks(blocks[summary.block_count :])]
+
+
+def stub_request(message: Message) -> Message:
+	"""Replace the attachments of a request with a note in its text.
+
+	Args:
+		message: The request message.
+
+	Returns:
+		A copy of the message without attachments.
+	"""
+	count = len(message.attachments or ())
+	# Translators: Replaces the attachments of an old message sent to the model when the conversation is too long
+	note = _("[%d attachment(s) omitted]") % count
+	content = f"{message.content}\n{note}" if message.content else note
+	return message.model_copy(update={"content": content, "attachments": None})
+
+
+def _block_tokens(
+	block: MessageBlock, provider_id: Optional[str], with_attachments: bool
+) -> int:
+	tokens = estimate_message_tokens(
+		block.request, provider_id, include_attachments=with_attachments
+	)
+	if block.response:
+		tokens += estimate_message_tokens(block.response, provider_id)
+	return tokens
+
+
+def select_history(
+	blocks: list[MessageBlock],
+	new_block: MessageBlock,
+	system_message: Optional[SystemMessage],
+	budget: Optional[int],
+	provider_id: Optional[str] = None,
+	keep_attachments_blocks: int = 2,
+) -> HistoryWindow:
+	"""Select the newest history blocks fitting in a token budget.
+
+	Blocks are added from the newest to the oldest, counting requests older
+	than the ``keep_attachments_blocks`` newest blocks without their
+	attachments, and the selection stops at the first block that does not
+	fit, so the history sent is always a contiguous suffix of the
+	conversation. The attachments of the oldest selected requests are then
+	omitted only while the request is over budget. Without budget, every
+	block is kept unchanged and only the estimate is computed.
+
+	Args:
+		blocks: The history blocks, oldest first.
+		new_block: The block to complete, always sent.
+		system_message: Optional system message, always sent.
+		budget: Maximum number of input tokens, None for no limit.
+		provider_id: ID of the provider whose tokenizer is approximated.
+		keep_attachments_blocks: Number of newest blocks keeping their
+			attachments.
+
+	Returns:
+		The selected history window.
+	"""
+	used = estimate_message_tokens(new_block.request, provider_id)
+	if system_message:
+		used += estimate_message_tokens(system_message, provider_id)
+	window = HistoryWindow(blocks=[])
+	# Tokens saved by omitting the attachments of each selected block
+	savings = []
+	can_save = 0
+	for age, block in enumerate(reversed(blocks)):
+		tokens = _block_tokens(block, provider_id, True)
+		saving = 0
+		if (
+			budget is not None
+			and age >= keep_attachments_blocks
+			and block.request.attachments
+		):
+			saving = tokens - _block_tokens(block, provider_id, False)
+		if budget is not None and used - can_save + tokens - saving > budget:
+			window.dropped = len(blocks) - age
+			break
+		used += tokens
+		can_save += saving
+		window.blocks.append(block)
+		savings.append(saving)
+	window.blocks.reverse()
+	savings.reverse()
+	for block, saving in zip(window.blocks, savings):
+		if budget is None or used <= budget:
+			break
+		if saving:
+			used -= saving
+			window.stubbed.add(id(block))
+	window.estimated_tokens = used
+	if window.dropped or window.stubbed:
+		log.debug(
+			"History window: %d block(s) dropped, %d stubbed, ~%d tokens of %s",
+			window.dropped,
+			len(window.stubbed),
+			used,
+			budget,
+		)
+	return window
@@ -10,8 +10,6 @@ import time
 from functools import wraps
 from typing import Callable
 
-import wx
-
 logger = logging.getLogger(__name__)
 
 
@@ -30,6 +28,8 @@ def ensure_no_task_running(method: Callable):
 	@wraps(method)
 	def wrapper(instance, *args, **kwargs):
 		if instance.task is not None and instance.task.is_alive():
+			import wx
+
 			logger.error("A task is already running.")
 			wx.MessageBox(
 				_("A task is already running. Please wait for it to complete."),
@@ -67,7 +67,8 @@ def require_list_selection(widget_attr: str):
 				index = widget.GetFirstSelected()
 			else:
 				index = widget.GetSelection()
-			if index == wx.NOT_FOUND:
+			# -1 is wx.NOT_FOUND, wx is not imported by headless code
+			if index == -1:
 				return
 			return method(instance, *args, **kwargs)
 
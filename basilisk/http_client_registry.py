@@ -0,0 +1,336 @@
+"""Process-wide registry of shared keep-alive HTTP clients.
+
+Every SDK client used to build its own connection pool, and the model list,
+attachment and update downloads called the module-level ``httpx.get``, so
+each request paid a new TCP and TLS handshake. The ``HttpClientRegistry``
+hands out one ``httpx.Client`` per transport key (API origin, proxy and
+certificate store setting), shared by every engine and account talking to the
+same endpoint. HTTP/2 is enabled when the optional ``h2`` package is
+installed.
+
+Async SDK clients, used when ``network.use_async_engine`` is set, get an
+``httpx.AsyncClient`` per transport key in the same way, with the same event
+hooks, so cancellation and rate limit observation also apply to them.
+
+``prewarm`` opens a connection in the background, so the first request sent
+after selecting an account does not wait for the handshake.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from functools import cache
+from typing import Any, Callable, Optional
+
+import httpx
+
+import basilisk.config as config
+from basilisk.completion_scheduler import observe_rate_limits
+from basilisk.provider_engine.cancellation import cancellable_event_hooks
+
+log = logging.getLogger(__name__)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Idle connections are kept long enough to survive between two prompts
+KEEPALIVE_EXPIRY = 60.0
+# Same defaults as the provider SDKs, long enough for slow completions
+DEFAULT_TIMEOUT = httpx.Timeout(600.0, connect=10.0)
+# Timeout of the module-level ``httpx.get`` replaced by ``http_get``
+HTTP_GET_TIMEOUT = 5.0
+PREWARM_INTERVAL = 30.0
+PREWARM_TIMEOUT = 10.0
+
+
+@dataclass(frozen=True)
+class TransportKey:
+	"""Identify the connection settings a shared client is built for.
+
+	Attributes:
+		origin: Scheme, host and port of the endpoint, None when unknown.
+		proxy: Explicit proxy URL, None to use the environment settings.
+		use_system_cert_store: Whether the system certificate store is used.
+	"""
+
+	origin: Optional[str]
+	proxy: Optional[str]
+	use_system_cert_store: bool
+
+
+def url_origin(url: Optional[str]) -> Optional[str]:
+	"""Return the scheme, host and port part of a URL.
+
+	Args:
+		url: The URL, may be None.
+
+	Returns:
+		The origin such as ``https://api.openai.com``, None without URL.
+	"""
+	if not url:
+		return None
+	parsed = httpx.URL(str(url))
+	if not parsed.host:
+		return None
+	return f"{parsed.scheme}://{parsed.netloc.decode('ascii')}"
+
+
+def shared_event_hooks() -> dict[str, list[Callable[[Any], None]]]:
+	"""Return the event hooks of the shared clients.
+
+	Responses are tracked for cancellation, and their rate limit headers are
+	reported to the completion scheduler.
+	"""
+	event_hooks = cancellable_event_hooks()
+	event_hooks["response"].append(observe_rate_limits)
+	return event_hooks
+
+
+def async_event_hooks(
+	event_hooks: dict[str, list[Callable[[Any], None]]],
+) -> dict[str, list[Callable[[Any], Any]]]:
+	"""Adapt httpx event hooks to an ``httpx.AsyncClient``.
+
+	An async client awaits its hooks, so each hook is wrapped in a coroutine
+	function calling it.
+
+	Args:
+		event_hooks: The hooks of a blocking client.
+
+	Returns:
+		The same hooks, awaitable.
+	"""
+	return {
+		event: [_awaitable_hook(hook) for hook in hooks]
+		for event, hooks in event_hooks.items()
+	}
+
+
+def _awaitable_hook(hook: Callable[[Any], None]) -> Callable[[Any], Any]:
+	async def run_hook(target: Any) -> None:
+		hook(target)
+
+	return run_hook
+
+
+class HttpClientRegistry:
+	"""Create and share one keep-alive HTTP client per transport key.
+
+	Blocking and async clients are kept apart, each kind having one client
+	per key.
+	"""
+
+	def __init__(self, http2: bool = HTTP2_AVAILABLE):
+		"""Initialize an empty registry.
+
+		Args:
+			http2: Whether the clients negotiate HTTP/2.
+		"""
+		self.http2 = http2
+		self._clients: dict[TransportKey, httpx.Client] = {}
+		self._async_clients: dict[TransportKey, httpx.AsyncClient] = {}
+		self._prewarmed_at: dict[TransportKey, float] = {}
+		self._lock = threading.Lock()
+
+	def key_for(
+		self, url: Optional[str] = None, proxy: Optional[str] = None
+	) -> TransportKey:
+		"""Build the transport key of a URL.
+
+		Args:
+			url: Any URL of the endpoint, usually the API base URL.
+			proxy: Explicit proxy URL.
+
+		Returns:
+			The key identifying the shared client to use.
+		"""
+		return TransportKey(
+			origin=url_origin(url),
+			proxy=proxy,
+			use_system_cert_store=config.conf().network.use_system_cert_store,
+		)
+
+	def get_client(
+		self, url: Optional[str] = None, proxy: Optional[str] = None
+	) -> httpx.Client:
+		"""Return the shared client for a URL, creating it if needed.
+
+		Args:
+			url: Any URL of the endpoint, usually the API base URL.
+			proxy: Explicit proxy URL.
+
+		Returns:
+			A keep-alive client shared by every caller with the same key.
+		"""
+		key = self.key_for(url, proxy)
+		with self._lock:
+			client = self._clients.get(key)
+			if client is None or client.is_closed:
+				client = self._clients[key] = self._create_client(key)
+			return client
+
+	def _create_client(self, key: TransportKey) -> httpx.Client:
+		log.debug(
+			"Creating shared HTTP client for %s (http2=%s)",
+			key.origin or "any origin",
+			self.http2,
+		)
+		return httpx.Client(
+			event_hooks=shared_event_hooks(), **self._client_options(key)
+		)
+
+	def get_async_client(
+		self, url: Optional[str] = None, proxy: Optional[str] = None
+	) -> httpx.AsyncClient:
+		"""Return the shared async client for a URL, creating it if needed.
+
+		Async clients are only used on the shared event loop thread (see
+		``basilisk.async_loop``), so their connection pools are never used
+		by two loops.
+
+		Args:
+			url: Any URL of the endpoint, usually the API base URL.
+			proxy: Explicit proxy URL.
+
+		Returns:
+			A keep-alive async client shared by every caller with the same key.
+		"""
+		key = self.key_for(url, proxy)
+		with self._lock:
+			client = self._async_clients.get(key)
+			if client is None or client.is_closed:
+				client = self._create_async_client(key)
+				self._async_clients[key] = client
+			return client
+
+	def _create_async_client(self, key: TransportKey) -> httpx.AsyncClient:
+		log.debug(
+			"Creating shared async HTTP client for %s (http2=%s)",
+			key.origin or "any origin",
+			self.http2,
+		)
+		return httpx.AsyncClient(
+			event_hooks=async_event_hooks(shared_event_hooks()),
+			**self._client_options(key),
+		)
+
+	def _client_options(self, key: TransportKey) -> dict[str, Any]:
+		"""Return the settings shared by the blocking and async clients."""
+		return {
+			"http2": self.http2,
+			"proxy": key.proxy,
+			"follow_redirects": True,
+			"timeout": DEFAULT_TIMEOUT,
+			"limits": httpx.Limits(
+				max_connections=100,
+				max_keepalive_connections=20,
+				keepalive_expiry=KEEPALIVE_EXPIRY,
+			),
+		}
+
+	def prewarm(self, url: Optional[str], proxy: Optional[str] = None) -> None:
+		"""Open a connection to the URL's origin in a background thread.
+
+		Nothing is done when the origin was prewarmed recently, since its
+		connection is still in the pool.
+
+		Args:
+			url: Any URL of the endpoint, usually the API base URL.
+			proxy: Explicit proxy URL.
+		"""
+		key = self.key_for(url, proxy)
+		if key.origin is None:
+			return
+		now = time.monotonic()
+		with self._lock:
+			last = self._prewarmed_at.get(key)
+			if last is not None and now - last < PREWARM_INTERVAL:
+				return
+			self._prewarmed_at[key] = now
+		client = self.get_client(url, proxy)
+		threading.Thread(
+			target=self._open_connection,
+			args=(client, key.origin),
+			name="http-prewarm",
+			daemon=True,
+		).start()
+
+	@staticmethod
+	def _open_connection(client: httpx.Client, origin: str) -> None:
+		"""Send a HEAD request leaving an open connection in the pool."""
+		start = time.perf_counter()
+		try:
+			client.head(origin, follow_redirects=False, timeout=PREWARM_TIMEOUT)
+		except httpx.HTTPError as e:
+			log.debug("Unable to prewarm connection to %s: %s", origin, e)
+			return
+		log.debug(
+			"Prewarmed connection to %s in %.0f ms",
+			origin,
+			(time.perf_counter() - start) * 1000,
+		)
+
+	def close_all(self) -> None:
+		"""Close every shared client.
+
+		Async clients are dropped without being closed: closing them needs
+		the event loop thread, which is stopped first on exit.
+		"""
+		with self._lock:
+			clients = list(self._clients.values())
+			self._clients.clear()
+			self._async_clients.clear()
+			self._prewarmed_at.clear()
+		for client in clients:
+			client.close()
+
+
+@cache
+def get_http_client_registry() -> HttpClientRegistry:
+	"""Return the registry shared by the whole application."""
+	return HttpClientRegistry()
+
+
+def get_http_client(url: Optional[str] = None) -> httpx.Client:
+	"""Return the shared client for a URL.
+
+	Args:
+		url: Any URL of the endpoint.
+
+	Returns:
+		The shared keep-alive client.
+	"""
+	return get_http_client_registry().get_client(url)
+
+
+def get_async_http_client(url: Optional[str] = None) -> httpx.AsyncClient:
+	"""Return the shared async client for a URL.
+
+	Args:
+		url: Any URL of the endpoint.
+
+	Returns:
+		The shared keep-alive async client.
+	"""
+	return get_http_client_registry().get_async_client(url)
+
+
+def http_get(url: str, **kwargs: Any) -> httpx.Response:
+	"""Send a GET request through the shared client of the URL's origin.
+
+	Drop-in replacement for ``httpx.get``: redirects are only followed when
+	``follow_redirects`` is set, and the same default timeout applies.
+
+	Args:
+		url: The URL to get.
+		**kwargs: Arguments passed to ``httpx.Client.get``.
+
+	Returns:
+		The response.
+	"""
+	kwargs.setdefault("follow_redirects", False)
+	kwargs.setdefault("timeout", HTTP_GET_TIMEOUT)
+	return get_http_client(url).get(url, **kwargs)
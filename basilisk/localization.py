@@ -1,17 +1,21 @@
 """Module to handle the translation of the application."""
 
+from __future__ import annotations
+
 import gettext
 import locale
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-import wx
 from babel import Locale
 
 from .consts import APP_NAME, DEFAULT_LANG
 from .global_vars import resource_path
 
+if TYPE_CHECKING:
+	import wx
+
 log = logging.getLogger(__name__)
 
 
@@ -66,6 +70,8 @@ def get_wx_locale(current_locale: Locale) -> wx.Locale:
 	Returns:
 		The wxPython locale object for the current locale.
 	"""
+	import wx
+
 	find_language = wx.Locale.FindLanguageInfo(current_locale.language)
 	if find_language:
 		log.debug(
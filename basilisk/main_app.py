@@ -17,8 +17,10 @@ import basilisk.config as config
 import basilisk.global_vars as global_vars
 
 # don't use relative import here, CxFreeze will fail to find the module
+from basilisk.async_loop import get_async_loop
 from basilisk.consts import APP_NAME
 from basilisk.conversation.database import ConversationDatabase
+from basilisk.http_client_registry import get_http_client_registry
 from basilisk.ipc import BasiliskIpc, FocusSignal, OpenBskcSignal
 from basilisk.localization import init_translation
 from basilisk.logger import (
@@ -27,6 +29,7 @@ from basilisk.logger import (
 	setup_logging,
 )
 from basilisk.server_thread import ServerThread
+from basilisk.services.batch_service import BatchService
 from basilisk.sound_manager import initialize_sound_manager
 from basilisk.updater import automatic_update_check, automatic_update_download
 
@@ -72,6 +75,7 @@ class MainApp(wx.App):
 		self.locale = init_translation(language)
 		log.info("translation initialized")
 		self.init_conversation_db()
+		self.init_batch_service()
 		initialize_sound_manager()
 		log.info("sound manager initialized")
 		self.init_main_frame()
@@ -143,6 +147,8 @@ class MainApp(wx.App):
 		Performs the following cleanup tasks:
 		- Stops and joins the server thread if it exists
 		- Stops and joins the automatic update thread if running
+		- Stops polling the pending batch jobs
+		- Cancels the requests running on the shared event loop
 		- Stops and joins the file watcher
 		- Removes temporary files
 		- Logs exit-related events
@@ -159,6 +165,10 @@ class MainApp(wx.App):
 			self.stop_auto_update = True
 			self.auto_update.join()
 			log.info("Automatic update thread stopped")
+		if self.batch_service:
+			self.batch_service.stop(timeout=5)
+		get_async_loop().stop()
+		get_http_client_registry().close_all()
 		# Stop IPC mechanism (Windows named pipes or file watcher)
 		# Clean up IPC
 		if self.ipc:
@@ -208,6 +218,17 @@ class MainApp(wx.App):
 			)
 			self.conv_db = None
 
+	def init_batch_service(self) -> None:
+		"""Resume polling the batch jobs submitted before the last exit."""
+		self.batch_service = None
+		if self.conv_db is None:
+			return
+		self.batch_service = BatchService(lambda: self.conv_db)
+		try:
+			self.batch_service.resume()
+		except Exception:
+			log.error("Failed to resume batch jobs", exc_info=True)
+
 	def close_conversation_db(self):
 		"""Close the database connection and release the singleton."""
 		if self.conv_db is None:
@@ -0,0 +1,68 @@
+"""Cost of completion requests at the catalog prices of their model.
+
+Catalog rows carry a ``pricing`` map of US dollars per token (or per
+request), keyed by usage type as in the OpenRouter API: ``prompt``,
+``completion``, ``input_cache_read``, ``request``… The raw map is kept in
+``ProviderAIModel.extra_info`` under :data:`PRICING_RATES_EXTRA_KEY`, next to
+the human-readable summary.
+"""
+
+from __future__ import annotations
+
+import logging
+from decimal import Decimal, InvalidOperation
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+	from basilisk.conversation.conversation_model import TokenUsage
+
+log = logging.getLogger(__name__)
+
+# Same key as read by ``display`` to summarize the rates.
+PRICING_RATES_EXTRA_KEY = "pricing_rates"
+
+
+def _rate(pricing: dict[str, Any], usage_type: str) -> Optional[Decimal]:
+	raw = pricing.get(usage_type)
+	if raw is None:
+		return None
+	try:
+		rate = Decimal(str(raw))
+	except InvalidOperation:
+		log.debug("Invalid %s price: %r", usage_type, raw)
+		return None
+	# OpenRouter uses -1 for variable prices, such as its auto router
+	return rate if rate.is_finite() and rate >= 0 else None
+
+
+def compute_cost(pricing: Any, usage: TokenUsage) -> Optional[float]:
+	"""Compute the cost of a response from its token usage.
+
+	Input tokens read from the prompt cache are billed at the cache read rate
+	when the catalog has one. Reasoning tokens are part of the output tokens.
+
+	Args:
+		pricing: The pricing map of the model, in US dollars per token.
+		usage: The token usage of the response.
+
+	Returns:
+		The cost in US dollars, or None when the model has no input or
+		output price.
+	"""
+	if not isinstance(pricing, dict):
+		return None
+	prompt = _rate(pricing, "prompt")
+	completion = _rate(pricing, "completion")
+	if prompt is None or completion is None:
+		return None
+	cache_read = _rate(pricing, "input_cache_read")
+	if cache_read is None:
+		cache_read = prompt
+	cached = min(usage.cached_input_tokens, usage.input_tokens)
+	cost = (
+		(usage.input_tokens - cached) * prompt
+		+ cached * cache_read
+		+ usage.output_tokens * completion
+		+ (_rate(pricing, "request") or 0)
+	)
+	return float(cost)
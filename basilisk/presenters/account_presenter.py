@@ -14,19 +14,32 @@ from pydantic import SecretStr
 
 from basilisk.config import (
 	CUSTOM_BASE_URL_PATTERN,
+	KEEP_ALIVE_PATTERN,
 	Account,
 	AccountOrganization,
 	AccountSource,
 	KeyStorageMethodEnum,
 )
 from basilisk.presenters.presenter_mixins import ManagerCrudMixin
+from basilisk.provider_capability import ProviderCapability
 
 if TYPE_CHECKING:
 	from basilisk.config import AccountManager
+	from basilisk.provider import Provider
 
 key_storage_methods = KeyStorageMethodEnum.get_labels()
 
 
+def supports_keep_alive(provider: Provider) -> bool:
+	"""Whether the engine of a provider keeps models loaded between requests.
+
+	Args:
+		provider: The provider to check.
+	"""
+	capabilities = provider.engine_cls.capabilities
+	return ProviderCapability.MODEL_KEEP_ALIVE in capabilities
+
+
 class EditAccountOrganizationPresenter:
 	"""Presenter for the edit/create organization dialog.
 
@@ -214,6 +227,17 @@ class EditAccountPresenter:
 					"custom_base_url_text_ctrl",
 				)
 
+		if supports_keep_alive(provider):
+			keep_alive = self.view.keep_alive_text_ctrl.GetValue().strip()
+			if keep_alive and not re.match(KEEP_ALIVE_PATTERN, keep_alive):
+				return (
+					# Translators: An error in account dialog
+					_(
+						"Please enter a keep-alive duration in seconds or such as 10m or 1h"
+					),
+					"keep_alive_text_ctrl",
+				)
+
 		return None
 
 	def build_account(self) -> Account:
@@ -246,6 +270,11 @@ class EditAccountPresenter:
 		if not provider.allow_custom_base_url or not custom_base_url.strip():
 			custom_base_url = None
 
+		keep_alive = None
+		if supports_keep_alive(provider):
+			keep_alive = self.view.keep_alive_text_ctrl.GetValue().strip()
+			keep_alive = keep_alive or None
+
 		if self.account:
 			self.account.name = self.view.name.GetValue()
 			self.account.provider = provider
@@ -253,6 +282,7 @@ class EditAccountPresenter:
 			self.account.api_key = api_key
 			self.account.active_organization_id = active_organization
 			self.account.custom_base_url = custom_base_url
+			self.account.keep_alive = keep_alive
 		else:
 			self.account = Account(
 				name=self.view.name.GetValue(),
@@ -262,6 +292,7 @@ class EditAccountPresenter:
 				active_organization_id=active_organization,
 				source=AccountSource.CONFIG,
 				custom_base_url=custom_base_url,
+				keep_alive=keep_alive,
 			)
 		return self.account
 
@@ -9,7 +9,7 @@ from __future__ import annotations
 import datetime
 import logging
 import re
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable, Optional
 
 import basilisk.config as config
 from basilisk.conversation import (
@@ -19,6 +19,11 @@ from basilisk.conversation import (
 	parse_supported_attachment_formats,
 )
 from basilisk.services.attachment_service import AttachmentService
+from basilisk.token_estimator import (
+	MESSAGE_OVERHEAD_TOKENS,
+	estimate_attachment_tokens,
+	estimate_text_tokens,
+)
 
 if TYPE_CHECKING:
 	from upath import UPath
@@ -51,6 +56,9 @@ class PromptAttachmentPresenter:
 		attachment_files: Current list of attachment objects.
 		current_engine: Currently selected provider engine.
 		attachment_service: Service for async URL downloads.
+		input_tokens_estimator: Optional callable returning the estimated
+			input tokens of the whole request and the token budget, used
+			instead of the prompt alone when set.
 	"""
 
 	def __init__(
@@ -70,6 +78,9 @@ class PromptAttachmentPresenter:
 			on_download_success=self._on_attachment_downloaded,
 			on_download_error=self._on_attachment_download_error,
 		)
+		self.input_tokens_estimator: Optional[
+			Callable[[], Optional[tuple[int, Optional[int]]]]
+		] = None
 
 	# ------------------------------------------------------------------
 	# State management
@@ -106,6 +117,46 @@ class PromptAttachmentPresenter:
 	# Queries
 	# ------------------------------------------------------------------
 
+	def estimate_prompt_tokens(self) -> int:
+		"""Estimate the tokens of the prompt text and attachments.
+
+		Returns:
+			The estimated number of tokens.
+		"""
+		provider_id = (
+			self.current_engine.account.provider.id
+			if self.current_engine
+			else None
+		)
+		return (
+			MESSAGE_OVERHEAD_TOKENS
+			+ estimate_text_tokens(self.view.get_prompt_text(), provider_id)
+			+ sum(map(estimate_attachment_tokens, self.attachment_files))
+		)
+
+	def get_token_estimate_text(self) -> str:
+		"""Build the token estimate label shown below the prompt.
+
+		Returns:
+			The label text.
+		"""
+		estimate = None
+		if self.input_tokens_estimator:
+			try:
+				estimate = self.input_tokens_estimator()
+			except Exception:
+				log.debug("Unable to estimate request tokens", exc_info=True)
+		if estimate is None:
+			estimate = (self.estimate_prompt_tokens(), None)
+		tokens, budget = estimate
+		if budget:
+			# Translators: Estimated size of the request, e.g. "Estimated tokens: 1200 of 180000"
+			return _("Estimated tokens: {tokens} of {budget}").format(
+				tokens=tokens, budget=budget
+			)
+		# Translators: Estimated size of the request
+		return _("Estimated tokens: {tokens}").format(tokens=tokens)
+
 	def has_image_attachments(self) -> bool:
 		"""Check if any attachment is an image.
 
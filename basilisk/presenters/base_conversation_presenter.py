@@ -14,6 +14,7 @@ from typing import TYPE_CHECKING, Callable
 import basilisk.config as config
 from basilisk.model_catalog.sampling import sampling_visibility_for_main_ui
 from basilisk.provider_ai_model import ProviderAIModel
+from basilisk.provider_capability import ProviderCapability
 from basilisk.services.account_model_service import AccountModelService
 
 if TYPE_CHECKING:
@@ -24,6 +25,9 @@ if TYPE_CHECKING:
 log = logging.getLogger(__name__)
 
 _MODEL_LOADER_JOIN_TIMEOUT_S = 5.0
+# Interval at which a worker waiting for a model list refresh checks whether
+# it was cancelled
+_MODEL_REFRESH_POLL_S = 0.2
 
 
 class BaseConversationPresenter:
@@ -54,6 +58,7 @@ class BaseConversationPresenter:
 		self._model_loading_generation: int = 0
 		self._pending_model_id: str | None = None
 		self._pending_model_account_id: UUID | None = None
+		self._warm_up_generation: int = 0
 
 	def get_engine(self, account: config.Account) -> BaseEngine:
 		"""Get or create an engine for the given account.
@@ -66,6 +71,19 @@ class BaseConversationPresenter:
 		"""
 		return self.account_model_service.get_engine(account)
 
+	def prewarm_connection(self, account: config.Account) -> None:
+		"""Open a connection to the account's API in the background.
+
+		Failures are only logged: the first request reports them if needed.
+
+		Args:
+			account: The newly selected account.
+		"""
+		try:
+			self.get_engine(account).prewarm_connection()
+		except Exception as e:
+			log.debug("Unable to prewarm connection: %s", e)
+
 	def invalidate_engine_models_cache(self, engine: BaseEngine | None) -> None:
 		"""Clear the engine's model list cache so the next access reloads it."""
 		if engine is not None:
@@ -138,13 +156,15 @@ class BaseConversationPresenter:
 		cancel_event: threading.Event,
 		on_loaded: Callable,
 	) -> None:
-		"""Worker: load models and invoke the callback on this worker thread."""
+		"""Worker: load models and invoke the callback on this worker thread.
+
+		An expired list is shown at once while the engine refreshes it; the
+		callback is invoked again if the refreshed list differs.
+		"""
 		error_message: str | None = None
 		try:
 			models = list(engine.models)
 			error_message = engine.get_model_loading_error()
-			if error_message and not models:
-				engine.invalidate_models_cache()
 		except Exception:
 			log.exception("Failed to load models for account %s", account_id)
 			error_message = _(
@@ -156,6 +176,20 @@ class BaseConversationPresenter:
 		if generation != self._model_loading_generation:
 			return
 		on_loaded(account_id, models, error_message)
+		try:
+			while not engine.wait_models_refresh(_MODEL_REFRESH_POLL_S):
+				if cancel_event.is_set():
+					return
+			refreshed = list(engine.models)
+		except Exception:
+			log.exception("Failed to refresh models for account %s", account_id)
+			return
+		if cancel_event.is_set():
+			return
+		if generation != self._model_loading_generation:
+			return
+		if refreshed != models:
+			on_loaded(account_id, refreshed, engine.get_model_loading_error())
 
 	def shutdown_model_loading(self) -> None:
 		"""Cancel and invalidate any in-flight model loading worker."""
@@ -169,6 +203,79 @@ class BaseConversationPresenter:
 		if thread is not None and thread.is_alive():
 			thread.join(timeout=_MODEL_LOADER_JOIN_TIMEOUT_S)
 
+	def start_model_warm_up(
+		self,
+		account: config.Account,
+		model_id: str,
+		on_status: Callable[[str, bool | None], None],
+	) -> bool:
+		"""Load the selected model in memory in a background thread.
+
+		Only engines keeping local models loaded between requests are
+		warmed up. A newer warm-up discards the status of older ones.
+
+		Args:
+			account: The selected account.
+			model_id: The ID of the selected model.
+			on_status: Callback invoked on the worker thread with the model
+				ID and whether the model is loaded, None when unknown.
+
+		Returns:
+			Whether a warm-up was started.
+		"""
+		engine = self.get_engine(account)
+		if ProviderCapability.MODEL_KEEP_ALIVE not in engine.capabilities:
+			return False
+		self._warm_up_generation += 1
+		threading.Thread(
+			target=self._warm_up_in_background,
+			args=(engine, model_id, self._warm_up_generation, on_status),
+			name=f"model-warm-up-{account.id}",
+			daemon=True,
+		).start()
+		return True
+
+	def _warm_up_in_background(
+		self,
+		engine: BaseEngine,
+		model_id: str,
+		generation: int,
+		on_status: Callable[[str, bool | None], None],
+	) -> None:
+		"""Worker: load the model, then report whether it is resident."""
+		try:
+			engine.warm_up_model(model_id)
+		except Exception as e:
+			log.debug("Unable to warm up model %s: %s", model_id, e)
+		try:
+			loaded = engine.is_model_loaded(model_id)
+		except Exception as e:
+			log.debug("Unable to check if model %s is loaded: %s", model_id, e)
+			loaded = None
+		if generation == self._warm_up_generation:
+			on_status(model_id, loaded)
+
+	def cancel_model_warm_up(self) -> None:
+		"""Discard the status of the in-flight warm-up, if any."""
+		self._warm_up_generation += 1
+
+	@staticmethod
+	def get_model_status_text(loaded: bool | None) -> str:
+		"""Return the text of the model residency indicator.
+
+		Args:
+			loaded: Whether the model is loaded in memory, None when
+				unknown.
+		"""
+		if loaded is None:
+			# Translators: Status of a local model when the host does not tell whether it is loaded in memory
+			return _("Model memory: unknown")
+		if loaded:
+			# Translators: Status of a local model loaded in memory, ready to answer quickly
+			return _("Model memory: loaded")
+		# Translators: Status of a local model not loaded in memory, the next request loads it first
+		return _("Model memory: not loaded")
+
 	def set_pending_model(self, model_id: str, account_id: UUID) -> None:
 		"""Store a deferred model selection to be applied once models load.
 
@@ -21,6 +21,11 @@ from basilisk.conversation import (
 	MessageRoleEnum,
 	SystemMessage,
 )
+from basilisk.conversation.history_window import (
+	history_blocks,
+	select_history,
+	summarized_history,
+)
 from basilisk.presenters.presenter_mixins import (
 	DestroyGuardMixin,
 	_guard_destroying,
@@ -31,6 +36,7 @@ from basilisk.services.conversation_service import ConversationService
 from basilisk.sound_manager import play_sound, stop_sound
 
 if TYPE_CHECKING:
+	from basilisk.completion_scheduler import SchedulerStats
 	from basilisk.recording_thread import RecordingThread
 	from basilisk.views.conversation_tab import ConversationTab
 
@@ -93,7 +99,11 @@ class ConversationPresenter(DestroyGuardMixin):
 			on_stream_finish=self._on_stream_finish,
 			on_non_stream_finish=self._on_non_stream_finish,
 			on_error=self._on_completion_error,
+			get_completion_cache=lambda: self.service.completion_cache,
+			on_queued=self._on_completion_queued,
+			on_retry=self._on_completion_retry,
 		)
+		self._waiting_status = False
 
 	# -- Submission flow --
 
@@ -121,14 +131,17 @@ class ConversationPresenter(DestroyGuardMixin):
 		self._store_prompt_content()
 		view.prompt_panel.clear(refresh=True)
 
-		completion_kwargs = {}
-		if (
-			ProviderCapability.WEB_SEARCH
-			in view.current_account.provider.engine_cls.capabilities
-		):
+		completion_kwargs = {"history_window": view.history_window}
+		capabilities = view.current_account.provider.engine_cls.capabilities
+		if ProviderCapability.WEB_SEARCH in capabilities:
 			completion_kwargs["web_search_mode"] = (
 				view.web_search_mode.GetValue()
 			)
+		if (
+			ProviderCapability.PROVIDER_ROUTING in capabilities
+			and view.provider_routing
+		):
+			completion_kwargs["provider_routing"] = view.provider_routing
 
 		self.completion_handler.start_completion(
 			engine=view.current_engine,
@@ -172,18 +185,68 @@ class ConversationPresenter(DestroyGuardMixin):
 			stream=view.stream_mode.GetValue(),
 		)
 
+	def estimate_input_tokens(self) -> tuple[int, Optional[int]] | None:
+		"""Estimate the input tokens of the request the prompt would send.
+
+		The estimate covers the system prompt, the history selected or
+		summarized by the history window policy of the tab and the prompt
+		with its attachments.
+
+		Returns:
+			A tuple of (estimated tokens, token budget or None), or None when
+			no model is selected.
+		"""
+		view = self.view
+		engine = view.current_engine
+		model = view.current_model
+		if not engine or not model:
+			return None
+		new_block = MessageBlock(
+			request=Message(
+				role=MessageRoleEnum.USER,
+				content=view.prompt_panel.prompt_text,
+				attachments=view.prompt_panel.attachment_files or None,
+			),
+			model=AIModelInfo(
+				provider_id=engine.account.provider.id, model_id=model.id
+			),
+			max_tokens=view.max_tokens_spin_ctrl.GetValue(),
+		)
+		policy = view.history_window
+		budget = None
+		blocks = history_blocks(self.conversation.messages)
+		if policy:
+			if policy.trim:
+				budget = policy.input_budget(model, new_block)
+			if policy.summarize:
+				blocks = summarized_history(self.conversation)
+		window = select_history(
+			blocks,
+			new_block,
+			self.get_system_message(),
+			budget,
+			provider_id=engine.account.provider.id,
+			keep_attachments_blocks=(
+				policy.keep_attachments_blocks if policy else 0
+			),
+		)
+		return window.estimated_tokens, budget
+
 	def get_completion_args(self) -> dict[str, Any] | None:
 		"""Get the arguments for the completion request."""
 		new_block = self.get_new_message_block()
 		if not new_block:
 			return None
 		view = self.view
-		completion_args = {}
+		completion_args = {"history_window": view.history_window}
+		capabilities = view.current_account.provider.engine_cls.capabilities
+		if ProviderCapability.WEB_SEARCH in capabilities:
+			completion_args["web_search_mode"] = view.web_search_mode.GetValue()
 		if (
-			ProviderCapability.WEB_SEARCH
-			in view.current_account.provider.engine_cls.capabilities
+			ProviderCapability.PROVIDER_ROUTING in capabilities
+			and view.provider_routing
 		):
-			completion_args["web_search_mode"] = view.web_search_mode.GetValue()
+			completion_args["provider_routing"] = view.provider_routing
 
 		return completion_args | {
 			"engine": view.current_engine,
@@ -212,6 +275,7 @@ class ConversationPresenter(DestroyGuardMixin):
 			self.recording_thread = None
 		stop_sound()
 		self.flush_draft()
+		self.service.release_context_caches(self.conversation)
 
 	@_guard_destroying
 	def _on_completion_start(self):
@@ -221,18 +285,75 @@ class ConversationPresenter(DestroyGuardMixin):
 		if config.conf().conversation.focus_history_after_send:
 			self.view.messages.SetFocus()
 
+	@_guard_destroying
+	def _on_completion_queued(self, stats: SchedulerStats):
+		"""Called when the request waits for the rate limits of its account."""
+		self._waiting_status = True
+		self.view.SetStatusText(
+			# Translators: Status shown while a request waits for other requests or the rate limits of its account. %(account)s is the account name
+			_("Waiting for %(account)s: %(active)d running, %(queued)d queued")
+			% {
+				"account": stats.label,
+				"active": stats.active,
+				"queued": stats.queued,
+			}
+		)
+
+	@_guard_destroying
+	def _on_completion_retry(
+		self, attempt: int, max_attempts: int, delay: float
+	):
+		"""Called when a failed request will be sent again."""
+		self._waiting_status = True
+		self.view.SetStatusText(
+			# Translators: Status shown when a request failed and is sent again after a delay
+			_(
+				"Request failed, retrying in %(delay).0f s (attempt %(next)d of %(max)d)"
+			)
+			% {"delay": delay, "next": attempt + 1, "max": max_attempts}
+		)
+
+	def _clear_waiting_status(self):
+		"""Reset the status bar once a waiting request has started."""
+		if self._waiting_status:
+			self._waiting_status = False
+			self.view.SetStatusText(_("Ready"))
+
 	@_guard_destroying
 	def _on_completion_end(self, success: bool):
 		"""Called when completion ends."""
+		self._clear_waiting_status()
 		self.view.stop_completion_btn.Hide()
 		self.view.submit_btn.Enable()
+		self.view.prompt_panel.schedule_token_estimate()
 
 		if success:
 			self._clear_stored_content()
+			self._start_summary_update()
 
 		if success and config.conf().conversation.focus_history_after_send:
 			self.view.messages.SetFocus()
 
+	def _start_summary_update(self):
+		"""Summarize the oldest blocks when the history grows too long."""
+		policy = self.view.history_window
+		engine = self.view.current_engine
+		if not policy or not policy.summarize or not engine:
+			return
+		model = self.view.current_model
+		if not model:
+			return
+		try:
+			model_info = AIModelInfo(
+				provider_id=engine.account.provider.id,
+				model_id=engine.get_summary_model(model.id),
+			)
+			self.service.start_summary_update(
+				engine, self.conversation, policy, model_info
+			)
+		except Exception:
+			log.error("Unable to start the summary update", exc_info=True)
+
 	@_guard_destroying
 	def _on_stream_chunk(self, chunk: str):
 		"""Called for each streaming chunk."""
@@ -243,6 +364,7 @@ class ConversationPresenter(DestroyGuardMixin):
 		self, new_block: MessageBlock, system_message: Optional[SystemMessage]
 	):
 		"""Called when streaming starts."""
+		self._clear_waiting_status()
 		self.conversation.add_block(new_block, system_message)
 		self.view.messages.display_new_block(new_block, streaming=True)
 		self.view.messages.SetInsertionPointEnd()
@@ -13,6 +13,7 @@ from pydantic import ValidationError
 
 from basilisk.config import ConversationProfile
 from basilisk.presenters.presenter_mixins import ManagerCrudMixin
+from basilisk.provider_routing import RoutingSort, parse_provider_names
 
 if TYPE_CHECKING:
 	from basilisk.config.conversation_profile import ConversationProfileManager
@@ -92,6 +93,31 @@ class EditConversationProfilePresenter:
 			self.profile.top_p = None
 
 		self.profile.stream_mode = self.view.stream_mode.GetValue()
+		self.profile.trim_history = self.view.trim_history_checkbox.GetValue()
+		self.profile.summarize_history = (
+			self.view.summarize_history_checkbox.GetValue()
+		)
+		max_history_tokens = self.view.max_history_tokens_spin.GetValue()
+		self.profile.max_history_tokens = (
+			max_history_tokens
+			if self.profile.trim_history and max_history_tokens > 0
+			else None
+		)
+		sort_index = self.view.routing_sort_combo.GetSelection()
+		self.profile.routing_sort = (
+			list(RoutingSort.get_labels())[sort_index - 1]
+			if sort_index > 0
+			else None
+		)
+		self.profile.routing_only = parse_provider_names(
+			self.view.routing_only_txt.GetValue()
+		)
+		self.profile.routing_ignore = parse_provider_names(
+			self.view.routing_ignore_txt.GetValue()
+		)
+		self.profile.routing_allow_fallbacks = (
+			self.view.routing_allow_fallbacks_checkbox.GetValue()
+		)
 		try:
 			ConversationProfile.model_validate(self.profile)
 		except ValidationError as e:
@@ -22,6 +22,7 @@ from basilisk.conversation.conversation_model import (
 )
 from basilisk.presenters.presenter_mixins import DestroyGuardMixin
 from basilisk.provider_ai_model import AIModelInfo
+from basilisk.provider_capability import ProviderCapability
 
 if TYPE_CHECKING:
 	from basilisk.services.conversation_service import ConversationService
@@ -74,6 +75,9 @@ class EditBlockPresenter(DestroyGuardMixin):
 			on_stream_start=self._on_stream_start,
 			on_stream_finish=self._on_stream_finish,
 			on_non_stream_finish=self._on_non_stream_finish,
+			get_completion_cache=lambda: (
+				self.service.completion_cache if self.service else None
+			),
 		)
 
 	# ------------------------------------------------------------------
@@ -121,6 +125,13 @@ class EditBlockPresenter(DestroyGuardMixin):
 			max_tokens=self.view.max_tokens_spin_ctrl.GetValue(),
 			stream=self.view.stream_mode.GetValue(),
 		)
+		completion_kwargs = {"history_window": self.view.history_window}
+		if (
+			ProviderCapability.PROVIDER_ROUTING
+			in account.provider.engine_cls.capabilities
+			and self.view.provider_routing
+		):
+			completion_kwargs["provider_routing"] = self.view.provider_routing
 
 		self.completion_handler.start_completion(
 			engine=self.view.current_engine,
@@ -129,6 +140,7 @@ class EditBlockPresenter(DestroyGuardMixin):
 			new_block=temp_block,
 			stream=temp_block.stream,
 			stop_block_index=self.block_index,
+			**completion_kwargs,
 		)
 		return True
 
@@ -185,6 +197,7 @@ class EditBlockPresenter(DestroyGuardMixin):
 			self.block.response.content = self.view.response_txt.GetValue()
 
 		self.block.updated_at = datetime.now()
+		self.block.mark_edited()
 		if self.service is not None:
 			self.service.auto_save_to_db(self.conversation, self.block)
 
@@ -253,8 +266,13 @@ class EditBlockPresenter(DestroyGuardMixin):
 		Args:
 			chunk: The latest text chunk from the stream.
 		"""
-		pos = self.view.response_txt.GetInsertionPoint()
+		response_txt = self.view.response_txt
+		pos = response_txt.GetInsertionPoint()
 		if self.view.should_speak_response:
 			self.view.a_output.handle_stream_buffer(new_text=chunk)
-		self.view.response_txt.AppendText(chunk)
-		self.view.response_txt.SetInsertionPoint(pos)
+		response_txt.Freeze()
+		try:
+			response_txt.AppendText(chunk)
+			response_txt.SetInsertionPoint(pos)
+		finally:
+			response_txt.Thaw()
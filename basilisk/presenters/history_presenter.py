@@ -211,14 +211,21 @@ class HistoryPresenter:
 	def handle_stream_chunk(self, text: str) -> None:
 		"""Append a streamed chunk to the text control and buffer speech.
 
+		Called once per UI pump frame with the text batched since the
+		previous frame; the control is frozen while it is updated.
+
 		Args:
 			text: The chunk of text to append.
 		"""
-		pos = self.view.GetInsertionPoint()
 		if self.should_speak_response:
 			self.a_output.handle_stream_buffer(new_text=text)
-		self.view.AppendText(text)
-		self.view.SetInsertionPoint(pos)
+		self.view.Freeze()
+		try:
+			pos = self.view.GetInsertionPoint()
+			self.view.AppendText(text)
+			self.view.SetInsertionPoint(pos)
+		finally:
+			self.view.Thaw()
 
 	# ------------------------------------------------------------------
 	# Citations
@@ -0,0 +1,97 @@
+"""Presenter for the latency summary dialog.
+
+Aggregates the latency metrics stored with each completed block so that
+providers and models can be compared on the user's own traffic.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Callable, Optional
+
+from basilisk.provider import get_provider
+
+if TYPE_CHECKING:
+	from basilisk.conversation.database import ConversationDatabase
+
+log = logging.getLogger(__name__)
+
+
+def _format_ms(value: Optional[float]) -> str:
+	if value is None:
+		return "-"
+	if value >= 1000:
+		# Translators: A duration in seconds in the latency summary
+		return _("%.1f s") % (value / 1000)
+	# Translators: A duration in milliseconds in the latency summary
+	return _("%d ms") % round(value)
+
+
+def _provider_name(provider_id: str) -> str:
+	try:
+		return get_provider(id=provider_id).name
+	except ValueError:
+		return provider_id
+
+
+class LatencySummaryPresenter:
+	"""Presenter for the latency summary dialog.
+
+	Attributes:
+		view: The LatencySummaryDialog instance.
+	"""
+
+	def __init__(
+		self, view, conv_db_getter: Callable[[], ConversationDatabase]
+	) -> None:
+		"""Initialize the presenter.
+
+		Args:
+			view: The dialog view.
+			conv_db_getter: Callable that returns the ConversationDatabase
+				singleton (deferred to avoid import-time wx dependency).
+		"""
+		self.view = view
+		self._get_conv_db = conv_db_getter
+
+	def load_rows(self) -> list[list[str]]:
+		"""Load the latency summary as the text of the list rows.
+
+		Returns:
+			One row per model and upstream provider: provider, model,
+			upstream provider, response count, average time to first
+			token, average total time, tokens per second, 95th percentile
+			of the gap between chunks and UI apply time.
+
+		Raises:
+			Exception: Re-raised from the database layer on any DB error so
+				the caller can distinguish a genuine failure from an empty
+				summary.
+		"""
+		return [
+			self.format_row(row)
+			for row in self._get_conv_db().get_latency_summary()
+		]
+
+	@staticmethod
+	def format_row(row: dict) -> list[str]:
+		"""Format an aggregated row of the latency summary.
+
+		Args:
+			row: A row returned by ``ConversationDatabase.get_latency_summary``.
+
+		Returns:
+			The text of each column.
+		"""
+		tokens_per_second = row["tokens_per_second"]
+		return [
+			_provider_name(row["provider_id"]),
+			row["model_id"],
+			row["upstream_provider"] or "-",
+			str(row["response_count"]),
+			_format_ms(row["first_chunk_ms"]),
+			_format_ms(row["total_ms"]),
+			"-" if tokens_per_second is None else f"{tokens_per_second:.1f}",
+			_format_ms(row["chunk_gap_p95_ms"]),
+			_format_ms(row["ui_apply_ms"]),
+		]
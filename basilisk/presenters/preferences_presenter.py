@@ -112,6 +112,15 @@ class PreferencesPresenter:
 		conf.conversation.reopen_last_conversation = (
 			self.view.reopen_last_conversation.GetValue()
 		)
+		conf.conversation.completion_cache_enabled = (
+			self.view.completion_cache_enabled.GetValue()
+		)
+		conf.conversation.upload_large_attachments = (
+			self.view.upload_large_attachments.GetValue()
+		)
+		conf.conversation.store_responses_server_side = (
+			self.view.store_responses_server_side.GetValue()
+		)
 		conf.images.resize = self.view.image_resize.GetValue()
 		conf.images.max_height = int(self.view.image_max_height.GetValue())
 		conf.images.max_width = int(self.view.image_max_width.GetValue())
@@ -119,6 +128,14 @@ class PreferencesPresenter:
 		conf.network.use_system_cert_store = (
 			self.view.use_system_cert_store.GetValue()
 		)
+		conf.network.use_async_engine = self.view.use_async_engine.GetValue()
+		conf.network.max_concurrent_requests = int(
+			self.view.max_concurrent_requests.GetValue()
+		)
+		conf.network.retry.max_attempts = int(
+			self.view.retry_max_attempts.GetValue()
+		)
+		conf.network.retry.hedge = self.view.retry_hedge.GetValue()
 		ttl_raw = int(self.view.model_metadata_cache_ttl.GetValue())
 		conf.general.model_metadata_cache_ttl_seconds = max(
 			MODEL_METADATA_CACHE_TTL_MIN_SECONDS,
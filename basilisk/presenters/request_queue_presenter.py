@@ -0,0 +1,95 @@
+"""Presenter for the request queue dialog.
+
+Shows, for each account used since the application started, the requests
+in flight and waiting in the completion scheduler, the rate limits learned
+from the provider and the time requests spent waiting.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+	from basilisk.completion_scheduler import (
+		CompletionScheduler,
+		SchedulerStats,
+	)
+
+log = logging.getLogger(__name__)
+
+
+def _format_seconds(value: float) -> str:
+	if value >= 1:
+		# Translators: A duration in seconds in the request queue dialog
+		return _("%.1f s") % value
+	# Translators: A duration in milliseconds in the request queue dialog
+	return _("%d ms") % round(value * 1000)
+
+
+def _format_limit(value: Optional[float]) -> str:
+	return "-" if value is None else str(round(value))
+
+
+class RequestQueuePresenter:
+	"""Presenter for the request queue dialog.
+
+	Attributes:
+		view: The RequestQueueDialog instance.
+	"""
+
+	def __init__(
+		self, view, scheduler_getter: Callable[[], CompletionScheduler]
+	) -> None:
+		"""Initialize the presenter.
+
+		Args:
+			view: The dialog view.
+			scheduler_getter: Callable that returns the completion scheduler.
+		"""
+		self.view = view
+		self._get_scheduler = scheduler_getter
+
+	def load_rows(self) -> list[list[str]]:
+		"""Load the queue state as the text of the list rows.
+
+		Returns:
+			One row per account: name, requests in flight and their limit,
+			queued requests, requests and tokens allowed per minute, pause
+			left, requests sent, requests that waited, average and longest
+			wait, and throttled responses.
+		"""
+		return [
+			self.format_row(stats)
+			for stats in sorted(
+				self._get_scheduler().stats(), key=lambda s: s.label.lower()
+			)
+		]
+
+	@staticmethod
+	def format_row(stats: SchedulerStats) -> list[str]:
+		"""Format the queue state of an account.
+
+		Args:
+			stats: The queue state returned by ``CompletionScheduler.stats``.
+
+		Returns:
+			The text of each column.
+		"""
+		return [
+			stats.label,
+			f"{stats.active}/{stats.max_concurrency}",
+			str(stats.queued),
+			_format_limit(stats.request_limit),
+			_format_limit(stats.token_limit),
+			_format_seconds(stats.paused_seconds)
+			if stats.paused_seconds
+			else "-",
+			str(stats.requests),
+			str(stats.waited),
+			_format_seconds(stats.average_wait_seconds)
+			if stats.waited
+			else "-",
+			_format_seconds(stats.max_wait_seconds) if stats.waited else "-",
+			str(stats.throttled),
+		]
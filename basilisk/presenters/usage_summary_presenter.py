@@ -0,0 +1,111 @@
+"""Presenter for the usage summary dialog.
+
+Aggregates the token usage reported by the providers for each completed
+block, so that the cost and throughput of accounts and models can be tracked
+day by day.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Callable, Optional
+from uuid import UUID
+
+import basilisk.config as config
+from basilisk.presenters.latency_summary_presenter import _provider_name
+
+if TYPE_CHECKING:
+	from basilisk.conversation.database import ConversationDatabase
+
+log = logging.getLogger(__name__)
+
+
+def _account_name(account_id: Optional[str]) -> str:
+	if account_id is None:
+		return "-"
+	try:
+		return config.accounts()[UUID(account_id)].name
+	except KeyError, ValueError:
+		# Translators: An account removed since its usage was recorded
+		return _("Deleted account")
+
+
+def _format_cost(cost: Optional[float]) -> str:
+	if cost is None:
+		return "-"
+	return f"${cost:.4f}"
+
+
+class UsageSummaryPresenter:
+	"""Presenter for the usage summary dialog.
+
+	Attributes:
+		view: The UsageSummaryDialog instance.
+	"""
+
+	def __init__(
+		self, view, conv_db_getter: Callable[[], ConversationDatabase]
+	) -> None:
+		"""Initialize the presenter.
+
+		Args:
+			view: The dialog view.
+			conv_db_getter: Callable that returns the ConversationDatabase
+				singleton (deferred to avoid import-time wx dependency).
+		"""
+		self.view = view
+		self._get_conv_db = conv_db_getter
+
+	def load_rows(self) -> tuple[list[list[str]], Optional[float]]:
+		"""Load the usage summary as the text of the list rows.
+
+		Returns:
+			One row per day, account and model: day, account, provider,
+			model, response count, input tokens, cached input tokens,
+			output tokens, reasoning tokens, cost and tokens per second;
+			and the total cost, None when no response was priced.
+
+		Raises:
+			Exception: Re-raised from the database layer on any DB error so
+				the caller can distinguish a genuine failure from an empty
+				summary.
+		"""
+		rows = self._get_conv_db().get_usage_summary()
+		costs = [row["cost"] for row in rows if row["cost"] is not None]
+		total_cost = sum(costs) if costs else None
+		return [self.format_row(row) for row in rows], total_cost
+
+	@staticmethod
+	def format_row(row: dict) -> list[str]:
+		"""Format an aggregated row of the usage summary.
+
+		Args:
+			row: A row returned by ``ConversationDatabase.get_usage_summary``.
+
+		Returns:
+			The text of each column.
+		"""
+		tokens_per_second = row["tokens_per_second"]
+		return [
+			row["day"].isoformat(),
+			_account_name(row["account_id"]),
+			_provider_name(row["provider_id"]),
+			row["model_id"],
+			str(row["response_count"]),
+			str(row["input_tokens"]),
+			str(row["cached_input_tokens"]),
+			str(row["output_tokens"]),
+			str(row["reasoning_tokens"]),
+			_format_cost(row["cost"]),
+			"-" if tokens_per_second is None else f"{tokens_per_second:.1f}",
+		]
+
+	@staticmethod
+	def format_total_cost(total_cost: Optional[float]) -> str:
+		"""Format the total cost shown under the list.
+
+		Args:
+			total_cost: The total cost, None when no response was priced.
+		"""
+		# Translators: Total cost of the responses listed in the usage summary, at the catalog prices
+		return _("Total cost: %s") % _format_cost(total_cost)
@@ -8,14 +8,20 @@ class ProviderCapability(enum.StrEnum):
 
 	# The provider support audio processing
 	AUDIO = enum.auto()
+	# The provider processes batches of requests asynchronously
+	BATCH = enum.auto()
 	# The provider supports document processing (excluding images)
 	DOCUMENT = enum.auto()
 	# The provider supports citation processing
 	CITATION = enum.auto()
 	# The provider supports image processing
 	IMAGE = enum.auto()
+	# The provider keeps local models loaded in memory between requests
+	MODEL_KEEP_ALIVE = enum.auto()
 	# The provider supports OCR (Optical Character Recognition)
 	OCR = enum.auto()
+	# The provider routes requests between the upstream hosts of a model
+	PROVIDER_ROUTING = enum.auto()
 	# The provider supports text processing
 	TEXT = enum.auto()
 	# The provider supports speech-to-text conversion
@@ -8,10 +8,11 @@ from __future__ import annotations
 
 import dataclasses
 import logging
+import time
 from functools import cached_property
-from typing import TYPE_CHECKING, ClassVar, Iterator
+from typing import TYPE_CHECKING, Any, AsyncIterator, ClassVar, Iterator
 
-from anthropic import Anthropic
+from anthropic import Anthropic, AsyncAnthropic
 from anthropic.types import Message as AnthropicMessage
 from anthropic.types import TextBlock
 
@@ -24,14 +25,19 @@ from basilisk.conversation import (
 	MessageBlock,
 	MessageRoleEnum,
 	SystemMessage,
+	TokenUsage,
 )
 from basilisk.provider_ai_model import ProviderAIModel
 
-from .base_engine import BaseEngine, ProviderCapability, sigma_night_data_file
+from .async_base_engine import AsyncBaseEngine
+from .base_engine import ProviderCapability, sigma_night_data_file
+from .batch import BatchItemResult, BatchRequest, BatchState, BatchStatus
+from .cancellation import CancellationToken
 from .completion_request_strip_keys import CHAT_CLIENT_TUNING_TOP_LEVEL_KEYS
+from .file_handle_cache import FileHandle
 
 if TYPE_CHECKING:
-	from anthropic._streaming import Stream
+	from anthropic._streaming import AsyncStream, Stream
 	from anthropic.types.message_stream_event import MessageStreamEvent
 
 	from basilisk.config import Account
@@ -40,8 +46,61 @@ log = logging.getLogger(__name__)
 
 _REASONING_ID_SUFFIX = "_reasoning"
 
+# Anthropic accepts at most four cache breakpoints per request
+_MAX_CACHE_BREAKPOINTS = 4
+# Documents shorter than the minimum cacheable prompt (about 1024 tokens) do
+# not get a breakpoint of their own
+_CACHE_DOCUMENT_MIN_CHARS = 4096
+_EPHEMERAL_CACHE_CONTROL = {"type": "ephemeral"}
+# Beta flag required to reference files uploaded through the files API
+_FILES_API_BETA = "files-api-2025-04-14"
+# The files API keeps files until deleted; uploads are deleted after this delay
+_FILE_RETENTION_SECONDS = 30 * 24 * 3600
 
-class AnthropicEngine(BaseEngine):
+
+@dataclasses.dataclass
+class PromptCacheStats:
+	"""Prompt cache token counts summed over the responses of an engine.
+
+	Attributes:
+		responses: Number of responses counted.
+		input_tokens: Input tokens neither read from nor written to the cache.
+		cache_creation_input_tokens: Input tokens written to the cache.
+		cache_read_input_tokens: Input tokens read from the cache.
+	"""
+
+	responses: int = 0
+	input_tokens: int = 0
+	cache_creation_input_tokens: int = 0
+	cache_read_input_tokens: int = 0
+
+	def record(self, usage: Any) -> None:
+		"""Add the token counts of a response usage.
+
+		Args:
+			usage: The ``usage`` object of an Anthropic response.
+		"""
+		self.responses += 1
+		self.input_tokens += getattr(usage, "input_tokens", 0) or 0
+		self.cache_creation_input_tokens += (
+			getattr(usage, "cache_creation_input_tokens", 0) or 0
+		)
+		self.cache_read_input_tokens += (
+			getattr(usage, "cache_read_input_tokens", 0) or 0
+		)
+
+	@property
+	def hit_ratio(self) -> float:
+		"""Share of the input tokens read from the cache."""
+		total = (
+			self.input_tokens
+			+ self.cache_creation_input_tokens
+			+ self.cache_read_input_tokens
+		)
+		return self.cache_read_input_tokens / total if total else 0.0
+
+
+class AnthropicEngine(AsyncBaseEngine):
 	"""Engine implementation for Anthropic API integration.
 
 	Provides functionality for interacting with Anthropic's Claude models,
@@ -55,7 +114,13 @@ class AnthropicEngine(BaseEngine):
 	catalog_strip_candidate_keys: ClassVar[frozenset[str] | None] = (
 		CHAT_CLIENT_TUNING_TOP_LEVEL_KEYS
 	)
+	sdk_default_base_url: ClassVar[str | None] = "https://api.anthropic.com"
+	summary_model_ids: ClassVar[tuple[str, ...]] = (
+		"claude-haiku-4-5",
+		"claude-3-5-haiku-latest",
+	)
 	capabilities: set[ProviderCapability] = {
+		ProviderCapability.BATCH,
 		ProviderCapability.TEXT,
 		ProviderCapability.IMAGE,
 		ProviderCapability.DOCUMENT,
@@ -70,6 +135,15 @@ class AnthropicEngine(BaseEngine):
 		"application/pdf",
 		"text/plain",
 	}
+	file_upload_formats: ClassVar[frozenset[str]] = frozenset(
+		{
+			"image/gif",
+			"image/jpeg",
+			"image/png",
+			"image/webp",
+			"application/pdf",
+		}
+	)
 
 	MODELS_JSON_URL = sigma_night_data_file("anthropic.json")
 
@@ -119,6 +193,7 @@ class AnthropicEngine(BaseEngine):
 			account: The provider account configuration.
 		"""
 		super().__init__(account)
+		self.prompt_cache_stats = PromptCacheStats()
 
 	@cached_property
 	def client(self) -> Anthropic:
@@ -128,7 +203,54 @@ class AnthropicEngine(BaseEngine):
 			The client object for the Anthropic API initialized with the account API key.
 		"""
 		super().client
-		return Anthropic(api_key=self.account.api_key.get_secret_value())
+		return Anthropic(
+			api_key=self.account.api_key.get_secret_value(),
+			http_client=self.http_client,
+		)
+
+	@cached_property
+	def async_client(self) -> AsyncAnthropic:
+		"""Property to return the async client object for the Anthropic API.
+
+		Returns:
+			The async client object for the Anthropic API initialized with the account API key.
+		"""
+		return AsyncAnthropic(
+			api_key=self.account.api_key.get_secret_value(),
+			http_client=self.async_http_client,
+		)
+
+	def upload_attachment(self, attachment: AttachmentFile) -> FileHandle:
+		"""Upload an attachment through the Anthropic files API.
+
+		The provider keeps files until deleted, so the handle expires after
+		a retention delay, then the file is deleted.
+
+		Args:
+			attachment: The attachment to upload.
+
+		Returns:
+			The handle referencing the uploaded file.
+		"""
+		uploaded_at = time.time()
+		with attachment.send_location.open("rb") as f:
+			metadata = self.client.beta.files.upload(
+				file=(attachment.name, f, attachment.mime_type)
+			)
+		return FileHandle(
+			file_id=metadata.id,
+			mime_type=attachment.mime_type,
+			expires_at=uploaded_at + _FILE_RETENTION_SECONDS,
+			delete_on_expiry=True,
+		)
+
+	def delete_uploaded_file(self, handle: FileHandle) -> None:
+		"""Delete a file uploaded through the Anthropic files API.
+
+		Args:
+			handle: The handle of the expired upload.
+		"""
+		self.client.beta.files.delete(handle.file_id)
 
 	def get_attachment_source(
 		self, attachment: AttachmentFile | ImageFile
@@ -144,6 +266,9 @@ class AnthropicEngine(BaseEngine):
 		if attachment.type == AttachmentFileTypes.URL:
 			return {"type": "url", "url": attachment.url}
 		elif attachment.type != AttachmentFileTypes.UNKNOWN:
+			handle = self.get_file_handle(attachment)
+			if handle is not None:
+				return {"type": "file", "file_id": handle.file_id}
 			source = {"media_type": attachment.mime_type}
 			match attachment.mime_type.split("/")[0]:
 				case "image" | "application":
@@ -151,7 +276,7 @@ class AnthropicEngine(BaseEngine):
 					source["data"] = attachment.encode_base64()
 				case "text":
 					source["type"] = "text"
-					source["data"] = attachment.read_as_plain_text()
+					source["data"] = attachment.cached_plain_text()
 				case _:
 					raise ValueError(
 						f"Unsupported attachment type: {attachment.type}"
@@ -208,15 +333,15 @@ class AnthropicEngine(BaseEngine):
 	prepare_message_request = convert_message
 	prepare_message_response = convert_message
 
-	def completion(
+	def build_completion_params(
 		self,
 		new_block: MessageBlock,
 		conversation: Conversation,
 		system_message: SystemMessage | None,
 		stop_block_index: int | None = None,
 		**kwargs,
-	) -> Message | Stream[MessageStreamEvent]:
-		"""Sends a completion request to the Anthropic API.
+	) -> dict[str, Any]:
+		"""Builds the parameters of a completion request.
 
 		Args:
 			new_block: Message block with generation parameters.
@@ -226,11 +351,8 @@ class AnthropicEngine(BaseEngine):
 			**kwargs: Additional API request parameters.
 
 		Returns:
-			Either a complete message or a stream of message events.
+			Keyword arguments for the messages create call.
 		"""
-		super().completion(
-			new_block, conversation, system_message, stop_block_index, **kwargs
-		)
 		tools = []
 		web_search = kwargs.pop("web_search_mode", False)
 		if web_search:
@@ -244,7 +366,10 @@ class AnthropicEngine(BaseEngine):
 		params = {
 			"model": model.id,
 			"messages": self.get_messages(
-				new_block, conversation, stop_block_index=stop_block_index
+				new_block,
+				conversation,
+				stop_block_index=stop_block_index,
+				history_window=kwargs.pop("history_window", None),
 			),
 			"temperature": new_block.temperature,
 			"max_tokens": new_block.max_tokens or model.max_output_tokens,
@@ -265,10 +390,323 @@ class AnthropicEngine(BaseEngine):
 				"type": "enabled",
 				"budget_tokens": kwargs.get("budget_tokens", 16000),
 			}
+		self._add_cache_breakpoints(params)
+		if self._references_files(params["messages"]):
+			params["extra_headers"] = {"anthropic-beta": _FILES_API_BETA}
 		params.update(kwargs)
 		self._strip_catalog_sampling_params(model, params)
+		return params
+
+	@staticmethod
+	def _references_files(messages: list[dict]) -> bool:
+		"""Tell whether messages reference files uploaded to the files API."""
+		return any(
+			isinstance(content, dict)
+			and content.get("source", {}).get("type") == "file"
+			for message in messages
+			for content in message["content"]
+		)
+
+	@staticmethod
+	def _with_cache_control(content: TextBlock | dict) -> dict:
+		"""Return a copy of a content block marked as a cache breakpoint."""
+		if not isinstance(content, dict):
+			content = content.model_dump(exclude_none=True)
+		return content | {"cache_control": _EPHEMERAL_CACHE_CONTROL}
+
+	@staticmethod
+	def _last_large_document(contents: list[TextBlock | dict]) -> int | None:
+		"""Return the index of the last document worth caching, if any."""
+		for i in range(len(contents) - 1, -1, -1):
+			content = contents[i]
+			if (
+				not isinstance(content, dict)
+				or content.get("type") != "document"
+			):
+				continue
+			source = content["source"]
+			# Uploaded files are always above the upload size threshold
+			if source.get("type") == "file":
+				return i
+			if len(source.get("data") or "") >= _CACHE_DOCUMENT_MIN_CHARS:
+				return i
+		return None
+
+	def _add_cache_breakpoints(self, params: dict[str, Any]) -> None:
+		"""Mark the stable prefix of the request for prompt caching.
+
+		Breakpoints are placed, in this order, on the system prompt, on the
+		last history message and on the last large document of the new
+		request. Each one caches the whole prompt before it, so earlier
+		history blocks and documents need no breakpoint of their own.
+
+		Prepared messages are shared with later requests, so the marked
+		messages and content blocks are copies.
+
+		Args:
+			params: The completion parameters, updated in place.
+		"""
+		breakpoints = 0
+		if params.get("system"):
+			params["system"] = [
+				{
+					"type": "text",
+					"text": params["system"],
+					"cache_control": _EPHEMERAL_CACHE_CONTROL,
+				}
+			]
+			breakpoints += 1
+		messages = params["messages"] = list(params["messages"])
+		targets = []
+		if len(messages) > 1:
+			targets.append(
+				(len(messages) - 2, len(messages[-2]["content"]) - 1)
+			)
+		document_index = self._last_large_document(messages[-1]["content"])
+		if document_index is not None:
+			targets.append((len(messages) - 1, document_index))
+		for message_index, content_index in targets:
+			if breakpoints >= _MAX_CACHE_BREAKPOINTS:
+				break
+			message = messages[message_index]
+			contents = list(message["content"])
+			contents[content_index] = self._with_cache_control(
+				contents[content_index]
+			)
+			messages[message_index] = message | {"content": contents}
+			breakpoints += 1
+
+	def _record_usage(self, usage: Any) -> None:
+		"""Record the prompt cache token counts of a response.
+
+		Args:
+			usage: The ``usage`` object of the response, if any.
+		"""
+		if usage is None:
+			return
+		self.prompt_cache_stats.record(usage)
+		log.debug(
+			"Prompt cache: %d input tokens read, %d written, %d uncached "
+			"(hit ratio %.0f%% over %d responses)",
+			getattr(usage, "cache_read_input_tokens", 0) or 0,
+			getattr(usage, "cache_creation_input_tokens", 0) or 0,
+			getattr(usage, "input_tokens", 0) or 0,
+			self.prompt_cache_stats.hit_ratio * 100,
+			self.prompt_cache_stats.responses,
+		)
+
+	@staticmethod
+	def _token_usage(usage: Any) -> TokenUsage:
+		"""Convert the usage of a message or of a message delta event.
+
+		Anthropic counts the input tokens read from or written to the prompt
+		cache apart from the other input tokens; they are added back.
+
+		Args:
+			usage: The ``usage`` object of the message or event.
+
+		Returns:
+			The token usage of the response.
+		"""
+		cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+		cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+		uncached = getattr(usage, "input_tokens", None) or 0
+		return TokenUsage(
+			input_tokens=uncached + cache_read + cache_write,
+			output_tokens=getattr(usage, "output_tokens", None) or 0,
+			cached_input_tokens=cache_read,
+		)
+
+	def _handle_usage_event(
+		self, event: MessageStreamEvent
+	) -> tuple[str, TokenUsage] | None:
+		"""Handle the token usage carried by a stream event.
+
+		The usage of ``message_start`` is recorded in the prompt cache
+		statistics; ``message_delta`` holds the cumulative output token
+		count of the response.
+
+		Args:
+			event: A ``message_start`` or ``message_delta`` event.
+
+		Returns:
+			The ``("usage", TokenUsage)`` tuple to yield, None without usage.
+		"""
+		if event.type == "message_start":
+			usage = getattr(event.message, "usage", None)
+			self._record_usage(usage)
+		else:
+			usage = getattr(event, "usage", None)
+		if usage is None:
+			return None
+		return ("usage", self._token_usage(usage))
+
+	def completion(
+		self,
+		new_block: MessageBlock,
+		conversation: Conversation,
+		system_message: SystemMessage | None,
+		stop_block_index: int | None = None,
+		cancel_token: CancellationToken | None = None,
+		**kwargs,
+	) -> Message | Stream[MessageStreamEvent]:
+		"""Sends a completion request to the Anthropic API.
+
+		Args:
+			new_block: Message block with generation parameters.
+			conversation: Current conversation context.
+			system_message: Optional system-level instruction message.
+			stop_block_index: Optional index to stop processing messages at. If None, all messages are processed.
+			cancel_token: Optional token closing the response when cancelled.
+			**kwargs: Additional API request parameters.
+
+		Returns:
+			Either a complete message or a stream of message events.
+		"""
+		super().completion(
+			new_block, conversation, system_message, stop_block_index, **kwargs
+		)
+		params = self.build_completion_params(
+			new_block, conversation, system_message, stop_block_index, **kwargs
+		)
 		response = self.client.messages.create(**params)
-		return response
+		return self._bind_cancellation(response, cancel_token)
+
+	async def acompletion(
+		self,
+		new_block: MessageBlock,
+		conversation: Conversation,
+		system_message: SystemMessage | None,
+		stop_block_index: int | None = None,
+		cancel_token: CancellationToken | None = None,
+		**kwargs,
+	) -> Message | AsyncStream[MessageStreamEvent]:
+		"""Sends a completion request to the Anthropic API with the async client.
+
+		Args:
+			new_block: Message block with generation parameters.
+			conversation: Current conversation context.
+			system_message: Optional system-level instruction message.
+			stop_block_index: Optional index to stop processing messages at. If None, all messages are processed.
+			cancel_token: Unused, the awaiting task is cancelled instead.
+			**kwargs: Additional API request parameters.
+
+		Returns:
+			Either a complete message or a stream of message events.
+		"""
+		params = await self.abuild_completion_params(
+			new_block, conversation, system_message, stop_block_index, **kwargs
+		)
+		return await self.async_client.messages.create(**params)
+
+	def build_batch_request(
+		self,
+		custom_id: str,
+		new_block: MessageBlock,
+		conversation: Conversation,
+		system_message: SystemMessage | None,
+	) -> BatchRequest:
+		"""Build the Message Batches request completing a message block.
+
+		Args:
+			custom_id: Identifier of the request, unique within the batch.
+			new_block: Message block with generation parameters.
+			conversation: Current conversation context.
+			system_message: Optional system-level instruction message.
+
+		Returns:
+			The request, with the parameters of a non-streamed message.
+		"""
+		params = self.build_completion_params(
+			new_block, conversation, system_message
+		)
+		params.pop("stream", None)
+		return BatchRequest(custom_id=custom_id, params=params)
+
+	def submit_batch(self, requests: list[BatchRequest]) -> str:
+		"""Submit requests to the Anthropic Message Batches API.
+
+		Args:
+			requests: The requests of the batch.
+
+		Returns:
+			The ID of the message batch.
+		"""
+		extra_headers = {}
+		batch_requests = []
+		for request in requests:
+			params = dict(request.params)
+			# Beta headers apply to the whole batch
+			extra_headers.update(params.pop("extra_headers", None) or {})
+			batch_requests.append(
+				{"custom_id": request.custom_id, "params": params}
+			)
+		batch = self.client.messages.batches.create(
+			requests=batch_requests, extra_headers=extra_headers or None
+		)
+		log.info(
+			"Submitted message batch %s with %d requests",
+			batch.id,
+			len(batch_requests),
+		)
+		return batch.id
+
+	def get_batch_status(self, batch_id: str) -> BatchStatus:
+		"""Get the progress of a message batch.
+
+		Args:
+			batch_id: The ID of the message batch.
+
+		Returns:
+			The status of the batch.
+		"""
+		batch = self.client.messages.batches.retrieve(batch_id)
+		counts = batch.request_counts
+		failed = counts.errored + counts.canceled + counts.expired
+		# Cancelled batches also end, with their pending requests cancelled
+		return BatchStatus(
+			state=BatchState.ENDED
+			if batch.processing_status == "ended"
+			else BatchState.IN_PROGRESS,
+			total=counts.processing + counts.succeeded + failed,
+			completed=counts.succeeded,
+			failed=failed,
+		)
+
+	def iter_batch_results(self, batch_id: str) -> Iterator[BatchItemResult]:
+		"""Iterate over the results of an ended message batch.
+
+		Args:
+			batch_id: The ID of the message batch.
+
+		Yields:
+			The outcome of each request.
+		"""
+		for entry in self.client.messages.batches.results(batch_id):
+			result = entry.result
+			match result.type:
+				case "succeeded":
+					yield BatchItemResult(
+						custom_id=entry.custom_id, response=result.message
+					)
+				case "errored":
+					error = getattr(result.error, "error", result.error)
+					yield BatchItemResult(
+						custom_id=entry.custom_id,
+						error=getattr(error, "message", None) or str(error),
+					)
+				case _:
+					yield BatchItemResult(
+						custom_id=entry.custom_id, error=result.type
+					)
+
+	def cancel_batch(self, batch_id: str) -> None:
+		"""Ask Anthropic to stop processing a message batch.
+
+		Args:
+			batch_id: The ID of the message batch.
+		"""
+		self.client.messages.batches.cancel(batch_id)
 
 	def _handle_citation(self, citation: dict) -> dict:
 		"""Processes citation data from the API response.
@@ -357,12 +795,60 @@ class AnthropicEngine(BaseEngine):
 			stream: Stream of message events from the API.
 
 		Yields:
-			Text content from each event or thinking content.
+			Text content from each event or thinking content, and the token
+			usage as ``("usage", TokenUsage)`` tuples.
 		"""
 		thinking_content_started = False
 		current_block_type = None
 		for event in stream:
 			match event.type:
+				case "message_start" | "message_delta":
+					usage = self._handle_usage_event(event)
+					if usage is not None:
+						yield usage
+				case "content_block_start":
+					current_block_type = event.content_block.type
+				case "content_block_stop":
+					content, thinking_content_started = (
+						self._handle_content_block_stop(
+							thinking_content_started, current_block_type
+						)
+					)
+					if content:
+						yield content
+				case "content_block_delta":
+					content, thinking_content_started = (
+						self._handle_content_block_delta(
+							event, thinking_content_started
+						)
+					)
+					if content:
+						yield content
+				case "message_stop":
+					if thinking_content_started:
+						yield "\n```\n"
+					break
+
+	async def acompletion_response_with_stream(
+		self, stream: AsyncStream[MessageStreamEvent]
+	) -> AsyncIterator[str | tuple[str, dict]]:
+		"""Processes async streaming response from Anthropic API.
+
+		Args:
+			stream: Async stream of message events from the API.
+
+		Yields:
+			Text content from each event or thinking content, and the token
+			usage as ``("usage", TokenUsage)`` tuples.
+		"""
+		thinking_content_started = False
+		current_block_type = None
+		async for event in stream:
+			match event.type:
+				case "message_start" | "message_delta":
+					usage = self._handle_usage_event(event)
+					if usage is not None:
+						yield usage
 				case "content_block_start":
 					current_block_type = event.content_block.type
 				case "content_block_stop":
@@ -399,6 +885,8 @@ class AnthropicEngine(BaseEngine):
 		Returns:
 			Updated message block with response.
 		"""
+		usage = getattr(response, "usage", None)
+		self._record_usage(usage)
 		citations = []
 		text_parts: list[str] = []
 		thinking_parts: list[str] = []
@@ -428,4 +916,6 @@ class AnthropicEngine(BaseEngine):
 			content=final_content,
 			citations=citations,
 		)
+		if usage is not None:
+			new_block.usage = self._token_usage(usage)
 		return new_block
@@ -0,0 +1,150 @@
+"""Base class for provider engines supporting asyncio clients.
+
+Engines deriving from ``AsyncBaseEngine`` expose the async client shipped
+with their provider SDK alongside the blocking one. Their requests can run on
+the shared event loop thread (see ``basilisk.async_loop``) instead of one
+thread per request.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from abc import abstractmethod
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, AsyncIterator
+
+import httpx
+
+from basilisk.http_client_registry import get_async_http_client
+
+from .base_engine import BaseEngine
+
+if TYPE_CHECKING:
+	from basilisk.conversation import Conversation, Message, MessageBlock
+
+	from .cancellation import CancellationToken
+
+
+class AsyncBaseEngine(BaseEngine):
+	"""Provider engine able to send completions with an async client.
+
+	Request parameters are shared with the blocking path through
+	``build_completion_params``, and non-streaming responses are handled by
+	``completion_response_without_stream`` since async clients return the
+	same response objects.
+	"""
+
+	@cached_property
+	@abstractmethod
+	def async_client(self):
+		"""Property to return the provider async client object."""
+		pass
+
+	@property
+	def async_http_client(self) -> httpx.AsyncClient:
+		"""Shared keep-alive async HTTP client for the engine's API origin."""
+		return get_async_http_client(self.api_base_url)
+
+	@abstractmethod
+	def build_completion_params(
+		self,
+		new_block: MessageBlock,
+		conversation: Conversation,
+		system_message: Message | None,
+		stop_block_index: int | None = None,
+		**kwargs: Any,
+	) -> dict[str, Any]:
+		"""Build the parameters of a completion request.
+
+		Args:
+			new_block: Configuration block containing model, message request and other generation settings.
+			conversation: The current conversation context.
+			system_message: Optional system-level instruction message.
+			stop_block_index: Optional index to stop processing messages at. If None, all messages are processed.
+			**kwargs: Additional keyword arguments for the API request.
+
+		Returns:
+			The keyword arguments passed to the SDK completion call.
+		"""
+		pass
+
+	async def abuild_completion_params(
+		self,
+		new_block: MessageBlock,
+		conversation: Conversation,
+		system_message: Message | None,
+		stop_block_index: int | None = None,
+		**kwargs: Any,
+	) -> dict[str, Any]:
+		"""Build the parameters of a completion request in a worker thread.
+
+		Building the parameters may block: attachments are read and resized,
+		large ones are uploaded through the provider files API, and some
+		providers wait for uploads to be processed or create context caches.
+		The worker thread keeps the current cancellation token, so stopping
+		the completion interrupts these waits, and the shared event loop
+		keeps serving the other streams meanwhile.
+
+		Args:
+			new_block: Configuration block containing model, message request and other generation settings.
+			conversation: The current conversation context.
+			system_message: Optional system-level instruction message.
+			stop_block_index: Optional index to stop processing messages at. If None, all messages are processed.
+			**kwargs: Additional keyword arguments for the API request.
+
+		Returns:
+			The keyword arguments passed to the SDK completion call.
+		"""
+		return await asyncio.to_thread(
+			self.build_completion_params,
+			new_block,
+			conversation,
+			system_message,
+			stop_block_index,
+			**kwargs,
+		)
+
+	@abstractmethod
+	async def acompletion(
+		self,
+		new_block: MessageBlock,
+		conversation: Conversation,
+		system_message: Message | None,
+		stop_block_index: int | None = None,
+		cancel_token: CancellationToken | None = None,
+		**kwargs: Any,
+	) -> Any:
+		"""Generates a completion response with the async client.
+
+		Args:
+			new_block: Configuration block containing model, message request and other generation settings.
+			conversation: The current conversation context.
+			system_message: Optional system-level instruction message.
+			stop_block_index: Optional index to stop processing messages at. If None, all messages are processed.
+			cancel_token: Optional token; the caller cancels the awaiting task when it is cancelled.
+			**kwargs: Additional keyword arguments for the API request.
+
+		Returns:
+			The generated content response or async stream from the provider.
+		"""
+		pass
+
+	async def acompletion_response_with_stream(
+		self, stream: AsyncIterator[Any], **kwargs: Any
+	) -> AsyncIterator[str | tuple[str, Any]]:
+		"""Handle an async completion stream.
+
+		Each event is passed to ``completion_response_with_stream`` on its
+		own, which suits parsers keeping no state between events. Engines
+		whose parser is stateful must override this method.
+
+		Args:
+			stream: Async stream response from the provider.
+			**kwargs: Additional keyword arguments for flexible configuration.
+
+		Yields:
+			Text chunks and typed ``(kind, data)`` chunks, as the sync parser.
+		"""
+		async for event in stream:
+			for chunk in self.completion_response_with_stream([event]):
+				yield chunk
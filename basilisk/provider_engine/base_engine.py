@@ -7,21 +7,53 @@ establishing the common interface and shared functionality.
 from __future__ import annotations
 
 import logging
+import math
 import threading
 import time
 from abc import ABC, abstractmethod
-from functools import cached_property
+from functools import cached_property, partial
 from pathlib import Path
-from typing import Any, ClassVar, Optional
+from typing import Any, ClassVar, Iterator, Optional
+
+import httpx
 
 import basilisk.config as config
+from basilisk.completion_metrics import timed_phase
 from basilisk.consts import APP_NAME, APP_SOURCE_URL
-from basilisk.conversation import Conversation, Message, MessageBlock
+from basilisk.conversation import (
+	AttachmentFile,
+	AttachmentFileTypes,
+	Conversation,
+	Message,
+	MessageBlock,
+)
+from basilisk.conversation.history_window import (
+	HistoryWindow,
+	HistoryWindowPolicy,
+	history_blocks,
+	select_history,
+	summarized_history,
+)
+from basilisk.http_client_registry import (
+	get_http_client,
+	get_http_client_registry,
+)
+from basilisk.model_catalog.pricing import PRICING_RATES_EXTRA_KEY, compute_cost
 from basilisk.model_catalog.sampling import (
 	strip_disallowed_completion_dict_params,
 )
 from basilisk.provider_ai_model import ProviderAIModel
 from basilisk.provider_capability import ProviderCapability
+from basilisk.provider_engine.batch import (
+	BatchItemResult,
+	BatchRequest,
+	BatchStatus,
+)
+from basilisk.provider_engine.cancellation import (
+	CancellationToken,
+	OperationCancelledError,
+	close_http_response,
+)
 from basilisk.provider_engine.dynamic_model_loader import load_models_from_url
 from basilisk.provider_engine.engine_model_list_cache import (
 	STALE_TTL_MULTIPLIER,
@@ -29,8 +61,18 @@ from basilisk.provider_engine.engine_model_list_cache import (
 	model_list_disk_cache_path,
 	prune_model_list_cache_dir,
 	read_model_list_disk_cache,
+	refresh_retry_delay,
 	write_model_list_disk_cache,
 )
+from basilisk.provider_engine.file_handle_cache import (
+	UPLOAD_MIN_BYTES,
+	FileHandle,
+	get_file_handle_cache,
+)
+from basilisk.provider_engine.prepared_message_cache import (
+	PreparedMessageCache,
+	PreparedPart,
+)
 
 log = logging.getLogger(__name__)
 
@@ -48,19 +90,29 @@ class BaseEngine(ABC):
 	``load_models_from_url`` — the same path for OpenAI, Anthropic, Gemini,
 	Mistral, DeepSeek, and xAI. Override ``_load_models`` for other sources
 	(e.g. OpenRouter API, Ollama ``list``); the ``models`` property still applies
-	the same caching and stale-disk fallback.
+	the same caching, background refresh of expired lists and failure backoff.
 
 	Attributes:
 		capabilities: Set of supported provider capabilities.
 		supported_attachment_formats: Set of MIME types for supported attachments.
 		catalog_strip_candidate_keys: Top-level client kwargs subject to catalog
 			stripping; ``None`` means do not strip (e.g. Ollama).
+		sdk_default_base_url: API URL used by the provider SDK when the
+			provider defines no base URL, used to pick the shared HTTP client.
+		summary_model_ids: Inexpensive models used to summarize long
+			conversations, by order of preference.
+		file_upload_formats: MIME types of the attachments the engine can
+			upload once through the provider files API instead of inlining
+			them in every request.
 	"""
 
 	capabilities: set[ProviderCapability] = set()
 	supported_attachment_formats: set[str] = set()
 	MODELS_JSON_URL: str | None = None
 	catalog_strip_candidate_keys: ClassVar[frozenset[str] | None] = None
+	sdk_default_base_url: ClassVar[str | None] = None
+	summary_model_ids: ClassVar[tuple[str, ...]] = ()
+	file_upload_formats: ClassVar[frozenset[str]] = frozenset()
 
 	def __init__(self, account: config.Account) -> None:
 		"""Initializes the engine with the given account.
@@ -75,13 +127,68 @@ class BaseEngine(ABC):
 		self._models_cache_lock = threading.Lock()
 		self._models_refresh_cv = threading.Condition(self._models_cache_lock)
 		self._models_refresh_in_progress = False
+		# Consecutive failures of the model source and time of next attempt
+		self._models_failures = 0
+		self._models_retry_at = 0.0
+		self._prepared_messages = PreparedMessageCache()
+		# Prepared messages reference file handles usable until this time
+		self._file_handles_usable_until = math.inf
 
-	@cached_property
+	@property
 	@abstractmethod
 	def client(self):
-		"""Property to return the provider client object."""
+		"""Property to return the provider client object.
+
+		Engines cache their client in a ``cached_property``. This one caches
+		nothing, so reading ``super().client`` while the client is created
+		never exposes a None client to the other threads.
+		"""
 		pass
 
+	@property
+	def api_base_url(self) -> str | None:
+		"""Base URL of the API the engine sends its requests to."""
+		return (
+			self.account.custom_base_url
+			or self.account.provider.base_url
+			or self.sdk_default_base_url
+		)
+
+	@property
+	def http_client(self) -> httpx.Client:
+		"""Shared keep-alive HTTP client for the engine's API origin."""
+		return get_http_client(self.api_base_url)
+
+	def prewarm_connection(self) -> None:
+		"""Open a connection to the API in the background.
+
+		Called when the account is selected, so the handshake is done before
+		the first completion request.
+		"""
+		get_http_client_registry().prewarm(self.api_base_url)
+
+	def warm_up_model(self, model_id: str) -> None:
+		"""Load a model in memory before the first completion request.
+
+		Called in the background when the model is selected, for engines
+		with the ``MODEL_KEEP_ALIVE`` capability.
+
+		Args:
+			model_id: The ID of the selected model.
+		"""
+
+	def is_model_loaded(self, model_id: str) -> Optional[bool]:
+		"""Check whether a model is loaded in memory.
+
+		Args:
+			model_id: The ID of the model.
+
+		Returns:
+			Whether the model is loaded, or None when the provider does not
+			tell.
+		"""
+		return None
+
 	def _postprocess_models(
 		self, models: list[ProviderAIModel]
 	) -> list[ProviderAIModel]:
@@ -175,6 +282,12 @@ class BaseEngine(ABC):
 	def models(self) -> list[ProviderAIModel]:
 		"""Get models available for the provider.
 
+		A list cached in RAM or on disk is returned at once, even past its
+		TTL: an expired list is then refreshed in a background thread
+		(stale-while-revalidate). The provider source is only awaited when
+		no list is cached. After a failure, the source is not queried again
+		before an exponential backoff delay.
+
 		Returns:
 			List of supported provider models with their configurations.
 		"""
@@ -185,93 +298,148 @@ class BaseEngine(ABC):
 		)
 		self._prune_models_cache_dir(now, ttl_seconds)
 
-		def _ram_ttl_ok() -> bool:
-			return (
-				self._models_cache is not None
-				and self._models_cached_at is not None
-				and now - self._models_cached_at < ttl_seconds
-			)
-
 		with self._models_refresh_cv:
-			if _ram_ttl_ok():
-				log.debug(
-					"Using models from RAM cache for %s",
-					self.__class__.__name__,
-				)
-				return self._models_cache
-			while self._models_refresh_in_progress:
+			while (
+				self._models_cache is None and self._models_refresh_in_progress
+			):
 				self._models_refresh_cv.wait()
-			if _ram_ttl_ok():
-				log.debug(
-					"Using models from RAM cache for %s",
-					self.__class__.__name__,
-				)
-				return self._models_cache
+			if self._models_cache is not None:
+				return self._serve_cached_models_locked(now, ttl_seconds)
 			self._models_refresh_in_progress = True
 
 		# Disk/network refresh runs without holding the condition lock so
 		# invalidate_models_cache() can interleave; disk writes are atomic
 		# and invalidate only removes the matching cache file for this engine.
 		try:
-			disk_cache = self._read_models_disk_cache(now, ttl_seconds)
-			if disk_cache is not None:
-				models, cached_at = disk_cache
-				with self._models_refresh_cv:
-					self._set_models_ram_cache(models, cached_at)
-					self._models_last_error = None
-					log.debug(
-						"Using models from disk cache for %s",
-						self.__class__.__name__,
-					)
-					return self._models_cache
-			try:
+			disk_cache = self._read_models_disk_cache(
+				now,
+				ttl_seconds,
+				allow_stale=True,
+				max_stale_seconds=max_stale_seconds,
+			)
+			if disk_cache is None:
+				return self._refresh_models(now)
+			models, cached_at = disk_cache
+			with self._models_refresh_cv:
+				self._set_models_ram_cache(models, cached_at)
 				log.debug(
-					"Loading models from provider source for %s",
+					"Using models from disk cache for %s",
 					self.__class__.__name__,
 				)
-				models = self._load_models()
-				try:
-					self._write_models_disk_cache(models, now)
-				except (OSError, TypeError, ValueError) as write_exc:
-					log.warning(
-						"Failed writing models disk cache: %s", write_exc
-					)
-			except Exception as exc:
-				log.warning(
-					"Failed to refresh models for %s: %s",
-					self.__class__.__name__,
-					exc,
-				)
-				with self._models_refresh_cv:
-					self._models_last_error = str(exc)
-					if self._models_cache is not None:
-						return self._models_cache
-				stale_disk_cache = self._read_models_disk_cache(
-					now,
-					ttl_seconds,
-					allow_stale=True,
-					max_stale_seconds=max_stale_seconds,
-				)
-				if stale_disk_cache is not None:
-					models, cached_at = stale_disk_cache
-					with self._models_refresh_cv:
-						self._set_models_ram_cache(models, cached_at)
-						log.debug(
-							"Using stale models from disk cache fallback for %s",
-							self.__class__.__name__,
-						)
-						return self._models_cache
-				with self._models_refresh_cv:
-					return []
+		finally:
 			with self._models_refresh_cv:
-				self._set_models_ram_cache(models, now)
-				self._models_last_error = None
-				return self._models_cache
+				self._models_refresh_in_progress = False
+				self._models_refresh_cv.notify_all()
+		with self._models_refresh_cv:
+			return self._serve_cached_models_locked(now, ttl_seconds)
+
+	def _serve_cached_models_locked(
+		self, now: float, ttl_seconds: int
+	) -> list[ProviderAIModel]:
+		"""Return the RAM cache, refreshing it in background when expired.
+
+		Must be called with ``_models_refresh_cv`` held.
+		"""
+		if now - self._models_cached_at < ttl_seconds:
+			log.debug(
+				"Using models from RAM cache for %s", self.__class__.__name__
+			)
+			return self._models_cache
+		if self._models_refresh_in_progress:
+			log.debug(
+				"Using stale models while refreshing for %s",
+				self.__class__.__name__,
+			)
+		elif now < self._models_retry_at:
+			log.debug(
+				"Using stale models until retry for %s", self.__class__.__name__
+			)
+		else:
+			log.debug(
+				"Using stale models and refreshing in background for %s",
+				self.__class__.__name__,
+			)
+			self._models_refresh_in_progress = True
+			threading.Thread(
+				target=self._refresh_models_in_background,
+				args=(now,),
+				name=f"models-refresh-{self.__class__.__name__}",
+				daemon=True,
+			).start()
+		return self._models_cache
+
+	def _refresh_models_in_background(self, now: float) -> None:
+		"""Worker: refresh the expired model list."""
+		try:
+			self._refresh_models(now)
 		finally:
 			with self._models_refresh_cv:
 				self._models_refresh_in_progress = False
 				self._models_refresh_cv.notify_all()
 
+	def _refresh_models(self, now: float) -> list[ProviderAIModel]:
+		"""Load models from the provider source into the RAM and disk caches.
+
+		The caller sets ``_models_refresh_in_progress`` beforehand.
+
+		Args:
+			now: The time of the request, in seconds since the epoch.
+
+		Returns:
+			The loaded models, or the cached ones (possibly none) when the
+			source fails or is backing off after failures.
+		"""
+		with self._models_refresh_cv:
+			if now < self._models_retry_at:
+				log.debug(
+					"Not querying failing model source for %s before %.0fs",
+					self.__class__.__name__,
+					self._models_retry_at - now,
+				)
+				return self._models_cache or []
+		try:
+			log.debug(
+				"Loading models from provider source for %s",
+				self.__class__.__name__,
+			)
+			models = self._load_models()
+		except Exception as exc:
+			with self._models_refresh_cv:
+				self._models_last_error = str(exc)
+				self._models_failures += 1
+				delay = refresh_retry_delay(self._models_failures)
+				self._models_retry_at = now + delay
+				log.warning(
+					"Failed to refresh models for %s, retrying in %.0fs: %s",
+					self.__class__.__name__,
+					delay,
+					exc,
+				)
+				return self._models_cache or []
+		try:
+			self._write_models_disk_cache(models, now)
+		except (OSError, TypeError, ValueError) as write_exc:
+			log.warning("Failed writing models disk cache: %s", write_exc)
+		with self._models_refresh_cv:
+			self._models_last_error = None
+			self._models_failures = 0
+			self._models_retry_at = 0.0
+			return self._set_models_ram_cache(models, now)
+
+	def wait_models_refresh(self, timeout: float) -> bool:
+		"""Wait for the model list refresh in progress, if any.
+
+		Args:
+			timeout: The maximum time to wait, in seconds.
+
+		Returns:
+			True when no refresh is in progress anymore.
+		"""
+		with self._models_refresh_cv:
+			return self._models_refresh_cv.wait_for(
+				lambda: not self._models_refresh_in_progress, timeout
+			)
+
 	def get_model(self, model_id: str) -> Optional[ProviderAIModel]:
 		"""Retrieves a specific model by its ID.
 
@@ -292,6 +460,26 @@ class BaseEngine(ABC):
 				found = model
 		return found
 
+	def get_summary_model(self, default_model_id: str) -> str:
+		"""Return the model used to summarize conversations.
+
+		Args:
+			default_model_id: Model used when no inexpensive model of
+				``summary_model_ids`` is available.
+
+		Returns:
+			The ID of the model to use.
+		"""
+		available = {model.id for model in self.models}
+		return next(
+			(
+				model_id
+				for model_id in self.summary_model_ids
+				if model_id in available
+			),
+			default_model_id,
+		)
+
 	def _strip_catalog_sampling_params(
 		self, model: ProviderAIModel | None, params: dict[str, Any]
 	) -> None:
@@ -313,6 +501,8 @@ class BaseEngine(ABC):
 			self._models_cache = None
 			self._models_cached_at = None
 			self._models_last_error = None
+			self._models_failures = 0
+			self._models_retry_at = 0.0
 			delete_model_list_disk_cache_file(self._models_cache_file_path)
 
 	@abstractmethod
@@ -345,12 +535,50 @@ class BaseEngine(ABC):
 		"""
 		pass
 
+	def get_history_window(
+		self,
+		new_block: MessageBlock,
+		conversation: Conversation,
+		system_message: Message | None = None,
+		stop_block_index: int | None = None,
+		history_window: HistoryWindowPolicy | None = None,
+	) -> HistoryWindow:
+		"""Select the history blocks to send with a request.
+
+		Args:
+			new_block: Current message block being processed.
+			conversation: Full conversation history.
+			system_message: Optional system-level instruction message.
+			stop_block_index: Optional index to stop processing messages at. If None, all messages are processed.
+			history_window: Optional token budget and summarization policy. If None, every answered block is sent.
+
+		Returns:
+			The selected history window.
+		"""
+		if history_window is not None and history_window.summarize:
+			blocks = summarized_history(conversation, stop_block_index)
+		else:
+			blocks = history_blocks(conversation.messages, stop_block_index)
+		if history_window is None or not history_window.trim:
+			return HistoryWindow(blocks=blocks)
+		model = self.get_model(new_block.model.model_id)
+		return select_history(
+			blocks,
+			new_block,
+			system_message,
+			history_window.input_budget(model, new_block),
+			provider_id=self.account.provider.id,
+			keep_attachments_blocks=history_window.keep_attachments_blocks,
+		)
+
 	def get_messages(
 		self,
 		new_block: MessageBlock,
 		conversation: Conversation,
 		system_message: Message | None = None,
 		stop_block_index: int | None = None,
+		history_window: HistoryWindowPolicy | None = None,
+		window: HistoryWindow | None = None,
 	) -> list[Message]:
 		"""Prepares message history for API requests.
 
@@ -359,27 +587,167 @@ class BaseEngine(ABC):
 			conversation: Full conversation history.
 			system_message: Optional system-level instruction message.
 			stop_block_index: Optional index to stop processing messages at. If None, all messages are processed.
+			history_window: Optional policy trimming or summarizing the oldest blocks. If None, every answered block is sent.
+			window: Optional history window already selected with ``get_history_window``, replacing the two previous arguments.
+
+		Prepared messages of history blocks are reused from previous requests
+		until the block is edited or removed.
 
 		Returns:
 			List of prepared messages in provider-specific format.
 		"""
+		with timed_phase("prepare"):
+			return self._prepare_messages(
+				new_block,
+				conversation,
+				system_message,
+				stop_block_index,
+				history_window,
+				window,
+			)
+
+	def _prepare_messages(
+		self,
+		new_block: MessageBlock,
+		conversation: Conversation,
+		system_message: Message | None,
+		stop_block_index: int | None,
+		history_window: HistoryWindowPolicy | None,
+		window: HistoryWindow | None = None,
+	) -> list[Message]:
+		"""Build the provider messages of a request, see ``get_messages``."""
 		messages = []
 		if system_message:
 			messages.append(self.prepare_message_request(system_message))
-		for i, block in enumerate(conversation.messages):
-			if stop_block_index is not None and i >= stop_block_index:
-				break
-			if not block.response:
-				continue
+		cache = self._prepared_messages
+		if time.time() >= self._file_handles_usable_until:
+			# Some prepared messages reference expiring uploaded files
+			self._file_handles_usable_until = math.inf
+			cache.clear()
+		if window is None:
+			window = self.get_history_window(
+				new_block,
+				conversation,
+				system_message,
+				stop_block_index,
+				history_window,
+			)
+		for block in window.blocks:
+			request_part = (
+				PreparedPart.STUBBED_REQUEST
+				if window.is_stubbed(block)
+				else PreparedPart.REQUEST
+			)
 			messages.extend(
 				[
-					self.prepare_message_request(block.request),
-					self.prepare_message_response(block.response),
+					cache.get_or_prepare(
+						block, request_part, self.prepare_message_request
+					),
+					cache.get_or_prepare(
+						block,
+						PreparedPart.RESPONSE,
+						self.prepare_message_response,
+					),
 				]
 			)
-		messages.append(self.prepare_message_request(new_block.request))
+		messages.append(
+			cache.get_or_prepare(
+				new_block, PreparedPart.REQUEST, self.prepare_message_request
+			)
+		)
 		return messages
 
+	def upload_attachment(self, attachment: AttachmentFile) -> FileHandle:
+		"""Upload an attachment through the provider files API.
+
+		Engines listing ``file_upload_formats`` must override this method.
+
+		Args:
+			attachment: The attachment to upload.
+
+		Returns:
+			The handle referencing the uploaded file.
+		"""
+		raise NotImplementedError(
+			f"{self.__class__.__name__} does not support file uploads"
+		)
+
+	def delete_uploaded_file(self, handle: FileHandle) -> None:
+		"""Delete a file uploaded through the provider files API.
+
+		Engines uploading files that the provider keeps until deleted must
+		override this method.
+
+		Args:
+			handle: The handle of the expired upload.
+		"""
+		raise NotImplementedError(
+			f"{self.__class__.__name__} does not support file deletion"
+		)
+
+	def _delete_expired_uploads(self) -> None:
+		"""Delete the expired uploads of the account kept by the provider."""
+		account_id = str(self.account.id)
+		for handle in get_file_handle_cache().take_pending_deletions(
+			account_id
+		):
+			try:
+				self.delete_uploaded_file(handle)
+			except Exception:
+				log.warning(
+					"Failed to delete expired upload %s",
+					handle.file_id,
+					exc_info=True,
+				)
+
+	def _should_upload(self, attachment: AttachmentFile) -> bool:
+		"""Tell whether an attachment is uploaded instead of inlined."""
+		if attachment.mime_type not in self.file_upload_formats:
+			return False
+		if attachment.type not in (
+			AttachmentFileTypes.LOCAL,
+			AttachmentFileTypes.MEMORY,
+		):
+			return False
+		if attachment.send_location.stat().st_size < UPLOAD_MIN_BYTES:
+			return False
+		return config.conf().conversation.upload_large_attachments
+
+	def get_file_handle(self, attachment: AttachmentFile) -> FileHandle | None:
+		"""Return the handle of an uploaded attachment, uploading it if needed.
+
+		Uploads are shared by every conversation of the account and reused
+		until the provider expires the file.
+
+		Args:
+			attachment: The attachment to reference.
+
+		Returns:
+			The file handle, or None to send the attachment inline.
+		"""
+		if not self._should_upload(attachment):
+			return None
+		self._delete_expired_uploads()
+		key = (str(self.account.id), attachment.content_hash)
+		try:
+			handle = get_file_handle_cache().get_or_upload(
+				key, lambda: self.upload_attachment(attachment)
+			)
+		except OperationCancelledError:
+			raise
+		except Exception:
+			log.warning(
+				"Failed to upload attachment %s, sending it inline",
+				attachment.name,
+				exc_info=True,
+			)
+			return None
+		if handle is not None and handle.usable_until is not None:
+			self._file_handles_usable_until = min(
+				self._file_handles_usable_until, handle.usable_until
+			)
+		return handle
+
 	@abstractmethod
 	def completion(
 		self,
@@ -387,6 +755,7 @@ class BaseEngine(ABC):
 		conversation: Conversation,
 		system_message: Message | None,
 		stop_block_index: int | None = None,
+		cancel_token: CancellationToken | None = None,
 		**kwargs: dict[str, Any],
 	) -> Any:
 		"""Generates a completion response.
@@ -399,6 +768,7 @@ class BaseEngine(ABC):
 			conversation: The current conversation context (paste message request and response).
 			system_message: Optional system-level instruction message.
 			stop_block_index: Optional index to stop processing messages at. If None, all messages are processed.
+			cancel_token: Optional token closing the response when cancelled.
 			**kwargs: Additional keyword arguments for flexible configuration.
 
 		Returns:
@@ -406,10 +776,43 @@ class BaseEngine(ABC):
 		"""
 		pass
 
+	@staticmethod
+	def _bind_cancellation(
+		response: Any, cancel_token: CancellationToken | None
+	) -> Any:
+		"""Close a completion response when the token is cancelled.
+
+		Responses exposing their ``httpx.Response`` (OpenAI, Anthropic and
+		Mistral streams) have their socket shut down, and any object with a
+		``close`` method, such as a generator, is closed. Responses sent
+		through the clients' cancellable event hooks are already tracked.
+
+		Args:
+			response: The object returned by the provider SDK.
+			cancel_token: The completion cancellation token, if any.
+
+		Returns:
+			The response, unchanged.
+		"""
+		if cancel_token is None:
+			return response
+		http_response = getattr(response, "response", None)
+		if isinstance(http_response, httpx.Response):
+			cancel_token.add_callback(
+				partial(close_http_response, http_response)
+			)
+		close = getattr(response, "close", None)
+		if callable(close):
+			cancel_token.add_callback(close)
+		return response
+
 	@abstractmethod
 	def completion_response_with_stream(self, stream: Any, **kwargs) -> Any:
 		"""Handle completion response with stream.
 
+		Engines that read the token usage from the stream yield it as a
+		``("usage", TokenUsage)`` tuple.
+
 		Args:
 			stream: Stream response from the provider.
 			**kwargs: Additional keyword arguments for flexible configuration.
@@ -431,6 +834,24 @@ class BaseEngine(ABC):
 		"""
 		pass
 
+	def account_usage(self, block: MessageBlock) -> None:
+		"""Attribute the token usage of a completed block to the account.
+
+		The usage is priced at the catalog rates of the block model; the
+		cost is left unset when the catalog has no pricing for it.
+
+		Args:
+			block: The completed block, whose usage is updated in place.
+		"""
+		if block.usage is None:
+			return
+		block.usage.account_id = str(self.account.id)
+		model = self.get_model(block.model.model_id)
+		pricing = None
+		if model is not None:
+			pricing = model.extra_info.get(PRICING_RATES_EXTRA_KEY)
+		block.usage.cost = compute_cost(pricing, block.usage)
+
 	@staticmethod
 	def get_user_agent() -> str:
 		"""Get a user agent string for the application."""
@@ -442,6 +863,69 @@ class BaseEngine(ABC):
 			"Transcription not implemented for this engine"
 		)
 
+	def build_batch_request(
+		self,
+		custom_id: str,
+		new_block: MessageBlock,
+		conversation: Conversation,
+		system_message: Message | None,
+	) -> BatchRequest:
+		"""Build the batch request completing a message block.
+
+		Engines with the ``BATCH`` capability implement the batch methods.
+
+		Args:
+			custom_id: Identifier of the request, unique within the batch.
+			new_block: The block to complete.
+			conversation: The conversation providing the history.
+			system_message: Optional system-level instruction message.
+
+		Returns:
+			The request, with the parameters of a non-streamed completion.
+		"""
+		raise NotImplementedError("Batches not implemented for this engine")
+
+	def submit_batch(self, requests: list[BatchRequest]) -> str:
+		"""Submit requests to the provider batch API.
+
+		Args:
+			requests: The requests of the batch.
+
+		Returns:
+			The provider ID of the batch.
+		"""
+		raise NotImplementedError("Batches not implemented for this engine")
+
+	def get_batch_status(self, batch_id: str) -> BatchStatus:
+		"""Get the progress of a batch.
+
+		Args:
+			batch_id: The provider ID of the batch.
+
+		Returns:
+			The status of the batch.
+		"""
+		raise NotImplementedError("Batches not implemented for this engine")
+
+	def iter_batch_results(self, batch_id: str) -> Iterator[BatchItemResult]:
+		"""Iterate over the results of a finished batch.
+
+		Args:
+			batch_id: The provider ID of the batch.
+
+		Yields:
+			The outcome of each processed request.
+		"""
+		raise NotImplementedError("Batches not implemented for this engine")
+
+	def cancel_batch(self, batch_id: str) -> None:
+		"""Ask the provider to stop processing a batch.
+
+		Args:
+			batch_id: The provider ID of the batch.
+		"""
+		raise NotImplementedError("Batches not implemented for this engine")
+
 
 _SIGMA_NIGHT_MASTER_DATA_BASE = (
 	"https://raw.githubusercontent.com/SigmaNight/model-metadata/master/data"
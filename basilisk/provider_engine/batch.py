@@ -0,0 +1,79 @@
+"""Types exchanged with the engines supporting a provider batch API.
+
+Batch APIs process many requests asynchronously, within hours, at a lower
+price than regular requests. Engines with the ``BATCH`` capability build one
+``BatchRequest`` per message block, submit them together, report the
+progress of the batch and return the provider response of each request.
+"""
+
+from __future__ import annotations
+
+import enum
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+class BatchState(enum.StrEnum):
+	"""Processing state of a batch on the provider side."""
+
+	# The provider is still processing requests
+	IN_PROGRESS = enum.auto()
+	# Every request was processed, or expired; results can be fetched
+	ENDED = enum.auto()
+	# The batch was cancelled; results of finished requests can be fetched
+	CANCELLED = enum.auto()
+	# The whole batch was rejected, there are no results
+	FAILED = enum.auto()
+
+
+@dataclass(frozen=True)
+class BatchRequest:
+	"""A completion request of a batch.
+
+	Attributes:
+		custom_id: Identifier of the request, unique within the batch.
+		params: Parameters of the completion request, without streaming.
+	"""
+
+	custom_id: str
+	params: dict[str, Any]
+
+
+@dataclass(frozen=True)
+class BatchStatus:
+	"""Progress of a batch.
+
+	Attributes:
+		state: Processing state of the batch.
+		total: Number of requests of the batch.
+		completed: Number of requests processed successfully.
+		failed: Number of requests that failed, expired or were cancelled.
+		error: Reason why the batch failed, if any.
+	"""
+
+	state: BatchState
+	total: int = 0
+	completed: int = 0
+	failed: int = 0
+	error: Optional[str] = None
+
+	@property
+	def finished(self) -> bool:
+		"""Whether the provider stopped processing the batch."""
+		return self.state != BatchState.IN_PROGRESS
+
+
+@dataclass(frozen=True)
+class BatchItemResult:
+	"""Outcome of a request of a batch.
+
+	Attributes:
+		custom_id: Identifier of the request.
+		response: Provider response, accepted by
+			``completion_response_without_stream``; None on error.
+		error: Reason why the request failed, if any.
+	"""
+
+	custom_id: str
+	response: Any = None
+	error: Optional[str] = None
@@ -0,0 +1,144 @@
+"""Cancellation of in-flight provider requests.
+
+Stopping a completion used to only set a flag checked between stream chunks,
+so the worker thread stayed blocked on the socket until the provider sent the
+next chunk or finished the response. A ``CancellationToken`` is passed to
+``BaseEngine.completion``; cancelling it closes the SDK stream and the HTTP
+responses opened while the token was the current one, which unblocks the
+reading thread immediately.
+
+Provider clients register their responses through the ``response`` event hook
+returned by ``cancellable_event_hooks``. The hook attaches each response to
+the token made current by ``cancellation_scope`` in the requesting thread.
+"""
+
+from __future__ import annotations
+
+import logging
+import socket
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+
+if TYPE_CHECKING:
+	import httpx
+
+log = logging.getLogger(__name__)
+
+_current_token: ContextVar[CancellationToken | None] = ContextVar(
+	"basilisk_cancellation_token", default=None
+)
+
+
+class OperationCancelledError(Exception):
+	"""Raised when a wait is abandoned because its token was cancelled."""
+
+
+class CancellationToken:
+	"""Thread-safe flag running close callbacks when cancelled."""
+
+	def __init__(self):
+		"""Initialize a token that is not cancelled."""
+		self._lock = threading.Lock()
+		self._cancelled = False
+		self._callbacks: list[Callable[[], None]] = []
+
+	@property
+	def cancelled(self) -> bool:
+		"""Whether the token has been cancelled."""
+		return self._cancelled
+
+	def add_callback(self, callback: Callable[[], None]) -> None:
+		"""Register a callback run when the token is cancelled.
+
+		The callback runs immediately if the token is already cancelled.
+
+		Args:
+			callback: Function taking no argument, usually closing a resource.
+		"""
+		with self._lock:
+			if not self._cancelled:
+				self._callbacks.append(callback)
+				return
+		self._run(callback)
+
+	def cancel(self) -> None:
+		"""Cancel the token and run the registered callbacks once."""
+		with self._lock:
+			if self._cancelled:
+				return
+			self._cancelled = True
+			callbacks = self._callbacks
+			self._callbacks = []
+		for callback in callbacks:
+			self._run(callback)
+
+	@staticmethod
+	def _run(callback: Callable[[], None]) -> None:
+		try:
+			callback()
+		except Exception:
+			log.debug("Error in cancellation callback", exc_info=True)
+
+
+@contextmanager
+def cancellation_scope(token: CancellationToken | None) -> Iterator[None]:
+	"""Make a token current for the HTTP requests sent in this context.
+
+	Args:
+		token: The token receiving the responses, None to disable tracking.
+	"""
+	reset_token = _current_token.set(token)
+	try:
+		yield
+	finally:
+		_current_token.reset(reset_token)
+
+
+def current_cancellation_token() -> CancellationToken | None:
+	"""Return the token made current by ``cancellation_scope``, if any."""
+	return _current_token.get()
+
+
+def close_http_response(response: httpx.Response) -> None:
+	"""Close an HTTP response, aborting a read blocked in another thread.
+
+	Closing a socket does not wake up a thread blocked in ``recv`` on it, so
+	the underlying socket is shut down first when it is available.
+
+	Args:
+		response: The response to close.
+	"""
+	network_stream = response.extensions.get("network_stream")
+	if network_stream is not None:
+		try:
+			sock = network_stream.get_extra_info("socket")
+			if sock is not None:
+				# Bypass SSLSocket.shutdown, which also drops the TLS object
+				socket.socket.shutdown(sock, socket.SHUT_RDWR)
+		except Exception:
+			log.debug("Unable to shut down response socket", exc_info=True)
+	try:
+		response.close()
+	except Exception:
+		log.debug("Error closing cancelled response", exc_info=True)
+
+
+def track_response(response: httpx.Response) -> None:
+	"""Attach a response to the current cancellation token.
+
+	Meant to be used as an httpx ``response`` event hook.
+
+	Args:
+		response: The response whose headers were just received.
+	"""
+	token = _current_token.get()
+	if token is not None:
+		token.add_callback(partial(close_http_response, response))
+
+
+def cancellable_event_hooks() -> dict[str, list[Callable[[Any], None]]]:
+	"""Return the httpx event hooks tracking responses for cancellation."""
+	return {"response": [track_response]}
@@ -17,6 +17,7 @@ CHAT_CLIENT_TUNING_TOP_LEVEL_KEYS: frozenset[str] = frozenset(
 		"top_p",
 		"max_tokens",
 		"max_completion_tokens",
+		"max_output_tokens",
 		"frequency_penalty",
 		"presence_penalty",
 		"seed",
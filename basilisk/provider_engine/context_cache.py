@@ -0,0 +1,218 @@
+"""Registry of the explicit context caches created for conversations.
+
+Providers with a cached-content API, such as Gemini, bill the tokens read
+from a context cache at a reduced rate. Engines create a cache holding the
+stable prefix of a conversation (system instruction, then the history up to
+its last large attachment) and reference it in later requests instead of
+sending the prefix again. Caches are kept here, keyed by conversation and
+account, with the digest of the prefix they hold: a cache is renewed while
+the prefix is unchanged, and deleted once the prefix changes or the
+conversation is closed. Unreleased caches expire on the provider side.
+
+Failed creations are remembered for a while, so a model without caching
+support does not receive a creation attempt on every turn.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import cache
+from typing import Callable, Optional
+
+log = logging.getLogger(__name__)
+
+# Prefixes estimated below this are not worth caching; providers also reject
+# caches below a model-dependent minimum
+CONTEXT_CACHE_MIN_TOKENS = 4096
+# Lifetime requested for a cache, extended while the conversation uses it
+CONTEXT_CACHE_TTL_SECONDS = 3600
+# Caches are renewed once they are this close to their expiry
+RENEW_MARGIN_SECONDS = 600
+# Delay before a prefix whose cache creation failed is tried again
+FAILURE_BACKOFF_SECONDS = 600
+
+# (conversation key, account ID)
+ContextCacheKey = tuple[int, str]
+
+
+@dataclass(frozen=True)
+class ContextCache:
+	"""Reference to a context cache stored by a provider.
+
+	Attributes:
+		name: Provider name of the cache.
+		digest: Digest of the prefix held by the cache.
+		prefix_length: Number of request contents held by the cache.
+		expires_at: Epoch time at which the provider deletes the cache.
+		delete: Deletes the cache on the provider side.
+	"""
+
+	name: str
+	digest: str
+	prefix_length: int
+	expires_at: float
+	delete: Callable[[], None] = field(
+		default=lambda: None, compare=False, repr=False
+	)
+
+	def needs_renewal(self, now: float) -> bool:
+		"""Tell whether the cache must be extended before it is referenced.
+
+		Args:
+			now: Current epoch time.
+		"""
+		return now >= self.expires_at - RENEW_MARGIN_SECONDS
+
+
+class ContextCacheRegistry:
+	"""Thread-safe registry of the context caches of open conversations.
+
+	Concurrent requests of a conversation wait for a single creation.
+	"""
+
+	def __init__(self, clock: Callable[[], float] = time.time):
+		"""Initialize an empty registry.
+
+		Args:
+			clock: Returns the current epoch time.
+		"""
+		self._clock = clock
+		self._caches: dict[ContextCacheKey, ContextCache] = {}
+		self._failures: dict[str, float] = {}
+		self._key_locks: dict[ContextCacheKey, threading.Lock] = {}
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.creations = 0
+		self.failures = 0
+
+	def get_or_create(
+		self,
+		key: ContextCacheKey,
+		digest: str,
+		create: Callable[[], ContextCache],
+		renew: Callable[[ContextCache], ContextCache],
+	) -> Optional[ContextCache]:
+		"""Return the cache of a prefix, creating or renewing it if needed.
+
+		The previous cache of the key is deleted when it holds another
+		prefix.
+
+		Args:
+			key: The (conversation key, account ID) key.
+			digest: Digest of the prefix to cache.
+			create: Creates the cache of the prefix.
+			renew: Extends the lifetime of a cache and returns it updated.
+
+		Returns:
+			The cache, or None when it cannot be used for this request.
+		"""
+		with self._lock:
+			key_lock = self._key_locks.setdefault(key, threading.Lock())
+		with key_lock:
+			now = self._clock()
+			with self._lock:
+				current = self._caches.get(key)
+			if current is not None and current.digest == digest:
+				if current.needs_renewal(now):
+					current = self._renew(key, current, renew)
+				if current is not None:
+					with self._lock:
+						self.hits += 1
+				return current
+			if current is not None:
+				self.release_key(key)
+			with self._lock:
+				failed_at = self._failures.get(digest)
+			if (
+				failed_at is not None
+				and now - failed_at < FAILURE_BACKOFF_SECONDS
+			):
+				return None
+			try:
+				created = create()
+			except Exception:
+				log.warning("Failed to create context cache", exc_info=True)
+				with self._lock:
+					self._failures[digest] = self._clock()
+					self.failures += 1
+				return None
+			with self._lock:
+				self._caches[key] = created
+				self._failures.pop(digest, None)
+				self.creations += 1
+			return created
+
+	def _renew(
+		self,
+		key: ContextCacheKey,
+		current: ContextCache,
+		renew: Callable[[ContextCache], ContextCache],
+	) -> Optional[ContextCache]:
+		"""Extend a cache, forgetting it when it is already gone."""
+		try:
+			renewed = renew(current)
+		except Exception:
+			log.warning(
+				"Failed to renew context cache %s", current.name, exc_info=True
+			)
+			with self._lock:
+				self._caches.pop(key, None)
+			return None
+		with self._lock:
+			self._caches[key] = renewed
+		return renewed
+
+	def release_key(self, key: ContextCacheKey) -> None:
+		"""Forget the cache of a key and delete it on the provider side.
+
+		Args:
+			key: The (conversation key, account ID) key.
+		"""
+		with self._lock:
+			current = self._caches.pop(key, None)
+		if current is None:
+			return
+		try:
+			current.delete()
+		except Exception:
+			log.warning(
+				"Failed to delete context cache %s", current.name, exc_info=True
+			)
+
+	def release(self, conversation_key: int) -> int:
+		"""Delete the caches of a conversation, whatever their account.
+
+		Args:
+			conversation_key: The key of the conversation.
+
+		Returns:
+			The number of caches released.
+		"""
+		with self._lock:
+			keys = [key for key in self._caches if key[0] == conversation_key]
+		for key in keys:
+			self.release_key(key)
+		return len(keys)
+
+	def __len__(self) -> int:
+		"""Return the number of registered caches."""
+		with self._lock:
+			return len(self._caches)
+
+
+def conversation_key(conversation: object) -> int:
+	"""Return the key identifying the caches of an open conversation.
+
+	Args:
+		conversation: The conversation object.
+	"""
+	return id(conversation)
+
+
+@cache
+def get_context_cache_registry() -> ContextCacheRegistry:
+	"""Return the process-wide context cache registry."""
+	return ContextCacheRegistry()
@@ -4,7 +4,7 @@ This module provides the DeepSeekAIEngine class for interacting with the DeepSee
 implementing capabilities for text generation using various DeepSeek models.
 """
 
-from typing import Generator
+from typing import AsyncIterator, Generator
 
 from openai.types.chat import (
 	ChatCompletion,
@@ -12,7 +12,12 @@ from openai.types.chat import (
 	ChatCompletionChunk,
 )
 
-from basilisk.conversation import Message, MessageBlock, MessageRoleEnum
+from basilisk.conversation import (
+	Message,
+	MessageBlock,
+	MessageRoleEnum,
+	TokenUsage,
+)
 from basilisk.provider_capability import ProviderCapability
 
 from .base_engine import sigma_night_data_file
@@ -50,27 +55,68 @@ class DeepSeekAIEngine(LegacyOpenAIEngine):
 			stream: Generator of chat completion chunks.
 
 		Yields:
-			Formatted text content from each chunk.
+			Formatted text content from each chunk, and the token usage.
 		"""
 		reasoning_content_tag_sent = False
 		for chunk in stream:
-			delta = chunk.choices[0].delta
-			if delta:
-				if (
-					hasattr(delta, "reasoning_content")
-					and delta.reasoning_content
-				):
-					if not reasoning_content_tag_sent:
-						reasoning_content_tag_sent = True
-						yield f"```think\n{delta.reasoning_content}"
-					else:
-						yield delta.reasoning_content
-				if delta.content:
-					if reasoning_content_tag_sent:
-						reasoning_content_tag_sent = False
-						yield f"\n```\n\n{delta.content}"
-					else:
-						yield delta.content
+			texts, reasoning_content_tag_sent = self._format_stream_chunk(
+				chunk, reasoning_content_tag_sent
+			)
+			yield from texts
+
+	async def acompletion_response_with_stream(
+		self, stream: AsyncIterator[ChatCompletionChunk]
+	) -> AsyncIterator[str | tuple[str, TokenUsage]]:
+		"""Processes async streaming response from DeepSeek API.
+
+		Args:
+			stream: Async stream of chat completion chunks.
+
+		Yields:
+			Formatted text content from each chunk, and the token usage.
+		"""
+		reasoning_content_tag_sent = False
+		async for chunk in stream:
+			texts, reasoning_content_tag_sent = self._format_stream_chunk(
+				chunk, reasoning_content_tag_sent
+			)
+			for text in texts:
+				yield text
+
+	def _format_stream_chunk(
+		self, chunk: ChatCompletionChunk, reasoning_content_tag_sent: bool
+	) -> tuple[list[str | tuple[str, TokenUsage]], bool]:
+		"""Formats the reasoning and regular content of a stream chunk.
+
+		Args:
+			chunk: The chat completion chunk.
+			reasoning_content_tag_sent: Whether a reasoning block is open.
+
+		Returns:
+			Tuple of the texts and usage to yield and the updated reasoning
+			block flag.
+		"""
+		texts = []
+		usage = getattr(chunk, "usage", None)
+		if usage:
+			texts.append(("usage", self._token_usage(usage)))
+		if not chunk.choices:
+			return texts, reasoning_content_tag_sent
+		delta = chunk.choices[0].delta
+		if delta:
+			if hasattr(delta, "reasoning_content") and delta.reasoning_content:
+				if not reasoning_content_tag_sent:
+					reasoning_content_tag_sent = True
+					texts.append(f"```think\n{delta.reasoning_content}")
+				else:
+					texts.append(delta.reasoning_content)
+			if delta.content:
+				if reasoning_content_tag_sent:
+					reasoning_content_tag_sent = False
+					texts.append(f"\n```\n\n{delta.content}")
+				else:
+					texts.append(delta.content)
+		return texts, reasoning_content_tag_sent
 
 	def completion_response_without_stream(
 		self, response: ChatCompletion, new_block: MessageBlock, **kwargs
@@ -100,6 +146,8 @@ class DeepSeekAIEngine(LegacyOpenAIEngine):
 		new_block.response = Message(
 			role=MessageRoleEnum.ASSISTANT, content=content
 		)
+		if response.usage:
+			new_block.usage = self._token_usage(response.usage)
 		return new_block
 
 	def prepare_message_response(
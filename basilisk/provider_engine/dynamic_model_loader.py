@@ -28,7 +28,9 @@ from pydantic import (
 
 from basilisk.consts import APP_NAME, APP_SOURCE_URL
 from basilisk.decorators import measure_time
+from basilisk.http_client_registry import http_get
 from basilisk.model_catalog.display import summarize_pricing
+from basilisk.model_catalog.pricing import PRICING_RATES_EXTRA_KEY
 from basilisk.model_catalog.sampling import METADATA_CATALOG_EXTRA_KEY
 from basilisk.provider_ai_model import ProviderAIModel
 
@@ -269,6 +271,13 @@ class ModelMetadataItem(BaseModel, extra="ignore"):
 		}
 		if pricing_summary:
 			extra_info["Pricing"] = pricing_summary
+		pricing_rates = {
+			usage_type: price
+			for usage_type, price in self.pricing.items()
+			if price is not None
+		}
+		if pricing_rates:
+			extra_info[PRICING_RATES_EXTRA_KEY] = pricing_rates
 		if self.created_timestamp:
 			try:
 				extra_info["created"] = datetime.fromtimestamp(
@@ -368,7 +377,7 @@ def fetch_models_json(url: str) -> ProviderMetadata:
 		httpx.HTTPError: On request failure.
 		ValidationError: If the JSON structure is invalid.
 	"""
-	response = httpx.get(
+	response = http_get(
 		url,
 		headers={"User-Agent": f"{APP_NAME} ({APP_SOURCE_URL})"},
 		timeout=_HTTP_TIMEOUT_SECONDS,
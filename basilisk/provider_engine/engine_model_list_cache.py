@@ -29,12 +29,27 @@ log = logging.getLogger(__name__)
 MODEL_LIST_CACHE_PAYLOAD_VERSION = 1
 PRUNE_INTERVAL_SECONDS = 3600
 STALE_TTL_MULTIPLIER = 7
+# Delay before retrying a failing model source, doubled after each failure
+REFRESH_RETRY_BASE_SECONDS = 30
+REFRESH_RETRY_MAX_SECONDS = 3600
 
 # Mutable throttle timestamp without a ``global`` statement.
 _prune_last_at: list[float] = [0.0]
 _prune_lock = threading.Lock()
 
 
+def refresh_retry_delay(failures: int) -> float:
+	"""Return the delay before retrying a model source after failures.
+
+	Args:
+		failures: The number of consecutive failures, at least 1.
+	"""
+	return min(
+		REFRESH_RETRY_BASE_SECONDS * 2 ** (failures - 1),
+		REFRESH_RETRY_MAX_SECONDS,
+	)
+
+
 def model_list_disk_cache_path(
 	*,
 	account_id: str,
@@ -0,0 +1,309 @@
+"""Cache of attachments uploaded through the providers' files APIs.
+
+Large attachments used to be inlined as base64 in every request of a
+conversation, so a multi-megabyte PDF was sent again on each turn. Engines
+supporting a files API upload such attachments once and reference the
+returned file handle in later requests. Handles are kept here, keyed by
+account and attachment content hash, until they expire on the provider side.
+They are saved on disk, so uploads are reused after a restart instead of being
+sent again and left orphaned on the provider.
+
+Providers keeping files until deleted get a local expiry: once it is reached,
+the handle is queued for deletion by the engine of its account.
+
+Failed uploads are remembered for a while, so an endpoint without a files
+API does not receive an upload attempt on every turn.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass
+from functools import cache
+from pathlib import Path
+from typing import Callable, Optional
+
+from basilisk.provider_engine.cancellation import OperationCancelledError
+from basilisk.provider_engine.model_cache_registry import (
+	get_cache_root_path,
+	write_json_atomic,
+)
+
+log = logging.getLogger(__name__)
+
+FILE_HANDLE_CACHE_VERSION = 1
+_CACHE_FILENAME = "file_handles.json"
+
+# Attachments smaller than this are cheaper to inline than to upload
+UPLOAD_MIN_BYTES = 1024 * 1024
+# Handles are not referenced once they are this close to their expiry
+EXPIRY_MARGIN_SECONDS = 3600
+# Delay before an upload that failed is tried again
+FAILURE_BACKOFF_SECONDS = 600
+
+FileHandleKey = tuple[str, str]
+
+
+@dataclass(frozen=True)
+class FileHandle:
+	"""Reference to an attachment stored by a provider.
+
+	Attributes:
+		file_id: Provider file ID, or the URI or URL referencing the file.
+		mime_type: MIME type of the uploaded file.
+		expires_at: Epoch time at which the provider deletes the file, None
+			when it is kept until deleted.
+		delete_on_expiry: Whether the provider keeps the file after
+			``expires_at``, so the engine must delete it.
+	"""
+
+	file_id: str
+	mime_type: Optional[str] = None
+	expires_at: Optional[float] = None
+	delete_on_expiry: bool = False
+
+	@property
+	def usable_until(self) -> Optional[float]:
+		"""Epoch time after which the handle is no longer referenced."""
+		if self.expires_at is None:
+			return None
+		return self.expires_at - EXPIRY_MARGIN_SECONDS
+
+	def is_usable(self, now: Optional[float] = None) -> bool:
+		"""Tell whether the handle can still be referenced in a request.
+
+		Args:
+			now: Current epoch time, defaults to the system time.
+		"""
+		usable_until = self.usable_until
+		if usable_until is None:
+			return True
+		return (time.time() if now is None else now) < usable_until
+
+
+class FileHandleCache:
+	"""Thread-safe cache of uploaded attachment handles.
+
+	Concurrent requests for the same key wait for a single upload.
+	"""
+
+	def __init__(
+		self,
+		clock: Callable[[], float] = time.time,
+		path: Optional[Path] = None,
+	):
+		"""Initialize the cache, loading the handles saved at a path.
+
+		Args:
+			clock: Returns the current epoch time.
+			path: JSON file the handles are saved to, None to keep them in
+				memory only.
+		"""
+		self._clock = clock
+		self._path = path
+		self._handles: dict[FileHandleKey, FileHandle] = {}
+		# Expired handles of files the provider keeps, by account ID
+		self._pending_deletions: dict[str, list[FileHandle]] = {}
+		self._failures: dict[FileHandleKey, float] = {}
+		self._key_locks: dict[FileHandleKey, threading.Lock] = {}
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.uploads = 0
+		self.failures = 0
+		if path is not None:
+			self._load()
+
+	def _load(self) -> None:
+		"""Read the saved handles, dropping an invalid file."""
+		if not self._path.exists():
+			return
+		try:
+			payload = json.loads(self._path.read_text(encoding="utf-8"))
+			if not isinstance(payload, dict):
+				raise TypeError("invalid cache payload")
+			if payload.get("version") != FILE_HANDLE_CACHE_VERSION:
+				raise ValueError("unsupported cache payload version")
+			for entry in payload["handles"]:
+				key = (entry.pop("account_id"), entry.pop("content_hash"))
+				self._handles[key] = FileHandle(**entry)
+			for entry in payload["pending_deletions"]:
+				account_id = entry.pop("account_id")
+				self._pending_deletions.setdefault(account_id, []).append(
+					FileHandle(**entry)
+				)
+		except (
+			OSError,
+			json.JSONDecodeError,
+			KeyError,
+			TypeError,
+			ValueError,
+		) as exc:
+			log.warning("Failed reading file handle cache: %s", exc)
+			self._handles.clear()
+			self._pending_deletions.clear()
+			try:
+				self._path.unlink(missing_ok=True)
+			except OSError:
+				log.debug("Could not delete invalid file handle cache")
+
+	def _save_unlocked(self) -> None:
+		"""Write the handles to disk, must be called with the lock held."""
+		if self._path is None:
+			return
+		payload = {
+			"version": FILE_HANDLE_CACHE_VERSION,
+			"handles": [
+				{"account_id": key[0], "content_hash": key[1], **asdict(handle)}
+				for key, handle in self._handles.items()
+			],
+			"pending_deletions": [
+				{"account_id": account_id, **asdict(handle)}
+				for account_id, handles in self._pending_deletions.items()
+				for handle in handles
+			],
+		}
+		try:
+			write_json_atomic(self._path, payload)
+		except (OSError, TypeError, ValueError) as exc:
+			log.warning("Failed writing file handle cache: %s", exc)
+
+	def _drop_unlocked(self, key: FileHandleKey) -> None:
+		"""Forget a handle, queueing its file for deletion if needed."""
+		handle = self._handles.pop(key, None)
+		if handle is not None and handle.delete_on_expiry:
+			self._pending_deletions.setdefault(key[0], []).append(handle)
+
+	def get(self, key: FileHandleKey) -> Optional[FileHandle]:
+		"""Return the usable handle of a key, dropping an expired one.
+
+		Args:
+			key: The (account ID, content hash) key.
+
+		Returns:
+			The handle, or None if there is no usable handle.
+		"""
+		with self._lock:
+			handle = self._handles.get(key)
+			if handle is None:
+				return None
+			if not handle.is_usable(self._clock()):
+				self._drop_unlocked(key)
+				self._save_unlocked()
+				return None
+			return handle
+
+	def put(self, key: FileHandleKey, handle: FileHandle) -> None:
+		"""Store the handle of an uploaded attachment.
+
+		Args:
+			key: The (account ID, content hash) key.
+			handle: The handle returned by the upload.
+		"""
+		with self._lock:
+			self._drop_unlocked(key)
+			self._handles[key] = handle
+			self._failures.pop(key, None)
+			self._save_unlocked()
+
+	def get_or_upload(
+		self, key: FileHandleKey, upload: Callable[[], FileHandle]
+	) -> Optional[FileHandle]:
+		"""Return the handle of a key, uploading the attachment on a miss.
+
+		Args:
+			key: The (account ID, content hash) key.
+			upload: Uploads the attachment and returns its handle.
+
+		Returns:
+			The handle, or None when the upload failed recently.
+
+		Raises:
+			Exception: Any error raised by ``upload``. A cancelled upload is
+				not remembered as a failure.
+		"""
+		with self._lock:
+			key_lock = self._key_locks.setdefault(key, threading.Lock())
+		with key_lock:
+			handle = self.get(key)
+			if handle is not None:
+				with self._lock:
+					self.hits += 1
+				return handle
+			with self._lock:
+				failed_at = self._failures.get(key)
+				if (
+					failed_at is not None
+					and self._clock() - failed_at < FAILURE_BACKOFF_SECONDS
+				):
+					return None
+			try:
+				handle = upload()
+			except OperationCancelledError:
+				raise
+			except Exception:
+				with self._lock:
+					self._failures[key] = self._clock()
+					self.failures += 1
+				raise
+			with self._lock:
+				self.uploads += 1
+			self.put(key, handle)
+			return handle
+
+	def invalidate(self, key: FileHandleKey) -> None:
+		"""Forget the handle of a key.
+
+		Args:
+			key: The (account ID, content hash) key.
+		"""
+		with self._lock:
+			self._drop_unlocked(key)
+			self._save_unlocked()
+
+	def take_pending_deletions(self, account_id: str) -> list[FileHandle]:
+		"""Return the expired handles whose files an account must delete.
+
+		The returned handles are forgotten.
+
+		Args:
+			account_id: The ID of the account.
+
+		Returns:
+			The handles of the files to delete.
+		"""
+		with self._lock:
+			now = self._clock()
+			expired = [
+				key
+				for key, handle in self._handles.items()
+				if key[0] == account_id and not handle.is_usable(now)
+			]
+			for key in expired:
+				self._drop_unlocked(key)
+			handles = self._pending_deletions.pop(account_id, [])
+			if expired or handles:
+				self._save_unlocked()
+			return handles
+
+	def clear(self) -> None:
+		"""Forget every handle and failure."""
+		with self._lock:
+			self._handles.clear()
+			self._pending_deletions.clear()
+			self._failures.clear()
+			self._key_locks.clear()
+			self._save_unlocked()
+
+	def __len__(self) -> int:
+		"""Return the number of cached handles."""
+		with self._lock:
+			return len(self._handles)
+
+
+@cache
+def get_file_handle_cache() -> FileHandleCache:
+	"""Return the process-wide file handle cache, saved in the cache root."""
+	return FileHandleCache(path=get_cache_root_path() / _CACHE_FILENAME)
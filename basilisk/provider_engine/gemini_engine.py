@@ -6,20 +6,32 @@ implementing capabilities for text and image handling using Google's generative
 
 from __future__ import annotations
 
+import dataclasses
+import hashlib
 import logging
-from functools import cached_property
-from typing import Any, Iterator
+import time
+from functools import cached_property, partial
+from typing import Any, AsyncIterator, ClassVar, Iterator
 
 from google import genai
+from google.genai.client import AsyncClient
 from google.genai.types import (
+	CachedContent,
 	Content,
+	CreateCachedContentConfig,
+	FileState,
 	GenerateContentConfig,
 	GenerateContentResponse,
+	GenerateContentResponseUsageMetadata,
 	GoogleSearch,
+	HttpOptions,
 	Part,
 	Tool,
+	UpdateCachedContentConfig,
+	UploadFileConfig,
 )
 
+from basilisk.consts import APP_NAME
 from basilisk.conversation import (
 	AttachmentFile,
 	AttachmentFileTypes,
@@ -27,15 +39,81 @@ from basilisk.conversation import (
 	Message,
 	MessageBlock,
 	MessageRoleEnum,
+	TokenUsage,
 )
+from basilisk.conversation.history_window import HistoryWindow
 from basilisk.model_catalog.sampling import model_allows_api_sampling_param
+from basilisk.token_estimator import (
+	estimate_message_tokens,
+	estimate_text_tokens,
+)
 
-from .base_engine import BaseEngine, ProviderCapability, sigma_night_data_file
+from .async_base_engine import AsyncBaseEngine
+from .base_engine import ProviderCapability, sigma_night_data_file
+from .cancellation import (
+	CancellationToken,
+	OperationCancelledError,
+	current_cancellation_token,
+)
+from .context_cache import (
+	CONTEXT_CACHE_MIN_TOKENS,
+	CONTEXT_CACHE_TTL_SECONDS,
+	ContextCache,
+	conversation_key,
+	get_context_cache_registry,
+)
+from .file_handle_cache import FileHandle
 
 logger = logging.getLogger(__name__)
 
+# The Gemini files API deletes uploaded files after 48 hours
+_FILE_TTL_SECONDS = 48 * 3600
+# Interval between two checks of a file still being processed
+_FILE_POLL_INTERVAL_SECONDS = 1.0
+# Time after which a file still being processed is sent inline instead
+_FILE_PROCESSING_TIMEOUT_SECONDS = 300
+
+
+def _prefix_digest(
+	model_id: str,
+	system_message: Message | None,
+	window: HistoryWindow,
+	prefix: list[MessageBlock],
+) -> str:
+	"""Return the digest of the stable prefix of a request.
+
+	Args:
+		model_id: The model of the request.
+		system_message: Optional system message of the request.
+		window: The history window of the request.
+		prefix: The history blocks of the prefix.
+
+	Returns:
+		The hexadecimal digest.
+	"""
+	digest = hashlib.sha256()
+
+	def update(*values: str):
+		for value in values:
+			digest.update(value.encode())
+			digest.update(b"\0")
+
+	update(model_id, system_message.content if system_message else "")
+	for block in prefix:
+		update(
+			block.request.content,
+			block.response.content,
+			str(window.is_stubbed(block)),
+		)
+		for attachment in block.request.attachments or []:
+			if attachment.type == AttachmentFileTypes.URL:
+				update(attachment.url)
+			else:
+				update(attachment.content_hash or str(attachment.location))
+	return digest.hexdigest()
+
 
-class GeminiEngine(BaseEngine):
+class GeminiEngine(AsyncBaseEngine):
 	"""Engine implementation for Google Gemini API integration.
 
 	Provides specific functionality for interacting with Google's Gemini models,
@@ -53,6 +131,10 @@ class GeminiEngine(BaseEngine):
 		ProviderCapability.WEB_SEARCH,
 		ProviderCapability.VIDEO,
 	}
+	summary_model_ids: ClassVar[tuple[str, ...]] = (
+		"gemini-2.5-flash-lite",
+		"gemini-2.0-flash-lite",
+	)
 
 	supported_attachment_formats: set[str] = {
 		"application/pdf",
@@ -81,6 +163,9 @@ class GeminiEngine(BaseEngine):
 		"video/webm",
 		"video/3gpp",
 	}
+	file_upload_formats: ClassVar[frozenset[str]] = frozenset(
+		supported_attachment_formats
+	)
 
 	MODELS_JSON_URL = sigma_night_data_file("google.json")
 
@@ -91,7 +176,22 @@ class GeminiEngine(BaseEngine):
 		Returns:
 			Client object for the provider, initialized with the API key.
 		"""
-		return genai.Client(api_key=self.account.api_key.get_secret_value())
+		return genai.Client(
+			api_key=self.account.api_key.get_secret_value(),
+			http_options=HttpOptions(
+				httpx_client=self.http_client,
+				httpx_async_client=self.async_http_client,
+			),
+		)
+
+	@cached_property
+	def async_client(self) -> AsyncClient:
+		"""Property to return the async client object for the provider.
+
+		Returns:
+			The async interface of the provider client.
+		"""
+		return self.client.aio
 
 	def convert_role(self, role: MessageRoleEnum) -> str:
 		"""Converts internal role enum to Gemini API role string.
@@ -114,6 +214,54 @@ class GeminiEngine(BaseEngine):
 				"System role must be set on the model instance"
 			)
 
+	def upload_attachment(self, attachment: AttachmentFile) -> FileHandle:
+		"""Upload an attachment through the Gemini files API.
+
+		Waits until the provider has processed the file, as audio and video
+		files cannot be referenced before.
+
+		Args:
+			attachment: The attachment to upload.
+
+		Returns:
+			The handle referencing the uploaded file.
+
+		Raises:
+			RuntimeError: If the provider failed to process the file in time.
+			OperationCancelledError: If the completion was stopped meanwhile.
+		"""
+		uploaded_at = time.time()
+		with attachment.send_location.open("rb") as f:
+			file = self.client.files.upload(
+				file=f,
+				config=UploadFileConfig(
+					mime_type=attachment.mime_type, display_name=attachment.name
+				),
+			)
+		cancel_token = current_cancellation_token()
+		deadline = time.monotonic() + _FILE_PROCESSING_TIMEOUT_SECONDS
+		while file.state == FileState.PROCESSING:
+			if cancel_token is not None and cancel_token.cancelled:
+				raise OperationCancelledError()
+			if time.monotonic() >= deadline:
+				raise RuntimeError(
+					f"Gemini did not process file {file.name} in time"
+				)
+			time.sleep(_FILE_POLL_INTERVAL_SECONDS)
+			file = self.client.files.get(name=file.name)
+		if file.state == FileState.FAILED:
+			raise RuntimeError(f"Gemini failed to process file {file.name}")
+		expires_at = (
+			file.expiration_time.timestamp()
+			if file.expiration_time
+			else uploaded_at + _FILE_TTL_SECONDS
+		)
+		return FileHandle(
+			file_id=file.uri,
+			mime_type=file.mime_type or attachment.mime_type,
+			expires_at=expires_at,
+		)
+
 	def convert_attachment(self, attachment: AttachmentFile) -> Part:
 		"""Converts internal attachment representation to Gemini 'part'.
 
@@ -132,10 +280,14 @@ class GeminiEngine(BaseEngine):
 			return Part.from_uri(
 				file_uri=attachment.url, mime_type=attachment.mime_type
 			)
-		with attachment.send_location.open("rb") as f:
-			return Part.from_bytes(
-				mime_type=attachment.mime_type, data=f.read()
+		handle = self.get_file_handle(attachment)
+		if handle is not None:
+			return Part.from_uri(
+				file_uri=handle.file_id, mime_type=handle.mime_type
 			)
+		return Part.from_bytes(
+			mime_type=attachment.mime_type, data=attachment.cached_bytes()
+		)
 
 	def convert_message_content(self, message: Message) -> Content:
 		"""Converts internal message to Gemini API content format.
@@ -157,17 +309,114 @@ class GeminiEngine(BaseEngine):
 	prepare_message_request = convert_message_content
 	prepare_message_response = convert_message_content
 
-	def completion(
+	@staticmethod
+	def _cache_expiry(cached: CachedContent) -> float:
+		"""Return the epoch time at which a context cache is deleted."""
+		if cached.expire_time:
+			return cached.expire_time.timestamp()
+		return time.time() + CONTEXT_CACHE_TTL_SECONDS
+
+	def _context_cache(
+		self,
+		model_id: str,
+		conversation: Conversation,
+		system_message: Message | None,
+		window: HistoryWindow,
+		contents: list[Content],
+	) -> ContextCache | None:
+		"""Return the context cache holding the stable prefix of a request.
+
+		The prefix is the system instruction followed by the history up to
+		the last block whose attachments are sent. It is cached once its
+		estimated size reaches ``CONTEXT_CACHE_MIN_TOKENS``, then reused by
+		the next requests of the conversation until it changes.
+
+		Args:
+			model_id: The model of the request.
+			conversation: The conversation of the request.
+			system_message: Optional system message of the request.
+			window: The history window of the request.
+			contents: The contents of the request.
+
+		Returns:
+			The cache, or None to send the whole request.
+		"""
+		provider_id = self.account.provider.id
+		prefix_blocks = 0
+		for index, block in enumerate(window.blocks):
+			if block.request.attachments and not window.is_stubbed(block):
+				prefix_blocks = index + 1
+		prefix = window.blocks[:prefix_blocks]
+		tokens = (
+			estimate_text_tokens(system_message.content, provider_id)
+			if system_message
+			else 0
+		)
+		for block in prefix:
+			tokens += estimate_message_tokens(
+				block.request,
+				provider_id,
+				include_attachments=not window.is_stubbed(block),
+			)
+			tokens += estimate_message_tokens(block.response, provider_id)
+		if tokens < CONTEXT_CACHE_MIN_TOKENS:
+			return None
+		digest = _prefix_digest(model_id, system_message, window, prefix)
+		# Each history block is sent as a request and a response content
+		prefix_length = 2 * prefix_blocks
+
+		def create() -> ContextCache:
+			cached = self.client.caches.create(
+				model=model_id,
+				config=CreateCachedContentConfig(
+					contents=contents[:prefix_length] or None,
+					system_instruction=system_message.content
+					if system_message
+					else None,
+					ttl=f"{CONTEXT_CACHE_TTL_SECONDS}s",
+					display_name=APP_NAME,
+				),
+			)
+			logger.debug(
+				"Created context cache %s of about %d tokens",
+				cached.name,
+				tokens,
+			)
+			return ContextCache(
+				name=cached.name,
+				digest=digest,
+				prefix_length=prefix_length,
+				expires_at=self._cache_expiry(cached),
+				delete=partial(self.client.caches.delete, name=cached.name),
+			)
+
+		def renew(current: ContextCache) -> ContextCache:
+			cached = self.client.caches.update(
+				name=current.name,
+				config=UpdateCachedContentConfig(
+					ttl=f"{CONTEXT_CACHE_TTL_SECONDS}s"
+				),
+			)
+			return dataclasses.replace(
+				current, expires_at=self._cache_expiry(cached)
+			)
+
+		return get_context_cache_registry().get_or_create(
+			(conversation_key(conversation), str(self.account.id)),
+			digest,
+			create,
+			renew,
+		)
+
+	def build_completion_params(
 		self,
 		new_block: MessageBlock,
 		conversation: Conversation,
 		system_message: Message | None,
 		stop_block_index: int | None = None,
 		**kwargs,
-	) -> GenerateContentResponse | Iterator[GenerateContentResponse]:
-		"""Generates a completion response using the Gemini AI model with specified configuration.
-
-		Processes a message block and conversation to generate AI-generated content through the Gemini API. Configures the generative model with optional system instructions, generation parameters, and streaming preferences.
+	) -> dict[str, Any]:
+		"""Builds the parameters of a completion request.
 
 		Args:
 			new_block: Configuration block containing message request, model and other generation settings
@@ -177,22 +426,42 @@ class GeminiEngine(BaseEngine):
 			**kwargs: Additional keyword arguments for flexible configuration
 
 		Returns:
-			The generated content response from the Gemini model
+			Keyword arguments for the generate content call
 		"""
-		super().completion(
-			new_block, conversation, system_message, stop_block_index, **kwargs
-		)
 		web_search = kwargs.pop("web_search_mode", False)
 		tools = None
 		if web_search:
 			tools = [Tool(google_search=GoogleSearch())]
 		model = self.get_model(new_block.model.model_id)
+		window = self.get_history_window(
+			new_block,
+			conversation,
+			stop_block_index=stop_block_index,
+			history_window=kwargs.pop("history_window", None),
+		)
+		contents = self.get_messages(new_block, conversation, window=window)
 		cfg_kwargs: dict[str, Any] = {
 			"system_instruction": system_message.content
 			if system_message
 			else None,
 			"tools": tools,
 		}
+		# Tools cannot be set on a request reading a context cache
+		context_cache = (
+			None
+			if tools
+			else self._context_cache(
+				new_block.model.model_id,
+				conversation,
+				system_message,
+				window,
+				contents,
+			)
+		)
+		if context_cache:
+			cfg_kwargs["system_instruction"] = None
+			cfg_kwargs["cached_content"] = context_cache.name
+			contents = contents[context_cache.prefix_length :]
 		if new_block.max_tokens and model_allows_api_sampling_param(
 			model, "max_output_tokens"
 		):
@@ -203,17 +472,82 @@ class GeminiEngine(BaseEngine):
 			cfg_kwargs["top_p"] = new_block.top_p
 		config = GenerateContentConfig(**cfg_kwargs)
 
-		generate_kwargs = {
+		params = {
 			"model": new_block.model.model_id,
 			"config": config,
-			"contents": self.get_messages(
-				new_block, conversation, stop_block_index=stop_block_index
-			),
+			"contents": contents,
 		}
+		return params
+
+	def completion(
+		self,
+		new_block: MessageBlock,
+		conversation: Conversation,
+		system_message: Message | None,
+		stop_block_index: int | None = None,
+		cancel_token: CancellationToken | None = None,
+		**kwargs,
+	) -> GenerateContentResponse | Iterator[GenerateContentResponse]:
+		"""Generates a completion response using the Gemini AI model with specified configuration.
+
+		Processes a message block and conversation to generate AI-generated content through the Gemini API. Configures the generative model with optional system instructions, generation parameters, and streaming preferences.
+
+		Args:
+			new_block: Configuration block containing message request, model and other generation settings
+			conversation: The current conversation context (past message request and response)
+			system_message: Optional system-level instruction message
+			stop_block_index: Optional index to stop processing messages at. If None, all messages are processed
+			cancel_token: Optional token closing the response when cancelled
+			**kwargs: Additional keyword arguments for flexible configuration
+
+		Returns:
+			The generated content response from the Gemini model
+		"""
+		super().completion(
+			new_block, conversation, system_message, stop_block_index, **kwargs
+		)
+		params = self.build_completion_params(
+			new_block, conversation, system_message, stop_block_index, **kwargs
+		)
 		if new_block.stream:
-			return self.client.models.generate_content_stream(**generate_kwargs)
+			response = self.client.models.generate_content_stream(**params)
 		else:
-			return self.client.models.generate_content(**generate_kwargs)
+			response = self.client.models.generate_content(**params)
+		return self._bind_cancellation(response, cancel_token)
+
+	async def acompletion(
+		self,
+		new_block: MessageBlock,
+		conversation: Conversation,
+		system_message: Message | None,
+		stop_block_index: int | None = None,
+		cancel_token: CancellationToken | None = None,
+		**kwargs,
+	) -> GenerateContentResponse | AsyncIterator[GenerateContentResponse]:
+		"""Generates a completion response using the Gemini AI model with the async client.
+
+		The parameters are built in a worker thread: uploads wait for Gemini
+		to process them, and the context cache is created or renewed there.
+
+		Args:
+			new_block: Configuration block containing message request, model and other generation settings
+			conversation: The current conversation context (past message request and response)
+			system_message: Optional system-level instruction message
+			stop_block_index: Optional index to stop processing messages at. If None, all messages are processed
+			cancel_token: Unused, the awaiting task is cancelled instead
+			**kwargs: Additional keyword arguments for flexible configuration
+
+		Returns:
+			The generated content response from the Gemini model
+		"""
+		params = await self.abuild_completion_params(
+			new_block, conversation, system_message, stop_block_index, **kwargs
+		)
+		if new_block.stream:
+			return await self.async_client.models.generate_content_stream(
+				**params
+			)
+		return await self.async_client.models.generate_content(**params)
 
 	def completion_response_without_stream(
 		self,
@@ -234,11 +568,13 @@ class GeminiEngine(BaseEngine):
 		new_block.response = Message(
 			role=MessageRoleEnum.ASSISTANT, content=response.text
 		)
+		if response.usage_metadata:
+			new_block.usage = self._token_usage(response.usage_metadata)
 		return new_block
 
 	def completion_response_with_stream(
 		self, stream: Iterator[GenerateContentResponse], **kwargs
-	) -> Iterator[str]:
+	) -> Iterator[str | tuple[str, TokenUsage]]:
 		"""Handle completion response with stream.
 
 		Args:
@@ -246,9 +582,39 @@ class GeminiEngine(BaseEngine):
 			**kwargs: Additional keyword arguments for flexible configuration
 
 		Returns:
-			Stream response from the provider
+			Stream response from the provider, then the token usage as a
+			``("usage", TokenUsage)`` tuple
 		"""
+		usage_metadata = None
 		for chunk in stream:
 			chunk_text = chunk.text
 			if chunk_text:
 				yield chunk_text
+			# Each chunk carries the usage so far, the last one is complete
+			usage_metadata = chunk.usage_metadata or usage_metadata
+		if usage_metadata:
+			yield ("usage", self._token_usage(usage_metadata))
+
+	@staticmethod
+	def _token_usage(
+		usage_metadata: GenerateContentResponseUsageMetadata,
+	) -> TokenUsage:
+		"""Convert the usage metadata of a response.
+
+		Gemini counts the thinking tokens apart from the output tokens; they
+		are added back.
+
+		Args:
+			usage_metadata: The ``usage_metadata`` of the response.
+
+		Returns:
+			The token usage of the response.
+		"""
+		output = usage_metadata.candidates_token_count or 0
+		thoughts = usage_metadata.thoughts_token_count or 0
+		return TokenUsage(
+			input_tokens=usage_metadata.prompt_token_count or 0,
+			output_tokens=output + thoughts,
+			cached_input_tokens=usage_metadata.cached_content_token_count or 0,
+			reasoning_tokens=thoughts,
+		)
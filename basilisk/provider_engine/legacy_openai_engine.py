@@ -8,9 +8,9 @@ from __future__ import annotations
 
 import logging
 from functools import cached_property
-from typing import TYPE_CHECKING, ClassVar, Generator, Union
+from typing import TYPE_CHECKING, Any, ClassVar, Generator, Union
 
-from openai import OpenAI
+from openai import AsyncOpenAI, AsyncStream, OpenAI
 from openai.types.chat import (
 	ChatCompletion,
 	ChatCompletionAssistantMessageParam,
@@ -22,16 +22,19 @@ from openai.types.chat.chat_completion_content_part_image_param import (
 	ChatCompletionContentPartImageParam,
 	ImageURL,
 )
+from openai.types.completion_usage import CompletionUsage
 
 from basilisk.conversation import (
 	Conversation,
 	Message,
 	MessageBlock,
 	MessageRoleEnum,
+	TokenUsage,
 )
 from basilisk.provider_capability import ProviderCapability
 
-from .base_engine import BaseEngine
+from .async_base_engine import AsyncBaseEngine
+from .cancellation import CancellationToken
 from .completion_request_strip_keys import CHAT_CLIENT_TUNING_TOP_LEVEL_KEYS
 
 if TYPE_CHECKING:
@@ -40,7 +43,7 @@ if TYPE_CHECKING:
 log = logging.getLogger(__name__)
 
 
-class LegacyOpenAIEngine(BaseEngine):
+class LegacyOpenAIEngine(AsyncBaseEngine):
 	"""Engine implementation for OpenAI API integration.
 
 	Provides functionality for interacting with OpenAI's models, supporting text,
@@ -82,17 +85,32 @@ class LegacyOpenAIEngine(BaseEngine):
 			Configured OpenAI client instance.
 		"""
 		super().client
+		return OpenAI(**self._client_options(), http_client=self.http_client)
+
+	@cached_property
+	def async_client(self) -> AsyncOpenAI:
+		"""Creates and configures the async OpenAI client.
+
+		Returns:
+			Configured async OpenAI client instance.
+		"""
+		return AsyncOpenAI(
+			**self._client_options(), http_client=self.async_http_client
+		)
+
+	def _client_options(self) -> dict[str, Any]:
+		"""Return the options shared by the sync and async clients."""
 		organization_key = (
 			self.account.active_organization_key.get_secret_value()
 			if self.account.active_organization_key
 			else None
 		)
-		return OpenAI(
-			api_key=self.account.api_key.get_secret_value(),
-			organization=organization_key,
-			base_url=self.account.custom_base_url
+		return {
+			"api_key": self.account.api_key.get_secret_value(),
+			"organization": organization_key,
+			"base_url": self.account.custom_base_url
 			or str(self.account.provider.base_url),
-		)
+		}
 
 	def prepare_message_request(
 		self, message: Message
@@ -144,15 +162,15 @@ class LegacyOpenAIEngine(BaseEngine):
 			],
 		)
 
-	def completion(
+	def build_completion_params(
 		self,
 		new_block: MessageBlock,
 		conversation: Conversation,
 		system_message: Message | None,
 		stop_block_index: int | None = None,
 		**kwargs,
-	) -> Union[ChatCompletion, Generator[ChatCompletionChunk, None, None]]:
-		"""Generates a chat completion using the OpenAI API.
+	) -> dict[str, Any]:
+		"""Builds the parameters of a completion request.
 
 		Args:
 			new_block: The message block containing generation parameters.
@@ -162,12 +180,8 @@ class LegacyOpenAIEngine(BaseEngine):
 			**kwargs: Additional keyword arguments for the API request.
 
 		Returns:
-			Either a complete chat completion response or a generator for streaming
-			chat completion chunks.
+			Keyword arguments for the chat completions create call.
 		"""
-		super().completion(
-			new_block, conversation, system_message, stop_block_index, **kwargs
-		)
 		model_id = new_block.model.model_id
 		model = self.get_model(model_id)
 		params = {
@@ -177,6 +191,7 @@ class LegacyOpenAIEngine(BaseEngine):
 				conversation,
 				system_message,
 				stop_block_index=stop_block_index,
+				history_window=kwargs.pop("history_window", None),
 			),
 			"stream": new_block.stream,
 			"temperature": new_block.temperature,
@@ -184,10 +199,72 @@ class LegacyOpenAIEngine(BaseEngine):
 		}
 		if new_block.max_tokens:
 			params["max_tokens"] = new_block.max_tokens
+		if new_block.stream:
+			# The usage is sent in a last chunk without choices
+			params["stream_options"] = {"include_usage": True}
 		params.update(kwargs)
 		self._strip_catalog_sampling_params(model, params)
+		return params
+
+	def completion(
+		self,
+		new_block: MessageBlock,
+		conversation: Conversation,
+		system_message: Message | None,
+		stop_block_index: int | None = None,
+		cancel_token: CancellationToken | None = None,
+		**kwargs,
+	) -> Union[ChatCompletion, Generator[ChatCompletionChunk, None, None]]:
+		"""Generates a chat completion using the OpenAI API.
+
+		Args:
+			new_block: The message block containing generation parameters.
+			conversation: The conversation history context.
+			system_message: Optional system message to guide the AI's behavior.
+			stop_block_index: Optional index to stop processing messages at. If None, all messages are processed.
+			cancel_token: Optional token closing the response when cancelled.
+			**kwargs: Additional keyword arguments for the API request.
+
+		Returns:
+			Either a complete chat completion response or a generator for streaming
+			chat completion chunks.
+		"""
+		super().completion(
+			new_block, conversation, system_message, stop_block_index, **kwargs
+		)
+		params = self.build_completion_params(
+			new_block, conversation, system_message, stop_block_index, **kwargs
+		)
 		response = self.client.chat.completions.create(**params)
-		return response
+		return self._bind_cancellation(response, cancel_token)
+
+	async def acompletion(
+		self,
+		new_block: MessageBlock,
+		conversation: Conversation,
+		system_message: Message | None,
+		stop_block_index: int | None = None,
+		cancel_token: CancellationToken | None = None,
+		**kwargs,
+	) -> Union[ChatCompletion, AsyncStream[ChatCompletionChunk]]:
+		"""Generates a chat completion using the OpenAI API with the async client.
+
+		Args:
+			new_block: The message block containing generation parameters.
+			conversation: The conversation history context.
+			system_message: Optional system message to guide the AI's behavior.
+			stop_block_index: Optional index to stop processing messages at. If None, all messages are processed.
+			cancel_token: Unused, the awaiting task is cancelled instead.
+			**kwargs: Additional keyword arguments for the API request.
+
+		Returns:
+			Either a complete chat completion response or an async stream of
+			chat completion chunks.
+		"""
+		params = await self.abuild_completion_params(
+			new_block, conversation, system_message, stop_block_index, **kwargs
+		)
+		return await self.async_client.chat.completions.create(**params)
 
 	def completion_response_with_stream(
 		self, stream: Generator[ChatCompletionChunk, None, None]
@@ -202,9 +279,13 @@ class LegacyOpenAIEngine(BaseEngine):
 			stream: Generator of chat completion chunks.
 
 		Yields:
-			Content from each chunk in the stream.
+			Content from each chunk in the stream, and the token usage as a
+			``("usage", TokenUsage)`` tuple.
 		"""
 		for chunk in stream:
+			usage = getattr(chunk, "usage", None)
+			if usage:
+				yield ("usage", self._token_usage(usage))
 			if not chunk.choices:
 				continue
 			delta = chunk.choices[0].delta
@@ -228,4 +309,32 @@ class LegacyOpenAIEngine(BaseEngine):
 			role=MessageRoleEnum.ASSISTANT,
 			content=response.choices[0].message.content,
 		)
+		if response.usage:
+			new_block.usage = self._token_usage(response.usage)
 		return new_block
+
+	@staticmethod
+	def _token_usage(usage: CompletionUsage) -> TokenUsage:
+		"""Convert the usage of a chat completion.
+
+		Args:
+			usage: The ``usage`` object of the response or last chunk.
+
+		Returns:
+			The token usage of the response.
+		"""
+		prompt_details = usage.prompt_tokens_details
+		completion_details = usage.completion_tokens_details
+		cached = prompt_details.cached_tokens if prompt_details else None
+		if cached is None:
+			# DeepSeek reports its cache hits outside the details
+			cached = getattr(usage, "prompt_cache_hit_tokens", None)
+		reasoning = (
+			completion_details.reasoning_tokens if completion_details else None
+		)
+		return TokenUsage(
+			input_tokens=usage.prompt_tokens or 0,
+			output_tokens=usage.completion_tokens or 0,
+			cached_input_tokens=cached or 0,
+			reasoning_tokens=reasoning or 0,
+		)
@@ -7,32 +7,44 @@ implementing capabilities for text and image generation/processing.
 from __future__ import annotations
 
 import logging
+import time
 from functools import cached_property
 from typing import TYPE_CHECKING, Any, ClassVar, Generator
 
 from mistralai.client import Mistral
-from mistralai.client.models import ChatCompletionResponse, CompletionEvent
-from mistralai.client.utils.eventstreaming import EventStream
+from mistralai.client.models import (
+	ChatCompletionResponse,
+	CompletionEvent,
+	UsageInfo,
+)
+from mistralai.client.utils.eventstreaming import EventStream, EventStreamAsync
 
 from basilisk.conversation import (
 	Conversation,
 	Message,
 	MessageBlock,
 	MessageRoleEnum,
+	TokenUsage,
 )
 from basilisk.conversation.attached_file import AttachmentFile
 
-from .base_engine import BaseEngine, ProviderCapability, sigma_night_data_file
+from .async_base_engine import AsyncBaseEngine
+from .base_engine import ProviderCapability, sigma_night_data_file
+from .cancellation import CancellationToken
 from .completion_request_strip_keys import CHAT_CLIENT_TUNING_TOP_LEVEL_KEYS
-from .mistralai_ocr import handle_ocr
+from .file_handle_cache import FileHandle
+from .mistralai_ocr import _ocr_upload, handle_ocr
 
 if TYPE_CHECKING:
 	from basilisk.config import Account
 
 log = logging.getLogger(__name__)
 
+# Lifetime of the signed URLs returned for uploaded files
+_SIGNED_URL_TTL_SECONDS = 24 * 3600
+
 
-class MistralAIEngine(BaseEngine):
+class MistralAIEngine(AsyncBaseEngine):
 	"""Engine implementation for MistralAI API integration.
 
 	Provides functionality for interacting with MistralAI's models, supporting text,
@@ -45,6 +57,8 @@ class MistralAIEngine(BaseEngine):
 	catalog_strip_candidate_keys: ClassVar[frozenset[str] | None] = (
 		CHAT_CLIENT_TUNING_TOP_LEVEL_KEYS
 	)
+	sdk_default_base_url: ClassVar[str | None] = "https://api.mistral.ai"
+	summary_model_ids: ClassVar[tuple[str, ...]] = ("mistral-small-latest",)
 	capabilities: set[ProviderCapability] = {
 		ProviderCapability.TEXT,
 		ProviderCapability.IMAGE,
@@ -58,6 +72,9 @@ class MistralAIEngine(BaseEngine):
 		"image/webp",
 		"application/pdf",
 	}
+	file_upload_formats: ClassVar[frozenset[str]] = frozenset(
+		{"application/pdf"}
+	)
 
 	MODELS_JSON_URL = sigma_night_data_file("mistralai.json")
 
@@ -81,6 +98,39 @@ class MistralAIEngine(BaseEngine):
 			api_key=self.account.api_key.get_secret_value(),
 			server_url=self.account.custom_base_url
 			or self.account.provider.base_url,
+			client=self.http_client,
+			async_client=self.async_http_client,
+		)
+
+	@cached_property
+	def async_client(self) -> Mistral:
+		"""Returns the MistralAI client, which also provides async methods.
+
+		Returns:
+			Configured MistralAI client instance.
+		"""
+		return self.client
+
+	def upload_attachment(self, attachment: AttachmentFile) -> FileHandle:
+		"""Upload a document through the MistralAI files API.
+
+		The document is referenced through a signed URL, valid for a day.
+
+		Args:
+			attachment: The document to upload.
+
+		Returns:
+			The handle holding the signed URL of the uploaded file.
+		"""
+		uploaded_at = time.time()
+		with attachment.send_location.open("rb") as f:
+			url = _ocr_upload(
+				self.client, {"file_name": attachment.name, "content": f}
+			)
+		return FileHandle(
+			file_id=url,
+			mime_type=attachment.mime_type,
+			expires_at=uploaded_at + _SIGNED_URL_TTL_SECONDS,
 		)
 
 	def prepare_message_request(self, message: Message) -> dict[str, Any]:
@@ -102,8 +152,10 @@ class MistralAIEngine(BaseEngine):
 						{"type": "image_url", "image_url": attachment.url}
 					)
 				else:
+					handle = self.get_file_handle(attachment)
+					url = handle.file_id if handle else attachment.url
 					content.append(
-						{"type": "document_url", "document_url": attachment.url}
+						{"type": "document_url", "document_url": url}
 					)
 		return {"role": message.role.value, "content": content}
 
@@ -122,15 +174,15 @@ class MistralAIEngine(BaseEngine):
 			"content": [{"type": "text", "text": response.content}],
 		}
 
-	def completion(
+	def build_completion_params(
 		self,
 		new_block: MessageBlock,
 		conversation: Conversation,
 		system_message: Message | None,
 		stop_block_index: int | None = None,
 		**kwargs,
-	) -> ChatCompletionResponse | EventStream[CompletionEvent]:
-		"""Generates a chat completion using the MistralAI API.
+	) -> dict[str, Any]:
+		"""Builds the parameters of a completion request.
 
 		Args:
 			new_block: The message block containing generation parameters.
@@ -140,11 +192,8 @@ class MistralAIEngine(BaseEngine):
 			**kwargs: Additional keyword arguments for the API request.
 
 		Returns:
-			The chat completion response.
+			Keyword arguments for the chat complete or stream call.
 		"""
-		super().completion(
-			new_block, conversation, system_message, stop_block_index, **kwargs
-		)
 		model = self.get_model(new_block.model.model_id)
 		params = {
 			"model": new_block.model.model_id,
@@ -153,6 +202,7 @@ class MistralAIEngine(BaseEngine):
 				conversation,
 				system_message,
 				stop_block_index=stop_block_index,
+				history_window=kwargs.pop("history_window", None),
 			),
 			"temperature": new_block.temperature,
 			"top_p": new_block.top_p,
@@ -162,9 +212,70 @@ class MistralAIEngine(BaseEngine):
 			params["max_tokens"] = new_block.max_tokens
 		params.update(kwargs)
 		self._strip_catalog_sampling_params(model, params)
+		return params
+
+	def completion(
+		self,
+		new_block: MessageBlock,
+		conversation: Conversation,
+		system_message: Message | None,
+		stop_block_index: int | None = None,
+		cancel_token: CancellationToken | None = None,
+		**kwargs,
+	) -> ChatCompletionResponse | EventStream[CompletionEvent]:
+		"""Generates a chat completion using the MistralAI API.
+
+		Args:
+			new_block: The message block containing generation parameters.
+			conversation: The conversation history context.
+			system_message: Optional system message to guide the AI's behavior.
+			stop_block_index: Optional index to stop processing messages at. If None, all messages are processed.
+			cancel_token: Optional token closing the response when cancelled.
+			**kwargs: Additional keyword arguments for the API request.
+
+		Returns:
+			The chat completion response.
+		"""
+		super().completion(
+			new_block, conversation, system_message, stop_block_index, **kwargs
+		)
+		params = self.build_completion_params(
+			new_block, conversation, system_message, stop_block_index, **kwargs
+		)
 		if new_block.stream:
-			return self.client.chat.stream(**params)
-		return self.client.chat.complete(**params)
+			response = self.client.chat.stream(**params)
+		else:
+			response = self.client.chat.complete(**params)
+		return self._bind_cancellation(response, cancel_token)
+
+	async def acompletion(
+		self,
+		new_block: MessageBlock,
+		conversation: Conversation,
+		system_message: Message | None,
+		stop_block_index: int | None = None,
+		cancel_token: CancellationToken | None = None,
+		**kwargs,
+	) -> ChatCompletionResponse | EventStreamAsync[CompletionEvent]:
+		"""Generates a chat completion using the MistralAI API with the async client.
+
+		Args:
+			new_block: The message block containing generation parameters.
+			conversation: The conversation history context.
+			system_message: Optional system message to guide the AI's behavior.
+			stop_block_index: Optional index to stop processing messages at. If None, all messages are processed.
+			cancel_token: Unused, the awaiting task is cancelled instead.
+			**kwargs: Additional keyword arguments for the API request.
+
+		Returns:
+			The chat completion response.
+		"""
+		params = await self.abuild_completion_params(
+			new_block, conversation, system_message, stop_block_index, **kwargs
+		)
+		if new_block.stream:
+			return await self.async_client.chat.stream_async(**params)
+		return await self.async_client.chat.complete_async(**params)
 
 	def completion_response_with_stream(
 		self, stream: Generator[CompletionEvent, None, None]
@@ -175,9 +286,14 @@ class MistralAIEngine(BaseEngine):
 			stream: Generator of chat completion chunks.
 
 		Yields:
-			Content from each chunk in the stream.
+			Content from each chunk in the stream, and the token usage as a
+			``("usage", TokenUsage)`` tuple.
 		"""
 		for chunk in stream:
+			if chunk.data.usage:
+				yield ("usage", self._token_usage(chunk.data.usage))
+			if not chunk.data.choices:
+				continue
 			delta = chunk.data.choices[0].delta
 			if delta and delta.content:
 				yield delta.content
@@ -202,8 +318,25 @@ class MistralAIEngine(BaseEngine):
 			role=MessageRoleEnum.ASSISTANT,
 			content=response.choices[0].message.content,
 		)
+		if response.usage:
+			new_block.usage = self._token_usage(response.usage)
 		return new_block
 
+	@staticmethod
+	def _token_usage(usage: UsageInfo) -> TokenUsage:
+		"""Convert the usage of a chat completion.
+
+		Args:
+			usage: The ``usage`` object of the response or last chunk.
+
+		Returns:
+			The token usage of the response.
+		"""
+		return TokenUsage(
+			input_tokens=usage.prompt_tokens or 0,
+			output_tokens=usage.completion_tokens or 0,
+		)
+
 	@staticmethod
 	def handle_ocr(
 		api_key: str, base_url: str, attachments: list[AttachmentFile], **kwargs
@@ -2,10 +2,13 @@
 
 import json
 import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from functools import cached_property
-from typing import Iterator
+from typing import Any, AsyncIterator, Iterator
 
-from ollama import ChatResponse, Client
+from ollama import AsyncClient, ChatResponse, Client
 
 from basilisk.conversation import (
 	AttachmentFileTypes,
@@ -14,21 +17,34 @@ from basilisk.conversation import (
 	MessageBlock,
 	MessageRoleEnum,
 	SystemMessage,
+	TokenUsage,
 )
 from basilisk.decorators import measure_time
+from basilisk.http_client_registry import async_event_hooks, shared_event_hooks
 from basilisk.provider_ai_model import ProviderAIModel
 
-from .base_engine import BaseEngine, ProviderCapability
+from .async_base_engine import AsyncBaseEngine
+from .base_engine import ProviderCapability
+from .cancellation import CancellationToken
+from .ollama_model_info_cache import (
+	OllamaModelInfo,
+	read_model_info_cache,
+	update_model_info_cache,
+)
 
 log = logging.getLogger(__name__)
 
+# Concurrent ``show`` requests when loading the model list
+SHOW_MAX_WORKERS = 8
+
 
-class OllamaEngine(BaseEngine):
+class OllamaEngine(AsyncBaseEngine):
 	"""Engine implementation for Ollama API integration."""
 
 	capabilities: set[ProviderCapability] = {
 		ProviderCapability.TEXT,
 		ProviderCapability.IMAGE,
+		ProviderCapability.MODEL_KEEP_ALIVE,
 	}
 	supported_attachment_formats: set[str] = {
 		"image/png",
@@ -40,25 +56,45 @@ class OllamaEngine(BaseEngine):
 	def _load_models(self) -> list[ProviderAIModel]:
 		"""Get Ollama models.
 
+		The details of each model are read from the disk cache by digest and
+		only fetched from the host for new or changed models, concurrently.
+
 		Returns:
 			A list of provider AI models.
 		"""
-		models = []
 		models_list = self.client.list().models
+		cached = read_model_info_cache()
+		to_fetch = [
+			model.model
+			for model in models_list
+			if not model.digest or model.digest not in cached
+		]
+		log.debug(
+			"Ollama model details: %d cached, %d to fetch",
+			len(models_list) - len(to_fetch),
+			len(to_fetch),
+		)
+		fetched = self._show_models(to_fetch)
+		update_model_info_cache(
+			{
+				model.digest: fetched[model.model]
+				for model in models_list
+				if model.digest and model.model in fetched
+			},
+			[model.digest for model in models_list if model.digest],
+			time.time(),
+		)
+		models = []
 		for model in models_list:
-			info = self.client.show(model.model)
-			context_length = 0
+			info = fetched.get(model.model) or cached[model.digest]
 			description = json.dumps(info.modelinfo, indent=2)
 			description += f"\n\n{info.license}"
-			for k, v in info.modelinfo.items():
-				if k.endswith("context_length"):
-					context_length = v
 			models.append(
 				ProviderAIModel(
 					id=model.model,
 					name=model.model,
 					description=description,
-					context_window=context_length,
+					context_window=info.context_length,
 					max_output_tokens=0,
 					max_temperature=2,
 					default_temperature=1,
@@ -68,6 +104,37 @@ class OllamaEngine(BaseEngine):
 
 		return models
 
+	def _show_models(self, names: list[str]) -> dict[str, OllamaModelInfo]:
+		"""Fetch the details of models, several at a time.
+
+		Args:
+			names: The names of the models.
+
+		Returns:
+			The details of each model, keyed by name.
+		"""
+		if not names:
+			return {}
+		with ThreadPoolExecutor(
+			max_workers=min(SHOW_MAX_WORKERS, len(names)),
+			thread_name_prefix="ollama-show",
+		) as executor:
+			return dict(zip(names, executor.map(self._show_model, names)))
+
+	def _show_model(self, name: str) -> OllamaModelInfo:
+		"""Fetch the details of a model.
+
+		Args:
+			name: The name of the model.
+
+		Returns:
+			The details of the model.
+		"""
+		info = self.client.show(name)
+		return OllamaModelInfo(
+			modelinfo=dict(info.modelinfo or {}), license=info.license
+		)
+
 	@cached_property
 	def client(self) -> Client:
 		"""Get Ollama client.
@@ -79,17 +146,73 @@ class OllamaEngine(BaseEngine):
 			self.account.provider.base_url
 		)
 		log.info("Base URL: %s", base_url)
-		return Client(host=base_url)
+		return Client(host=base_url, event_hooks=shared_event_hooks())
 
-	def completion(
+	def prewarm_connection(self) -> None:
+		"""Do nothing, the Ollama client manages its own local connections."""
+
+	@property
+	def keep_alive(self) -> int | str | None:
+		"""How long models stay loaded after a request, None for the default.
+
+		Ollama reads numbers as seconds and strings as durations, such as
+		``10m``.
+		"""
+		keep_alive = self.account.keep_alive
+		if keep_alive and re.fullmatch(r"-?\d+", keep_alive):
+			return int(keep_alive)
+		return keep_alive or None
+
+	def warm_up_model(self, model_id: str) -> None:
+		"""Load a model in memory with an empty generate request.
+
+		Args:
+			model_id: The ID of the selected model.
+		"""
+		log.debug("Warming up Ollama model %s", model_id)
+		self.client.generate(
+			model=model_id, prompt="", keep_alive=self.keep_alive
+		)
+
+	def is_model_loaded(self, model_id: str) -> bool:
+		"""Check whether a model is loaded in the memory of the host.
+
+		Args:
+			model_id: The ID of the model.
+
+		Returns:
+			Whether the model is listed by ``ps``.
+		"""
+		return any(
+			model_id in (model.model, model.name)
+			for model in self.client.ps().models
+		)
+
+	@cached_property
+	def async_client(self) -> AsyncClient:
+		"""Get async Ollama client.
+
+		The SDK builds its own httpx client, so it gets the event hooks of
+		the shared clients instead of a shared client.
+
+		Returns:
+			The async Ollama client instance.
+		"""
+		return AsyncClient(
+			host=self.account.custom_base_url
+			or str(self.account.provider.base_url),
+			event_hooks=async_event_hooks(shared_event_hooks()),
+		)
+
+	def build_completion_params(
 		self,
 		new_block: MessageBlock,
 		conversation: Conversation,
 		system_message: SystemMessage | None,
 		stop_block_index: int | None = None,
 		**kwargs,
-	) -> ChatResponse | Iterator[ChatResponse]:
-		"""Get completion from Ollama.
+	) -> dict[str, Any]:
+		"""Builds the parameters of a completion request.
 
 		Args:
 			new_block: The new message block.
@@ -99,11 +222,8 @@ class OllamaEngine(BaseEngine):
 			**kwargs: Additional keyword arguments.
 
 		Returns:
-			The chat response or an iterator of chat responses.
+			Keyword arguments for the chat call.
 		"""
-		super().completion(
-			new_block, conversation, system_message, stop_block_index, **kwargs
-		)
 		params = {
 			"model": new_block.model.model_id,
 			"messages": self.get_messages(
@@ -111,11 +231,72 @@ class OllamaEngine(BaseEngine):
 				conversation,
 				system_message,
 				stop_block_index=stop_block_index,
+				history_window=kwargs.pop("history_window", None),
 			),
 			"stream": new_block.stream,
 		}
+		if self.keep_alive is not None:
+			params["keep_alive"] = self.keep_alive
 		params.update(kwargs)
-		return self.client.chat(**params)
+		return params
+
+	def completion(
+		self,
+		new_block: MessageBlock,
+		conversation: Conversation,
+		system_message: SystemMessage | None,
+		stop_block_index: int | None = None,
+		cancel_token: CancellationToken | None = None,
+		**kwargs,
+	) -> ChatResponse | Iterator[ChatResponse]:
+		"""Get completion from Ollama.
+
+		Args:
+			new_block: The new message block.
+			conversation: The conversation instance.
+			system_message: The system message, if any.
+			stop_block_index: Optional index to stop processing messages at. If None, all messages are processed.
+			cancel_token: Optional token closing the response when cancelled.
+			**kwargs: Additional keyword arguments.
+
+		Returns:
+			The chat response or an iterator of chat responses.
+		"""
+		super().completion(
+			new_block, conversation, system_message, stop_block_index, **kwargs
+		)
+		params = self.build_completion_params(
+			new_block, conversation, system_message, stop_block_index, **kwargs
+		)
+		response = self.client.chat(**params)
+		return self._bind_cancellation(response, cancel_token)
+
+	async def acompletion(
+		self,
+		new_block: MessageBlock,
+		conversation: Conversation,
+		system_message: SystemMessage | None,
+		stop_block_index: int | None = None,
+		cancel_token: CancellationToken | None = None,
+		**kwargs,
+	) -> ChatResponse | AsyncIterator[ChatResponse]:
+		"""Get completion from Ollama with the async client.
+
+		Args:
+			new_block: The new message block.
+			conversation: The conversation instance.
+			system_message: The system message, if any.
+			stop_block_index: Optional index to stop processing messages at. If None, all messages are processed.
+			cancel_token: Unused, the awaiting task is cancelled instead.
+			**kwargs: Additional keyword arguments.
+
+		Returns:
+			The chat response or an async iterator of chat responses.
+		"""
+		params = await self.abuild_completion_params(
+			new_block, conversation, system_message, stop_block_index, **kwargs
+		)
+		return await self.async_client.chat(**params)
 
 	def prepare_message_request(self, message: Message):
 		"""Prepare message request for Ollama.
@@ -139,7 +320,7 @@ class OllamaEngine(BaseEngine):
 					raise NotImplementedError(
 						"images URL are not supported for Ollama"
 					)
-				images.append(attachment.read_as_bytes())
+				images.append(attachment.encode_base64())
 		return {
 			"role": message.role.value,
 			"content": message.content,
@@ -155,12 +336,17 @@ class OllamaEngine(BaseEngine):
 			stream: The stream of chat completion responses.
 
 		Returns:
-			An iterator of the completion response content.
+			An iterator of the completion response content, then of the
+			token usage as a ``("usage", TokenUsage)`` tuple.
 		"""
 		for chunk in stream:
 			content = chunk.get("message", {}).get("content")
 			if content:
 				yield content
+			# Only the last chunk has the token counts
+			usage = self._token_usage(chunk)
+			if usage is not None:
+				yield ("usage", usage)
 
 	def completion_response_without_stream(
 		self, response, new_block: MessageBlock, **kwargs
@@ -179,4 +365,19 @@ class OllamaEngine(BaseEngine):
 			role=MessageRoleEnum.ASSISTANT,
 			content=response["message"]["content"],
 		)
+		new_block.usage = self._token_usage(response)
 		return new_block
+
+	@staticmethod
+	def _token_usage(response: Any) -> TokenUsage | None:
+		"""Read the token counts of a response, None when it has none.
+
+		Args:
+			response: The chat response or the last stream chunk.
+		"""
+		if response.get("eval_count") is None:
+			return None
+		return TokenUsage(
+			input_tokens=response.get("prompt_eval_count") or 0,
+			output_tokens=response.get("eval_count") or 0,
+		)
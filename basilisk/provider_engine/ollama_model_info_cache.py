@@ -0,0 +1,149 @@
+"""Disk cache of the details of Ollama models, keyed by model digest.
+
+``OllamaEngine`` needs one ``show`` round-trip per installed model to read
+its context length and license. These details only depend on the model
+files, identified by the digest returned by ``list``, so they are kept on
+disk and only fetched again for new or changed models. The cache is shared
+by all Ollama hosts since a digest identifies the same files everywhere.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable
+
+from basilisk.provider_engine.model_cache_registry import (
+	get_cache_root_path,
+	write_json_atomic,
+)
+
+log = logging.getLogger(__name__)
+
+OLLAMA_MODEL_INFO_CACHE_VERSION = 1
+# Details of models no longer listed by any host are dropped after this delay
+MAX_UNSEEN_SECONDS = 30 * 24 * 3600
+# Last-seen times are only rewritten when older than this, to avoid writing
+# the file each time the model list is loaded
+SEEN_REFRESH_SECONDS = 24 * 3600
+
+_CACHE_FILENAME = "ollama_model_info.json"
+_cache_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class OllamaModelInfo:
+	"""Details of an Ollama model returned by ``show``.
+
+	Attributes:
+		modelinfo: The metadata of the model file, such as its architecture
+			and context length.
+		license: The license of the model, if any.
+	"""
+
+	modelinfo: dict[str, Any] = field(default_factory=dict)
+	license: str | None = None
+
+	@property
+	def context_length(self) -> int:
+		"""The context length declared by the model architecture, or 0."""
+		for key, value in self.modelinfo.items():
+			if key.endswith("context_length"):
+				return value
+		return 0
+
+
+def _cache_file_path() -> Path:
+	return get_cache_root_path() / _CACHE_FILENAME
+
+
+def _read_entries_unlocked() -> dict[str, dict]:
+	"""Read the cache entries from disk, dropping an invalid file."""
+	cache_file = _cache_file_path()
+	if not cache_file.exists():
+		return {}
+	try:
+		payload = json.loads(cache_file.read_text(encoding="utf-8"))
+		if not isinstance(payload, dict):
+			raise TypeError("invalid cache payload")
+		if payload.get("version") != OLLAMA_MODEL_INFO_CACHE_VERSION:
+			raise ValueError("unsupported cache payload version")
+		entries = payload.get("models")
+		if not isinstance(entries, dict):
+			raise TypeError("invalid models mapping in cache")
+		return {
+			digest: entry
+			for digest, entry in entries.items()
+			if isinstance(entry, dict)
+			and isinstance(entry.get("modelinfo"), dict)
+			and isinstance(entry.get("seen_at"), (int, float))
+		}
+	except (OSError, json.JSONDecodeError, TypeError, ValueError) as exc:
+		log.warning("Failed reading Ollama model info cache: %s", exc)
+		try:
+			cache_file.unlink(missing_ok=True)
+		except OSError:
+			log.debug("Could not delete invalid Ollama model info cache")
+		return {}
+
+
+def read_model_info_cache() -> dict[str, OllamaModelInfo]:
+	"""Read the cached model details.
+
+	Returns:
+		The details of each cached model, keyed by digest.
+	"""
+	with _cache_lock:
+		entries = _read_entries_unlocked()
+	return {
+		digest: OllamaModelInfo(
+			modelinfo=entry["modelinfo"], license=entry.get("license")
+		)
+		for digest, entry in entries.items()
+	}
+
+
+def update_model_info_cache(
+	fetched: dict[str, OllamaModelInfo], seen: Iterable[str], now: float
+) -> None:
+	"""Store fetched model details and mark the listed models as seen.
+
+	Args:
+		fetched: The details fetched from a host, keyed by digest.
+		seen: The digests of the models listed by the host.
+		now: The current time, in seconds since the epoch.
+	"""
+	with _cache_lock:
+		entries = _read_entries_unlocked()
+		changed = False
+		for digest in seen:
+			entry = entries.get(digest)
+			if entry and now - entry["seen_at"] >= SEEN_REFRESH_SECONDS:
+				entry["seen_at"] = now
+				changed = True
+		for digest, info in fetched.items():
+			entries[digest] = {
+				"modelinfo": info.modelinfo,
+				"license": info.license,
+				"seen_at": now,
+			}
+			changed = True
+		for digest in [
+			digest
+			for digest, entry in entries.items()
+			if now - entry["seen_at"] >= MAX_UNSEEN_SECONDS
+		]:
+			del entries[digest]
+			changed = True
+		if not changed:
+			return
+		try:
+			write_json_atomic(
+				_cache_file_path(),
+				{"version": OLLAMA_MODEL_INFO_CACHE_VERSION, "models": entries},
+			)
+		except (OSError, TypeError, ValueError) as exc:
+			log.warning("Failed writing Ollama model info cache: %s", exc)
@@ -6,14 +6,24 @@ implementing capabilities for text, image, and audio generation/processing.
 
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
 from functools import cached_property
-from typing import TYPE_CHECKING, ClassVar, Generator
-
-from openai import OpenAI
+from typing import TYPE_CHECKING, Any, ClassVar, Generator, Iterator
+
+from openai import (
+	AsyncOpenAI,
+	AsyncStream,
+	BadRequestError,
+	NotFoundError,
+	OpenAI,
+)
+from openai._models import construct_type
 from openai.types.responses import (
 	EasyInputMessageParam,
 	Response,
+	ResponseCompletedEvent,
 	ResponseInputImageParam,
 	ResponseInputTextParam,
 	ResponseOutputMessage,
@@ -22,27 +32,90 @@ from openai.types.responses import (
 	ResponseOutputTextParam,
 	ResponseStreamEvent,
 	ResponseTextDeltaEvent,
+	ResponseUsage,
 	WebSearchToolParam,
 )
 
+import basilisk.config as config
 from basilisk.conversation import (
+	AttachmentFile,
 	Conversation,
 	Message,
 	MessageBlock,
 	MessageRoleEnum,
+	TokenUsage,
 )
+from basilisk.conversation.history_window import history_blocks
 from basilisk.provider_capability import ProviderCapability
 
-from .base_engine import BaseEngine, sigma_night_data_file
+from .async_base_engine import AsyncBaseEngine
+from .base_engine import sigma_night_data_file
+from .batch import BatchItemResult, BatchRequest, BatchState, BatchStatus
+from .cancellation import CancellationToken
 from .completion_request_strip_keys import CHAT_CLIENT_TUNING_TOP_LEVEL_KEYS
+from .file_handle_cache import FileHandle
 
 if TYPE_CHECKING:
 	from basilisk.config import Account
 
 log = logging.getLogger(__name__)
 
+_BATCH_ENDPOINT = "/v1/responses"
+# Error code of a request continuing a stored response that no longer exists
+_PREVIOUS_RESPONSE_NOT_FOUND = "previous_response_not_found"
+# Uploaded files are deleted by the provider after this delay (the maximum)
+_FILE_TTL_SECONDS = 30 * 24 * 3600
+# Batch statuses after which the provider processes no more requests
+_FINISHED_BATCH_STATES = {
+	"completed": BatchState.ENDED,
+	"expired": BatchState.ENDED,
+	"cancelled": BatchState.CANCELLED,
+	"failed": BatchState.FAILED,
+}
+
+
+def _chain_digest(
+	account_id: str,
+	block: MessageBlock,
+	history: list[MessageBlock],
+	system_message: Message | None,
+) -> str:
+	"""Return the digest of the input a block is completed from.
+
+	A stored response can only be continued when the input it was generated
+	from is still the one the conversation would send.
+
+	Args:
+		account_id: The account sending the request.
+		block: The block being completed.
+		history: The answered blocks sent before the block.
+		system_message: Optional system message of the request.
+
+	Returns:
+		The hexadecimal digest.
+	"""
+	digest = hashlib.sha256()
+
+	def update(*values: str):
+		for value in values:
+			digest.update(value.encode())
+			digest.update(b"\0")
+
+	def update_message(message: Message):
+		update(message.role.value, message.content)
+		for attachment in getattr(message, "attachments", None) or []:
+			update(str(attachment.location))
+
+	update(account_id, block.model.model_id)
+	update(system_message.content if system_message else "")
+	for previous in history:
+		update_message(previous.request)
+		update_message(previous.response)
+	update_message(block.request)
+	return digest.hexdigest()
 
-class OpenAIEngine(BaseEngine):
+
+class OpenAIEngine(AsyncBaseEngine):
 	"""Engine implementation for OpenAI API integration.
 
 	Provides functionality for interacting with OpenAI's models, supporting text,
@@ -55,7 +128,12 @@ class OpenAIEngine(BaseEngine):
 	catalog_strip_candidate_keys: ClassVar[frozenset[str] | None] = (
 		CHAT_CLIENT_TUNING_TOP_LEVEL_KEYS
 	)
+	summary_model_ids: ClassVar[tuple[str, ...]] = (
+		"gpt-4.1-mini",
+		"gpt-4o-mini",
+	)
 	capabilities: set[ProviderCapability] = {
+		ProviderCapability.BATCH,
 		ProviderCapability.IMAGE,
 		ProviderCapability.TEXT,
 		ProviderCapability.STT,
@@ -69,6 +147,9 @@ class OpenAIEngine(BaseEngine):
 		"image/png",
 		"image/webp",
 	}
+	file_upload_formats: ClassVar[frozenset[str]] = frozenset(
+		supported_attachment_formats
+	)
 
 	MODELS_JSON_URL = sigma_night_data_file("openai.json")
 
@@ -88,16 +169,57 @@ class OpenAIEngine(BaseEngine):
 			Configured OpenAI client instance.
 		"""
 		super().client
+		return OpenAI(**self._client_options(), http_client=self.http_client)
+
+	@cached_property
+	def async_client(self) -> AsyncOpenAI:
+		"""Creates and configures the async OpenAI client.
+
+		Returns:
+			Configured async OpenAI client instance.
+		"""
+		return AsyncOpenAI(
+			**self._client_options(), http_client=self.async_http_client
+		)
+
+	def _client_options(self) -> dict[str, Any]:
+		"""Return the options shared by the sync and async clients."""
 		organization_key = (
 			self.account.active_organization_key.get_secret_value()
 			if self.account.active_organization_key
 			else None
 		)
-		return OpenAI(
-			api_key=self.account.api_key.get_secret_value(),
-			organization=organization_key,
-			base_url=self.account.custom_base_url
+		return {
+			"api_key": self.account.api_key.get_secret_value(),
+			"organization": organization_key,
+			"base_url": self.account.custom_base_url
 			or str(self.account.provider.base_url),
+		}
+
+	def upload_attachment(self, attachment: AttachmentFile) -> FileHandle:
+		"""Upload an image through the OpenAI files API.
+
+		Uploaded files expire, so the provider deletes them once unused.
+
+		Args:
+			attachment: The image to upload.
+
+		Returns:
+			The handle referencing the uploaded file.
+		"""
+		with attachment.send_location.open("rb") as f:
+			file = self.client.files.create(
+				file=(attachment.name, f, attachment.mime_type),
+				purpose="vision",
+				expires_after={
+					"anchor": "created_at",
+					"seconds": _FILE_TTL_SECONDS,
+				},
+			)
+		return FileHandle(
+			file_id=file.id,
+			mime_type=attachment.mime_type,
+			expires_at=file.expires_at or file.created_at + _FILE_TTL_SECONDS,
 		)
 
 	def prepare_message_request(
@@ -117,6 +239,16 @@ class OpenAIEngine(BaseEngine):
 		]
 		if getattr(message, "attachments", None):
 			for attachment in message.attachments:
+				handle = self.get_file_handle(attachment)
+				if handle is not None:
+					content.append(
+						ResponseInputImageParam(
+							file_id=handle.file_id,
+							detail="auto",
+							type="input_image",
+						)
+					)
+					continue
 				content.append(
 					ResponseInputImageParam(
 						image_url=attachment.url,
@@ -150,30 +282,33 @@ class OpenAIEngine(BaseEngine):
 			type="message",
 		)
 
-	def completion(
+	def build_completion_params(
 		self,
 		new_block: MessageBlock,
 		conversation: Conversation,
 		system_message: Message | None,
 		stop_block_index: int | None = None,
+		chain: bool = True,
+		store: bool | None = None,
 		**kwargs,
-	) -> Response | Generator[ResponseStreamEvent, None, None]:
-		"""Generates a chat completion using the OpenAI API.
+	) -> dict[str, Any]:
+		"""Builds the parameters of a completion request.
+
+		When responses are stored server-side, a request continuing the
+		stored response of the previous block only sends the new message.
 
 		Args:
 			new_block: The message block containing generation parameters.
 			conversation: The conversation history context.
 			system_message: Optional system message to guide the AI's behavior.
 			stop_block_index: Optional index to stop processing messages at. If None, all messages are processed.
+			chain: Whether the stored response of the previous block can be continued.
+			store: Whether to store the response server-side, the conversation setting if None.
 			**kwargs: Additional keyword arguments for the API request.
 
 		Returns:
-			Either a complete chat completion response or a generator for streaming
-			chat completion chunks.
+			Keyword arguments for the Responses API create call.
 		"""
-		super().completion(
-			new_block, conversation, system_message, stop_block_index, **kwargs
-		)
 		tools = []
 		web_search = kwargs.pop("web_search_mode", False)
 		if web_search:
@@ -189,27 +324,199 @@ class OpenAIEngine(BaseEngine):
 				"Model metadata missing for %s; using stored model id",
 				new_block.model.model_id,
 			)
-		params = {
-			"model": model_id,
-			"input": self.get_messages(
+		if store is None:
+			store = bool(config.conf().conversation.store_responses_server_side)
+		new_block.response_id = None
+		new_block.response_chain_digest = None
+		previous_response_id = None
+		if store:
+			history = history_blocks(conversation.messages, stop_block_index)
+			new_block.response_chain_digest = _chain_digest(
+				str(self.account.id), new_block, history, system_message
+			)
+			if chain:
+				previous_response_id = self._previous_response_id(
+					new_block, history, system_message
+				)
+		history_window = kwargs.pop("history_window", None)
+		if previous_response_id:
+			# The stored response already holds the history
+			messages = [self.prepare_message_request(new_block.request)]
+		else:
+			messages = self.get_messages(
 				new_block,
 				conversation,
 				system_message,
 				stop_block_index=stop_block_index,
-			),
+				history_window=history_window,
+			)
+		params = {
+			"model": model_id,
+			"input": messages,
 			"stream": new_block.stream,
 			"temperature": new_block.temperature,
 			"top_p": new_block.top_p,
-			"store": False,
+			"store": store,
 		}
+		if previous_response_id:
+			params["previous_response_id"] = previous_response_id
+			# The provider drops the oldest stored turns instead of failing
+			# once the context window is exceeded
+			params["truncation"] = "auto"
 		if new_block.max_tokens:
-			params["max_tokens"] = new_block.max_tokens
+			params["max_output_tokens"] = new_block.max_tokens
 		if tools:
 			params["tools"] = tools
 		params.update(kwargs)
 		self._strip_catalog_sampling_params(model, params)
-		response = self.client.responses.create(**params)
-		return response
+		return params
+
+	def _previous_response_id(
+		self,
+		new_block: MessageBlock,
+		history: list[MessageBlock],
+		system_message: Message | None,
+	) -> str | None:
+		"""Return the stored response a request can continue, if any.
+
+		The chain is broken when the previous block has no stored response,
+		was answered by another model, or when its request, the history
+		before it or the system message changed since it was answered.
+
+		Args:
+			new_block: The block being completed.
+			history: The answered blocks sent before the block.
+			system_message: Optional system message of the request.
+
+		Returns:
+			The ID of the stored response of the previous block, or None to
+			send the full history.
+		"""
+		if not history:
+			return None
+		previous = history[-1]
+		if not previous.response_id or previous.model != new_block.model:
+			return None
+		digest = _chain_digest(
+			str(self.account.id), previous, history[:-1], system_message
+		)
+		if digest != previous.response_chain_digest:
+			log.debug(
+				"Stored response %s no longer matches the conversation",
+				previous.response_id,
+			)
+			return None
+		return previous.response_id
+
+	@staticmethod
+	def _is_broken_chain(params: dict[str, Any], error: Exception) -> bool:
+		"""Tell whether a request failed because its stored response is gone.
+
+		Only errors about the previous response are retried with the full
+		history; any other rejected request is raised.
+		"""
+		previous_response_id = params.get("previous_response_id")
+		if not previous_response_id:
+			return False
+		message = str(getattr(error, "message", error)).lower()
+		if not (
+			getattr(error, "code", None) == _PREVIOUS_RESPONSE_NOT_FOUND
+			or getattr(error, "param", None) == "previous_response_id"
+			or "previous response" in message
+			or previous_response_id.lower() in message
+		):
+			return False
+		log.warning(
+			"Stored response %s unavailable, sending the full history: %s",
+			params["previous_response_id"],
+			error,
+		)
+		return True
+
+	def completion(
+		self,
+		new_block: MessageBlock,
+		conversation: Conversation,
+		system_message: Message | None,
+		stop_block_index: int | None = None,
+		cancel_token: CancellationToken | None = None,
+		**kwargs,
+	) -> Response | Generator[ResponseStreamEvent, None, None]:
+		"""Generates a chat completion using the OpenAI API.
+
+		Args:
+			new_block: The message block containing generation parameters.
+			conversation: The conversation history context.
+			system_message: Optional system message to guide the AI's behavior.
+			stop_block_index: Optional index to stop processing messages at. If None, all messages are processed.
+			cancel_token: Optional token closing the response when cancelled.
+			**kwargs: Additional keyword arguments for the API request.
+
+		Returns:
+			Either a complete chat completion response or a generator for streaming
+			chat completion chunks.
+		"""
+		super().completion(
+			new_block, conversation, system_message, stop_block_index, **kwargs
+		)
+		params = self.build_completion_params(
+			new_block, conversation, system_message, stop_block_index, **kwargs
+		)
+		try:
+			response = self.client.responses.create(**params)
+		except (BadRequestError, NotFoundError) as e:
+			if not self._is_broken_chain(params, e):
+				raise
+			params = self.build_completion_params(
+				new_block,
+				conversation,
+				system_message,
+				stop_block_index,
+				chain=False,
+				**kwargs,
+			)
+			response = self.client.responses.create(**params)
+		return self._bind_cancellation(response, cancel_token)
+
+	async def acompletion(
+		self,
+		new_block: MessageBlock,
+		conversation: Conversation,
+		system_message: Message | None,
+		stop_block_index: int | None = None,
+		cancel_token: CancellationToken | None = None,
+		**kwargs,
+	) -> Response | AsyncStream[ResponseStreamEvent]:
+		"""Generates a chat completion using the OpenAI API with the async client.
+
+		Args:
+			new_block: The message block containing generation parameters.
+			conversation: The conversation history context.
+			system_message: Optional system message to guide the AI's behavior.
+			stop_block_index: Optional index to stop processing messages at. If None, all messages are processed.
+			cancel_token: Unused, the awaiting task is cancelled instead.
+			**kwargs: Additional keyword arguments for the API request.
+
+		Returns:
+			Either a complete response or an async stream of response events.
+		"""
+		params = await self.abuild_completion_params(
+			new_block, conversation, system_message, stop_block_index, **kwargs
+		)
+		try:
+			return await self.async_client.responses.create(**params)
+		except (BadRequestError, NotFoundError) as e:
+			if not self._is_broken_chain(params, e):
+				raise
+			params = await self.abuild_completion_params(
+				new_block,
+				conversation,
+				system_message,
+				stop_block_index,
+				chain=False,
+				**kwargs,
+			)
+			return await self.async_client.responses.create(**params)
 
 	def completion_response_with_stream(
 		self, stream: Generator[ResponseStreamEvent, None, None]
@@ -220,11 +527,17 @@ class OpenAIEngine(BaseEngine):
 			stream: Generator of chat completion chunks.
 
 		Yields:
-			Content from each chunk in the stream.
+			Content from each chunk in the stream, then the ID of the
+			response as a ``("response_id", id)`` tuple and its token usage
+			as a ``("usage", TokenUsage)`` tuple.
 		"""
 		for event in stream:
 			if isinstance(event, ResponseTextDeltaEvent):
 				yield event.delta
+			elif isinstance(event, ResponseCompletedEvent):
+				yield ("response_id", event.response.id)
+				if event.response.usage:
+					yield ("usage", self._token_usage(event.response.usage))
 			else:
 				log.warning(
 					"Received unexpected event type: %s", type(event).__name__
@@ -263,8 +576,165 @@ class OpenAIEngine(BaseEngine):
 		new_block.response = Message(
 			role=MessageRoleEnum.ASSISTANT, content="".join(txt_parts)
 		)
+		new_block.response_id = response.id
+		if response.usage:
+			new_block.usage = self._token_usage(response.usage)
 		return new_block
 
+	@staticmethod
+	def _token_usage(usage: ResponseUsage) -> TokenUsage:
+		"""Convert the usage of a response.
+
+		Args:
+			usage: The ``usage`` object of the response.
+
+		Returns:
+			The token usage of the response.
+		"""
+		input_details = usage.input_tokens_details
+		output_details = usage.output_tokens_details
+		return TokenUsage(
+			input_tokens=usage.input_tokens,
+			output_tokens=usage.output_tokens,
+			cached_input_tokens=(
+				input_details.cached_tokens if input_details else 0
+			),
+			reasoning_tokens=(
+				output_details.reasoning_tokens if output_details else 0
+			),
+		)
+
+	def build_batch_request(
+		self,
+		custom_id: str,
+		new_block: MessageBlock,
+		conversation: Conversation,
+		system_message: Message | None,
+	) -> BatchRequest:
+		"""Build the batch request completing a message block.
+
+		Batch requests are never stored server-side: their responses are
+		saved as new conversations, which send their whole history.
+
+		Args:
+			custom_id: Identifier of the request, unique within the batch.
+			new_block: The message block containing generation parameters.
+			conversation: The conversation history context.
+			system_message: Optional system message to guide the AI's behavior.
+
+		Returns:
+			The request, with the body of a non-streamed Responses API call.
+		"""
+		params = self.build_completion_params(
+			new_block, conversation, system_message, chain=False, store=False
+		)
+		params.pop("stream", None)
+		return BatchRequest(custom_id=custom_id, params=params)
+
+	def submit_batch(self, requests: list[BatchRequest]) -> str:
+		"""Upload the requests as a JSONL file and create a batch.
+
+		Args:
+			requests: The requests of the batch.
+
+		Returns:
+			The ID of the batch.
+		"""
+		lines = "".join(
+			json.dumps(
+				{
+					"custom_id": request.custom_id,
+					"method": "POST",
+					"url": _BATCH_ENDPOINT,
+					"body": request.params,
+				}
+			)
+			+ "\n"
+			for request in requests
+		)
+		input_file = self.client.files.create(
+			file=("batch.jsonl", lines.encode(), "application/jsonl"),
+			purpose="batch",
+		)
+		batch = self.client.batches.create(
+			input_file_id=input_file.id,
+			endpoint=_BATCH_ENDPOINT,
+			completion_window="24h",
+		)
+		log.info("Submitted batch %s with %d requests", batch.id, len(requests))
+		return batch.id
+
+	def get_batch_status(self, batch_id: str) -> BatchStatus:
+		"""Get the progress of a batch.
+
+		Args:
+			batch_id: The ID of the batch.
+
+		Returns:
+			The status of the batch.
+		"""
+		batch = self.client.batches.retrieve(batch_id)
+		counts = batch.request_counts
+		errors = batch.errors.data if batch.errors and batch.errors.data else []
+		return BatchStatus(
+			state=_FINISHED_BATCH_STATES.get(
+				batch.status, BatchState.IN_PROGRESS
+			),
+			total=counts.total if counts else 0,
+			completed=counts.completed if counts else 0,
+			failed=counts.failed if counts else 0,
+			error="; ".join(error.message or error.code for error in errors)
+			or None,
+		)
+
+	def iter_batch_results(self, batch_id: str) -> Iterator[BatchItemResult]:
+		"""Iterate over the results of a finished batch.
+
+		Successful requests are read from the output file, failed ones from
+		the error file.
+
+		Args:
+			batch_id: The ID of the batch.
+
+		Yields:
+			The outcome of each processed request.
+		"""
+		batch = self.client.batches.retrieve(batch_id)
+		for file_id in (batch.output_file_id, batch.error_file_id):
+			if not file_id:
+				continue
+			content = self.client.files.content(file_id)
+			for line in content.text.splitlines():
+				if line.strip():
+					yield self._parse_batch_result(json.loads(line))
+
+	@staticmethod
+	def _parse_batch_result(item: dict[str, Any]) -> BatchItemResult:
+		"""Convert a line of a batch output or error file."""
+		custom_id = item["custom_id"]
+		response = item.get("response") or {}
+		body = response.get("body") or {}
+		if not item.get("error") and response.get("status_code") == 200:
+			# Parsed leniently, like the SDK parses its HTTP responses
+			return BatchItemResult(
+				custom_id=custom_id,
+				response=construct_type(type_=Response, value=body),
+			)
+		error = item.get("error") or body.get("error") or {}
+		return BatchItemResult(
+			custom_id=custom_id,
+			error=error.get("message")
+			or f"HTTP status {response.get('status_code')}",
+		)
+
+	def cancel_batch(self, batch_id: str) -> None:
+		"""Ask OpenAI to stop processing a batch.
+
+		Args:
+			batch_id: The ID of the batch.
+		"""
+		self.client.batches.cancel(batch_id)
+
 	def get_transcription(
 		self, audio_file_path: str, response_format: str = "json"
 	) -> str:
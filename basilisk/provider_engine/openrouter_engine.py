@@ -5,15 +5,18 @@ implementing capabilities for text and image generation across multiple AI model
 """
 
 import logging
-from typing import Generator, Union
+from typing import Any, Generator, Iterable, Optional
 
 import httpx
 from openai.types.chat import ChatCompletion, ChatCompletionChunk
 
+from basilisk.completion_metrics import current_timer
 from basilisk.conversation import Conversation, Message, MessageBlock
 from basilisk.decorators import measure_time
+from basilisk.http_client_registry import http_get
 from basilisk.provider_ai_model import ProviderAIModel
 from basilisk.provider_capability import ProviderCapability
+from basilisk.provider_routing import ProviderRouting
 
 from .dynamic_model_loader import parse_model_rows
 from .legacy_openai_engine import LegacyOpenAIEngine
@@ -21,6 +24,34 @@ from .legacy_openai_engine import LegacyOpenAIEngine
 log = logging.getLogger(__name__)
 
 
+def _routing_preferences(routing: ProviderRouting) -> dict[str, Any]:
+	"""Build the ``provider`` object of an OpenRouter request.
+
+	Args:
+		routing: The routing preferences of the conversation.
+
+	Returns:
+		The preferences differing from OpenRouter's defaults.
+	"""
+	preferences: dict[str, Any] = {}
+	if routing.sort:
+		preferences["sort"] = routing.sort.value
+	if routing.only:
+		preferences["only"] = list(routing.only)
+	if routing.ignore:
+		preferences["ignore"] = list(routing.ignore)
+	if not routing.allow_fallbacks:
+		preferences["allow_fallbacks"] = False
+	return preferences
+
+
+def _record_upstream_provider(response: Any) -> None:
+	"""Record the upstream provider reported in an OpenRouter response."""
+	timer = current_timer()
+	if timer is not None:
+		timer.record_upstream_provider(getattr(response, "provider", None))
+
+
 class OpenRouterEngine(LegacyOpenAIEngine):
 	"""Engine implementation for OpenRouter API integration.
 
@@ -35,6 +66,7 @@ class OpenRouterEngine(LegacyOpenAIEngine):
 		ProviderCapability.TEXT,
 		ProviderCapability.IMAGE,
 		ProviderCapability.WEB_SEARCH,
+		ProviderCapability.PROVIDER_ROUTING,
 	}
 
 	@measure_time
@@ -46,7 +78,7 @@ class OpenRouterEngine(LegacyOpenAIEngine):
 		"""
 		log.debug("Getting openRouter models")
 		url = "https://openrouter.ai/api/v1/models"
-		response = httpx.get(
+		response = http_get(
 			url, headers={"User-Agent": self.get_user_agent()}, timeout=30.0
 		)
 		if response.status_code != 200:
@@ -63,26 +95,33 @@ class OpenRouterEngine(LegacyOpenAIEngine):
 		log.debug("Got %d models", len(models))
 		return models
 
-	def completion(
+	def build_completion_params(
 		self,
 		new_block: MessageBlock,
 		conversation: Conversation,
 		system_message: Message | None,
+		stop_block_index: int | None = None,
 		**kwargs,
-	) -> Union[ChatCompletion, Generator[ChatCompletionChunk, None, None]]:
-		"""Generates a chat completion using the OpenAI API.
+	) -> dict[str, Any]:
+		"""Builds chat completion parameters with OpenRouter extensions.
 
 		Args:
 			new_block: The message block containing generation parameters.
 			conversation: The conversation history context.
 			system_message: Optional system message to guide the AI's behavior.
+			stop_block_index: Optional index to stop processing messages at. If None, all messages are processed.
 			**kwargs: Additional keyword arguments for the API request.
+				``provider_routing`` sets the upstream providers preferences.
 
 		Returns:
-			Either a complete chat completion response or a generator for streaming
-			chat completion chunks.
+			Keyword arguments for the chat completions create call.
 		"""
 		extra_body = kwargs.get("extra_body", {})
+		routing: Optional[ProviderRouting] = kwargs.pop(
+			"provider_routing", None
+		)
+		if routing is not None and not routing.is_default:
+			extra_body["provider"] = _routing_preferences(routing)
 		plugins = []
 		if "web_search_mode" in kwargs:
 			if kwargs["web_search_mode"]:
@@ -97,10 +136,48 @@ class OpenRouterEngine(LegacyOpenAIEngine):
 
 		if plugins:
 			extra_body["plugins"] = plugins
-		return super().completion(
-			new_block,
-			conversation,
-			system_message,
-			extra_body=extra_body,
-			**kwargs,
+		kwargs["extra_body"] = extra_body
+		return super().build_completion_params(
+			new_block, conversation, system_message, stop_block_index, **kwargs
+		)
+
+	def completion_response_with_stream(
+		self, stream: Iterable[ChatCompletionChunk]
+	) -> Generator[str, None, None]:
+		"""Processes a streaming completion response.
+
+		Records the upstream provider named by the chunks in the metrics.
+
+		Args:
+			stream: Chat completion chunks.
+
+		Yields:
+			Content from each chunk in the stream.
+		"""
+
+		def tracked_stream():
+			for chunk in stream:
+				_record_upstream_provider(chunk)
+				yield chunk
+
+		yield from super().completion_response_with_stream(tracked_stream())
+
+	def completion_response_without_stream(
+		self, response: ChatCompletion, new_block: MessageBlock, **kwargs
+	) -> MessageBlock:
+		"""Processes a non-streaming completion response.
+
+		Records the upstream provider named by the response in the metrics.
+
+		Args:
+			response: The chat completion response.
+			new_block: The message block to update with the response.
+			**kwargs: Additional keyword arguments.
+
+		Returns:
+			Updated message block containing the response.
+		"""
+		_record_upstream_provider(response)
+		return super().completion_response_without_stream(
+			response, new_block, **kwargs
 		)
@@ -0,0 +1,141 @@
+"""Per-engine cache of provider-specific messages prepared from history.
+
+``BaseEngine.get_messages`` converts every block of the conversation into the
+provider message format on each request. Finished blocks do not change unless
+they are edited, so their prepared request and response messages are kept here
+keyed by block identity and the block edit version
+(``MessageBlock.edit_version``). Editing or removing a block bumps its version,
+which makes the stale entries unreachable.
+"""
+
+from __future__ import annotations
+
+import enum
+import logging
+import threading
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from basilisk.conversation import Message, MessageBlock
+from basilisk.conversation.history_window import stub_request
+
+log = logging.getLogger(__name__)
+
+
+class PreparedPart(enum.StrEnum):
+	"""Which message of a block a prepared entry was built from."""
+
+	REQUEST = enum.auto()
+	RESPONSE = enum.auto()
+	# Request with its attachments replaced by a note, see history_window
+	STUBBED_REQUEST = enum.auto()
+
+
+@dataclass
+class _PreparedEntry:
+	"""Prepared messages of one block at a given edit version."""
+
+	block_ref: weakref.ref[MessageBlock]
+	edit_version: int
+	messages: dict[PreparedPart, Any] = field(default_factory=dict)
+
+
+class PreparedMessageCache:
+	"""Thread-safe cache of prepared messages keyed by block identity.
+
+	Cached objects are shared between requests; callers that need to alter a
+	prepared message for a single request must copy it first.
+	"""
+
+	def __init__(self):
+		"""Initialize an empty cache."""
+		self._entries: dict[int, _PreparedEntry] = {}
+		# Reentrant: weakref callbacks may run during a collection triggered
+		# while the lock is held.
+		self._lock = threading.RLock()
+		self.hits = 0
+		self.misses = 0
+
+	def _forget(self, block_id: int, block_ref: weakref.ref) -> None:
+		"""Drop the entry of a garbage-collected block."""
+		with self._lock:
+			entry = self._entries.get(block_id)
+			if entry is not None and entry.block_ref is block_ref:
+				del self._entries[block_id]
+
+	def get_or_prepare(
+		self,
+		block: MessageBlock,
+		part: PreparedPart,
+		prepare: Callable[[Message], Any],
+	) -> Any:
+		"""Return the prepared message of a block, preparing it on a miss.
+
+		Args:
+			block: The finished message block.
+			part: Whether to prepare the block request, with or without its
+				attachments, or response.
+			prepare: The engine method converting a message to the provider
+				format.
+
+		Returns:
+			The provider-specific prepared message.
+		"""
+		block_id = id(block)
+		version = block.edit_version
+		with self._lock:
+			entry = self._entries.get(block_id)
+			if (
+				entry is not None
+				and entry.block_ref() is block
+				and entry.edit_version == version
+				and part in entry.messages
+			):
+				self.hits += 1
+				return entry.messages[part]
+		if part == PreparedPart.RESPONSE:
+			message = block.response
+		elif part == PreparedPart.STUBBED_REQUEST:
+			message = stub_request(block.request)
+		else:
+			message = block.request
+		prepared = prepare(message)
+		with self._lock:
+			self.misses += 1
+			entry = self._entries.get(block_id)
+			if (
+				entry is None
+				or entry.block_ref() is not block
+				or entry.edit_version != version
+			):
+				block_ref = weakref.ref(
+					block, lambda ref: self._forget(block_id, ref)
+				)
+				entry = _PreparedEntry(
+					block_ref=block_ref, edit_version=version
+				)
+				self._entries[block_id] = entry
+			entry.messages[part] = prepared
+		return prepared
+
+	def invalidate(self, block: MessageBlock) -> None:
+		"""Drop the prepared messages of a block.
+
+		Args:
+			block: The block whose entry must be removed.
+		"""
+		with self._lock:
+			entry = self._entries.get(id(block))
+			if entry is not None and entry.block_ref() is block:
+				del self._entries[id(block)]
+
+	def clear(self) -> None:
+		"""Remove every cached entry."""
+		with self._lock:
+			self._entries.clear()
+
+	def __len__(self) -> int:
+		"""Return the number of blocks with cached messages."""
+		with self._lock:
+			return len(self._entries)
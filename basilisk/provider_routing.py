@@ -0,0 +1,85 @@
+"""Preferences routing requests between the upstream providers of a model.
+
+Aggregators such as OpenRouter serve a model from several hosts and pick one
+per request. A conversation profile can ask for the fastest or cheapest host,
+restrict or exclude hosts, and forbid falling back to other hosts.
+"""
+
+from __future__ import annotations
+
+import enum
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+
+class RoutingSort(enum.StrEnum):
+	"""Order in which the upstream providers of a model are tried."""
+
+	# Lowest price first
+	PRICE = "price"
+	# Highest output tokens per second first
+	THROUGHPUT = "throughput"
+	# Lowest time to first token first
+	LATENCY = "latency"
+
+	@classmethod
+	def get_labels(cls) -> dict[RoutingSort, str]:
+		"""Return a dict of routing sort labels.
+
+		Returns:
+			A dict of routing sort enum values as keys and their translated labels as values.
+		"""
+		return {
+			# Translators: Order of the upstream providers serving a model
+			cls.PRICE: _("Lowest price"),
+			# Translators: Order of the upstream providers serving a model
+			cls.THROUGHPUT: _("Highest throughput"),
+			# Translators: Order of the upstream providers serving a model
+			cls.LATENCY: _("Lowest latency"),
+		}
+
+
+@dataclass(frozen=True)
+class ProviderRouting:
+	"""Routing preferences applied to the requests of a conversation.
+
+	Attributes:
+		sort: Order of the upstream providers, None for the aggregator's
+			default load balancing.
+		only: Upstream providers allowed, empty to allow all.
+		ignore: Upstream providers never used.
+		allow_fallbacks: Whether other providers are used when the
+			preferred ones are unavailable.
+	"""
+
+	sort: Optional[RoutingSort] = None
+	only: tuple[str, ...] = ()
+	ignore: tuple[str, ...] = ()
+	allow_fallbacks: bool = True
+
+	@property
+	def is_default(self) -> bool:
+		"""Whether the preferences leave the routing to the aggregator."""
+		return self == ProviderRouting()
+
+
+def parse_provider_names(text: str) -> list[str]:
+	"""Parse a comma-separated list of upstream provider names.
+
+	Args:
+		text: The names, separated by commas.
+
+	Returns:
+		The names without surrounding spaces or duplicates, in order.
+	"""
+	names = (name.strip() for name in text.split(","))
+	return list(dict.fromkeys(name for name in names if name))
+
+
+def format_provider_names(names: Iterable[str]) -> str:
+	"""Format upstream provider names as a comma-separated list.
+
+	Args:
+		names: The names to format.
+	"""
+	return ", ".join(names)
@@ -0,0 +1,44 @@
+"""Add the completion response cache table.
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-16
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "002"
+down_revision: Union[str, None] = "001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+	"""Create the completion_cache table."""
+	op.create_table(
+		"completion_cache",
+		sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+		sa.Column("cache_key", sa.String(), nullable=False, unique=True),
+		sa.Column("model_provider", sa.String(), nullable=False),
+		sa.Column("model_id", sa.String(), nullable=False),
+		sa.Column("content", sa.String(), nullable=False),
+		sa.Column("citations", sa.String(), nullable=True),
+		sa.Column(
+			"hit_count", sa.Integer(), nullable=False, server_default="0"
+		),
+		sa.Column("created_at", sa.DateTime(), nullable=False),
+		sa.Column("last_used_at", sa.DateTime(), nullable=False),
+	)
+	op.create_index(
+		"ix_completion_cache_last_used", "completion_cache", ["last_used_at"]
+	)
+
+
+def downgrade() -> None:
+	"""Drop the completion_cache table."""
+	op.drop_index("ix_completion_cache_last_used", "completion_cache")
+	op.drop_table("completion_cache")
@@ -0,0 +1,41 @@
+"""Add the conversation summary table.
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-16
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "003"
+down_revision: Union[str, None] = "002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+	"""Create the conversation_summaries table."""
+	op.create_table(
+		"conversation_summaries",
+		sa.Column(
+			"conversation_id",
+			sa.Integer(),
+			sa.ForeignKey("conversations.id", ondelete="CASCADE"),
+			primary_key=True,
+		),
+		sa.Column("content", sa.String(), nullable=False),
+		sa.Column("block_count", sa.Integer(), nullable=False),
+		sa.Column("digest", sa.String(), nullable=False),
+		sa.Column("model_provider", sa.String(), nullable=False),
+		sa.Column("model_id", sa.String(), nullable=False),
+		sa.Column("created_at", sa.DateTime(), nullable=False),
+	)
+
+
+def downgrade() -> None:
+	"""Drop the conversation_summaries table."""
+	op.drop_table("conversation_summaries")
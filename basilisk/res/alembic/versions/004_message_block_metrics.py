@@ -0,0 +1,47 @@
+"""Add the message block latency metrics table.
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-16
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+	"""Create the message_block_metrics table."""
+	op.create_table(
+		"message_block_metrics",
+		sa.Column(
+			"message_block_id",
+			sa.Integer(),
+			sa.ForeignKey("message_blocks.id", ondelete="CASCADE"),
+			primary_key=True,
+		),
+		sa.Column("prepare_ms", sa.Float(), nullable=True),
+		sa.Column("request_ms", sa.Float(), nullable=True),
+		sa.Column("first_chunk_ms", sa.Float(), nullable=True),
+		sa.Column("total_ms", sa.Float(), nullable=False),
+		sa.Column("chunk_count", sa.Integer(), nullable=False),
+		sa.Column("chunk_gap_mean_ms", sa.Float(), nullable=True),
+		sa.Column("chunk_gap_p95_ms", sa.Float(), nullable=True),
+		sa.Column("chunk_gap_max_ms", sa.Float(), nullable=True),
+		sa.Column("output_chars", sa.Integer(), nullable=False),
+		sa.Column("output_tokens", sa.Integer(), nullable=False),
+		sa.Column("ui_apply_ms", sa.Float(), nullable=True),
+		sa.Column("cached", sa.Boolean(), nullable=False),
+	)
+
+
+def downgrade() -> None:
+	"""Drop the message_block_metrics table."""
+	op.drop_table("message_block_metrics")
@@ -0,0 +1,63 @@
+"""Add the provider batch job tables.
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-16
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+	"""Create the batch_jobs and batch_job_items tables."""
+	op.create_table(
+		"batch_jobs",
+		sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+		sa.Column("account_id", sa.String(), nullable=False),
+		sa.Column("provider_id", sa.String(), nullable=False),
+		sa.Column("provider_batch_id", sa.String(), nullable=False),
+		sa.Column("name", sa.String(), nullable=True),
+		sa.Column("system_prompt", sa.String(), nullable=True),
+		sa.Column("status", sa.String(), nullable=False),
+		sa.Column("error", sa.String(), nullable=True),
+		sa.Column("created_at", sa.DateTime(), nullable=False),
+		sa.Column("updated_at", sa.DateTime(), nullable=False),
+	)
+	op.create_index("ix_batch_jobs_status", "batch_jobs", ["status"])
+	op.create_table(
+		"batch_job_items",
+		sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+		sa.Column(
+			"job_id",
+			sa.Integer(),
+			sa.ForeignKey("batch_jobs.id", ondelete="CASCADE"),
+			nullable=False,
+		),
+		sa.Column("custom_id", sa.String(), nullable=False),
+		sa.Column("request", sa.String(), nullable=False),
+		sa.Column("done", sa.Boolean(), nullable=False, server_default="0"),
+		sa.Column(
+			"conversation_id",
+			sa.Integer(),
+			sa.ForeignKey("conversations.id", ondelete="SET NULL"),
+			nullable=True,
+		),
+		sa.Column("error", sa.String(), nullable=True),
+		sa.UniqueConstraint("job_id", "custom_id"),
+	)
+
+
+def downgrade() -> None:
+	"""Drop the batch job tables."""
+	op.drop_table("batch_job_items")
+	op.drop_index("ix_batch_jobs_status", "batch_jobs")
+	op.drop_table("batch_jobs")
@@ -0,0 +1,35 @@
+"""Add the provider response state of message blocks.
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-16
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+	"""Add the response ID and chain digest columns to message_blocks."""
+	with op.batch_alter_table("message_blocks") as batch_op:
+		batch_op.add_column(
+			sa.Column("response_id", sa.String(), nullable=True)
+		)
+		batch_op.add_column(
+			sa.Column("response_chain_digest", sa.String(), nullable=True)
+		)
+
+
+def downgrade() -> None:
+	"""Drop the response state columns of message_blocks."""
+	with op.batch_alter_table("message_blocks") as batch_op:
+		batch_op.drop_column("response_chain_digest")
+		batch_op.drop_column("response_id")
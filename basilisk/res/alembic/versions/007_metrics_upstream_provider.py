@@ -0,0 +1,31 @@
+"""Add the upstream provider of the block metrics.
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-16
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+	"""Add the upstream provider column to message_block_metrics."""
+	with op.batch_alter_table("message_block_metrics") as batch_op:
+		batch_op.add_column(
+			sa.Column("upstream_provider", sa.String(), nullable=True)
+		)
+
+
+def downgrade() -> None:
+	"""Drop the upstream provider column of message_block_metrics."""
+	with op.batch_alter_table("message_block_metrics") as batch_op:
+		batch_op.drop_column("upstream_provider")
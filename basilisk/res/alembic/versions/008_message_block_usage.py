@@ -0,0 +1,47 @@
+"""Add the token usage of message blocks.
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-16
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+	"""Add the account, token counts and cost columns to message_blocks."""
+	with op.batch_alter_table("message_blocks") as batch_op:
+		batch_op.add_column(sa.Column("account_id", sa.String(), nullable=True))
+		batch_op.add_column(
+			sa.Column("input_tokens", sa.Integer(), nullable=True)
+		)
+		batch_op.add_column(
+			sa.Column("output_tokens", sa.Integer(), nullable=True)
+		)
+		batch_op.add_column(
+			sa.Column("cached_input_tokens", sa.Integer(), nullable=True)
+		)
+		batch_op.add_column(
+			sa.Column("reasoning_tokens", sa.Integer(), nullable=True)
+		)
+		batch_op.add_column(sa.Column("cost", sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+	"""Drop the token usage columns of message_blocks."""
+	with op.batch_alter_table("message_blocks") as batch_op:
+		batch_op.drop_column("cost")
+		batch_op.drop_column("reasoning_tokens")
+		batch_op.drop_column("cached_input_tokens")
+		batch_op.drop_column("output_tokens")
+		batch_op.drop_column("input_tokens")
+		batch_op.drop_column("account_id")
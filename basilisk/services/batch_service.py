@@ -0,0 +1,337 @@
+"""Service processing message blocks through the providers' batch APIs.
+
+Batch APIs answer within hours instead of seconds, at about half the price,
+which suits bulk offline work such as describing a folder of images or
+summarizing many documents. ``BatchService.submit`` sends the blocks as one
+provider batch and records the job in the conversation database; a
+background thread polls the pending jobs and saves the result of each
+request as a new conversation. Jobs are only marked finished once their
+results are saved, so polling resumes after a restart.
+"""
+
+from __future__ import annotations
+
+import enum
+import logging
+import threading
+from typing import TYPE_CHECKING, Callable, Optional
+from uuid import UUID
+
+import basilisk.config as config
+from basilisk.conversation import Conversation, MessageBlock, SystemMessage
+from basilisk.provider_capability import ProviderCapability
+from basilisk.provider_engine.batch import BatchState, BatchStatus
+
+from .account_model_service import AccountModelService
+
+if TYPE_CHECKING:
+	from basilisk.conversation.database import ConversationDatabase
+	from basilisk.provider_engine.base_engine import BaseEngine
+
+log = logging.getLogger(__name__)
+
+# Seconds between two checks of the pending jobs
+DEFAULT_POLL_INTERVAL = 60.0
+
+
+class BatchJobStatus(enum.StrEnum):
+	"""Status of a batch job in the conversation database."""
+
+	# The batch is processed by the provider
+	SUBMITTED = enum.auto()
+	# The results of the batch are saved
+	COMPLETED = enum.auto()
+	# The batch was cancelled, the results of finished requests are saved
+	CANCELLED = enum.auto()
+	# The provider rejected the batch, or its account no longer exists
+	FAILED = enum.auto()
+
+
+_account_model_service = AccountModelService()
+
+
+def _engine_for_account(account_id: str) -> BaseEngine:
+	"""Return an engine for a configured account.
+
+	Raises:
+		KeyError: If the account no longer exists.
+	"""
+	account = config.accounts()[UUID(account_id)]
+	return _account_model_service.get_engine(account)
+
+
+class BatchService:
+	"""Submits batch jobs and saves their results as conversations.
+
+	Attributes:
+		poll_interval: Seconds between two checks of the pending jobs.
+	"""
+
+	def __init__(
+		self,
+		conv_db_getter: Callable[[], ConversationDatabase],
+		engine_getter: Callable[[str], BaseEngine] = _engine_for_account,
+		poll_interval: float = DEFAULT_POLL_INTERVAL,
+		on_job_finished: Optional[Callable[[int, BatchJobStatus], None]] = None,
+	):
+		"""Initialize the service.
+
+		Args:
+			conv_db_getter: Callable that returns the ConversationDatabase.
+			engine_getter: Returns the engine of an account by account ID.
+			poll_interval: Seconds between two checks of the pending jobs.
+			on_job_finished: Called from the polling thread with the job ID
+				and status when a job finishes.
+		"""
+		self._get_conv_db = conv_db_getter
+		self._get_engine = engine_getter
+		self.poll_interval = poll_interval
+		self._on_job_finished = on_job_finished
+		self._lock = threading.Lock()
+		self._poll_lock = threading.Lock()
+		self._stop_event = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+		self._new_jobs = False
+
+	def submit(
+		self,
+		engine: BaseEngine,
+		blocks: list[MessageBlock],
+		system_message: Optional[SystemMessage] = None,
+		name: Optional[str] = None,
+	) -> int:
+		"""Submit blocks as one provider batch and start polling it.
+
+		Each block is completed on its own, without history, and its result
+		is saved as a new conversation.
+
+		Args:
+			engine: The engine of the account to submit the batch with.
+			blocks: The blocks to complete.
+			system_message: Optional system message of every request.
+			name: Optional name of the job, used to title the conversations.
+
+		Returns:
+			The database ID of the job.
+
+		Raises:
+			ValueError: If the engine has no batch API or there are no blocks.
+		"""
+		if ProviderCapability.BATCH not in engine.capabilities:
+			raise ValueError(
+				f"{engine.account.provider.id} does not support batches"
+			)
+		if not blocks:
+			raise ValueError("A batch needs at least one block")
+		requests: dict[str, MessageBlock] = {}
+		for index, block in enumerate(blocks, start=1):
+			requests[str(index)] = block.model_copy(update={"stream": False})
+		batch_id = engine.submit_batch(
+			[
+				engine.build_batch_request(
+					custom_id, block, Conversation(), system_message
+				)
+				for custom_id, block in requests.items()
+			]
+		)
+		job_id = self._get_conv_db().create_batch_job(
+			account_id=str(engine.account.id),
+			provider_id=engine.account.provider.id,
+			provider_batch_id=batch_id,
+			status=BatchJobStatus.SUBMITTED,
+			requests=requests,
+			name=name,
+			system_prompt=system_message.content if system_message else None,
+		)
+		log.info("Batch job %d submitted as %s", job_id, batch_id)
+		self.start()
+		return job_id
+
+	def poll(self, job_id: int) -> Optional[BatchStatus]:
+		"""Check a submitted job and save its results once it has finished.
+
+		Args:
+			job_id: The database ID of the job.
+
+		Returns:
+			The provider status of the batch, None if the job is not pending.
+		"""
+		with self._poll_lock:
+			conv_db = self._get_conv_db()
+			job = conv_db.get_batch_job(job_id)
+			if job is None or job["status"] != BatchJobStatus.SUBMITTED:
+				return None
+			try:
+				engine = self._get_engine(job["account_id"])
+			except KeyError:
+				error = f"Account {job['account_id']} not found"
+				self._finish(job_id, BatchJobStatus.FAILED, error)
+				return BatchStatus(state=BatchState.FAILED, error=error)
+			status = engine.get_batch_status(job["provider_batch_id"])
+			if not status.finished:
+				return status
+			if status.state == BatchState.FAILED:
+				self._finish(job_id, BatchJobStatus.FAILED, status.error)
+				return status
+			self._save_results(engine, job)
+			self._finish(
+				job_id,
+				BatchJobStatus.CANCELLED
+				if status.state == BatchState.CANCELLED
+				else BatchJobStatus.COMPLETED,
+			)
+			return status
+
+	def _save_results(self, engine: BaseEngine, job: dict) -> None:
+		"""Save the results of the requests not saved yet."""
+		conv_db = self._get_conv_db()
+		blocks = conv_db.get_pending_batch_requests(job["id"])
+		system = (
+			SystemMessage(content=job["system_prompt"])
+			if job["system_prompt"]
+			else None
+		)
+		for result in engine.iter_batch_results(job["provider_batch_id"]):
+			block = blocks.pop(result.custom_id, None)
+			if block is None:
+				# Saved before a restart
+				continue
+			error = result.error
+			if error is None:
+				try:
+					block = engine.completion_response_without_stream(
+						result.response, block
+					)
+					engine.account_usage(block)
+				except Exception as e:
+					log.warning(
+						"Invalid result for request %s of batch job %d",
+						result.custom_id,
+						job["id"],
+						exc_info=True,
+					)
+					error = str(e)
+			if error is not None:
+				conv_db.save_batch_result(
+					job["id"], result.custom_id, error=error
+				)
+				continue
+			conversation = Conversation(
+				title=f"{job['name']} #{result.custom_id}"
+				if job["name"]
+				else None
+			)
+			conversation.add_block(block, system)
+			conv_db.save_batch_result(job["id"], result.custom_id, conversation)
+		for custom_id in blocks:
+			conv_db.save_batch_result(
+				job["id"], custom_id, error="No result returned"
+			)
+
+	def _finish(
+		self, job_id: int, status: BatchJobStatus, error: Optional[str] = None
+	) -> None:
+		self._get_conv_db().set_batch_job_status(job_id, status, error)
+		log.info("Batch job %d %s", job_id, status)
+		if self._on_job_finished:
+			self._on_job_finished(job_id, status)
+
+	def cancel(self, job_id: int) -> None:
+		"""Ask the provider to stop processing a job.
+
+		The results of the requests already processed are still saved.
+
+		Args:
+			job_id: The database ID of the job.
+		"""
+		job = self._get_conv_db().get_batch_job(job_id)
+		if job is None or job["status"] != BatchJobStatus.SUBMITTED:
+			return
+		self._get_engine(job["account_id"]).cancel_batch(
+			job["provider_batch_id"]
+		)
+
+	def poll_pending(self) -> int:
+		"""Poll every submitted job once.
+
+		Returns:
+			Number of jobs still processed by their provider.
+		"""
+		remaining = 0
+		for job in self._get_conv_db().list_batch_jobs(
+			[BatchJobStatus.SUBMITTED]
+		):
+			try:
+				status = self.poll(job["id"])
+			except Exception:
+				log.warning(
+					"Failed to poll batch job %d", job["id"], exc_info=True
+				)
+				remaining += 1
+				continue
+			if status is not None and not status.finished:
+				remaining += 1
+		return remaining
+
+	def resume(self) -> int:
+		"""Resume polling the jobs submitted before the last exit.
+
+		Returns:
+			Number of pending jobs.
+		"""
+		pending = len(
+			self._get_conv_db().list_batch_jobs([BatchJobStatus.SUBMITTED])
+		)
+		if pending:
+			log.info("Resuming %d pending batch jobs", pending)
+			self.start()
+		return pending
+
+	def start(self) -> None:
+		"""Poll the pending jobs in a background thread until none is left."""
+		with self._lock:
+			self._new_jobs = True
+			if self._thread is not None:
+				return
+			self._stop_event.clear()
+			self._thread = threading.Thread(
+				target=self._run, name="BatchPoller", daemon=True
+			)
+			self._thread.start()
+
+	def stop(self, timeout: Optional[float] = None) -> None:
+		"""Stop the polling thread.
+
+		Args:
+			timeout: Seconds to wait for the thread to stop.
+		"""
+		self._stop_event.set()
+		with self._lock:
+			thread = self._thread
+		if thread is not None:
+			thread.join(timeout)
+
+	def wait(self, timeout: Optional[float] = None) -> None:
+		"""Wait for the polling thread to have no pending job left.
+
+		Args:
+			timeout: Seconds to wait for the thread to return.
+		"""
+		with self._lock:
+			thread = self._thread
+		if thread is not None:
+			thread.join(timeout)
+
+	def _run(self) -> None:
+		while True:
+			with self._lock:
+				self._new_jobs = False
+			remaining = self.poll_pending()
+			with self._lock:
+				if not remaining and not self._new_jobs:
+					self._thread = None
+					return
+			if self._stop_event.wait(self.poll_interval):
+				with self._lock:
+					self._thread = None
+				return
@@ -7,19 +7,34 @@ without any wx dependency.
 from __future__ import annotations
 
 import logging
+import threading
 from typing import TYPE_CHECKING, Callable, Optional
 
 import basilisk.config as config
+from basilisk.completion_cache import CompletionCache
+from basilisk.completion_scheduler import completion_slot
 from basilisk.conversation import (
+	PROMPT_SUMMARY,
 	PROMPT_TITLE,
 	Conversation,
+	ConversationSummary,
 	Message,
 	MessageBlock,
 	MessageRoleEnum,
 	SystemMessage,
 )
+from basilisk.conversation.conversation_helper import PROMPT_SUMMARY_UPDATE
+from basilisk.conversation.history_window import (
+	HistoryWindowPolicy,
+	history_blocks,
+)
 from basilisk.provider_ai_model import AIModelInfo
+from basilisk.provider_engine.context_cache import (
+	conversation_key,
+	get_context_cache_registry,
+)
 from basilisk.sound_manager import play_sound, stop_sound
+from basilisk.token_estimator import estimate_message_tokens
 
 if TYPE_CHECKING:
 	from basilisk.conversation.database import ConversationDatabase
@@ -27,6 +42,9 @@ if TYPE_CHECKING:
 
 log = logging.getLogger(__name__)
 
+# Maximum length of a generated conversation summary
+SUMMARY_MAX_TOKENS = 2048
+
 
 class ConversationService:
 	"""Encapsulates database persistence and business logic for a conversation.
@@ -47,8 +65,17 @@ class ConversationService:
 				singleton (deferred to avoid import-time wx dependency).
 		"""
 		self._get_conv_db = conv_db_getter
+		self._completion_cache = CompletionCache(conv_db_getter)
 		self.db_conv_id: Optional[int] = None
 		self.private: bool = False
+		self._summary_thread: Optional[threading.Thread] = None
+
+	@property
+	def completion_cache(self) -> Optional[CompletionCache]:
+		"""The completion cache, None for private conversations."""
+		if self.private:
+			return None
+		return self._completion_cache
 
 	def auto_save_to_db(
 		self, conversation: Conversation, new_block: MessageBlock
@@ -249,19 +276,239 @@ class ConversationService:
 				"new_block": new_block,
 				"stream": stream,
 			}
+			cache = self.completion_cache
+			cache_key, cached = (
+				cache.lookup(engine, **completion_kw) if cache else (None, None)
+			)
+			if cached is not None:
+				content = cached.content
+			else:
+				content = self._request_text(engine, completion_kw)
+				if cache_key is not None:
+					new_block.response = Message(
+						role=MessageRoleEnum.ASSISTANT, content=content
+					)
+					cache.store(cache_key, new_block)
+			return (content.strip() if stream else content), None
+		except Exception as e:
+			log.error("Title generation failed", exc_info=True)
+			return None, e
+		finally:
+			stop_sound()
+
+	@staticmethod
+	def _request_text(engine: BaseEngine, completion_kw: dict) -> str:
+		"""Send a completion request and return the response text.
+
+		Args:
+			engine: The provider engine to use.
+			completion_kw: The arguments of the completion request.
+
+		Returns:
+			The response text.
+		"""
+		with completion_slot(engine, completion_kw["new_block"]):
 			response = engine.completion(**completion_kw)
-			if stream:
+			if completion_kw["stream"]:
 				content_parts = []
 				for chunk in engine.completion_response_with_stream(response):
 					if isinstance(chunk, str):
 						content_parts.append(chunk)
-				return "".join(content_parts).strip(), None
+				return "".join(content_parts)
 			new_block = engine.completion_response_without_stream(
 				response=response, **completion_kw
 			)
-			return new_block.response.content, None
-		except Exception as e:
-			log.error("Title generation failed", exc_info=True)
-			return None, e
-		finally:
-			stop_sound()
+			return new_block.response.content
+
+	# -- Rolling summary --
+
+	@staticmethod
+	def get_summary_block_count(
+		conversation: Conversation,
+		policy: HistoryWindowPolicy,
+		provider_id: Optional[str] = None,
+	) -> Optional[int]:
+		"""Decide whether the summary of a conversation must be updated.
+
+		The history that is not summarized yet is sent verbatim with every
+		request; once it exceeds the policy threshold, every block but the
+		newest ones is summarized.
+
+		Args:
+			conversation: The conversation to check.
+			policy: The history window policy of the conversation.
+			provider_id: ID of the provider whose tokenizer is approximated.
+
+		Returns:
+			The number of leading blocks the new summary must cover, or None
+			when the current summary is sufficient.
+		"""
+		blocks = conversation.messages
+		block_count = len(blocks) - policy.summary_keep_blocks
+		summary = conversation.summary
+		start = summary.block_count if summary and summary.covers(blocks) else 0
+		if block_count <= start:
+			return None
+		pending_tokens = 0
+		for block in history_blocks(blocks[start:]):
+			pending_tokens += estimate_message_tokens(
+				block.request, provider_id, include_attachments=False
+			) + estimate_message_tokens(block.response, provider_id)
+		if pending_tokens < policy.summary_threshold_tokens:
+			return None
+		return block_count
+
+	def summarize_history(
+		self,
+		engine: BaseEngine,
+		conversation: Conversation,
+		block_count: int,
+		model: AIModelInfo,
+	) -> ConversationSummary:
+		"""Summarize the leading blocks of a conversation.
+
+		When the current summary is still valid, only the blocks added since
+		are sent with it, so the summary is updated incrementally.
+		Attachments of the summarized blocks are replaced by a note.
+
+		Args:
+			engine: The provider engine to use.
+			conversation: The conversation to summarize.
+			block_count: Number of leading blocks to summarize.
+			model: The model generating the summary.
+
+		Returns:
+			The new summary.
+		"""
+		blocks = conversation.messages[:block_count]
+		previous = conversation.summary
+		if previous is not None and previous.covers(blocks):
+			history = [previous.as_block(), *blocks[previous.block_count :]]
+			prompt = PROMPT_SUMMARY_UPDATE
+		else:
+			history = list(blocks)
+			prompt = PROMPT_SUMMARY
+		new_block = MessageBlock(
+			request=Message(role=MessageRoleEnum.USER, content=prompt),
+			model=model,
+			temperature=0,
+			max_tokens=SUMMARY_MAX_TOKENS,
+			stream=True,
+		)
+		completion_kw = {
+			"system_message": None,
+			# Built without validation: the blocks keep the system indexes
+			# of the original conversation
+			"conversation": Conversation.model_construct(messages=history),
+			"new_block": new_block,
+			"stream": True,
+			"history_window": HistoryWindowPolicy(keep_attachments_blocks=0),
+		}
+		content = self._request_text(engine, completion_kw).strip()
+		if not content:
+			raise ValueError("Empty conversation summary")
+		return ConversationSummary(
+			content=content,
+			block_count=block_count,
+			digest=ConversationSummary.compute_digest(blocks),
+			model=model,
+		)
+
+	def save_summary(self, summary: Optional[ConversationSummary]) -> None:
+		"""Persist the summary of the conversation in the database.
+
+		Args:
+			summary: The summary to store, or None to remove it.
+		"""
+		if self.private or self.db_conv_id is None:
+			return
+		try:
+			self._get_conv_db().save_conversation_summary(
+				self.db_conv_id, summary
+			)
+		except Exception:
+			log.error("Failed to save conversation summary", exc_info=True)
+
+	@staticmethod
+	def release_context_caches(conversation: Conversation) -> None:
+		"""Delete the provider context caches of a closed conversation.
+
+		The caches are deleted in the background, as closing a tab must
+		not wait for the providers.
+
+		Args:
+			conversation: The closed conversation.
+		"""
+		threading.Thread(
+			target=get_context_cache_registry().release,
+			args=(conversation_key(conversation),),
+			name="context-cache-release",
+			daemon=True,
+		).start()
+
+	def is_summarizing(self) -> bool:
+		"""Return True while a summary is generated in the background."""
+		return (
+			self._summary_thread is not None and self._summary_thread.is_alive()
+		)
+
+	def start_summary_update(
+		self,
+		engine: BaseEngine,
+		conversation: Conversation,
+		policy: HistoryWindowPolicy,
+		model: AIModelInfo,
+	) -> bool:
+		"""Update the summary of a long conversation in the background.
+
+		Nothing is done while a previous update is running or when the
+		history not summarized yet is below the policy threshold.
+
+		Args:
+			engine: The provider engine to use.
+			conversation: The conversation to summarize.
+			policy: The history window policy of the conversation.
+			model: The model generating the summary.
+
+		Returns:
+			True if an update was started.
+		"""
+		if self.is_summarizing():
+			return False
+		block_count = self.get_summary_block_count(
+			conversation, policy, model.provider_id
+		)
+		if block_count is None:
+			return False
+		log.debug("Summarizing the first %d block(s)", block_count)
+		self._summary_thread = threading.Thread(
+			target=self._update_summary,
+			args=(engine, conversation, block_count, model),
+			name="conversation-summary",
+			daemon=True,
+		)
+		self._summary_thread.start()
+		return True
+
+	def _update_summary(
+		self,
+		engine: BaseEngine,
+		conversation: Conversation,
+		block_count: int,
+		model: AIModelInfo,
+	) -> None:
+		"""Generate and store a summary; run in the summary thread."""
+		try:
+			summary = self.summarize_history(
+				engine, conversation, block_count, model
+			)
+		except Exception:
+			log.error("Failed to summarize conversation", exc_info=True)
+			return
+		conversation.summary = summary
+		self.save_summary(summary)
+		log.debug(
+			"Conversation summary updated: %d block(s) in %d characters",
+			block_count,
+			len(summary.content),
+		)
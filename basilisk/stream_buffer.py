@@ -0,0 +1,184 @@
+"""Coalescing of streamed completion text before it reaches the UI.
+
+Provider streams deliver text in many small chunks. Forwarding each chunk to
+the main thread floods the event loop, while waiting for a sentence boundary
+can hold text back for a long time on outputs without punctuation such as code
+or tables. ``StreamFlushPolicy`` bounds how long and how much text may be
+buffered, and ``StreamCoalescingBuffer`` applies it in constant time per chunk.
+``ChunkedText`` accumulates the whole response without repeated string
+concatenation.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+COMMON_PATTERN = r"[\n;:.?!)»\"\]}]"
+RE_BOUNDARY_HINT = re.compile(COMMON_PATTERN)
+
+
+@dataclass(frozen=True)
+class StreamFlushPolicy:
+	"""Rules deciding when buffered stream text must be flushed.
+
+	Attributes:
+		latency_budget: Maximum time in seconds a chunk may stay buffered
+			before the buffer is flushed on the next append.
+		max_buffer_chars: Buffer size in characters that triggers a flush.
+		boundary_hint: Pattern searched in each new chunk only; a match
+			flushes the buffer so text is released at natural boundaries.
+	"""
+
+	latency_budget: float = 0.05
+	max_buffer_chars: int = 4096
+	boundary_hint: re.Pattern[str] | None = field(
+		default=RE_BOUNDARY_HINT, compare=False
+	)
+
+	def should_flush(self, chunk: str, pending_chars: int, age: float) -> bool:
+		"""Tell whether the buffer must be flushed after appending a chunk.
+
+		Args:
+			chunk: The chunk that was just appended.
+			pending_chars: Number of buffered characters, chunk included.
+			age: Seconds elapsed since the oldest buffered chunk arrived.
+
+		Returns:
+			True if the buffered text should be released.
+		"""
+		if pending_chars >= self.max_buffer_chars:
+			return True
+		if age >= self.latency_budget:
+			return True
+		return bool(self.boundary_hint and self.boundary_hint.search(chunk))
+
+
+class StreamCoalescingBuffer:
+	"""Buffer of streamed text released according to a flush policy.
+
+	Chunks are kept in a list and joined only when flushed, so appending is
+	independent of the buffer size. The buffer is thread-safe: text may be
+	appended by the streaming thread and taken by another one.
+	"""
+
+	def __init__(
+		self,
+		policy: StreamFlushPolicy | None = None,
+		clock: Callable[[], float] = time.monotonic,
+	):
+		"""Initialize an empty buffer.
+
+		Args:
+			policy: The flush policy, defaults to ``StreamFlushPolicy()``.
+			clock: Monotonic clock returning seconds.
+		"""
+		self.policy = policy or StreamFlushPolicy()
+		self._clock = clock
+		self._chunks: list[str] = []
+		self._pending_chars = 0
+		self._first_chunk_at = 0.0
+		self._lock = threading.Lock()
+
+	def __len__(self) -> int:
+		"""Return the number of buffered characters."""
+		return self._pending_chars
+
+	def append(self, chunk: str) -> str | None:
+		"""Append a chunk and flush the buffer when the policy requires it.
+
+		Args:
+			chunk: The text received from the stream.
+
+		Returns:
+			The flushed text, or None if the text stays buffered.
+		"""
+		if not chunk:
+			return None
+		with self._lock:
+			now = self._clock()
+			if not self._chunks:
+				self._first_chunk_at = now
+			self._chunks.append(chunk)
+			self._pending_chars += len(chunk)
+			if not self.policy.should_flush(
+				chunk, self._pending_chars, now - self._first_chunk_at
+			):
+				return None
+			return self._take()
+
+	def take_if_due(self) -> str | None:
+		"""Flush the buffer if its oldest chunk exceeded the latency budget.
+
+		Returns:
+			The flushed text, or None if nothing is due.
+		"""
+		with self._lock:
+			if not self._chunks:
+				return None
+			age = self._clock() - self._first_chunk_at
+			if age < self.policy.latency_budget:
+				return None
+			return self._take()
+
+	def flush(self) -> str:
+		"""Release all buffered text.
+
+		Returns:
+			The buffered text, empty when nothing was buffered.
+		"""
+		with self._lock:
+			if not self._chunks:
+				return ""
+			return self._take()
+
+	def _take(self) -> str:
+		text = "".join(self._chunks)
+		self._chunks.clear()
+		self._pending_chars = 0
+		return text
+
+
+class ChunkedText:
+	"""Append-only text stored as a list of chunks.
+
+	The chunks are joined only when the text is read, and the joined value is
+	kept until the next append.
+	"""
+
+	def __init__(self):
+		"""Initialize an empty text."""
+		self._chunks: list[str] = []
+		self._joined: str | None = ""
+		self._length = 0
+
+	def __len__(self) -> int:
+		"""Return the text length in characters."""
+		return self._length
+
+	def append(self, text: str) -> None:
+		"""Append text.
+
+		Args:
+			text: The text to append.
+		"""
+		if not text:
+			return
+		self._chunks.append(text)
+		self._length += len(text)
+		self._joined = None
+
+	@property
+	def text(self) -> str:
+		"""Return the whole text."""
+		if self._joined is None:
+			self._joined = "".join(self._chunks)
+			self._chunks = [self._joined]
+		return self._joined
+
+	def __str__(self) -> str:
+		"""Return the whole text."""
+		return self.text
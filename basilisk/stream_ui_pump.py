@@ -0,0 +1,215 @@
+"""Frame-rate-limited pump applying streamed text to the UI.
+
+Streaming completions used to post one ``wx.CallAfter`` per flushed chunk, so
+several tabs and edit dialogs streaming at once flooded the main loop. The
+``StreamUIPump`` gathers the text posted by every stream, keyed by its
+producer, and applies it on the main thread in one batch per frame. Producers
+may also register a poll callback, called on each frame, to release text that
+stayed buffered longer than their latency budget.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Hashable
+from dataclasses import dataclass, field
+from functools import cache
+from typing import Callable
+
+import wx
+
+log = logging.getLogger(__name__)
+
+DEFAULT_FRAME_RATE = 30
+
+
+@dataclass
+class PumpFrameStats:
+	"""Timing of the frames applied by the pump.
+
+	Attributes:
+		frames: Number of frames that applied text.
+		last_apply_ms: Time spent applying text in the last frame.
+		max_apply_ms: Longest time spent applying text in one frame.
+		total_apply_ms: Total time spent applying text.
+		slow_frames: Number of frames exceeding the frame interval.
+	"""
+
+	frames: int = 0
+	last_apply_ms: float = 0.0
+	max_apply_ms: float = 0.0
+	total_apply_ms: float = 0.0
+	slow_frames: int = 0
+
+	@property
+	def avg_apply_ms(self) -> float:
+		"""Average time spent applying text per frame."""
+		if not self.frames:
+			return 0.0
+		return self.total_apply_ms / self.frames
+
+	def record(self, apply_ms: float, frame_interval_ms: float) -> None:
+		"""Record the apply time of one frame.
+
+		Args:
+			apply_ms: Time spent applying text, in milliseconds.
+			frame_interval_ms: The pump frame interval, in milliseconds.
+		"""
+		self.frames += 1
+		self.last_apply_ms = apply_ms
+		self.max_apply_ms = max(self.max_apply_ms, apply_ms)
+		self.total_apply_ms += apply_ms
+		if apply_ms > frame_interval_ms:
+			self.slow_frames += 1
+
+
+@dataclass
+class _PendingText:
+	apply: Callable[[str], None]
+	chunks: list[str] = field(default_factory=list)
+
+
+class StreamUIPump:
+	"""Batch streamed text and apply it on the main thread at a fixed rate.
+
+	``post``, ``register_source``, ``unregister_source`` and ``discard`` may
+	be called from any thread; ``flush`` must be called from the main thread.
+	"""
+
+	def __init__(self, frame_rate: int = DEFAULT_FRAME_RATE):
+		"""Initialize the pump.
+
+		Args:
+			frame_rate: Maximum number of UI updates per second.
+		"""
+		self.frame_interval_ms = max(1, round(1000 / frame_rate))
+		self.stats = PumpFrameStats()
+		self._pending: dict[Hashable, _PendingText] = {}
+		self._sources: dict[Hashable, Callable[[], None]] = {}
+		self._scheduled = False
+		self._lock = threading.Lock()
+
+	def post(
+		self, key: Hashable, text: str, apply: Callable[[str], None]
+	) -> None:
+		"""Queue text to be applied on the next frame.
+
+		Text posted under the same key is concatenated in posting order and
+		passed to a single ``apply`` call per frame.
+
+		Args:
+			key: Identifies the producer, usually the completion handler.
+			text: The text to apply.
+			apply: Main-thread callback receiving the batched text.
+		"""
+		if not text:
+			return
+		with self._lock:
+			entry = self._pending.get(key)
+			if entry is None:
+				entry = self._pending[key] = _PendingText(apply)
+			entry.apply = apply
+			entry.chunks.append(text)
+			should_schedule = not self._scheduled
+			self._scheduled = True
+		if should_schedule:
+			wx.CallAfter(self._schedule_frame)
+
+	def register_source(self, key: Hashable, poll: Callable[[], None]) -> None:
+		"""Register a callback polled on every frame while it is registered.
+
+		Args:
+			key: Identifies the producer.
+			poll: Callback that may ``post`` text that became due.
+		"""
+		with self._lock:
+			self._sources[key] = poll
+			should_schedule = not self._scheduled
+			self._scheduled = True
+		if should_schedule:
+			wx.CallAfter(self._schedule_frame)
+
+	def unregister_source(self, key: Hashable) -> None:
+		"""Stop polling a producer.
+
+		Args:
+			key: Identifies the producer.
+		"""
+		with self._lock:
+			self._sources.pop(key, None)
+
+	def flush(self, key: Hashable) -> None:
+		"""Apply the text pending for a producer immediately.
+
+		Args:
+			key: Identifies the producer.
+		"""
+		with self._lock:
+			entry = self._pending.pop(key, None)
+		if entry is not None:
+			self._apply({key: entry})
+
+	def discard(self, key: Hashable) -> None:
+		"""Drop the text pending for a producer and stop polling it.
+
+		Args:
+			key: Identifies the producer.
+		"""
+		with self._lock:
+			self._pending.pop(key, None)
+			self._sources.pop(key, None)
+
+	def _schedule_frame(self) -> None:
+		wx.CallLater(self.frame_interval_ms, self._run_frame)
+
+	def _run_frame(self) -> None:
+		"""Poll the sources, apply pending text and schedule the next frame."""
+		with self._lock:
+			sources = list(self._sources.values())
+		for poll in sources:
+			try:
+				poll()
+			except Exception:
+				log.error("Error polling stream source", exc_info=True)
+		with self._lock:
+			pending = self._pending
+			self._pending = {}
+		if pending:
+			self._apply(pending)
+		with self._lock:
+			keep_running = bool(self._pending or self._sources)
+			self._scheduled = keep_running
+		if keep_running:
+			self._schedule_frame()
+		elif self.stats.frames:
+			log.debug(
+				"Stream UI pump idle: %d frames, avg %.2f ms, max %.2f ms, %d slow",
+				self.stats.frames,
+				self.stats.avg_apply_ms,
+				self.stats.max_apply_ms,
+				self.stats.slow_frames,
+			)
+
+	def _apply(self, pending: dict[Hashable, _PendingText]) -> None:
+		start = time.perf_counter()
+		for entry in pending.values():
+			try:
+				entry.apply("".join(entry.chunks))
+			except Exception:
+				log.error("Error applying streamed text", exc_info=True)
+		apply_ms = (time.perf_counter() - start) * 1000
+		self.stats.record(apply_ms, self.frame_interval_ms)
+		if apply_ms > self.frame_interval_ms:
+			log.debug(
+				"Stream UI frame took %.2f ms for %d stream(s)",
+				apply_ms,
+				len(pending),
+			)
+
+
+@cache
+def get_stream_ui_pump() -> StreamUIPump:
+	"""Return the pump shared by every streaming view."""
+	return StreamUIPump()
@@ -17,6 +17,7 @@ from xml.etree import ElementTree as ET
 import httpx
 
 from basilisk.config import BasiliskConfig, ReleaseChannelEnum
+from basilisk.http_client_registry import http_get
 
 from .consts import APP_REPO, UNINSTALL_FILE_NAME, WORKFLOW_NAME
 from .global_vars import base_path
@@ -190,7 +191,7 @@ class BaseUpdater(ABC):
 		Returns:
 			True if the download was successful, False otherwise.
 		"""
-		response = httpx.get(link, follow_redirects=True)
+		response = http_get(link, follow_redirects=True)
 		response.raise_for_status()
 		total_length = int(response.headers.get("Content-Length", 0))
 		chunk_size = 4096
@@ -340,7 +341,7 @@ class NigthlyUpdater(BaseUpdater):
 		Returns:
 			The XML table containing the artifact links as an ElementTree object.
 		"""
-		response = httpx.get(self.url)
+		response = http_get(self.url)
 		response.raise_for_status()
 		table_pattern = re.compile(r"(<table>.*?</table>)", re.DOTALL)
 		xml_table = re.findall(table_pattern, response.text)[0]
@@ -512,7 +513,7 @@ class GithubUpdater(BaseUpdater):
 		url = self.url
 		if not self.pre_release:
 			url += "/latest"
-		response = httpx.get(url, headers=self.headers)
+		response = http_get(url, headers=self.headers)
 		response.raise_for_status()
 		data = response.json()
 		if self.pre_release:
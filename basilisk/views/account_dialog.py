@@ -18,6 +18,7 @@ from basilisk.presenters.account_presenter import (
 	AccountPresenter,
 	EditAccountOrganizationPresenter,
 	EditAccountPresenter,
+	supports_keep_alive,
 )
 from basilisk.provider import Provider, get_provider, providers
 
@@ -401,7 +402,7 @@ class EditAccountDialog(wx.Dialog):
 		self,
 		parent: wx.Window,
 		title: str,
-		size: tuple[int, int] = (400, 400),
+		size: tuple[int, int] = (400, 450),
 		account: Account | None = None,
 	):
 		"""Initialize the dialog for editing account settings.
@@ -506,6 +507,16 @@ class EditAccountDialog(wx.Dialog):
 		self.custom_base_url_text_ctrl = wx.TextCtrl(panel)
 		sizer.Add(self.custom_base_url_text_ctrl, 0, wx.EXPAND)
 
+		self.keep_alive_label = wx.StaticText(
+			panel,
+			# Translators: A label in account dialog, how long a local model stays loaded in memory after a request
+			label=_("Keep models &loaded for (seconds, or e.g. 10m, 1h):"),
+			style=wx.ALIGN_LEFT,
+		)
+		sizer.Add(self.keep_alive_label, 0, wx.ALL, 5)
+		self.keep_alive_text_ctrl = wx.TextCtrl(panel)
+		sizer.Add(self.keep_alive_text_ctrl, 0, wx.EXPAND)
+
 		buttons_sizer = wx.BoxSizer(wx.HORIZONTAL)
 
 		btn = wx.Button(panel, wx.ID_OK)
@@ -544,6 +555,9 @@ class EditAccountDialog(wx.Dialog):
 		if account.custom_base_url:
 			self.custom_base_url_text_ctrl.SetValue(account.custom_base_url)
 
+		if account.keep_alive:
+			self.keep_alive_text_ctrl.SetValue(account.keep_alive)
+
 	def _set_api_key_data(self) -> None:
 		"""Set API key related fields from account data."""
 		account = self.presenter.account
@@ -608,6 +622,7 @@ class EditAccountDialog(wx.Dialog):
 		self._update_api_key_fields(provider.require_api_key)
 		self._update_organization_fields(provider.organization_mode_available)
 		self._update_base_url_fields(provider)
+		self._update_keep_alive_fields(supports_keep_alive(provider))
 
 	def _disable_all_fields(self) -> None:
 		"""Disable all provider-dependent fields."""
@@ -620,6 +635,8 @@ class EditAccountDialog(wx.Dialog):
 			self.organization_text_ctrl,
 			self.custom_base_url_label,
 			self.custom_base_url_text_ctrl,
+			self.keep_alive_label,
+			self.keep_alive_text_ctrl,
 		]
 		for field in fields:
 			field.Disable()
@@ -654,6 +671,11 @@ class EditAccountDialog(wx.Dialog):
 			# Translators: A label in account dialog
 			self.custom_base_url_label.SetLabel(_("Custom &base URL:"))
 
+	def _update_keep_alive_fields(self, enable: bool) -> None:
+		"""Update keep-alive related fields state."""
+		self.keep_alive_label.Enable(enable)
+		self.keep_alive_text_ctrl.Enable(enable)
+
 	def on_ok(self, event: wx.CommandEvent) -> None:
 		"""Handle the OK button click event.
 
@@ -10,11 +10,13 @@ from more_itertools import locate
 from wx.lib.agw.floatspin import FloatSpin
 
 import basilisk.config as config
+from basilisk.conversation.history_window import HistoryWindowPolicy
 from basilisk.model_catalog.sampling import MAIN_UI_SAMPLING_PARAM_KEYS
 from basilisk.presenters.base_conversation_presenter import (
 	BaseConversationPresenter,
 )
 from basilisk.provider_ai_model import ProviderAIModel
+from basilisk.provider_routing import ProviderRouting
 from basilisk.services.account_model_service import AccountModelService
 from basilisk.views.view_mixins import _guard_view_destroying
 
@@ -76,6 +78,8 @@ class BaseConversation:
 		)
 		self._displayed_models: list[ProviderAIModel] = []
 		self._is_destroying = False
+		self.history_window: Optional[HistoryWindowPolicy] = None
+		self.provider_routing: Optional[ProviderRouting] = None
 
 	@property
 	def account_model_service(self) -> AccountModelService:
@@ -172,6 +176,7 @@ class BaseConversation:
 		if not account:
 			return None
 		self.base_conv_presenter.get_engine(account)
+		self.base_conv_presenter.prewarm_connection(account)
 		self.update_model_list()
 		return account
 
@@ -371,6 +376,12 @@ class BaseConversation:
 		current_account = self.current_account
 		if not current_account or current_account.id != account_id:
 			return
+		# Keep the selection when a refreshed list replaces a stale one
+		selected_model = self.current_model
+		if selected_model is not None:
+			self.base_conv_presenter.set_pending_model(
+				selected_model.id, account_id
+			)
 		self._displayed_models = models
 		self.model_list.DeleteAllItems()
 		for model in models:
@@ -589,6 +600,17 @@ class BaseConversation:
 		if profile.top_p is not None:
 			self.top_p_spinner.SetValue(profile.top_p)
 		self.stream_mode.SetValue(profile.stream_mode)
+		self.history_window = (
+			HistoryWindowPolicy(
+				trim=profile.trim_history,
+				max_input_tokens=profile.max_history_tokens,
+				summarize=profile.summarize_history,
+			)
+			if profile.trim_history or profile.summarize_history
+			else None
+		)
+		routing = profile.provider_routing
+		self.provider_routing = None if routing.is_default else routing
 		self.refresh_sampling_controls_visibility()
 
 	def adjust_advanced_mode_setting(self):
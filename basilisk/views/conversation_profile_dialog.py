@@ -11,6 +11,7 @@ from basilisk.presenters.conversation_profile_presenter import (
 	ConversationProfilePresenter,
 	EditConversationProfilePresenter,
 )
+from basilisk.provider_routing import RoutingSort, format_provider_names
 
 from .base_conversation import BaseConversation
 
@@ -89,6 +90,33 @@ class EditConversationProfileDialog(wx.Dialog, BaseConversation):
 		self.sizer.Add(self.top_p_spinner, 0, wx.ALL | wx.EXPAND, 5)
 		self.create_stream_widget()
 		self.sizer.Add(self.stream_mode, 0, wx.ALL | wx.EXPAND, 5)
+		self.trim_history_checkbox = wx.CheckBox(
+			self,
+			# Translators: Label of a conversation profile option
+			label=_("Trim old messages to fit the model's conte&xt window"),
+		)
+		self.trim_history_checkbox.Bind(
+			wx.EVT_CHECKBOX, lambda e: self.refresh_history_controls()
+		)
+		self.sizer.Add(self.trim_history_checkbox, 0, wx.ALL, 5)
+		self.max_history_tokens_label = wx.StaticText(
+			self,
+			# Translators: Label of a conversation profile option, 0 uses the model context window
+			label=_("Input token &budget (0 for automatic):"),
+		)
+		self.sizer.Add(self.max_history_tokens_label, 0, wx.ALL, 5)
+		self.max_history_tokens_spin = wx.SpinCtrl(
+			self, value="0", min=0, max=10000000
+		)
+		self.sizer.Add(self.max_history_tokens_spin, 0, wx.ALL | wx.EXPAND, 5)
+		self.refresh_history_controls()
+		self.summarize_history_checkbox = wx.CheckBox(
+			self,
+			# Translators: Label of a conversation profile option
+			label=_("Summari&ze old messages of long conversations"),
+		)
+		self.sizer.Add(self.summarize_history_checkbox, 0, wx.ALL, 5)
+		self.create_routing_widgets()
 		self.ok_button = wx.Button(self, wx.ID_OK)
 		self.cancel_button = wx.Button(self, wx.ID_CANCEL)
 		self.Bind(wx.EVT_BUTTON, self.on_ok, self.ok_button)
@@ -98,6 +126,50 @@ class EditConversationProfileDialog(wx.Dialog, BaseConversation):
 		self.sizer.Add(self.cancel_button, 0, wx.ALL | wx.ALIGN_CENTER, 5)
 		self.SetSizerAndFit(self.sizer)
 
+	def create_routing_widgets(self):
+		"""Create the controls routing requests between upstream providers.
+
+		They apply to providers serving a model from several hosts, such as
+		OpenRouter.
+		"""
+		label = wx.StaticText(
+			self,
+			# Translators: Label of a conversation profile option for providers serving a model from several hosts, such as OpenRouter
+			label=_("Prefer upstream providers &with:"),
+		)
+		self.sizer.Add(label, 0, wx.ALL, 5)
+		self.routing_sort_combo = wx.ComboBox(
+			self,
+			# Translators: Default order of the upstream providers serving a model
+			choices=[_("Default")] + list(RoutingSort.get_labels().values()),
+			style=wx.CB_READONLY,
+		)
+		self.routing_sort_combo.SetSelection(0)
+		self.sizer.Add(self.routing_sort_combo, 0, wx.ALL | wx.EXPAND, 5)
+		label = wx.StaticText(
+			self,
+			# Translators: Label of a conversation profile option listing upstream providers, such as OpenRouter hosts
+			label=_("Only use upstream providers (comma separated):"),
+		)
+		self.sizer.Add(label, 0, wx.ALL, 5)
+		self.routing_only_txt = wx.TextCtrl(self)
+		self.sizer.Add(self.routing_only_txt, 0, wx.ALL | wx.EXPAND, 5)
+		label = wx.StaticText(
+			self,
+			# Translators: Label of a conversation profile option listing upstream providers, such as OpenRouter hosts
+			label=_("Ignore upstream providers (comma separated):"),
+		)
+		self.sizer.Add(label, 0, wx.ALL, 5)
+		self.routing_ignore_txt = wx.TextCtrl(self)
+		self.sizer.Add(self.routing_ignore_txt, 0, wx.ALL | wx.EXPAND, 5)
+		self.routing_allow_fallbacks_checkbox = wx.CheckBox(
+			self,
+			# Translators: Label of a conversation profile option
+			label=_("Fall &back to other upstream providers"),
+		)
+		self.routing_allow_fallbacks_checkbox.SetValue(True)
+		self.sizer.Add(self.routing_allow_fallbacks_checkbox, 0, wx.ALL, 5)
+
 	def apply_profile(
 		self,
 		profile: ConversationProfile | None,
@@ -115,6 +187,29 @@ class EditConversationProfileDialog(wx.Dialog, BaseConversation):
 		self.profile_name_txt.SetValue(profile.name)
 		if profile.account or profile.ai_model_info:
 			self.include_account_checkbox.SetValue(profile.account is not None)
+		self.trim_history_checkbox.SetValue(profile.trim_history)
+		self.max_history_tokens_spin.SetValue(profile.max_history_tokens or 0)
+		self.summarize_history_checkbox.SetValue(profile.summarize_history)
+		self.refresh_history_controls()
+		sorts = list(RoutingSort.get_labels())
+		self.routing_sort_combo.SetSelection(
+			sorts.index(profile.routing_sort) + 1 if profile.routing_sort else 0
+		)
+		self.routing_only_txt.SetValue(
+			format_provider_names(profile.routing_only)
+		)
+		self.routing_ignore_txt.SetValue(
+			format_provider_names(profile.routing_ignore)
+		)
+		self.routing_allow_fallbacks_checkbox.SetValue(
+			profile.routing_allow_fallbacks
+		)
+
+	def refresh_history_controls(self):
+		"""Enable the token budget control only when trimming is enabled."""
+		enabled = self.trim_history_checkbox.GetValue()
+		self.max_history_tokens_label.Enable(enabled)
+		self.max_history_tokens_spin.Enable(enabled)
 
 	def on_ok(self, event: wx.Event | None):
 		"""Handle the OK button click by delegating to the presenter.
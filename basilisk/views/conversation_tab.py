@@ -37,6 +37,8 @@ if TYPE_CHECKING:
 log = logging.getLogger(__name__)
 
 CHECK_TASK_DELAY = 100  # ms
+# Delay before loading the selected model, so browsing the list loads nothing
+MODEL_WARM_UP_DELAY = 800  # ms
 
 
 class ConversationTab(wx.Panel, BaseConversation, ErrorDisplayMixin):
@@ -242,6 +244,8 @@ class ConversationTab(wx.Panel, BaseConversation, ErrorDisplayMixin):
 		self.ocr_handler = OCRHandler(self)
 		self._draft_timer = wx.Timer(self)
 		self.Bind(wx.EVT_TIMER, self._on_draft_timer, self._draft_timer)
+		self._warm_up_timer = wx.Timer(self)
+		self.Bind(wx.EVT_TIMER, self._on_warm_up_timer, self._warm_up_timer)
 
 		self.init_ui()
 		self.init_data(profile)
@@ -271,12 +275,18 @@ class ConversationTab(wx.Panel, BaseConversation, ErrorDisplayMixin):
 		)
 		sizer.Add(self.prompt_panel, proportion=1, flag=wx.EXPAND)
 		self.prompt_panel.prompt.Bind(wx.EVT_TEXT, self._on_prompt_text_changed)
+		self.prompt_panel.input_tokens_estimator = (
+			self.presenter.estimate_input_tokens
+		)
 		self.prompt_panel.set_prompt_focus()
 		self.ocr_button = self.ocr_handler.create_ocr_widget(self)
 		sizer.Add(self.ocr_button, proportion=0, flag=wx.EXPAND)
 		label = self.create_model_widget()
 		sizer.Add(label, proportion=0, flag=wx.EXPAND)
 		sizer.Add(self.model_list, proportion=0, flag=wx.ALL | wx.EXPAND)
+		self.model_status_label = wx.StaticText(self)
+		self.model_status_label.Hide()
+		sizer.Add(self.model_status_label, proportion=0, flag=wx.EXPAND)
 		self.create_web_search_widget()
 		sizer.Add(self.web_search_mode, proportion=0, flag=wx.EXPAND)
 		self.create_max_tokens_widget()
@@ -397,6 +407,58 @@ class ConversationTab(wx.Panel, BaseConversation, ErrorDisplayMixin):
 			in account.provider.engine_cls.capabilities
 		)
 		self.prompt_panel.set_engine(self.current_engine)
+		self._warm_up_timer.Stop()
+		self.base_conv_presenter.cancel_model_warm_up()
+		self.model_status_label.SetLabel("")
+		self.model_status_label.Show(
+			ProviderCapability.MODEL_KEEP_ALIVE
+			in account.provider.engine_cls.capabilities
+		)
+		self.Layout()
+
+	def on_model_change(self, event: wx.Event | None):
+		"""Handle model selection changes.
+
+		Args:
+			event: The model selection event.
+		"""
+		super().on_model_change(event)
+		self.prompt_panel.schedule_token_estimate()
+		if self.model_status_label.IsShown() and self.current_model:
+			self._warm_up_timer.StartOnce(MODEL_WARM_UP_DELAY)
+
+	def _on_warm_up_timer(self, event):
+		"""Load the selected model in memory once the selection settles."""
+		account = self.current_account
+		model = self.current_model
+		if not account or not model:
+			return
+		started = self.base_conv_presenter.start_model_warm_up(
+			account,
+			model.id,
+			lambda *args: wx.CallAfter(self._on_model_status, *args),
+		)
+		if started:
+			self.model_status_label.SetLabel(
+				# Translators: Status of a local model being loaded in memory
+				_("Model memory: loading...")
+			)
+
+	def _on_model_status(self, model_id: str, loaded: bool | None):
+		"""Show whether the selected model is loaded in memory.
+
+		Args:
+			model_id: The ID of the warmed up model.
+			loaded: Whether the model is loaded, None when unknown.
+		"""
+		if not self._is_widget_valid("model_status_label"):
+			return
+		model = self.current_model
+		if not model or model.id != model_id:
+			return
+		self.model_status_label.SetLabel(
+			self.base_conv_presenter.get_model_status_text(loaded)
+		)
 
 	def refresh_accounts(self):
 		"""Update the account combo box with current accounts."""
@@ -666,6 +728,8 @@ class ConversationTab(wx.Panel, BaseConversation, ErrorDisplayMixin):
 	def cleanup_resources(self):
 		"""Clean up all running resources before closing the conversation tab."""
 		self._is_destroying = True
+		self._warm_up_timer.Stop()
+		self.base_conv_presenter.cancel_model_warm_up()
 		self.shutdown_model_loading()
 		self.presenter.cleanup()
 		self.ocr_handler.cleanup()
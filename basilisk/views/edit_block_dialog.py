@@ -52,6 +52,8 @@ class EditBlockDialog(wx.Dialog, BaseConversation):
 			self, account_model_service=parent.account_model_service
 		)
 		self.conversation: Conversation = parent.conversation
+		self.history_window = parent.history_window
+		self.provider_routing = parent.provider_routing
 		self.a_output = parent.messages.a_output
 		self.block_index = message_block_index
 		if not (0 <= self.block_index < len(self.conversation.messages)):
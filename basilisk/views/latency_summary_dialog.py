@@ -0,0 +1,110 @@
+"""Dialog comparing the latency of providers and models."""
+
+import logging
+
+import wx
+
+from basilisk.presenters.latency_summary_presenter import (
+	LatencySummaryPresenter,
+)
+
+log = logging.getLogger(__name__)
+
+
+class LatencySummaryDialog(wx.Dialog):
+	"""Dialog listing the average latency of each model used."""
+
+	def __init__(self, parent: wx.Window):
+		"""Initialize the latency summary dialog.
+
+		Args:
+			parent: The parent window.
+		"""
+		super().__init__(
+			parent,
+			# Translators: Title of the latency summary dialog
+			title=_("Latency by model"),
+			style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER,
+			size=(900, 400),
+		)
+		self.presenter = LatencySummaryPresenter(
+			self, conv_db_getter=lambda: wx.GetApp().conv_db
+		)
+		self._init_ui()
+		self._refresh_list()
+		self.CenterOnParent()
+
+	def _init_ui(self):
+		"""Initialize the dialog UI components."""
+		sizer = wx.BoxSizer(wx.VERTICAL)
+		list_label = wx.StaticText(
+			self,
+			# Translators: Label of the list in the latency summary dialog
+			label=_("Average latency of the saved responses:"),
+		)
+		sizer.Add(list_label, flag=wx.EXPAND | wx.ALL, border=5)
+		self.list_ctrl = wx.ListCtrl(
+			self, style=wx.LC_REPORT | wx.LC_SINGLE_SEL
+		)
+		columns = [
+			# Translators: Column header of the latency summary
+			(_("Provider"), 100),
+			# Translators: Column header of the latency summary
+			(_("Model"), 180),
+			# Translators: Column header of the latency summary, host that served the model behind an aggregator such as OpenRouter
+			(_("Upstream provider"), 120),
+			# Translators: Column header of the latency summary
+			(_("Responses"), 80),
+			# Translators: Column header of the latency summary
+			(_("First token"), 90),
+			# Translators: Column header of the latency summary
+			(_("Total"), 80),
+			# Translators: Column header of the latency summary
+			(_("Tokens/s"), 80),
+			# Translators: Column header of the latency summary, 95th percentile of the time between two streamed chunks
+			(_("Chunk gap (p95)"), 110),
+			# Translators: Column header of the latency summary, time spent displaying the streamed text
+			(_("Display"), 80),
+		]
+		for label, width in columns:
+			self.list_ctrl.AppendColumn(label, width=width)
+		sizer.Add(
+			self.list_ctrl,
+			proportion=1,
+			flag=wx.EXPAND | wx.LEFT | wx.RIGHT,
+			border=5,
+		)
+
+		btn_sizer = wx.BoxSizer(wx.HORIZONTAL)
+		# Translators: Button to reload the latency summary
+		refresh_btn = wx.Button(self, label=_("&Refresh"))
+		refresh_btn.Bind(wx.EVT_BUTTON, lambda _event: self._refresh_list())
+		btn_sizer.Add(refresh_btn, flag=wx.RIGHT, border=5)
+		close_btn = wx.Button(self, wx.ID_CANCEL, _("&Close"))
+		btn_sizer.Add(close_btn)
+		sizer.Add(btn_sizer, flag=wx.ALIGN_RIGHT | wx.ALL, border=10)
+
+		self.SetSizer(sizer)
+
+	def _refresh_list(self):
+		"""Reload the latency summary from the database."""
+		self.list_ctrl.DeleteAllItems()
+		try:
+			rows = self.presenter.load_rows()
+		except Exception:
+			log.error("Failed to load the latency summary", exc_info=True)
+			wx.MessageBox(
+				# Translators: Error shown when the latency summary cannot be loaded from the database
+				_("Failed to load the latency summary from the database."),
+				# Translators: Title of the error dialog when loading the latency summary fails
+				_("Error"),
+				wx.OK | wx.ICON_ERROR,
+				self,
+			)
+			return
+		for row in rows:
+			index = self.list_ctrl.InsertItem(
+				self.list_ctrl.GetItemCount(), row[0]
+			)
+			for column, text in enumerate(row[1:], start=1):
+				self.list_ctrl.SetItem(index, column, text)
@@ -207,6 +207,24 @@ class MainFrame(wx.Frame, ErrorDisplayMixin):
 		preferences_item = tool_menu.Append(wx.ID_PREFERENCES)
 		self.Bind(wx.EVT_MENU, self.on_preferences, preferences_item)
 		update_item_label_suffix(preferences_item, "...\tCtrl+,")
+		latency_item = tool_menu.Append(
+			wx.ID_ANY,
+			# Translators: A label for a menu item to compare the latency of models
+			_("&Latency by model") + "...",
+		)
+		self.Bind(wx.EVT_MENU, self.on_latency_summary, latency_item)
+		usage_item = tool_menu.Append(
+			wx.ID_ANY,
+			# Translators: A label for a menu item to show the token usage and cost of models
+			_("&Token usage and cost") + "...",
+		)
+		self.Bind(wx.EVT_MENU, self.on_usage_summary, usage_item)
+		request_queue_item = tool_menu.Append(
+			wx.ID_ANY,
+			# Translators: A label for a menu item to show the requests waiting for each account
+			_("Request &queue") + "...",
+		)
+		self.Bind(wx.EVT_MENU, self.on_request_queue, request_queue_item)
 		tool_menu.AppendSeparator()
 		install_nvda_addon = tool_menu.Append(
 			wx.ID_ANY, _("Install NVDA addon")
@@ -477,6 +495,42 @@ class MainFrame(wx.Frame, ErrorDisplayMixin):
 			self.presenter.open_from_db(dlg.selected_conv_id)
 		dlg.Destroy()
 
+	def on_latency_summary(self, event: wx.Event | None):
+		"""Open the dialog comparing the latency of the models used.
+
+		Args:
+			event: The triggering event. Can be None.
+		"""
+		from .latency_summary_dialog import LatencySummaryDialog
+
+		dlg = LatencySummaryDialog(self)
+		dlg.ShowModal()
+		dlg.Destroy()
+
+	def on_usage_summary(self, event: wx.Event | None):
+		"""Open the dialog summarizing the token usage and cost of the models.
+
+		Args:
+			event: The triggering event. Can be None.
+		"""
+		from .usage_summary_dialog import UsageSummaryDialog
+
+		dlg = UsageSummaryDialog(self)
+		dlg.ShowModal()
+		dlg.Destroy()
+
+	def on_request_queue(self, event: wx.Event | None):
+		"""Open the dialog showing the requests queued for each account.
+
+		Args:
+			event: The triggering event. Can be None.
+		"""
+		from .request_queue_dialog import RequestQueueDialog
+
+		dlg = RequestQueueDialog(self)
+		dlg.ShowModal()
+		dlg.Destroy()
+
 	def on_save_conversation(self, event: wx.Event | None):
 		"""Save the current conversation.
 
@@ -224,6 +224,46 @@ class PreferencesDialog(wx.Dialog):
 			self.reopen_last_conversation, 0, wx.ALL, 5
 		)
 
+		self.completion_cache_enabled = wx.CheckBox(
+			conversation_group,
+			# Translators: A label for a checkbox in the preferences dialog
+			label=_("Reuse cached &responses for identical requests"),
+		)
+		self.completion_cache_enabled.SetValue(
+			conf.conversation.completion_cache_enabled
+		)
+		conversation_group_sizer.Add(
+			self.completion_cache_enabled, 0, wx.ALL, 5
+		)
+
+		self.upload_large_attachments = wx.CheckBox(
+			conversation_group,
+			# Translators: A label for a checkbox in the preferences dialog
+			label=_(
+				"&Upload large attachments once to the provider instead of resending them"
+			),
+		)
+		self.upload_large_attachments.SetValue(
+			conf.conversation.upload_large_attachments
+		)
+		conversation_group_sizer.Add(
+			self.upload_large_attachments, 0, wx.ALL, 5
+		)
+
+		self.store_responses_server_side = wx.CheckBox(
+			conversation_group,
+			# Translators: A label for a checkbox in the preferences dialog
+			label=_(
+				"Store OpenAI responses on the provider &servers to send only new messages"
+			),
+		)
+		self.store_responses_server_side.SetValue(
+			conf.conversation.store_responses_server_side
+		)
+		conversation_group_sizer.Add(
+			self.store_responses_server_side, 0, wx.ALL, 5
+		)
+
 		sizer.Add(conversation_group_sizer, 0, wx.ALL, 5)
 
 		images_group = wx.StaticBox(panel, label=_("Images"))
@@ -292,6 +332,13 @@ class PreferencesDialog(wx.Dialog):
 		)
 		self.use_system_cert_store.SetValue(conf.network.use_system_cert_store)
 		network_sizer.Add(self.use_system_cert_store, 0, wx.ALL, 5)
+		self.use_async_engine = wx.CheckBox(
+			network_group,
+			# Translators: A label for a checkbox in the preferences dialog
+			label=_("Run completions on a shared event loop (experimental)"),
+		)
+		self.use_async_engine.SetValue(conf.network.use_async_engine)
+		network_sizer.Add(self.use_async_engine, 0, wx.ALL, 5)
 
 		label = wx.StaticText(
 			network_group,
@@ -308,6 +355,45 @@ class PreferencesDialog(wx.Dialog):
 		)
 		network_sizer.Add(self.model_metadata_cache_ttl, 0, wx.ALL, 5)
 
+		label = wx.StaticText(
+			network_group,
+			# Translators: Label for the number of requests sent at the same time to an account in preferences
+			label=_("Maximum simultaneous &requests per account:"),
+			style=wx.ALIGN_LEFT,
+		)
+		network_sizer.Add(label, 0, wx.ALL, 5)
+		self.max_concurrent_requests = wx.SpinCtrl(
+			network_group,
+			value=str(conf.network.max_concurrent_requests),
+			min=1,
+			max=32,
+		)
+		network_sizer.Add(self.max_concurrent_requests, 0, wx.ALL, 5)
+
+		label = wx.StaticText(
+			network_group,
+			# Translators: Label for the number of times a request failing with a temporary error is sent, in preferences
+			label=_("&Attempts for requests failing temporarily:"),
+			style=wx.ALIGN_LEFT,
+		)
+		network_sizer.Add(label, 0, wx.ALL, 5)
+		self.retry_max_attempts = wx.SpinCtrl(
+			network_group,
+			value=str(conf.network.retry.max_attempts),
+			min=1,
+			max=10,
+		)
+		network_sizer.Add(self.retry_max_attempts, 0, wx.ALL, 5)
+		self.retry_hedge = wx.CheckBox(
+			network_group,
+			# Translators: A label for a checkbox in the preferences dialog
+			label=_(
+				"Send a duplicate of requests slower than usual (may double the cost)"
+			),
+		)
+		self.retry_hedge.SetValue(conf.network.retry.hedge)
+		network_sizer.Add(self.retry_hedge, 0, wx.ALL, 5)
+
 		sizer.Add(network_sizer, 0, wx.ALL, 5)
 
 		server_group = wx.StaticBox(panel, label=_("Server"))
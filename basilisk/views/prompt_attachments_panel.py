@@ -28,6 +28,9 @@ if TYPE_CHECKING:
 
 log = logging.getLogger(__name__)
 
+# Delay between the last prompt change and the token estimate update
+TOKEN_ESTIMATE_DELAY_MS = 300
+
 
 class PromptAttachmentsPanel(wx.Panel, ErrorDisplayMixin):
 	"""Panel component for managing prompt input and attachments.
@@ -85,7 +88,16 @@ class PromptAttachmentsPanel(wx.Panel, ErrorDisplayMixin):
 		self.prompt.Bind(wx.EVT_KEY_DOWN, self.on_prompt_key_down)
 		self.prompt.Bind(wx.EVT_CONTEXT_MENU, self.on_prompt_context_menu)
 		self.prompt.Bind(wx.EVT_TEXT_PASTE, self.on_paste)
+		self.prompt.Bind(wx.EVT_TEXT, self.on_prompt_text)
 		sizer.Add(self.prompt, proportion=1, flag=wx.EXPAND)
+		self.token_estimate_label = wx.StaticText(self)
+		sizer.Add(self.token_estimate_label, proportion=0, flag=wx.EXPAND)
+		self._token_estimate_timer = wx.Timer(self)
+		self.Bind(
+			wx.EVT_TIMER,
+			lambda e: self.refresh_token_estimate(),
+			self._token_estimate_timer,
+		)
 		# Attachments list
 		self.attachments_list_label = wx.StaticText(
 			self,
@@ -177,6 +189,37 @@ class PromptAttachmentsPanel(wx.Panel, ErrorDisplayMixin):
 			engine: The engine to use.
 		"""
 		self.presenter.set_engine(engine)
+		self.schedule_token_estimate()
+
+	@property
+	def input_tokens_estimator(
+		self,
+	) -> Optional[Callable[[], Optional[tuple[int, Optional[int]]]]]:
+		"""Get the request token estimator of the presenter."""
+		return self.presenter.input_tokens_estimator
+
+	@input_tokens_estimator.setter
+	def input_tokens_estimator(
+		self, value: Optional[Callable[[], Optional[tuple[int, Optional[int]]]]]
+	) -> None:
+		"""Set the callable estimating the tokens of the whole request.
+
+		Args:
+			value: Callable returning the estimated tokens and the token
+				budget, or None to estimate the prompt alone.
+		"""
+		self.presenter.input_tokens_estimator = value
+		self.schedule_token_estimate()
+
+	def schedule_token_estimate(self) -> None:
+		"""Update the token estimate once the prompt stops changing."""
+		self._token_estimate_timer.StartOnce(TOKEN_ESTIMATE_DELAY_MS)
+
+	def refresh_token_estimate(self) -> None:
+		"""Update the token estimate label immediately."""
+		self.token_estimate_label.SetLabel(
+			self.presenter.get_token_estimate_text()
+		)
 
 	def check_attachments_valid(self) -> bool:
 		"""Delegate to presenter.
@@ -289,6 +332,7 @@ class PromptAttachmentsPanel(wx.Panel, ErrorDisplayMixin):
 			files: The current list of attachment objects.
 		"""
 		self.attachments_list.DeleteAllItems()
+		self.schedule_token_estimate()
 
 		if not files:
 			self.attachments_list_label.Hide()
@@ -409,6 +453,15 @@ class PromptAttachmentsPanel(wx.Panel, ErrorDisplayMixin):
 	# Event handlers — prompt area
 	# ------------------------------------------------------------------
 
+	def on_prompt_text(self, event: wx.CommandEvent):
+		"""Schedule a token estimate update when the prompt changes.
+
+		Args:
+			event: The text event
+		"""
+		event.Skip()
+		self.schedule_token_estimate()
+
 	def on_prompt_key_down(self, event: wx.KeyEvent):
 		"""Handle keyboard shortcuts for the prompt text control.
 
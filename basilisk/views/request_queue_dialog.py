@@ -0,0 +1,100 @@
+"""Dialog showing the queue of completion requests of each account."""
+
+import logging
+
+import wx
+
+from basilisk.completion_scheduler import get_completion_scheduler
+from basilisk.presenters.request_queue_presenter import RequestQueuePresenter
+
+log = logging.getLogger(__name__)
+
+
+class RequestQueueDialog(wx.Dialog):
+	"""Dialog listing the requests running and waiting for each account."""
+
+	def __init__(self, parent: wx.Window):
+		"""Initialize the request queue dialog.
+
+		Args:
+			parent: The parent window.
+		"""
+		super().__init__(
+			parent,
+			# Translators: Title of the request queue dialog
+			title=_("Request queue"),
+			style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER,
+			size=(900, 400),
+		)
+		self.presenter = RequestQueuePresenter(
+			self, scheduler_getter=get_completion_scheduler
+		)
+		self._init_ui()
+		self._refresh_list()
+		self.CenterOnParent()
+
+	def _init_ui(self):
+		"""Initialize the dialog UI components."""
+		sizer = wx.BoxSizer(wx.VERTICAL)
+		list_label = wx.StaticText(
+			self,
+			# Translators: Label of the list in the request queue dialog
+			label=_("Requests of each account since the application started:"),
+		)
+		sizer.Add(list_label, flag=wx.EXPAND | wx.ALL, border=5)
+		self.list_ctrl = wx.ListCtrl(
+			self, style=wx.LC_REPORT | wx.LC_SINGLE_SEL
+		)
+		columns = [
+			# Translators: Column header of the request queue
+			(_("Account"), 140),
+			# Translators: Column header of the request queue, requests in flight and their maximum
+			(_("Running"), 70),
+			# Translators: Column header of the request queue, requests waiting to be sent
+			(_("Queued"), 70),
+			# Translators: Column header of the request queue, requests allowed per minute by the provider
+			(_("Requests/min"), 90),
+			# Translators: Column header of the request queue, tokens allowed per minute by the provider
+			(_("Tokens/min"), 90),
+			# Translators: Column header of the request queue, time before the provider accepts requests again
+			(_("Paused"), 70),
+			# Translators: Column header of the request queue
+			(_("Sent"), 60),
+			# Translators: Column header of the request queue, number of requests that had to wait
+			(_("Waited"), 60),
+			# Translators: Column header of the request queue
+			(_("Average wait"), 90),
+			# Translators: Column header of the request queue
+			(_("Longest wait"), 90),
+			# Translators: Column header of the request queue, responses asking to slow down
+			(_("Throttled"), 70),
+		]
+		for label, width in columns:
+			self.list_ctrl.AppendColumn(label, width=width)
+		sizer.Add(
+			self.list_ctrl,
+			proportion=1,
+			flag=wx.EXPAND | wx.LEFT | wx.RIGHT,
+			border=5,
+		)
+
+		btn_sizer = wx.BoxSizer(wx.HORIZONTAL)
+		# Translators: Button to reload the request queue
+		refresh_btn = wx.Button(self, label=_("&Refresh"))
+		refresh_btn.Bind(wx.EVT_BUTTON, lambda _event: self._refresh_list())
+		btn_sizer.Add(refresh_btn, flag=wx.RIGHT, border=5)
+		close_btn = wx.Button(self, wx.ID_CANCEL, _("&Close"))
+		btn_sizer.Add(close_btn)
+		sizer.Add(btn_sizer, flag=wx.ALIGN_RIGHT | wx.ALL, border=10)
+
+		self.SetSizer(sizer)
+
+	def _refresh_list(self):
+		"""Reload the queue state of the scheduler."""
+		self.list_ctrl.DeleteAllItems()
+		for row in self.presenter.load_rows():
+			index = self.list_ctrl.InsertItem(
+				self.list_ctrl.GetItemCount(), row[0]
+			)
+			for column, text in enumerate(row[1:], start=1):
+				self.list_ctrl.SetItem(index, column, text)
@@ -0,0 +1,115 @@
+"""Dialog summarizing the token usage and cost of accounts and models."""
+
+import logging
+
+import wx
+
+from basilisk.presenters.usage_summary_presenter import UsageSummaryPresenter
+
+log = logging.getLogger(__name__)
+
+
+class UsageSummaryDialog(wx.Dialog):
+	"""Dialog listing the daily token usage and cost of each model used."""
+
+	def __init__(self, parent: wx.Window):
+		"""Initialize the usage summary dialog.
+
+		Args:
+			parent: The parent window.
+		"""
+		super().__init__(
+			parent,
+			# Translators: Title of the usage summary dialog
+			title=_("Token usage and cost"),
+			style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER,
+			size=(1000, 400),
+		)
+		self.presenter = UsageSummaryPresenter(
+			self, conv_db_getter=lambda: wx.GetApp().conv_db
+		)
+		self._init_ui()
+		self._refresh_list()
+		self.CenterOnParent()
+
+	def _init_ui(self):
+		"""Initialize the dialog UI components."""
+		sizer = wx.BoxSizer(wx.VERTICAL)
+		list_label = wx.StaticText(
+			self,
+			# Translators: Label of the list in the usage summary dialog
+			label=_("Daily token usage of the saved responses:"),
+		)
+		sizer.Add(list_label, flag=wx.EXPAND | wx.ALL, border=5)
+		self.list_ctrl = wx.ListCtrl(
+			self, style=wx.LC_REPORT | wx.LC_SINGLE_SEL
+		)
+		columns = [
+			# Translators: Column header of the usage summary
+			(_("Day"), 90),
+			# Translators: Column header of the usage summary
+			(_("Account"), 120),
+			# Translators: Column header of the usage summary
+			(_("Provider"), 100),
+			# Translators: Column header of the usage summary
+			(_("Model"), 180),
+			# Translators: Column header of the usage summary
+			(_("Responses"), 80),
+			# Translators: Column header of the usage summary
+			(_("Input tokens"), 90),
+			# Translators: Column header of the usage summary, input tokens read from the provider's prompt cache
+			(_("Cached"), 70),
+			# Translators: Column header of the usage summary
+			(_("Output tokens"), 90),
+			# Translators: Column header of the usage summary, output tokens spent thinking before answering
+			(_("Reasoning"), 80),
+			# Translators: Column header of the usage summary, in US dollars
+			(_("Cost"), 80),
+			# Translators: Column header of the usage summary
+			(_("Tokens/s"), 70),
+		]
+		for label, width in columns:
+			self.list_ctrl.AppendColumn(label, width=width)
+		sizer.Add(
+			self.list_ctrl,
+			proportion=1,
+			flag=wx.EXPAND | wx.LEFT | wx.RIGHT,
+			border=5,
+		)
+		self.total_label = wx.StaticText(self)
+		sizer.Add(self.total_label, flag=wx.EXPAND | wx.ALL, border=5)
+
+		btn_sizer = wx.BoxSizer(wx.HORIZONTAL)
+		# Translators: Button to reload the usage summary
+		refresh_btn = wx.Button(self, label=_("&Refresh"))
+		refresh_btn.Bind(wx.EVT_BUTTON, lambda _event: self._refresh_list())
+		btn_sizer.Add(refresh_btn, flag=wx.RIGHT, border=5)
+		close_btn = wx.Button(self, wx.ID_CANCEL, _("&Close"))
+		btn_sizer.Add(close_btn)
+		sizer.Add(btn_sizer, flag=wx.ALIGN_RIGHT | wx.ALL, border=10)
+
+		self.SetSizer(sizer)
+
+	def _refresh_list(self):
+		"""Reload the usage summary from the database."""
+		self.list_ctrl.DeleteAllItems()
+		try:
+			rows, total_cost = self.presenter.load_rows()
+		except Exception:
+			log.error("Failed to load the usage summary", exc_info=True)
+			wx.MessageBox(
+				# Translators: Error shown when the usage summary cannot be loaded from the database
+				_("Failed to load the usage summary from the database."),
+				# Translators: Title of the error dialog when loading the usage summary fails
+				_("Error"),
+				wx.OK | wx.ICON_ERROR,
+				self,
+			)
+			return
+		for row in rows:
+			index = self.list_ctrl.InsertItem(
+				self.list_ctrl.GetItemCount(), row[0]
+			)
+			for column, text in enumerate(row[1:], start=1):
+				self.list_ctrl.SetItem(index, column, text)
+		self.total_label.SetLabel(self.presenter.format_total_cost(total_cost))
@@ -0,0 +1 @@
+"""Benchmarks of the completion pipeline against stub servers."""
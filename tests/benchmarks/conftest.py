@@ -0,0 +1,118 @@
+"""Fixtures running the completion pipeline headlessly against stub servers.
+
+Tests marked ``benchmark`` are skipped unless selected explicitly::
+
+	python -m pytest tests/benchmarks -m benchmark
+
+Their results are printed at the end of the session and, when the
+``BASILISK_BENCHMARK_JSON`` environment variable names a file, written there
+as JSON.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict
+
+import pytest
+
+from basilisk.config import RetrySettings
+from basilisk.stream_ui_pump import StreamUIPump
+
+from .harness import BenchmarkResult, HeadlessMainLoop
+
+_results: list[BenchmarkResult] = []
+
+
+@pytest.fixture
+def main_loop(mocker):
+	"""Route the wx calls of the completion pipeline to a headless loop."""
+	loop = HeadlessMainLoop()
+	for module in ("basilisk.completion_handler", "basilisk.stream_ui_pump"):
+		wx = mocker.patch(f"{module}.wx")
+		wx.CallAfter.side_effect = loop.call_after
+		wx.CallLater.side_effect = loop.call_later
+	mocker.patch("basilisk.completion_handler.play_sound")
+	mocker.patch("basilisk.completion_handler.stop_sound")
+	yield loop
+	loop.stop()
+
+
+@pytest.fixture(autouse=True)
+def mock_conf(mocker):
+	"""Run the engines on worker threads without reading the user config."""
+	conf = mocker.patch("basilisk.config.conf")
+	conf.return_value.network.use_system_cert_store = True
+	conf.return_value.network.use_async_engine = False
+	# Every stream runs at once, as with independent accounts
+	conf.return_value.network.max_concurrent_requests = 1000
+	conf.return_value.network.retry = RetrySettings()
+	conf.return_value.network.provider_retry = {}
+	conf.return_value.conversation.store_responses_server_side = False
+	return conf
+
+
+@pytest.fixture
+def ui_pump(main_loop) -> StreamUIPump:
+	"""Return a UI pump shared by the completions of a test."""
+	return StreamUIPump()
+
+
+@pytest.fixture
+def benchmark_results() -> list[BenchmarkResult]:
+	"""Return the list collecting the results of the session."""
+	return _results
+
+
+def pytest_collection_modifyitems(config, items):
+	"""Skip the benchmarks unless they are selected with ``-m benchmark``."""
+	if "benchmark" in (config.getoption("markexpr", "") or ""):
+		return
+	skip = pytest.mark.skip(reason="select with -m benchmark to run")
+	for item in items:
+		if "benchmark" in item.keywords:
+			item.add_marker(skip)
+
+
+def _format_optional(value: float | None, fmt: str) -> str:
+	return "-" if value is None else format(value, fmt)
+
+
+def pytest_terminal_summary(terminalreporter):
+	"""Print the benchmark results and write them as JSON if requested."""
+	if not _results:
+		return
+	terminalreporter.section("completion pipeline benchmarks")
+	terminalreporter.write_line(
+		f"{'run':<42} {'streams':>7} {'tokens':>8} {'tok/s':>10} "
+		f"{'cpu us/tok':>10} {'ttfc ms':>8} {'ui ms':>7} "
+		f"{'mem KiB':>8} {'peak KiB':>9}"
+	)
+	for result in _results:
+		growth = result.memory_growth_bytes
+		peak = result.memory_peak_bytes
+		terminalreporter.write_line(
+			f"{result.name:<42} {result.streams:>7} "
+			f"{result.output_tokens:>8} {result.tokens_per_second:>10.0f} "
+			f"{result.cpu_us_per_token:>10.1f} "
+			f"{_format_optional(result.first_chunk_ms, '.0f'):>8} "
+			f"{_format_optional(result.ui_apply_ms, '.1f'):>7} "
+			f"{_format_optional(growth and growth / 1024, '.0f'):>8} "
+			f"{_format_optional(peak and peak / 1024, '.0f'):>9}"
+		)
+	path = os.environ.get("BASILISK_BENCHMARK_JSON")
+	if path:
+		with open(path, "w", encoding="utf-8") as f:
+			json.dump(
+				[
+					asdict(result)
+					| {
+						"tokens_per_second": result.tokens_per_second,
+						"cpu_us_per_token": result.cpu_us_per_token,
+					}
+					for result in _results
+				],
+				f,
+				indent=2,
+			)
@@ -0,0 +1,328 @@
+"""Headless harness running the completion pipeline against stub servers."""
+
+from __future__ import annotations
+
+import gc
+import heapq
+import itertools
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable
+from unittest.mock import MagicMock
+
+from anthropic import Anthropic
+
+from basilisk.completion_handler import CompletionHandler
+from basilisk.conversation import (
+	Conversation,
+	Message,
+	MessageBlock,
+	MessageRoleEnum,
+)
+from basilisk.provider_ai_model import AIModelInfo, ProviderAIModel
+from basilisk.provider_engine.anthropic_engine import AnthropicEngine
+from basilisk.provider_engine.base_engine import BaseEngine
+from basilisk.provider_engine.legacy_openai_engine import LegacyOpenAIEngine
+from basilisk.provider_engine.ollama_engine import OllamaEngine
+from basilisk.provider_engine.openai_engine import OpenAIEngine
+from basilisk.stream_ui_pump import StreamUIPump
+
+from .stub_servers import STUB_MODEL, StreamProfile
+
+# Wire format -> (engine class, provider ID, API path under the server URL)
+ENGINE_FORMATS: dict[str, tuple[type[BaseEngine], str, str]] = {
+	"openai_responses": (OpenAIEngine, "openai", "/v1"),
+	"openai_chat": (LegacyOpenAIEngine, "openai", "/v1"),
+	"anthropic": (AnthropicEngine, "anthropic", ""),
+	"ollama": (OllamaEngine, "ollama", ""),
+}
+
+
+@dataclass
+class BenchmarkResult:
+	"""Measurements of one benchmark run.
+
+	Attributes:
+		name: Name of the run.
+		streams: Number of concurrent completions.
+		output_tokens: Tokens received over all the completions.
+		output_chars: Characters received over all the completions.
+		wall_seconds: Duration of the run.
+		cpu_seconds: CPU time used by the client process.
+		first_chunk_ms: Average time to first chunk of the completions.
+		ui_apply_ms: Average time the UI spent applying each response.
+		memory_growth_bytes: Memory still allocated after the run, None
+			when memory was not traced.
+		memory_peak_bytes: Peak memory allocated during the run, None when
+			memory was not traced.
+	"""
+
+	name: str
+	streams: int
+	output_tokens: int
+	output_chars: int
+	wall_seconds: float
+	cpu_seconds: float
+	first_chunk_ms: float | None = None
+	ui_apply_ms: float | None = None
+	memory_growth_bytes: int | None = None
+	memory_peak_bytes: int | None = None
+
+	@property
+	def tokens_per_second(self) -> float:
+		"""Tokens received per second of wall time."""
+		return self.output_tokens / self.wall_seconds
+
+	@property
+	def cpu_us_per_token(self) -> float:
+		"""Client CPU time per token, in microseconds."""
+		return self.cpu_seconds * 1e6 / self.output_tokens
+
+
+class HeadlessMainLoop:
+	"""Stand-in for the wx main loop running callbacks on one thread.
+
+	``call_after`` and ``call_later`` replace ``wx.CallAfter`` and
+	``wx.CallLater``, so UI callbacks run serially as they would on the
+	main thread.
+	"""
+
+	def __init__(self):
+		"""Start the loop thread."""
+		self._queue: list[tuple[float, int, Callable, tuple]] = []
+		self._counter = itertools.count()
+		self._cond = threading.Condition()
+		self._running = True
+		self._thread = threading.Thread(
+			target=self._run, name="headless-main-loop", daemon=True
+		)
+		self._thread.start()
+
+	def call_after(self, func: Callable, *args: Any, **kwargs: Any) -> None:
+		"""Run a callback on the loop thread as soon as possible."""
+		self.call_later(0, func, *args, **kwargs)
+
+	def call_later(
+		self, millis: int, func: Callable, *args: Any, **kwargs: Any
+	) -> None:
+		"""Run a callback on the loop thread after a delay."""
+		due = time.perf_counter() + millis / 1000
+		with self._cond:
+			heapq.heappush(
+				self._queue, (due, next(self._counter), func, (args, kwargs))
+			)
+			self._cond.notify()
+
+	def stop(self) -> None:
+		"""Stop the loop thread."""
+		with self._cond:
+			self._running = False
+			self._cond.notify()
+		self._thread.join(timeout=5)
+
+	def _run(self) -> None:
+		while True:
+			with self._cond:
+				while self._running and (
+					not self._queue or self._queue[0][0] > time.perf_counter()
+				):
+					timeout = (
+						self._queue[0][0] - time.perf_counter()
+						if self._queue
+						else None
+					)
+					self._cond.wait(timeout)
+				if not self._running:
+					return
+				_due, _seq, func, (args, kwargs) = heapq.heappop(self._queue)
+			func(*args, **kwargs)
+
+
+def make_engine(wire_format: str, server_url: str) -> BaseEngine:
+	"""Build an engine sending its requests to a stub server.
+
+	Args:
+		wire_format: A key of ``ENGINE_FORMATS``.
+		server_url: Base URL of the stub server.
+
+	Returns:
+		The engine, with the stub model as its only model.
+	"""
+	engine_cls, provider_id, api_path = ENGINE_FORMATS[wire_format]
+	account = MagicMock()
+	account.api_key.get_secret_value.return_value = "sk-stub"
+	account.active_organization_key = None
+	account.custom_base_url = server_url + api_path
+	account.keep_alive = None
+	account.provider.id = provider_id
+	engine = engine_cls(account)
+	engine.get_model = MagicMock(
+		return_value=ProviderAIModel(
+			id=STUB_MODEL, context_window=1_000_000, max_output_tokens=200_000
+		)
+	)
+	if engine_cls is AnthropicEngine:
+		# The Anthropic client does not read the account base URL
+		engine.__dict__["client"] = Anthropic(
+			api_key="sk-stub",
+			base_url=account.custom_base_url,
+			http_client=engine.http_client,
+		)
+	return engine
+
+
+class CompletionRun:
+	"""A headless completion handler and the text it applied to the UI.
+
+	Attributes:
+		handler: The completion handler.
+		block: The block being completed.
+		applied: Number of characters applied to the UI.
+		done: Set when the completion ended.
+		success: Whether the completion succeeded.
+		error: Error reported by the handler, if any.
+	"""
+
+	def __init__(self, provider_id: str, ui_pump: StreamUIPump):
+		"""Create the handler.
+
+		Args:
+			provider_id: Provider of the model of the block.
+			ui_pump: Pump applying the streamed text to the UI.
+		"""
+		self.applied = 0
+		self.done = threading.Event()
+		self.success = False
+		self.error: str | None = None
+		self.block = MessageBlock(
+			request=Message(role=MessageRoleEnum.USER, content="Go"),
+			model=AIModelInfo(provider_id=provider_id, model_id=STUB_MODEL),
+			stream=True,
+		)
+		self.handler = CompletionHandler(
+			on_completion_end=self._on_end,
+			on_stream_chunk=self._on_chunk,
+			on_error=self._on_error,
+			ui_pump=ui_pump,
+		)
+
+	def start(self, engine: BaseEngine) -> None:
+		"""Start the completion.
+
+		Args:
+			engine: The engine to complete the block with.
+		"""
+		self.handler.start_completion(
+			engine=engine,
+			system_message=None,
+			conversation=Conversation(),
+			new_block=self.block,
+			stream=True,
+		)
+
+	def _on_chunk(self, text: str) -> None:
+		self.applied += len(text)
+
+	def _on_error(self, message: str) -> None:
+		self.error = message
+
+	def _on_end(self, success: bool) -> None:
+		self.success = success
+		self.done.set()
+
+
+def run_completions(
+	engine: BaseEngine,
+	ui_pump: StreamUIPump,
+	streams: int = 1,
+	timeout: float = 600.0,
+) -> list[CompletionRun]:
+	"""Run concurrent streamed completions and wait for them to end.
+
+	Args:
+		engine: The engine used by every completion.
+		ui_pump: Pump shared by the completions, as in the application.
+		streams: Number of concurrent completions.
+		timeout: Seconds to wait for each completion.
+
+	Returns:
+		The finished runs.
+	"""
+	provider_id = engine.account.provider.id
+	runs = [CompletionRun(provider_id, ui_pump) for _ in range(streams)]
+	for run in runs:
+		run.start(engine)
+	for run in runs:
+		if not run.done.wait(timeout):
+			raise TimeoutError("Completion did not finish")
+	return runs
+
+
+def _mean(values: list[float | None]) -> float | None:
+	values = [value for value in values if value is not None]
+	return sum(values) / len(values) if values else None
+
+
+def measure_completions(
+	name: str,
+	engine: BaseEngine,
+	ui_pump: StreamUIPump,
+	profile: StreamProfile,
+	streams: int = 1,
+	trace_memory: bool = False,
+) -> BenchmarkResult:
+	"""Run concurrent completions and measure the client.
+
+	Tracing memory slows Python down, so throughput and CPU figures of runs
+	tracing memory are not comparable with the others.
+
+	Args:
+		name: Name of the run.
+		engine: The engine used by every completion.
+		ui_pump: Pump shared by the completions.
+		profile: Profile of the stub server the engine talks to.
+		streams: Number of concurrent completions.
+		trace_memory: Whether to measure the memory allocated by the run.
+
+	Returns:
+		The measurements of the run.
+
+	Raises:
+		AssertionError: If a completion failed or its text is incomplete.
+	"""
+	gc.collect()
+	if trace_memory:
+		tracemalloc.start()
+		baseline = tracemalloc.get_traced_memory()[0]
+	cpu_start = time.process_time()
+	wall_start = time.perf_counter()
+	runs = run_completions(engine, ui_pump, streams)
+	wall_seconds = time.perf_counter() - wall_start
+	cpu_seconds = time.process_time() - cpu_start
+	growth = peak = None
+	if trace_memory:
+		gc.collect()
+		current, peak = tracemalloc.get_traced_memory()
+		tracemalloc.stop()
+		growth = current - baseline
+		peak -= baseline
+	expected = profile.text()
+	for run in runs:
+		assert run.success, run.error
+		assert run.block.response.content == expected
+		assert run.applied == len(expected)
+	metrics = [run.block.metrics for run in runs]
+	return BenchmarkResult(
+		name=name,
+		streams=streams,
+		output_tokens=profile.output_tokens * streams,
+		output_chars=len(expected) * streams,
+		wall_seconds=wall_seconds,
+		cpu_seconds=cpu_seconds,
+		first_chunk_ms=_mean([m.first_chunk_ms for m in metrics if m]),
+		ui_apply_ms=_mean([m.ui_apply_ms for m in metrics if m]),
+		memory_growth_bytes=growth,
+		memory_peak_bytes=peak,
+	)
@@ -0,0 +1,435 @@
+"""Local stand-ins for the streaming endpoints of the providers.
+
+A ``StubProviderServer`` answers chat requests with a synthetic response
+streamed in the wire format of the provider addressed by the request path:
+
+- ``/v1/responses``: OpenAI Responses API server-sent events
+- ``/v1/chat/completions``: OpenAI chat completions server-sent events
+- ``/v1/messages``: Anthropic Messages server-sent events
+- ``/api/chat``: Ollama newline-delimited JSON
+
+A ``StreamProfile`` sets the length of the response, the number of tokens
+per chunk, the token rate, the latency before the first token and the jitter
+between chunks. ``StubServerProcess`` runs the server in a child process, so
+the CPU time and memory measured by the benchmarks belong to the client only.
+
+A ``Fault`` queued on a server makes its next request fail: an error status,
+a delayed answer or a connection dropped after some events of the stream.
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import cycle, islice
+from typing import Callable, Iterator, Optional
+
+STUB_MODEL = "stub-model"
+
+_WORDS = (
+	" the",
+	" quick",
+	" brown",
+	" fox",
+	" jumps",
+	" over",
+	" lazy",
+	" dog",
+	",",
+	" and",
+	" then",
+	" runs",
+	" away",
+	".",
+)
+
+
+@dataclass(frozen=True)
+class StreamProfile:
+	"""Shape of the responses streamed by a stub server.
+
+	Attributes:
+		output_tokens: Number of tokens of each response.
+		tokens_per_chunk: Number of tokens sent in each event.
+		tokens_per_second: Token rate, 0 to stream as fast as possible.
+		first_token_latency: Seconds waited before the first event.
+		jitter: Relative random variation of the delay between chunks.
+		seed: Seed of the jitter, for reproducible runs.
+	"""
+
+	output_tokens: int = 1000
+	tokens_per_chunk: int = 1
+	tokens_per_second: float = 0
+	first_token_latency: float = 0.0
+	jitter: float = 0.0
+	seed: Optional[int] = 0
+
+	def tokens(self) -> Iterator[str]:
+		"""Return the tokens of a response."""
+		return islice(cycle(_WORDS), self.output_tokens)
+
+	def text(self) -> str:
+		"""Return the full text of a response."""
+		return "".join(self.tokens())
+
+	def chunks(self) -> Iterator[str]:
+		"""Return the text of each event of a response."""
+		tokens = self.tokens()
+		while chunk := "".join(islice(tokens, self.tokens_per_chunk)):
+			yield chunk
+
+	def delays(self) -> Iterator[float]:
+		"""Return the delay to wait before each chunk, in seconds."""
+		rng = random.Random(self.seed)
+		interval = (
+			self.tokens_per_chunk / self.tokens_per_second
+			if self.tokens_per_second
+			else 0.0
+		)
+		first = True
+		while True:
+			delay = interval * (1 + rng.uniform(-self.jitter, self.jitter))
+			if first:
+				delay += self.first_token_latency
+				first = False
+			yield max(0.0, delay)
+
+
+@dataclass(frozen=True)
+class Fault:
+	"""Failure injected into one request of a stub server.
+
+	Attributes:
+		status: Error status answered instead of the stream, 0 for none.
+		retry_after: Value of the retry-after header of the error.
+		delay: Seconds waited before answering.
+		reset_after: Number of events sent before the connection is dropped,
+			None to send the whole response.
+	"""
+
+	status: int = 0
+	retry_after: Optional[str] = None
+	delay: float = 0.0
+	reset_after: Optional[int] = None
+
+
+def _sse(data: dict, event: Optional[str] = None) -> bytes:
+	prefix = f"event: {event}\n" if event else ""
+	return f"{prefix}data: {json.dumps(data)}\n\n".encode()
+
+
+def _openai_chat_frames(chunks: Iterator[str]) -> Iterator[bytes]:
+	def chunk(delta: dict, finish_reason: Optional[str] = None) -> bytes:
+		return _sse(
+			{
+				"id": "chatcmpl-stub",
+				"object": "chat.completion.chunk",
+				"created": 0,
+				"model": STUB_MODEL,
+				"choices": [
+					{"index": 0, "delta": delta, "finish_reason": finish_reason}
+				],
+			}
+		)
+
+	yield chunk({"role": "assistant", "content": ""})
+	for text in chunks:
+		yield chunk({"content": text})
+	yield chunk({}, "stop")
+	yield b"data: [DONE]\n\n"
+
+
+def _openai_responses_frames(chunks: Iterator[str]) -> Iterator[bytes]:
+	response = {
+		"id": "resp_stub",
+		"object": "response",
+		"created_at": 0,
+		"model": STUB_MODEL,
+		"status": "in_progress",
+		"output": [],
+	}
+	yield _sse(
+		{
+			"type": "response.created",
+			"sequence_number": 0,
+			"response": response,
+		},
+		"response.created",
+	)
+	sequence_number = 0
+	for sequence_number, text in enumerate(chunks, start=1):
+		yield _sse(
+			{
+				"type": "response.output_text.delta",
+				"sequence_number": sequence_number,
+				"item_id": "msg_stub",
+				"output_index": 0,
+				"content_index": 0,
+				"delta": text,
+				"logprobs": [],
+			},
+			"response.output_text.delta",
+		)
+	yield _sse(
+		{
+			"type": "response.completed",
+			"sequence_number": sequence_number + 1,
+			"response": response | {"status": "completed"},
+		},
+		"response.completed",
+	)
+
+
+def _anthropic_frames(chunks: Iterator[str]) -> Iterator[bytes]:
+	def event(data: dict) -> bytes:
+		return _sse(data, data["type"])
+
+	yield event(
+		{
+			"type": "message_start",
+			"message": {
+				"id": "msg_stub",
+				"type": "message",
+				"role": "assistant",
+				"content": [],
+				"model": STUB_MODEL,
+				"stop_reason": None,
+				"stop_sequence": None,
+				"usage": {"input_tokens": 1, "output_tokens": 1},
+			},
+		}
+	)
+	yield event(
+		{
+			"type": "content_block_start",
+			"index": 0,
+			"content_block": {"type": "text", "text": ""},
+		}
+	)
+	for text in chunks:
+		yield event(
+			{
+				"type": "content_block_delta",
+				"index": 0,
+				"delta": {"type": "text_delta", "text": text},
+			}
+		)
+	yield event({"type": "content_block_stop", "index": 0})
+	yield event(
+		{
+			"type": "message_delta",
+			"delta": {"stop_reason": "end_turn", "stop_sequence": None},
+			"usage": {"output_tokens": 1},
+		}
+	)
+	yield event({"type": "message_stop"})
+
+
+def _ollama_frames(chunks: Iterator[str]) -> Iterator[bytes]:
+	def line(content: str, done: bool) -> bytes:
+		data = {
+			"model": STUB_MODEL,
+			"created_at": "2026-01-01T00:00:00Z",
+			"message": {"role": "assistant", "content": content},
+			"done": done,
+		}
+		if done:
+			data["done_reason"] = "stop"
+		return json.dumps(data).encode() + b"\n"
+
+	for text in chunks:
+		yield line(text, False)
+	yield line("", True)
+
+
+# Request path -> (content type, frame writer)
+ROUTES: dict[str, tuple[str, Callable[[Iterator[str]], Iterator[bytes]]]] = {
+	"/v1/chat/completions": ("text/event-stream", _openai_chat_frames),
+	"/v1/responses": ("text/event-stream", _openai_responses_frames),
+	"/v1/messages": ("text/event-stream", _anthropic_frames),
+	"/api/chat": ("application/x-ndjson", _ollama_frames),
+}
+
+
+class StubProviderHandler(BaseHTTPRequestHandler):
+	"""Stream a synthetic response in the format addressed by the path."""
+
+	protocol_version = "HTTP/1.1"
+	server: StubProviderServer
+
+	def log_message(self, format, *args):
+		"""Keep the output quiet."""
+
+	def do_POST(self):
+		"""Answer a chat request with the response of the server profile."""
+		self.rfile.read(int(self.headers.get("Content-Length", 0)))
+		route = ROUTES.get(self.path.split("?", 1)[0])
+		if route is None:
+			self.send_error(404)
+			return
+		content_type, frames = route
+		profile = self.server.profile
+		fault = self.server.next_fault()
+		if fault.delay:
+			time.sleep(fault.delay)
+		if fault.status:
+			self._send_fault(fault)
+			return
+		self.send_response(200)
+		self.send_header("Content-Type", content_type)
+		self.send_header("Transfer-Encoding", "chunked")
+		self.end_headers()
+		delays = profile.delays()
+		events = frames(self._paced(profile.chunks(), delays))
+		if fault.reset_after is not None:
+			events = islice(events, fault.reset_after)
+		try:
+			for frame in events:
+				self.wfile.write(b"%x\r\n%s\r\n" % (len(frame), frame))
+			if fault.reset_after is not None:
+				# End the connection in the middle of the chunked body
+				self.wfile.flush()
+				self.close_connection = True
+				return
+			self.wfile.write(b"0\r\n\r\n")
+			self.wfile.flush()
+		except OSError:
+			self.close_connection = True
+
+	def _send_fault(self, fault: Fault) -> None:
+		"""Answer an overloaded error with the status of the fault."""
+		body = json.dumps(
+			{
+				"error": {
+					"type": "overloaded_error",
+					"message": "Stub server overloaded",
+				}
+			}
+		).encode()
+		self.send_response(fault.status)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(body)))
+		if fault.retry_after is not None:
+			self.send_header("Retry-After", fault.retry_after)
+		self.end_headers()
+		self.wfile.write(body)
+
+	@staticmethod
+	def _paced(chunks: Iterator[str], delays: Iterator[float]) -> Iterator[str]:
+		"""Wait before each chunk according to the profile."""
+		for chunk, delay in zip(chunks, delays):
+			if delay:
+				time.sleep(delay)
+			yield chunk
+
+
+class StubProviderServer(ThreadingHTTPServer):
+	"""HTTP server streaming synthetic provider responses.
+
+	Attributes:
+		profile: Shape of the responses.
+		faults: Failures of the next requests, one per request.
+		request_count: Number of chat requests received.
+	"""
+
+	daemon_threads = True
+	# Accept many simultaneous streams without refusing connections
+	request_queue_size = 256
+
+	def __init__(
+		self,
+		profile: StreamProfile,
+		address: tuple[str, int] = ("127.0.0.1", 0),
+	):
+		"""Bind the server.
+
+		Args:
+			profile: Shape of the responses.
+			address: Host and port, port 0 to pick a free one.
+		"""
+		super().__init__(address, StubProviderHandler)
+		self.profile = profile
+		self.faults: deque[Fault] = deque()
+		self.request_count = 0
+		self._lock = threading.Lock()
+
+	def next_fault(self) -> Fault:
+		"""Count a request and return its fault, if any."""
+		with self._lock:
+			self.request_count += 1
+			return self.faults.popleft() if self.faults else Fault()
+
+	@property
+	def url(self) -> str:
+		"""Base URL of the server."""
+		host, port = self.server_address[:2]
+		return f"http://{host}:{port}"
+
+	def start(self) -> threading.Thread:
+		"""Serve requests in a background thread."""
+		thread = threading.Thread(target=self.serve_forever, daemon=True)
+		thread.start()
+		return thread
+
+	def stop(self) -> None:
+		"""Stop serving and close the socket."""
+		self.shutdown()
+		self.server_close()
+
+
+def _serve(profile: StreamProfile, conn) -> None:
+	server = StubProviderServer(profile)
+	conn.send(server.url)
+	server.start()
+	# Serve until the parent closes the pipe
+	try:
+		conn.recv()
+	except EOFError:
+		pass
+	server.stop()
+
+
+class StubServerProcess:
+	"""Run a stub provider server in a child process.
+
+	Use as a context manager; ``url`` is the base URL of the server.
+	"""
+
+	def __init__(self, profile: StreamProfile, start_timeout: float = 30.0):
+		"""Prepare the process.
+
+		Args:
+			profile: Shape of the responses.
+			start_timeout: Seconds to wait for the server to listen.
+		"""
+		self.profile = profile
+		self.start_timeout = start_timeout
+		self.url: Optional[str] = None
+		context = multiprocessing.get_context("spawn")
+		self._conn, self._child_conn = context.Pipe()
+		self._process = context.Process(
+			target=_serve, args=(profile, self._child_conn), daemon=True
+		)
+
+	def __enter__(self) -> StubServerProcess:
+		"""Start the server and wait until it listens."""
+		self._process.start()
+		self._child_conn.close()
+		if not self._conn.poll(self.start_timeout):
+			self._process.kill()
+			raise TimeoutError("Stub provider server did not start")
+		self.url = self._conn.recv()
+		return self
+
+	def __exit__(self, *exc_info) -> None:
+		"""Stop the server process."""
+		self._conn.close()
+		self._process.join(timeout=5)
+		if self._process.is_alive():
+			self._process.kill()
@@ -0,0 +1,89 @@
+"""Tests of the completion retries against a fault-injecting stub server."""
+
+import time
+
+import pytest
+
+from basilisk.config import RetrySettings
+
+from .harness import make_engine, run_completions
+from .stub_servers import Fault, StreamProfile, StubProviderServer
+
+PROFILE = StreamProfile(output_tokens=20, tokens_per_chunk=2)
+
+
+@pytest.fixture
+def stub_server():
+	"""Start an in-process stub server."""
+	server = StubProviderServer(PROFILE)
+	server.start()
+	yield server
+	server.stop()
+
+
+@pytest.fixture(autouse=True)
+def retry_settings(mock_conf):
+	"""Retry quickly, so the tests do not wait for the real backoff."""
+	settings = RetrySettings(
+		max_attempts=3,
+		base_delay_seconds=0.01,
+		max_delay_seconds=0.5,
+		hedge_min_delay_seconds=0.2,
+	)
+	mock_conf.return_value.network.retry = settings
+	return settings
+
+
+@pytest.mark.parametrize(
+	"faults",
+	[
+		[Fault(status=503), Fault(status=529)],
+		[Fault(status=429, retry_after="0")],
+		[Fault(reset_after=0)],
+	],
+	ids=["overloaded", "throttled", "reset-before-text"],
+)
+def test_transient_faults_are_retried(stub_server, ui_pump, faults):
+	"""Failures before any text are hidden by sending the request again."""
+	stub_server.faults.extend(faults)
+	engine = make_engine("ollama", stub_server.url)
+	(run,) = run_completions(engine, ui_pump, timeout=30)
+	assert run.success, run.error
+	assert run.block.response.content == PROFILE.text()
+	assert stub_server.request_count == len(faults) + 1
+
+
+def test_too_many_faults_are_reported(stub_server, ui_pump):
+	"""The error is reported once every attempt failed."""
+	stub_server.faults.extend([Fault(status=503)] * 3)
+	engine = make_engine("ollama", stub_server.url)
+	(run,) = run_completions(engine, ui_pump, timeout=30)
+	assert not run.success
+	assert "overloaded" in run.error
+	assert stub_server.request_count == 3
+
+
+def test_reset_after_text_is_not_retried(stub_server, ui_pump):
+	"""A stream cut after its first text is reported, not sent again."""
+	stub_server.faults.append(Fault(reset_after=2))
+	engine = make_engine("ollama", stub_server.url)
+	(run,) = run_completions(engine, ui_pump, timeout=30)
+	assert not run.success
+	assert run.error
+	assert stub_server.request_count == 1
+
+
+def test_slow_request_is_hedged(stub_server, ui_pump, retry_settings):
+	"""A request slower than usual is answered by its duplicate."""
+	retry_settings.hedge = True
+	engine = make_engine("openai_chat", stub_server.url)
+	# Learn the usual latency of the model
+	for run in run_completions(engine, ui_pump, streams=5, timeout=30):
+		assert run.success, run.error
+	stub_server.faults.append(Fault(delay=5))
+	start = time.perf_counter()
+	(run,) = run_completions(engine, ui_pump, timeout=30)
+	assert run.success, run.error
+	assert run.block.response.content == PROFILE.text()
+	assert time.perf_counter() - start < 4
+	assert stub_server.request_count == 7
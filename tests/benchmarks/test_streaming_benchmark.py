@@ -0,0 +1,66 @@
+"""End-to-end benchmarks of the streaming completion pipeline.
+
+Each run starts a stub provider server in a child process and streams its
+responses through ``CompletionHandler`` and the engine's
+``completion_response_with_stream``, with the UI pump driven by a headless
+main loop. Run them with ``python -m pytest tests/benchmarks -m benchmark``.
+"""
+
+import pytest
+
+from .harness import ENGINE_FORMATS, make_engine, measure_completions
+from .stub_servers import StreamProfile, StubServerProcess
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.slow]
+
+LARGE_OUTPUT = StreamProfile(output_tokens=100_000)
+CONCURRENT_STREAMS = 50
+# Paced like a fast hosted model: 3 tokens per event at 300 tokens per second
+CONCURRENT_OUTPUT = StreamProfile(
+	output_tokens=2_000,
+	tokens_per_chunk=3,
+	tokens_per_second=300,
+	first_token_latency=0.3,
+	jitter=0.5,
+)
+
+
+@pytest.mark.parametrize("wire_format", ENGINE_FORMATS)
+def test_large_output_throughput(wire_format, ui_pump, benchmark_results):
+	"""Stream a 100k-token response as fast as the client reads it."""
+	with StubServerProcess(LARGE_OUTPUT) as server:
+		result = measure_completions(
+			f"{wire_format} 100k tokens",
+			make_engine(wire_format, server.url),
+			ui_pump,
+			LARGE_OUTPUT,
+		)
+	benchmark_results.append(result)
+
+
+@pytest.mark.parametrize("wire_format", ENGINE_FORMATS)
+def test_large_output_memory(wire_format, ui_pump, benchmark_results):
+	"""Measure the memory used to stream a 100k-token response."""
+	with StubServerProcess(LARGE_OUTPUT) as server:
+		result = measure_completions(
+			f"{wire_format} 100k tokens (traced)",
+			make_engine(wire_format, server.url),
+			ui_pump,
+			LARGE_OUTPUT,
+			trace_memory=True,
+		)
+	benchmark_results.append(result)
+
+
+@pytest.mark.parametrize("wire_format", ENGINE_FORMATS)
+def test_concurrent_streams(wire_format, ui_pump, benchmark_results):
+	"""Stream 50 paced responses at once through the shared UI pump."""
+	with StubServerProcess(CONCURRENT_OUTPUT) as server:
+		result = measure_completions(
+			f"{wire_format} {CONCURRENT_STREAMS} streams",
+			make_engine(wire_format, server.url),
+			ui_pump,
+			CONCURRENT_OUTPUT,
+			streams=CONCURRENT_STREAMS,
+		)
+	benchmark_results.append(result)
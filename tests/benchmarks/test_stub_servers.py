@@ -0,0 +1,56 @@
+"""Tests for the stub provider servers used by the benchmarks."""
+
+import pytest
+
+from .harness import ENGINE_FORMATS, make_engine, run_completions
+from .stub_servers import StreamProfile, StubProviderServer
+
+PROFILE = StreamProfile(output_tokens=50, tokens_per_chunk=3)
+
+
+@pytest.fixture
+def stub_server():
+	"""Start an in-process stub server."""
+	server = StubProviderServer(PROFILE)
+	server.start()
+	yield server
+	server.stop()
+
+
+class TestStreamProfile:
+	"""Tests for StreamProfile."""
+
+	def test_chunks_cover_the_text(self):
+		"""Chunks hold the requested number of tokens and the whole text."""
+		chunks = list(PROFILE.chunks())
+		assert len(chunks) == 17
+		assert "".join(chunks) == PROFILE.text()
+
+	def test_delays_follow_the_rate(self):
+		"""The first delay includes the latency and jitter stays bounded."""
+		profile = StreamProfile(
+			tokens_per_chunk=2,
+			tokens_per_second=100,
+			first_token_latency=0.5,
+			jitter=0.5,
+		)
+		delays = profile.delays()
+		assert 0.51 <= next(delays) <= 0.53
+		for _ in range(100):
+			assert 0.01 <= next(delays) <= 0.03
+
+	def test_unpaced_profile_has_no_delay(self):
+		"""A profile without a rate streams without waiting."""
+		delays = StreamProfile().delays()
+		assert [next(delays) for _ in range(3)] == [0, 0, 0]
+
+
+@pytest.mark.parametrize("wire_format", ENGINE_FORMATS)
+def test_engine_streams_whole_response(stub_server, ui_pump, wire_format):
+	"""Each engine parses the whole response of its stub endpoint."""
+	engine = make_engine(wire_format, stub_server.url)
+	(run,) = run_completions(engine, ui_pump, timeout=30)
+	assert run.success, run.error
+	assert run.block.response.content == PROFILE.text()
+	assert run.applied == len(PROFILE.text())
+	assert run.block.metrics.chunk_count == 17
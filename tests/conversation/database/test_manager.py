@@ -8,13 +8,20 @@ from upath import UPath
 
 from basilisk.conversation import (
 	AttachmentFile,
+	CompletionMetrics,
 	Conversation,
+	ConversationSummary,
 	Message,
 	MessageBlock,
 	MessageRoleEnum,
 	SystemMessage,
+	TokenUsage,
 )
-from basilisk.conversation.database.models import DBAttachment
+from basilisk.conversation.database.models import (
+	DBAttachment,
+	DBCompletionCacheEntry,
+)
+from basilisk.provider_ai_model import AIModelInfo
 
 
 class TestSaveConversation:
@@ -139,6 +146,27 @@ class TestSaveMessageBlock:
 		assert loaded.messages[0].request.content == "Message 0"
 		assert loaded.messages[2].request.content == "Message 2"
 
+	def test_save_block_with_response_id(self, db_manager, test_ai_model):
+		"""Test that the server-side state of the response is kept."""
+		conv = Conversation()
+		conv_id = db_manager.save_conversation(conv)
+
+		block = MessageBlock(
+			request=Message(role=MessageRoleEnum.USER, content="Question"),
+			response=Message(role=MessageRoleEnum.ASSISTANT, content="Answer"),
+			model=test_ai_model,
+			response_id="resp_1",
+			response_chain_digest="digest",
+		)
+		conv.add_block(block)
+		db_manager.save_message_block(conv_id, 0, block)
+
+		loaded = db_manager.load_conversation(conv_id).messages[0]
+		assert loaded.response_id == "resp_1"
+		assert loaded.response_chain_digest == "digest"
+		# Kept in the database only, never in exported conversations
+		assert "response_id" not in loaded.model_dump()
+
 	def test_save_block_with_citations(
 		self, db_manager, conversation_with_citations
 	):
@@ -540,3 +568,361 @@ class TestCleanupOrphanAttachments:
 		# Delete second — now orphaned, must be removed
 		db_manager.delete_conversation(id2)
 		assert self._count_attachments(db_manager) == 0
+
+
+class TestCompletionCache:
+	"""Tests for the completion cache operations."""
+
+	TTL = 3600
+
+	def _store(self, db_manager, key, content="answer", citations=None):
+		db_manager.store_cached_completion(
+			key, "openai", "gpt-4", content, citations
+		)
+
+	def _set_dates(self, db_manager, key, created_at, last_used_at=None):
+		with db_manager._get_session() as session:
+			with session.begin():
+				entry = session.execute(
+					select(DBCompletionCacheEntry).where(
+						DBCompletionCacheEntry.cache_key == key
+					)
+				).scalar_one()
+				entry.created_at = created_at
+				entry.last_used_at = last_used_at or created_at
+
+	def test_miss_returns_none(self, db_manager):
+		"""Test that an unknown key is a cache miss."""
+		assert db_manager.get_cached_completion("unknown", self.TTL) is None
+
+	def test_store_then_get(self, db_manager):
+		"""Test that a stored response is returned with its citations."""
+		citations = [{"source_url": "https://example.com"}]
+		self._store(db_manager, "key", citations=citations)
+		assert db_manager.get_cached_completion("key", self.TTL) == (
+			"answer",
+			citations,
+		)
+
+	def test_store_replaces_existing_entry(self, db_manager):
+		"""Test that storing the same key again replaces the response."""
+		self._store(db_manager, "key", "first")
+		self._store(db_manager, "key", "second")
+		assert db_manager.get_cached_completion("key", self.TTL) == (
+			"second",
+			None,
+		)
+
+	def test_expired_entry_is_a_miss(self, db_manager):
+		"""Test that entries older than the TTL are ignored."""
+		self._store(db_manager, "key")
+		old = datetime.now(timezone.utc) - timedelta(seconds=self.TTL + 60)
+		self._set_dates(db_manager, "key", old)
+		assert db_manager.get_cached_completion("key", self.TTL) is None
+
+	def test_prune_removes_expired_and_least_recently_used(self, db_manager):
+		"""Test that pruning applies the TTL, then the size limit."""
+		now = datetime.now(timezone.utc)
+		for key in ["expired", "old", "recent", "newest"]:
+			self._store(db_manager, key)
+		self._set_dates(
+			db_manager, "expired", now - timedelta(seconds=self.TTL + 60)
+		)
+		self._set_dates(db_manager, "old", now, now - timedelta(seconds=30))
+		self._set_dates(db_manager, "recent", now, now - timedelta(seconds=20))
+		self._set_dates(db_manager, "newest", now, now - timedelta(seconds=10))
+
+		assert db_manager.prune_completion_cache(self.TTL, 2) == 2
+		assert db_manager.get_cached_completion("expired", self.TTL) is None
+		assert db_manager.get_cached_completion("old", self.TTL) is None
+		assert db_manager.get_cached_completion("recent", self.TTL)
+		assert db_manager.get_cached_completion("newest", self.TTL)
+
+	def test_clear(self, db_manager):
+		"""Test that clearing the cache deletes every entry."""
+		self._store(db_manager, "a")
+		self._store(db_manager, "b")
+		assert db_manager.clear_completion_cache() == 2
+		assert db_manager.get_cached_completion("a", self.TTL) is None
+
+
+class TestLatencyMetrics:
+	"""Tests for the storage and aggregation of latency metrics."""
+
+	def _block(self, model_id, total_ms, first_chunk_ms=None, cached=False):
+		block = MessageBlock(
+			request=Message(role=MessageRoleEnum.USER, content="Q"),
+			response=Message(role=MessageRoleEnum.ASSISTANT, content="A"),
+			model=AIModelInfo(provider_id="openai", model_id=model_id),
+		)
+		block.metrics = CompletionMetrics(
+			request_ms=100,
+			first_chunk_ms=first_chunk_ms,
+			total_ms=total_ms,
+			output_tokens=100,
+			cached=cached,
+		)
+		return block
+
+	def test_save_and_load_metrics(self, db_manager):
+		"""Test that block metrics are restored with the conversation."""
+		conv = Conversation()
+		conv.add_block(self._block("gpt-4", 2000, 500))
+		conv_id = db_manager.save_conversation(conv)
+		loaded = db_manager.load_conversation(conv_id)
+		assert loaded.messages[0].metrics == conv.messages[0].metrics
+
+	def test_block_without_metrics(self, db_manager, conversation_with_blocks):
+		"""Test that blocks saved without metrics load without them."""
+		conv_id = db_manager.save_conversation(conversation_with_blocks)
+		loaded = db_manager.load_conversation(conv_id)
+		assert all(block.metrics is None for block in loaded.messages)
+
+	def test_latency_summary(self, db_manager):
+		"""Test that metrics are averaged per model, skipping cached ones."""
+		conv = Conversation()
+		conv.add_block(self._block("gpt-4", 2000, 1000))
+		conv.add_block(self._block("gpt-4", 3000, 500))
+		conv.add_block(self._block("gpt-4", 10, cached=True))
+		conv.add_block(self._block("gpt-4o", 1000))
+		db_manager.save_conversation(conv)
+
+		rows = db_manager.get_latency_summary()
+		assert [row["model_id"] for row in rows] == ["gpt-4", "gpt-4o"]
+		gpt4 = rows[0]
+		assert gpt4["provider_id"] == "openai"
+		assert gpt4["response_count"] == 2
+		assert gpt4["first_chunk_ms"] == pytest.approx(750)
+		assert gpt4["total_ms"] == pytest.approx(2500)
+		assert gpt4["tokens_per_second"] == pytest.approx(70)
+		assert gpt4["ui_apply_ms"] is None
+		assert rows[1]["first_chunk_ms"] is None
+		assert rows[1]["tokens_per_second"] == pytest.approx(100)
+
+	def test_latency_summary_per_upstream_provider(self, db_manager):
+		"""Test that routed responses are grouped by upstream provider."""
+		conv = Conversation()
+		for upstream, total_ms in [("Groq", 500), ("Together", 2000)]:
+			block = self._block("llama", total_ms)
+			block.metrics.upstream_provider = upstream
+			conv.add_block(block)
+		conv.add_block(self._block("llama", 1000))
+		db_manager.save_conversation(conv)
+
+		rows = db_manager.get_latency_summary()
+		assert [
+			(row["upstream_provider"], row["total_ms"]) for row in rows
+		] == [(None, 1000), ("Groq", 500), ("Together", 2000)]
+
+	def test_latency_summary_empty(self, db_manager):
+		"""Test that the summary is empty without metrics."""
+		assert db_manager.get_latency_summary() == []
+
+
+class TestTokenUsage:
+	"""Tests for the storage and aggregation of token usage."""
+
+	def _block(self, model_id, usage, total_ms=None):
+		block = MessageBlock(
+			request=Message(role=MessageRoleEnum.USER, content="Q"),
+			response=Message(role=MessageRoleEnum.ASSISTANT, content="A"),
+			model=AIModelInfo(provider_id="openai", model_id=model_id),
+		)
+		block.usage = usage
+		if total_ms is not None:
+			block.metrics = CompletionMetrics(
+				request_ms=100, total_ms=total_ms, output_tokens=100
+			)
+		return block
+
+	def test_save_and_load_usage(self, db_manager):
+		"""Test that block usage is restored with the conversation."""
+		usage = TokenUsage(
+			input_tokens=1000,
+			output_tokens=200,
+			cached_input_tokens=800,
+			reasoning_tokens=50,
+			cost=0.0021,
+			account_id="account-1",
+		)
+		conv = Conversation()
+		conv.add_block(self._block("gpt-4", usage))
+		conv_id = db_manager.save_conversation(conv)
+		loaded = db_manager.load_conversation(conv_id)
+		assert loaded.messages[0].usage == usage
+
+	def test_block_without_usage(self, db_manager, conversation_with_blocks):
+		"""Test that blocks saved without usage load without it."""
+		conv_id = db_manager.save_conversation(conversation_with_blocks)
+		loaded = db_manager.load_conversation(conv_id)
+		assert all(block.usage is None for block in loaded.messages)
+
+	def test_usage_summary(self, db_manager, conversation_with_blocks):
+		"""Test that usage is summed per day, account and model."""
+		conv = Conversation()
+		conv.add_block(
+			self._block(
+				"gpt-4",
+				TokenUsage(
+					input_tokens=100,
+					output_tokens=100,
+					cost=0.5,
+					account_id="a",
+				),
+				total_ms=1000,
+			)
+		)
+		conv.add_block(
+			self._block(
+				"gpt-4",
+				TokenUsage(
+					input_tokens=300,
+					output_tokens=50,
+					cached_input_tokens=200,
+					cost=0.25,
+					account_id="a",
+				),
+			)
+		)
+		conv.add_block(
+			self._block("gpt-4", TokenUsage(input_tokens=10, account_id="b"))
+		)
+		db_manager.save_conversation(conv)
+		db_manager.save_conversation(conversation_with_blocks)
+
+		rows = db_manager.get_usage_summary()
+		assert [(row["account_id"], row["model_id"]) for row in rows] == [
+			("a", "gpt-4"),
+			("b", "gpt-4"),
+		]
+		first = rows[0]
+		assert first["response_count"] == 2
+		assert first["input_tokens"] == 400
+		assert first["cached_input_tokens"] == 200
+		assert first["output_tokens"] == 150
+		assert first["cost"] == pytest.approx(0.75)
+		# Only the output of the measured response is counted
+		assert first["tokens_per_second"] == pytest.approx(100)
+		assert rows[1]["cost"] is None
+		assert rows[1]["tokens_per_second"] is None
+
+	def test_usage_summary_since(self, db_manager):
+		"""Test that older blocks are excluded from the summary."""
+		conv = Conversation()
+		conv.add_block(
+			self._block("gpt-4", TokenUsage(input_tokens=10, account_id="a"))
+		)
+		db_manager.save_conversation(conv)
+		future = datetime.now() + timedelta(days=1)
+		assert db_manager.get_usage_summary(since=future) == []
+		assert len(db_manager.get_usage_summary()) == 1
+
+
+class TestConversationSummary:
+	"""Tests for the storage of conversation summaries."""
+
+	def _summary(self, conversation, block_count, content="Summary"):
+		return ConversationSummary(
+			content=content,
+			block_count=block_count,
+			digest=ConversationSummary.compute_digest(
+				conversation.messages[:block_count]
+			),
+			model=AIModelInfo(provider_id="openai", model_id="cheap"),
+		)
+
+	def test_save_and_load_summary(self, db_manager, conversation_with_blocks):
+		"""Test that a saved summary is restored with the conversation."""
+		conv_id = db_manager.save_conversation(conversation_with_blocks)
+		summary = self._summary(conversation_with_blocks, 1)
+		db_manager.save_conversation_summary(conv_id, summary)
+		loaded = db_manager.load_conversation(conv_id)
+		assert loaded.summary.content == summary.content
+		assert loaded.summary.model == summary.model
+		assert loaded.summary.covers(loaded.messages)
+
+	def test_replace_and_remove_summary(
+		self, db_manager, conversation_with_blocks
+	):
+		"""Test that a conversation keeps at most one summary."""
+		conv_id = db_manager.save_conversation(conversation_with_blocks)
+		db_manager.save_conversation_summary(
+			conv_id, self._summary(conversation_with_blocks, 1)
+		)
+		db_manager.save_conversation_summary(
+			conv_id, self._summary(conversation_with_blocks, 1, "Newer")
+		)
+		assert db_manager.load_conversation(conv_id).summary.content == "Newer"
+		db_manager.save_conversation_summary(conv_id, None)
+		assert db_manager.load_conversation(conv_id).summary is None
+
+	def test_save_conversation_with_summary(
+		self, db_manager, conversation_with_blocks
+	):
+		"""Test that saving a conversation stores its summary."""
+		conversation_with_blocks.summary = self._summary(
+			conversation_with_blocks, 1
+		)
+		conv_id = db_manager.save_conversation(conversation_with_blocks)
+		loaded = db_manager.load_conversation(conv_id)
+		assert loaded.summary.content == "Summary"
+
+
+class TestBatchJobs:
+	"""Tests for the storage of provider batch jobs."""
+
+	def _create_job(self, db_manager, test_ai_model) -> int:
+		requests = {
+			str(i): MessageBlock(
+				request=Message(role=MessageRoleEnum.USER, content=f"Q{i}"),
+				model=test_ai_model,
+				temperature=0.2,
+			)
+			for i in (1, 2)
+		}
+		return db_manager.create_batch_job(
+			account_id="acct-1",
+			provider_id="openai",
+			provider_batch_id="batch_1",
+			status="submitted",
+			requests=requests,
+			name="Job",
+		)
+
+	def test_pending_requests_roundtrip(self, db_manager, test_ai_model):
+		"""Test that the stored requests are restored as blocks."""
+		job_id = self._create_job(db_manager, test_ai_model)
+		pending = db_manager.get_pending_batch_requests(job_id)
+		assert list(pending) == ["1", "2"]
+		assert pending["1"].request.content == "Q1"
+		assert pending["1"].temperature == 0.2
+		assert pending["1"].model == test_ai_model
+		job = db_manager.get_batch_job(job_id)
+		assert job["item_count"] == 2
+		assert job["done_count"] == 0
+
+	def test_result_saved_once(self, db_manager, test_ai_model):
+		"""Test that a request result is saved as a single conversation."""
+		job_id = self._create_job(db_manager, test_ai_model)
+		block = db_manager.get_pending_batch_requests(job_id)["1"]
+		block.response = Message(role=MessageRoleEnum.ASSISTANT, content="A1")
+		conv = Conversation(title="Job #1")
+		conv.add_block(block)
+		conv_id = db_manager.save_batch_result(job_id, "1", conv)
+		assert db_manager.load_conversation(conv_id).title == "Job #1"
+		assert db_manager.save_batch_result(job_id, "1", conv) is None
+		assert db_manager.get_conversation_count() == 1
+		assert list(db_manager.get_pending_batch_requests(job_id)) == ["2"]
+
+	def test_failed_request_and_status(self, db_manager, test_ai_model):
+		"""Test recording a failed request and listing jobs by status."""
+		job_id = self._create_job(db_manager, test_ai_model)
+		assert db_manager.save_batch_result(job_id, "2", error="boom") is None
+		db_manager.set_batch_job_status(job_id, "completed")
+		job = db_manager.get_batch_job(job_id)
+		assert job["error_count"] == 1
+		assert job["done_count"] == 1
+		assert db_manager.list_batch_jobs(["submitted"]) == []
+		assert [j["id"] for j in db_manager.list_batch_jobs()] == [job_id]
+		db_manager.delete_batch_job(job_id)
+		assert db_manager.get_batch_job(job_id) is None
@@ -0,0 +1,133 @@
+"""Tests for the attachment payload cache."""
+
+import base64
+import os
+
+import pytest
+from upath import UPath
+
+from basilisk.conversation import AttachmentFile
+from basilisk.conversation.attachment_cache import (
+	AttachmentPayloadCache,
+	PayloadEncoding,
+	get_attachment_payload_cache,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_payload_cache():
+	"""Start every test with an empty process-wide payload cache."""
+	get_attachment_payload_cache().clear()
+	yield
+	get_attachment_payload_cache().clear()
+
+
+class TestAttachmentPayloadCache:
+	"""Tests for the LRU behaviour of AttachmentPayloadCache."""
+
+	def test_get_or_encode_counts_hits_and_misses(self):
+		"""The encoder runs only on the first lookup of a key."""
+		cache = AttachmentPayloadCache(max_bytes=100)
+		calls = []
+
+		def encoder():
+			calls.append(1)
+			return "payload"
+
+		key = ("hash", "memory://a.txt", PayloadEncoding.BASE64)
+		assert cache.get_or_encode(key, encoder) == "payload"
+		assert cache.get_or_encode(key, encoder) == "payload"
+		assert len(calls) == 1
+		stats = cache.stats
+		assert stats.hits == 1
+		assert stats.misses == 1
+		assert stats.entries == 1
+		assert stats.size_bytes == len("payload")
+
+	def test_least_recently_used_entry_is_evicted(self):
+		"""Exceeding the byte budget evicts the oldest unused entry."""
+		cache = AttachmentPayloadCache(max_bytes=10)
+		key_a = ("a", "loc", PayloadEncoding.BYTES)
+		key_b = ("b", "loc", PayloadEncoding.BYTES)
+		key_c = ("c", "loc", PayloadEncoding.BYTES)
+		cache.put(key_a, b"aaaa")
+		cache.put(key_b, b"bbbb")
+		assert cache.get(key_a) == b"aaaa"
+		cache.put(key_c, b"cccc")
+		assert cache.get(key_b) is None
+		assert cache.get(key_a) == b"aaaa"
+		assert cache.get(key_c) == b"cccc"
+		assert cache.stats.evictions == 1
+		assert cache.stats.size_bytes == 8
+
+	def test_oversized_payload_is_not_stored(self):
+		"""A payload larger than the whole budget bypasses the cache."""
+		cache = AttachmentPayloadCache(max_bytes=4)
+		key = ("hash", "loc", PayloadEncoding.TEXT)
+		assert cache.get_or_encode(key, lambda: "too large") == "too large"
+		assert cache.stats.entries == 0
+
+
+class TestAttachmentFilePayloads:
+	"""Tests for the cached payload accessors of AttachmentFile."""
+
+	def test_encode_base64_reads_file_once(self, text_file, mocker):
+		"""Repeated encodings are served from the cache."""
+		attachment = AttachmentFile(location=text_file)
+		read_spy = mocker.spy(AttachmentFile, "read_as_bytes")
+		first = attachment.encode_base64()
+		second = attachment.encode_base64()
+		assert first == second
+		assert base64.b64decode(first) == b"test content"
+		assert read_spy.call_count == 1
+		assert get_attachment_payload_cache().stats.hits == 1
+
+	def test_url_is_cached_data_url(self, text_file):
+		"""The data URL is built once and then reused."""
+		attachment = AttachmentFile(location=text_file)
+		url = attachment.url
+		assert url == attachment.url
+		assert url.startswith("data:text/plain;base64,")
+
+	def test_cached_bytes_and_text(self, text_file):
+		"""Raw bytes and plain text are cached under distinct kinds."""
+		attachment = AttachmentFile(location=text_file)
+		assert attachment.cached_bytes() == b"test content"
+		assert attachment.cached_plain_text() == "test content"
+		assert get_attachment_payload_cache().stats.entries == 2
+
+	def test_same_content_shares_payload(self):
+		"""Two attachments with the same content and location share entries."""
+		location = UPath("memory://shared.txt")
+		with location.open("w") as f:
+			f.write("shared content")
+		first = AttachmentFile(location=location)
+		second = AttachmentFile(location=location)
+		assert first.content_hash == second.content_hash
+		first.encode_base64()
+		second.encode_base64()
+		assert get_attachment_payload_cache().stats.hits == 1
+
+	def test_content_change_invalidates_payload(self, tmp_path):
+		"""Rewriting the file with a different size produces a new payload."""
+		location = UPath(tmp_path) / "changing.txt"
+		with location.open("w") as f:
+			f.write("before")
+		attachment = AttachmentFile(location=location)
+		assert attachment.cached_plain_text() == "before"
+		with location.open("w") as f:
+			f.write("after change")
+		assert attachment.cached_plain_text() == "after change"
+
+	def test_same_size_edit_invalidates_payload(self, tmp_path):
+		"""Rewriting the file in place with the same size is detected."""
+		location = UPath(tmp_path) / "edited.txt"
+		with location.open("w") as f:
+			f.write("before")
+		attachment = AttachmentFile(location=location)
+		assert attachment.cached_plain_text() == "before"
+		with location.open("w") as f:
+			f.write("edited")
+		stat = location.stat()
+		os.utime(location, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+		assert attachment.cached_plain_text() == "edited"
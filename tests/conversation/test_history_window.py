@@ -0,0 +1,223 @@
+"""Tests for the history window policy."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from basilisk.conversation import (
+	Conversation,
+	ConversationSummary,
+	Message,
+	MessageBlock,
+	MessageRoleEnum,
+)
+from basilisk.conversation.history_window import (
+	CONTEXT_WINDOW_SAFETY_RATIO,
+	HistoryWindowPolicy,
+	history_blocks,
+	select_history,
+	stub_request,
+	summarized_history,
+)
+from basilisk.token_estimator import estimate_attachment_tokens
+
+
+def _block(ai_model, index, attachments=None, answered=True):
+	return MessageBlock(
+		request=Message(
+			role=MessageRoleEnum.USER,
+			content=f"question {index} " * 10,
+			attachments=attachments,
+		),
+		response=(
+			Message(role=MessageRoleEnum.ASSISTANT, content=f"answer {index}")
+			if answered
+			else None
+		),
+		model=ai_model,
+	)
+
+
+@pytest.fixture
+def blocks(ai_model):
+	"""Return five answered history blocks."""
+	return [_block(ai_model, i) for i in range(5)]
+
+
+@pytest.fixture
+def new_block(ai_model):
+	"""Return the block to complete."""
+	return _block(ai_model, 5, answered=False)
+
+
+class TestInputBudget:
+	"""Tests for HistoryWindowPolicy.input_budget."""
+
+	def test_explicit_budget(self, new_block):
+		"""An explicit budget ignores the model."""
+		policy = HistoryWindowPolicy(max_input_tokens=1000)
+		assert policy.input_budget(None, new_block) == 1000
+
+	def test_budget_from_context_window(self, new_block):
+		"""The output reserved by the block is left out of the window."""
+		model = SimpleNamespace(context_window=10000, max_output_tokens=4000)
+		new_block.max_tokens = 2000
+		assert HistoryWindowPolicy().input_budget(model, new_block) == int(
+			8000 * CONTEXT_WINDOW_SAFETY_RATIO
+		)
+
+	def test_unknown_context_window(self, new_block):
+		"""No budget is derived for models without context window."""
+		model = SimpleNamespace(context_window=0, max_output_tokens=-1)
+		assert HistoryWindowPolicy().input_budget(model, new_block) is None
+
+
+class TestSelectHistory:
+	"""Tests for select_history."""
+
+	def test_without_budget_keeps_everything(self, blocks, new_block):
+		"""Every block is kept and the total is estimated."""
+		window = select_history(blocks, new_block, None, None)
+		assert window.blocks == blocks
+		assert window.dropped == 0
+		assert window.estimated_tokens > 0
+
+	def test_oldest_blocks_are_dropped(self, blocks, new_block):
+		"""The newest blocks fitting in the budget are kept in order."""
+		full = select_history(blocks, new_block, None, None)
+		budget = full.estimated_tokens - 1
+		window = select_history(blocks, new_block, None, budget)
+		assert window.blocks == blocks[1:]
+		assert window.dropped == 1
+		assert window.estimated_tokens <= budget
+
+	def test_new_request_is_always_counted(self, blocks, new_block):
+		"""A budget smaller than the new request drops the whole history."""
+		window = select_history(blocks, new_block, None, 1)
+		assert window.blocks == []
+		assert window.dropped == len(blocks)
+
+	@pytest.mark.parametrize(
+		("excess", "expected"),
+		[
+			(lambda saving: 0, [False, False, False]),
+			(lambda saving: 1, [True, False, False]),
+			(lambda saving: saving + 1, [True, True, False]),
+		],
+	)
+	def test_oldest_attachments_are_stubbed_to_fit(
+		self, ai_model, attachment, new_block, excess, expected
+	):
+		"""Attachments are omitted from the oldest blocks only as needed."""
+		blocks = [
+			_block(ai_model, i, attachments=[attachment]) for i in range(3)
+		]
+		full = select_history(blocks, new_block, None, None).estimated_tokens
+		budget = full - excess(estimate_attachment_tokens(attachment))
+		window = select_history(
+			blocks, new_block, None, budget, keep_attachments_blocks=1
+		)
+		assert window.blocks == blocks
+		assert [window.is_stubbed(block) for block in blocks] == expected
+		assert window.estimated_tokens <= budget
+
+
+def test_history_blocks_skips_unanswered_and_stops(ai_model):
+	"""Unanswered blocks and blocks after the stop index are ignored."""
+	blocks = [
+		_block(ai_model, 0),
+		_block(ai_model, 1, answered=False),
+		_block(ai_model, 2),
+		_block(ai_model, 3),
+	]
+	assert history_blocks(blocks, stop_block_index=3) == [blocks[0], blocks[2]]
+
+
+def test_stub_request(attachment):
+	"""The stub keeps the text and replaces attachments with a note."""
+	message = Message(
+		role=MessageRoleEnum.USER,
+		content="Compare",
+		attachments=[attachment, attachment],
+	)
+	stubbed = stub_request(message)
+	assert stubbed.attachments is None
+	assert stubbed.content == "Compare\n[2 attachment(s) omitted]"
+	assert message.attachments == [attachment, attachment]
+
+
+def _summary(blocks, block_count, ai_model):
+	return ConversationSummary(
+		content="The user asked five questions.",
+		block_count=block_count,
+		digest=ConversationSummary.compute_digest(blocks[:block_count]),
+		model=ai_model,
+	)
+
+
+@pytest.fixture
+def conversation(blocks):
+	"""Return a conversation holding the history blocks."""
+	conversation = Conversation()
+	for block in blocks:
+		conversation.add_block(block)
+	return conversation
+
+
+class TestConversationSummary:
+	"""Tests for ConversationSummary."""
+
+	def test_covers_unchanged_blocks(self, blocks, ai_model):
+		"""The summary applies while the summarized blocks are unchanged."""
+		summary = _summary(blocks, 3, ai_model)
+		assert summary.covers(blocks)
+		assert not summary.covers(blocks[:2])
+
+	def test_edited_block_makes_summary_stale(self, blocks, ai_model):
+		"""Editing a summarized block invalidates the summary."""
+		summary = _summary(blocks, 3, ai_model)
+		blocks[1].response.content = "another answer"
+		assert not summary.covers(blocks)
+
+	def test_newer_blocks_do_not_matter(self, blocks, ai_model):
+		"""Blocks after the summarized ones can change freely."""
+		summary = _summary(blocks, 3, ai_model)
+		blocks[4].response.content = "another answer"
+		assert summary.covers(blocks)
+
+	def test_as_block_is_reused(self, blocks, ai_model):
+		"""The synthetic block holds the summary and is built once."""
+		summary = _summary(blocks, 3, ai_model)
+		block = summary.as_block()
+		assert summary.content in block.request.content
+		assert block.response.role == MessageRoleEnum.ASSISTANT
+		assert summary.as_block() is block
+
+
+class TestSummarizedHistory:
+	"""Tests for summarized_history."""
+
+	def test_without_summary(self, conversation, blocks):
+		"""Every answered block is sent when there is no summary."""
+		assert summarized_history(conversation) == blocks
+
+	def test_summary_replaces_leading_blocks(
+		self, conversation, blocks, ai_model
+	):
+		"""The summarized blocks are replaced by the summary block."""
+		conversation.summary = _summary(blocks, 3, ai_model)
+		history = summarized_history(conversation)
+		assert history == [conversation.summary.as_block(), *blocks[3:]]
+
+	def test_stop_index_before_summary_end(
+		self, conversation, blocks, ai_model
+	):
+		"""A summary covering blocks after the stop index is not used."""
+		conversation.summary = _summary(blocks, 3, ai_model)
+		assert summarized_history(conversation, 2) == blocks[:2]
+
+	def test_stale_summary_is_ignored(self, conversation, blocks, ai_model):
+		"""The original blocks are sent when the summary is stale."""
+		conversation.summary = _summary(blocks, 3, ai_model)
+		blocks[0].request.content = "edited question"
+		assert summarized_history(conversation) == blocks
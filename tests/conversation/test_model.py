@@ -10,6 +10,7 @@ from basilisk.conversation import (
 	MessageBlock,
 	MessageRoleEnum,
 	SystemMessage,
+	TokenUsage,
 )
 from basilisk.provider_ai_model import AIModelInfo
 
@@ -299,3 +300,26 @@ class TestConversationWithMultipleBlocks:
 		assert first_system not in empty_conversation.systems
 		assert second_system in empty_conversation.systems
 		assert third_system in empty_conversation.systems
+
+
+class TestTokenUsage:
+	"""Tests for the token usage of a response."""
+
+	def test_merged_keeps_largest_counts(self):
+		"""Test that stream reports split between events are combined."""
+		start = TokenUsage(input_tokens=100, cached_input_tokens=80)
+		end = TokenUsage(input_tokens=0, output_tokens=25)
+		merged = start.merged(end)
+		assert merged == TokenUsage(
+			input_tokens=100, output_tokens=25, cached_input_tokens=80
+		)
+
+	def test_negative_count_rejected(self):
+		"""Test that negative token counts are rejected."""
+		with pytest.raises(ValidationError):
+			TokenUsage(input_tokens=-1)
+
+	def test_usage_not_serialized(self, message_block):
+		"""Test that usage stays out of the saved conversation file."""
+		message_block.usage = TokenUsage(input_tokens=10)
+		assert "usage" not in message_block.model_dump()
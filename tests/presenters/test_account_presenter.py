@@ -13,6 +13,7 @@ from basilisk.presenters.account_presenter import (
 	EditAccountOrganizationPresenter,
 	EditAccountPresenter,
 )
+from basilisk.provider_capability import ProviderCapability
 
 
 class TestEditAccountOrganizationPresenter:
@@ -220,6 +221,35 @@ class TestEditAccountPresenter:
 		error = presenter.validate_form()
 		assert error is None
 
+	@pytest.mark.parametrize(
+		("keep_alive", "valid"),
+		[("", True), ("-1", True), ("1h30m", True), ("10 minutes", False)],
+	)
+	def test_validate_keep_alive(self, mock_view, keep_alive, valid):
+		"""Keep-alive is validated for providers keeping models loaded."""
+		mock_view.provider.engine_cls.capabilities = {
+			ProviderCapability.MODEL_KEEP_ALIVE
+		}
+		mock_view.keep_alive_text_ctrl.GetValue.return_value = keep_alive
+		error = EditAccountPresenter(view=mock_view).validate_form()
+		if valid:
+			assert error is None
+		else:
+			assert error[1] == "keep_alive_text_ctrl"
+
+	def test_build_keep_alive_only_when_supported(self, mock_view):
+		"""Keep-alive is only stored for providers keeping models loaded."""
+		mock_view.keep_alive_text_ctrl.GetValue.return_value = "10m"
+		existing = MagicMock()
+		existing.organizations = None
+		EditAccountPresenter(view=mock_view, account=existing).build_account()
+		assert existing.keep_alive is None
+		mock_view.provider.engine_cls.capabilities = {
+			ProviderCapability.MODEL_KEEP_ALIVE
+		}
+		EditAccountPresenter(view=mock_view, account=existing).build_account()
+		assert existing.keep_alive == "10m"
+
 	def test_build_new_account(self, mock_view, mocker):
 		"""Building a new account should create an Account."""
 		mock_account_cls = mocker.patch(
@@ -188,6 +188,29 @@ class TestHasImageAttachments:
 		assert presenter.has_image_attachments() is False
 
 
+class TestTokenEstimate:
+	"""Tests for the token estimate label."""
+
+	def test_prompt_only(self, presenter, mock_view):
+		"""Without request estimator, the prompt alone is estimated."""
+		mock_view.get_prompt_text.return_value = "Hello, world!"
+		assert presenter.get_token_estimate_text() == "Estimated tokens: 8"
+
+	def test_request_estimate_with_budget(self, presenter):
+		"""The request estimator is used and its budget shown."""
+		presenter.input_tokens_estimator = lambda: (1200, 180000)
+		assert (
+			presenter.get_token_estimate_text()
+			== "Estimated tokens: 1200 of 180000"
+		)
+
+	def test_failing_estimator_falls_back_to_prompt(self, presenter, mock_view):
+		"""Errors of the request estimator are not raised."""
+		mock_view.get_prompt_text.return_value = ""
+		presenter.input_tokens_estimator = MagicMock(side_effect=ValueError)
+		assert presenter.get_token_estimate_text() == "Estimated tokens: 4"
+
+
 class TestCheckAttachmentsValid:
 	"""Tests for check_attachments_valid()."""
 
@@ -8,6 +8,7 @@ from basilisk.presenters.base_conversation_presenter import (
 	BaseConversationPresenter,
 )
 from basilisk.provider_ai_model import ProviderAIModel
+from basilisk.provider_capability import ProviderCapability
 from basilisk.services.account_model_service import AccountModelService
 
 
@@ -139,6 +140,67 @@ class TestGetEngine:
 		assert result is engine
 
 
+class TestPrewarmConnection:
+	"""Tests for BaseConversationPresenter.prewarm_connection()."""
+
+	def test_prewarms_account_engine(self, mock_service):
+		"""The engine of the selected account opens its connection."""
+		engine = MagicMock()
+		mock_service.get_engine.return_value = engine
+		p = BaseConversationPresenter(account_model_service=mock_service)
+		p.prewarm_connection(MagicMock())
+		engine.prewarm_connection.assert_called_once_with()
+
+	def test_swallows_errors(self, mock_service):
+		"""A failing prewarm does not break the account change."""
+		mock_service.get_engine.side_effect = RuntimeError("boom")
+		p = BaseConversationPresenter(account_model_service=mock_service)
+		p.prewarm_connection(MagicMock())
+
+
+class TestModelWarmUp:
+	"""Tests for loading the selected model in memory."""
+
+	def _make_engine(self, capabilities, loaded=True):
+		engine = MagicMock()
+		engine.capabilities = capabilities
+		engine.is_model_loaded.return_value = loaded
+		return engine
+
+	def test_skipped_without_keep_alive_capability(self, mock_service):
+		"""Engines of remote providers are not warmed up."""
+		engine = self._make_engine({ProviderCapability.TEXT})
+		mock_service.get_engine.return_value = engine
+		p = BaseConversationPresenter(account_model_service=mock_service)
+		assert not p.start_model_warm_up(MagicMock(), "llama3", MagicMock())
+		engine.warm_up_model.assert_not_called()
+
+	def test_reports_residency(self, presenter):
+		"""The model is loaded, then its residency is reported."""
+		on_status = MagicMock()
+		engine = self._make_engine({ProviderCapability.MODEL_KEEP_ALIVE})
+		presenter._warm_up_in_background(engine, "llama3", 0, on_status)
+		engine.warm_up_model.assert_called_once_with("llama3")
+		on_status.assert_called_once_with("llama3", True)
+
+	def test_failures_report_unknown_status(self, presenter):
+		"""A host that cannot be reached reports an unknown residency."""
+		on_status = MagicMock()
+		engine = self._make_engine({ProviderCapability.MODEL_KEEP_ALIVE})
+		engine.warm_up_model.side_effect = ConnectionError("refused")
+		engine.is_model_loaded.side_effect = ConnectionError("refused")
+		presenter._warm_up_in_background(engine, "llama3", 0, on_status)
+		on_status.assert_called_once_with("llama3", None)
+
+	def test_stale_status_discarded(self, presenter):
+		"""The status of a warm-up superseded by another one is ignored."""
+		on_status = MagicMock()
+		engine = self._make_engine({ProviderCapability.MODEL_KEEP_ALIVE})
+		presenter.cancel_model_warm_up()
+		presenter._warm_up_in_background(engine, "llama3", 0, on_status)
+		on_status.assert_not_called()
+
+
 class TestResolveAccountAndModel:
 	"""Tests for BaseConversationPresenter.resolve_account_and_model()."""
 
@@ -329,8 +391,8 @@ class TestLoadModelsInBackground:
 		)
 		on_loaded.assert_not_called()
 
-	def test_invalidates_cache_on_error_with_no_models(self, presenter):
-		"""Calls invalidate_models_cache() when there is an error but no models."""
+	def test_keeps_failure_backoff_on_error_with_no_models(self, presenter):
+		"""A failed load does not reset the engine's retry backoff."""
 		on_loaded = MagicMock()
 		engine = self._make_engine(models=[], error="Network error")
 		cancel_event = MagicMock()
@@ -338,7 +400,42 @@ class TestLoadModelsInBackground:
 		presenter._load_models_in_background(
 			"acct-1", engine, 0, cancel_event, on_loaded
 		)
-		engine.invalidate_models_cache.assert_called_once()
+		engine.invalidate_models_cache.assert_not_called()
+		on_loaded.assert_called_once_with("acct-1", [], "Network error")
+
+	def test_reports_models_refreshed_in_background(self, presenter):
+		"""The refreshed list replaces the stale one shown at first."""
+		on_loaded = MagicMock()
+		stale = [_make_provider_model("gpt-4")]
+		fresh = [_make_provider_model("gpt-4"), _make_provider_model("gpt-5")]
+		engine = self._make_engine(models=stale)
+		waits = iter([False, True])
+
+		def _wait(timeout):
+			done = next(waits)
+			if done:
+				engine.models = fresh
+			return done
+
+		engine.wait_models_refresh.side_effect = _wait
+		cancel_event = MagicMock()
+		cancel_event.is_set.return_value = False
+		presenter._load_models_in_background(
+			"acct-1", engine, 0, cancel_event, on_loaded
+		)
+		assert [c.args[1] for c in on_loaded.call_args_list] == [stale, fresh]
+
+	def test_skips_refreshed_models_when_cancelled(self, presenter):
+		"""A cancelled worker stops waiting for the background refresh."""
+		on_loaded = MagicMock()
+		engine = self._make_engine(models=[_make_provider_model("gpt-4")])
+		engine.wait_models_refresh.return_value = False
+		cancel_event = MagicMock()
+		cancel_event.is_set.side_effect = [False, True]
+		presenter._load_models_in_background(
+			"acct-1", engine, 0, cancel_event, on_loaded
+		)
+		on_loaded.assert_called_once()
 
 	def test_exception_yields_empty_models_and_error(self, presenter):
 		"""On exception, calls on_loaded with empty models and an error message."""
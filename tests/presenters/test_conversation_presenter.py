@@ -11,8 +11,11 @@ from basilisk.conversation import (
 	MessageRoleEnum,
 	SystemMessage,
 )
+from basilisk.conversation.history_window import HistoryWindowPolicy
 from basilisk.presenters.conversation_presenter import ConversationPresenter
 from basilisk.provider_ai_model import AIModelInfo
+from basilisk.provider_capability import ProviderCapability
+from basilisk.provider_routing import ProviderRouting, RoutingSort
 from basilisk.services.conversation_service import ConversationService
 
 
@@ -75,6 +78,73 @@ class TestOnSubmit:
 		mock_view.prompt_panel.clear.assert_called_once_with(refresh=True)
 		mock_start.assert_called_once()
 
+	@pytest.mark.parametrize(
+		("capabilities", "expected"),
+		[(set(), False), ({ProviderCapability.PROVIDER_ROUTING}, True)],
+		ids=["unsupported", "supported"],
+	)
+	def test_provider_routing_passed_to_routing_providers(
+		self, presenter, mock_view, mocker, capabilities, expected
+	):
+		"""Routing preferences are only sent to providers supporting them."""
+		routing = ProviderRouting(sort=RoutingSort.LATENCY)
+		mock_view.provider_routing = routing
+		mock_view.current_account.provider.engine_cls.capabilities = (
+			capabilities
+		)
+		mock_view.prompt_panel.prompt_text = "Hello"
+		mock_view.prompt_panel.ensure_model_compatibility.return_value = (
+			mock_view.current_model
+		)
+		mock_start = mocker.patch.object(
+			presenter.completion_handler, "start_completion"
+		)
+		presenter.on_submit()
+
+		kwargs = mock_start.call_args.kwargs
+		assert ("provider_routing" in kwargs) is expected
+		if expected:
+			assert kwargs["provider_routing"] is routing
+
+
+class TestEstimateInputTokens:
+	"""Tests for estimate_input_tokens."""
+
+	@pytest.fixture
+	def history_presenter(self, presenter, mock_view):
+		"""Return a presenter with one answered block and a prompt."""
+		mock_view.current_engine.account.provider.id = "openai"
+		mock_view.prompt_panel.prompt_text = "What next?"
+		mock_view.history_window = None
+		presenter.conversation.add_block(
+			MessageBlock(
+				request=Message(role=MessageRoleEnum.USER, content="Hi " * 50),
+				response=Message(
+					role=MessageRoleEnum.ASSISTANT, content="Hello " * 50
+				),
+				model=AIModelInfo(provider_id="openai", model_id="gpt-4"),
+			)
+		)
+		return presenter
+
+	def test_no_model(self, presenter, mock_view):
+		"""Nothing is estimated without a selected model."""
+		mock_view.current_model = None
+		assert presenter.estimate_input_tokens() is None
+
+	def test_full_history_is_counted(self, history_presenter):
+		"""Without policy the whole history is estimated, with no budget."""
+		tokens, budget = history_presenter.estimate_input_tokens()
+		assert tokens > 100
+		assert budget is None
+
+	def test_budget_trims_history(self, history_presenter, mock_view):
+		"""With a budget, only what fits is counted."""
+		mock_view.history_window = HistoryWindowPolicy(max_input_tokens=50)
+		tokens, budget = history_presenter.estimate_input_tokens()
+		assert tokens < 50
+		assert budget == 50
+
 
 class TestOnCompletionError:
 	"""Tests for _on_completion_error."""
@@ -195,6 +265,16 @@ class TestCleanup:
 		mocker.patch.object(presenter, "flush_draft")
 		presenter.cleanup()  # must not raise
 
+	def test_releases_context_caches(self, presenter, mocker):
+		"""cleanup() deletes the provider context caches of the conversation."""
+		mocker.patch("basilisk.presenters.conversation_presenter.stop_sound")
+		mocker.patch.object(presenter, "flush_draft")
+		release = mocker.patch.object(
+			presenter.service, "release_context_caches"
+		)
+		presenter.cleanup()
+		release.assert_called_once_with(presenter.conversation)
+
 
 class TestIsDestroyingGuard:
 	"""Tests that callbacks respect the _is_destroying flag."""
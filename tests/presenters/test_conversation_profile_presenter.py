@@ -9,6 +9,7 @@ from basilisk.presenters.conversation_profile_presenter import (
 	ConversationProfilePresenter,
 	EditConversationProfilePresenter,
 )
+from basilisk.provider_routing import ProviderRouting, RoutingSort
 
 
 class TestEditConversationProfilePresenter:
@@ -30,6 +31,13 @@ class TestEditConversationProfilePresenter:
 		view.temperature_spinner.GetValue.return_value = 0.7
 		view.top_p_spinner.GetValue.return_value = 0.9
 		view.stream_mode.GetValue.return_value = True
+		view.trim_history_checkbox.GetValue.return_value = False
+		view.max_history_tokens_spin.GetValue.return_value = 0
+		view.summarize_history_checkbox.GetValue.return_value = True
+		view.routing_sort_combo.GetSelection.return_value = 0
+		view.routing_only_txt.GetValue.return_value = ""
+		view.routing_ignore_txt.GetValue.return_value = ""
+		view.routing_allow_fallbacks_checkbox.GetValue.return_value = True
 		return view
 
 	def test_validate_returns_none_on_empty_name(self, mock_view):
@@ -48,6 +56,47 @@ class TestEditConversationProfilePresenter:
 		assert result.name == "Test Profile"
 		assert result.system_prompt == "Be helpful"
 		assert result.stream_mode is True
+		assert result.summarize_history is True
+
+	@pytest.mark.parametrize(
+		("trim", "spin_value", "expected_budget"),
+		[(True, 0, None), (True, 32000, 32000), (False, 32000, None)],
+	)
+	def test_validate_history_trimming(
+		self, mock_view, trim, spin_value, expected_budget
+	):
+		"""A zero budget means automatic, and no budget without trimming."""
+		mock_view.include_account_checkbox.GetValue.return_value = False
+		mock_view.trim_history_checkbox.GetValue.return_value = trim
+		mock_view.max_history_tokens_spin.GetValue.return_value = spin_value
+		presenter = EditConversationProfilePresenter(view=mock_view)
+		result = presenter.validate_and_build_profile()
+		assert result.trim_history is trim
+		assert result.max_history_tokens == expected_budget
+
+	def test_validate_provider_routing(self, mock_view):
+		"""Routing preferences are read from the routing controls."""
+		mock_view.include_account_checkbox.GetValue.return_value = False
+		mock_view.routing_sort_combo.GetSelection.return_value = 2
+		mock_view.routing_only_txt.GetValue.return_value = "Groq, , Cerebras"
+		mock_view.routing_ignore_txt.GetValue.return_value = " DeepInfra "
+		mock_view.routing_allow_fallbacks_checkbox.GetValue.return_value = False
+		presenter = EditConversationProfilePresenter(view=mock_view)
+		routing = presenter.validate_and_build_profile().provider_routing
+		assert routing == ProviderRouting(
+			sort=RoutingSort.THROUGHPUT,
+			only=("Groq", "Cerebras"),
+			ignore=("DeepInfra",),
+			allow_fallbacks=False,
+		)
+
+	def test_validate_default_provider_routing(self, mock_view):
+		"""Untouched routing controls leave the routing to the provider."""
+		mock_view.include_account_checkbox.GetValue.return_value = False
+		presenter = EditConversationProfilePresenter(view=mock_view)
+		result = presenter.validate_and_build_profile()
+		assert result.routing_sort is None
+		assert result.provider_routing.is_default
 
 	def test_validate_updates_existing_profile(self, mock_view):
 		"""Editing an existing profile should update it in place."""
@@ -214,6 +214,7 @@ class TestStartRegenerate:
 		kwargs = mock_start.call_args.kwargs
 		assert kwargs["stop_block_index"] == 0
 		assert kwargs["engine"] is mock_view.current_engine
+		assert kwargs["history_window"] is mock_view.history_window
 
 	def test_system_message_absent_when_no_prompt(
 		self, presenter, mock_view, mocker
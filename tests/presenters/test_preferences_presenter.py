@@ -27,12 +27,19 @@ def mock_view():
 	view.auto_save_to_db.GetValue.return_value = True
 	view.auto_save_draft.GetValue.return_value = False
 	view.reopen_last_conversation.GetValue.return_value = False
+	view.completion_cache_enabled.GetValue.return_value = True
+	view.upload_large_attachments.GetValue.return_value = True
+	view.store_responses_server_side.GetValue.return_value = True
 	view.image_resize.GetValue.return_value = True
 	view.image_max_height.GetValue.return_value = 800
 	view.image_max_width.GetValue.return_value = 1200
 	view.image_quality.GetValue.return_value = 85
 	view.use_system_cert_store.GetValue.return_value = False
+	view.use_async_engine.GetValue.return_value = True
 	view.model_metadata_cache_ttl.GetValue.return_value = 7200
+	view.max_concurrent_requests.GetValue.return_value = 2
+	view.retry_max_attempts.GetValue.return_value = 5
+	view.retry_hedge.GetValue.return_value = True
 	view.server_enable.GetValue.return_value = False
 	view.server_port.GetValue.return_value = "8080"
 	return view
@@ -5,11 +5,21 @@ from unittest.mock import MagicMock
 
 import pytest
 
-from basilisk.provider_ai_model import ProviderAIModel
+from basilisk.conversation import (
+	AttachmentFileTypes,
+	Conversation,
+	Message,
+	MessageBlock,
+	MessageRoleEnum,
+	SystemMessage,
+	TokenUsage,
+)
+from basilisk.provider_ai_model import AIModelInfo, ProviderAIModel
 from basilisk.provider_engine.anthropic_engine import (
 	_REASONING_ID_SUFFIX,
 	AnthropicEngine,
 )
+from basilisk.provider_engine.file_handle_cache import FileHandle
 
 
 @pytest.fixture
@@ -138,3 +148,169 @@ def test_completion_raises_for_unknown_model_id(
 		anthropic_engine.completion(
 			new_block, SimpleNamespace(messages=[]), system_message=None
 		)
+
+
+def _count_breakpoints(params: dict) -> int:
+	contents = [
+		content
+		for message in params["messages"]
+		for content in message["content"]
+	]
+	if isinstance(params.get("system"), list):
+		contents.extend(params["system"])
+	return sum(
+		1
+		for content in contents
+		if isinstance(content, dict) and "cache_control" in content
+	)
+
+
+def test_cache_breakpoints_on_system_and_last_history_message(
+	anthropic_engine: AnthropicEngine,
+):
+	"""The system prompt and the last history message are cache breakpoints."""
+	anthropic_engine.get_model = MagicMock(
+		return_value=ProviderAIModel(id="claude-sonnet-4-6")
+	)
+	conversation = Conversation()
+	for i in range(3):
+		conversation.add_block(
+			MessageBlock(
+				request=Message(role=MessageRoleEnum.USER, content=f"q{i}"),
+				response=Message(
+					role=MessageRoleEnum.ASSISTANT, content=f"a{i}"
+				),
+				model=AIModelInfo(
+					provider_id="anthropic", model_id="claude-sonnet-4-6"
+				),
+			)
+		)
+	new_block = MessageBlock(
+		request=Message(role=MessageRoleEnum.USER, content="next"),
+		model=AIModelInfo(
+			provider_id="anthropic", model_id="claude-sonnet-4-6"
+		),
+	)
+	params = anthropic_engine.build_completion_params(
+		new_block, conversation, SystemMessage(content="Be brief")
+	)
+	assert params["system"] == [
+		{
+			"type": "text",
+			"text": "Be brief",
+			"cache_control": {"type": "ephemeral"},
+		}
+	]
+	assert params["messages"][-2]["content"][-1] == {
+		"type": "text",
+		"text": "a2",
+		"cache_control": {"type": "ephemeral"},
+	}
+	assert _count_breakpoints(params) == 2
+
+	# Prepared messages reused by the next request are left untouched
+	params = anthropic_engine.build_completion_params(
+		new_block, conversation, None
+	)
+	assert _count_breakpoints(params) == 1
+
+
+def test_cache_breakpoint_on_last_large_document(
+	anthropic_engine: AnthropicEngine,
+):
+	"""Only the last document large enough to be cached gets a breakpoint."""
+	large = {
+		"type": "document",
+		"source": {"type": "base64", "data": "x" * 10_000},
+	}
+	small = {"type": "document", "source": {"type": "text", "data": "short"}}
+	request = {"role": "user", "content": [{"type": "text"}, large, small]}
+	params = {"messages": [request]}
+	anthropic_engine._add_cache_breakpoints(params)
+	contents = params["messages"][0]["content"]
+	assert contents[1]["cache_control"] == {"type": "ephemeral"}
+	assert "cache_control" not in contents[2]
+	assert "cache_control" not in large
+	assert _count_breakpoints(params) == 1
+
+
+def test_completion_response_records_prompt_cache_usage(
+	anthropic_engine: AnthropicEngine,
+):
+	"""Cache read and write token counts of responses are summed."""
+	usage = SimpleNamespace(
+		input_tokens=10,
+		cache_creation_input_tokens=0,
+		cache_read_input_tokens=30,
+	)
+	response = SimpleNamespace(thinking=None, content=[], usage=usage)
+	for _ in range(2):
+		anthropic_engine.completion_response_without_stream(
+			response, SimpleNamespace(response=None)
+		)
+	stats = anthropic_engine.prompt_cache_stats
+	assert stats.responses == 2
+	assert stats.cache_read_input_tokens == 60
+	assert stats.hit_ratio == 0.75
+
+
+def test_completion_response_sets_block_usage(
+	anthropic_engine: AnthropicEngine,
+):
+	"""Cached input tokens are counted in the input tokens of the block."""
+	usage = SimpleNamespace(
+		input_tokens=10,
+		cache_creation_input_tokens=20,
+		cache_read_input_tokens=30,
+		output_tokens=5,
+	)
+	response = SimpleNamespace(thinking=None, content=[], usage=usage)
+	block = anthropic_engine.completion_response_without_stream(
+		response, SimpleNamespace(response=None)
+	)
+	assert block.usage == TokenUsage(
+		input_tokens=60, output_tokens=5, cached_input_tokens=30
+	)
+
+
+def test_uploaded_attachment_referenced_by_file_id(
+	anthropic_engine: AnthropicEngine,
+):
+	"""An uploaded attachment is sent as a file source with the beta header."""
+	anthropic_engine.get_file_handle = MagicMock(
+		return_value=FileHandle(file_id="file_1")
+	)
+	attachment = MagicMock(
+		type=AttachmentFileTypes.LOCAL, mime_type="application/pdf"
+	)
+	source = anthropic_engine.get_attachment_source(attachment)
+	assert source == {"type": "file", "file_id": "file_1"}
+
+	anthropic_engine.get_model = MagicMock(
+		return_value=ProviderAIModel(id="claude-sonnet-4-6")
+	)
+	anthropic_engine.get_messages = MagicMock(
+		return_value=[
+			{
+				"role": "user",
+				"content": [
+					{"type": "text", "text": "Summarize"},
+					{"type": "document", "source": source},
+				],
+			}
+		]
+	)
+	new_block = MessageBlock(
+		request=Message(role=MessageRoleEnum.USER, content="Summarize"),
+		model=AIModelInfo(
+			provider_id="anthropic", model_id="claude-sonnet-4-6"
+		),
+	)
+	params = anthropic_engine.build_completion_params(
+		new_block, Conversation(), None
+	)
+	assert params["extra_headers"] == {"anthropic-beta": "files-api-2025-04-14"}
+	# Uploaded documents are always large enough to be cached
+	assert params["messages"][0]["content"][1]["cache_control"] == {
+		"type": "ephemeral"
+	}
@@ -0,0 +1,175 @@
+"""Tests for the async completion path of provider engines."""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from basilisk.conversation import TokenUsage
+from basilisk.provider_engine.anthropic_engine import AnthropicEngine
+from basilisk.provider_engine.cancellation import (
+	CancellationToken,
+	cancellation_scope,
+	current_cancellation_token,
+)
+from basilisk.provider_engine.legacy_openai_engine import LegacyOpenAIEngine
+
+
+async def _aiter(items):
+	for item in items:
+		yield item
+
+
+async def _collect(async_iterator):
+	return [chunk async for chunk in async_iterator]
+
+
+def _account():
+	account = MagicMock()
+	account.api_key.get_secret_value.return_value = "sk-test"
+	account.custom_base_url = None
+	return account
+
+
+def _openai_chunk(content):
+	delta = SimpleNamespace(content=content)
+	return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+@pytest.fixture
+def openai_engine() -> LegacyOpenAIEngine:
+	"""Return an OpenAI-compatible engine with mocked clients."""
+	engine = LegacyOpenAIEngine(_account())
+	engine.__dict__["async_client"] = MagicMock()
+	engine.get_model = MagicMock(return_value=None)
+	return engine
+
+
+def test_generic_stream_adapter_uses_sync_parser(openai_engine):
+	"""Each async event is parsed by the engine's sync stream parser."""
+	events = [
+		_openai_chunk("Hello"),
+		SimpleNamespace(choices=[]),
+		_openai_chunk(None),
+		_openai_chunk(", world"),
+	]
+	chunks = asyncio.run(
+		_collect(openai_engine.acompletion_response_with_stream(_aiter(events)))
+	)
+	assert chunks == ["Hello", ", world"]
+
+
+def test_stream_yields_usage_of_last_chunk(openai_engine):
+	"""The usage sent in the last chunk without choices is yielded."""
+	usage = SimpleNamespace(
+		prompt_tokens=120,
+		completion_tokens=40,
+		prompt_tokens_details=SimpleNamespace(cached_tokens=100),
+		completion_tokens_details=SimpleNamespace(reasoning_tokens=10),
+	)
+	events = [_openai_chunk("Hello"), SimpleNamespace(choices=[], usage=usage)]
+	chunks = asyncio.run(
+		_collect(openai_engine.acompletion_response_with_stream(_aiter(events)))
+	)
+	assert chunks == [
+		"Hello",
+		(
+			"usage",
+			TokenUsage(
+				input_tokens=120,
+				output_tokens=40,
+				cached_input_tokens=100,
+				reasoning_tokens=10,
+			),
+		),
+	]
+
+
+@pytest.mark.parametrize("engine_cls", [AnthropicEngine, LegacyOpenAIEngine])
+def test_async_client_uses_shared_http_client(mocker, engine_cls):
+	"""Async SDK clients send their requests through the registry client."""
+	mocker.patch("basilisk.config.conf")
+	account = _account()
+	account.custom_base_url = "https://api.example.com/v1"
+	account.active_organization_key = None
+	engine = engine_cls(account)
+	assert engine.async_client._client is engine.async_http_client
+
+
+def test_acompletion_awaits_async_client(
+	openai_engine, message_block, empty_conversation
+):
+	"""The async path sends the parameters built for the sync path."""
+	create = AsyncMock(return_value="response")
+	openai_engine.async_client.chat.completions.create = create
+	response = asyncio.run(
+		openai_engine.acompletion(
+			message_block, empty_conversation, None, stream=True
+		)
+	)
+	assert response == "response"
+	params = create.await_args.kwargs
+	assert params == openai_engine.build_completion_params(
+		message_block, empty_conversation, None, stream=True
+	)
+	assert params["stream"] is True
+
+
+def test_params_built_off_the_event_loop(
+	openai_engine, message_block, empty_conversation
+):
+	"""Parameters are built in a worker thread keeping the current token."""
+	token = CancellationToken()
+	seen = {}
+	build = openai_engine.build_completion_params
+
+	def build_in_thread(*args, **kwargs):
+		seen["thread"] = threading.get_ident()
+		seen["token"] = current_cancellation_token()
+		return build(*args, **kwargs)
+
+	openai_engine.build_completion_params = build_in_thread
+	openai_engine.async_client.chat.completions.create = AsyncMock()
+
+	async def complete():
+		with cancellation_scope(token):
+			await openai_engine.acompletion(
+				message_block, empty_conversation, None
+			)
+		return threading.get_ident()
+
+	loop_thread = asyncio.run(complete())
+	assert seen["thread"] != loop_thread
+	assert seen["token"] is token
+
+
+def test_anthropic_stream_keeps_state_between_events():
+	"""The Anthropic async parser closes the thinking block it opened."""
+	engine = AnthropicEngine(_account())
+	events = [
+		SimpleNamespace(
+			type="content_block_start",
+			content_block=SimpleNamespace(type="thinking"),
+		),
+		SimpleNamespace(
+			type="content_block_delta",
+			delta=SimpleNamespace(type="thinking_delta", thinking="hmm"),
+		),
+		SimpleNamespace(type="content_block_stop"),
+		SimpleNamespace(
+			type="content_block_start",
+			content_block=SimpleNamespace(type="text"),
+		),
+		SimpleNamespace(
+			type="content_block_delta",
+			delta=SimpleNamespace(type="text_delta", text="answer"),
+		),
+		SimpleNamespace(type="message_stop"),
+	]
+	chunks = asyncio.run(
+		_collect(engine.acompletion_response_with_stream(_aiter(events)))
+	)
+	assert chunks == list(engine.completion_response_with_stream(events))
+	assert chunks == ["```think\n hmm", "\n```\n\n", "answer"]
@@ -8,10 +8,17 @@ from types import SimpleNamespace
 from unittest.mock import MagicMock
 
 import pytest
+from upath import UPath
 
+from basilisk.conversation import AttachmentFile
 from basilisk.provider_ai_model import ProviderAIModel
 from basilisk.provider_engine import engine_model_list_cache
 from basilisk.provider_engine.base_engine import BaseEngine
+from basilisk.provider_engine.file_handle_cache import (
+	UPLOAD_MIN_BYTES,
+	FileHandle,
+	get_file_handle_cache,
+)
 from basilisk.provider_engine.model_cache_registry import get_models_cache_dir
 
 
@@ -92,15 +99,21 @@ def test_models_cached_within_ttl(monkeypatch):
 	assert engine.load_calls == 1
 
 
+def _set_time(monkeypatch, now: float) -> None:
+	monkeypatch.setattr(
+		"basilisk.provider_engine.base_engine.time.time", lambda: now
+	)
+
+
 def test_models_reloaded_after_ttl_expires(monkeypatch):
-	"""Expired TTL triggers a refresh on next access."""
+	"""Expired TTL serves the stale list and refreshes it in background."""
 	engine = _engine([[_model("old")], [_model("new")]])
 	monkeypatch.setattr(engine, "_get_models_cache_ttl_seconds", lambda: 10)
-	times = iter([100.0, 111.0])
-	monkeypatch.setattr(
-		"basilisk.provider_engine.base_engine.time.time", lambda: next(times)
-	)
+	_set_time(monkeypatch, 100.0)
 	assert [m.id for m in engine.models] == ["old"]
+	_set_time(monkeypatch, 111.0)
+	assert [m.id for m in engine.models] == ["old"]
+	assert engine.wait_models_refresh(5)
 	assert [m.id for m in engine.models] == ["new"]
 	assert engine.load_calls == 2
 
@@ -109,16 +122,48 @@ def test_failed_refresh_returns_stale_cache(monkeypatch):
 	"""When refresh fails, previously cached models are returned."""
 	engine = _engine([[_model("cached")], RuntimeError("boom")])
 	monkeypatch.setattr(engine, "_get_models_cache_ttl_seconds", lambda: 10)
-	times = iter([100.0, 111.0])
-	monkeypatch.setattr(
-		"basilisk.provider_engine.base_engine.time.time", lambda: next(times)
-	)
+	_set_time(monkeypatch, 100.0)
 	assert [m.id for m in engine.models] == ["cached"]
+	_set_time(monkeypatch, 111.0)
+	assert [m.id for m in engine.models] == ["cached"]
+	assert engine.wait_models_refresh(5)
 	assert [m.id for m in engine.models] == ["cached"]
 	assert engine.get_model_loading_error() == "boom"
 	assert engine.load_calls == 2
 
 
+def test_failing_source_not_queried_before_retry_delay(monkeypatch):
+	"""Failures back off exponentially before the source is queried again."""
+	engine = _engine(
+		[RuntimeError("down"), RuntimeError("down"), [_model("back")]]
+	)
+	monkeypatch.setattr(engine, "_get_models_cache_ttl_seconds", lambda: 10)
+	_set_time(monkeypatch, 100.0)
+	assert engine.models == []
+	_set_time(monkeypatch, 129.0)
+	assert engine.models == []
+	assert engine.load_calls == 1
+	_set_time(monkeypatch, 130.0)
+	assert engine.models == []
+	assert engine.load_calls == 2
+	_set_time(monkeypatch, 189.0)
+	assert engine.models == []
+	assert engine.load_calls == 2
+	_set_time(monkeypatch, 190.0)
+	assert [m.id for m in engine.models] == ["back"]
+	assert engine.get_model_loading_error() is None
+
+
+def test_invalidate_models_cache_resets_retry_delay(monkeypatch):
+	"""An explicit reload queries a failing source at once."""
+	engine = _engine([RuntimeError("down"), [_model("back")]])
+	monkeypatch.setattr(engine, "_get_models_cache_ttl_seconds", lambda: 10)
+	_set_time(monkeypatch, 100.0)
+	assert engine.models == []
+	engine.invalidate_models_cache()
+	assert [m.id for m in engine.models] == ["back"]
+
+
 def test_failed_initial_load_returns_empty(monkeypatch):
 	"""If there is no stale cache and loading fails, return empty list."""
 	engine = _engine([RuntimeError("network down")])
@@ -168,7 +213,7 @@ def test_models_loaded_from_disk_cache_after_restart(tmp_path, monkeypatch):
 
 
 def test_expired_disk_cache_reloads_models(tmp_path, monkeypatch):
-	"""Expired disk cache should trigger a fresh load."""
+	"""Expired disk cache is served while a fresh load runs."""
 	cache_file = tmp_path / "models-cache.json"
 	seed_engine = _engine([[_model("stale")]])
 	seed_engine._models_cache_file_path = Path(cache_file)
@@ -188,6 +233,8 @@ def test_expired_disk_cache_reloads_models(tmp_path, monkeypatch):
 	monkeypatch.setattr(
 		"basilisk.provider_engine.base_engine.time.time", lambda: 200.0
 	)
+	assert [m.id for m in restarted_engine.models] == ["stale"]
+	assert restarted_engine.wait_models_refresh(5)
 	assert [m.id for m in restarted_engine.models] == ["fresh"]
 	assert restarted_engine.load_calls == 1
 
@@ -272,3 +319,89 @@ def test_prune_removes_obsolete_cache_files(tmp_path, monkeypatch):
 	assert valid_file.exists()
 	assert not old_file.exists()
 	assert not bad_file.exists()
+
+
+@pytest.mark.parametrize(
+	("available", "expected"),
+	[
+		(["current", "cheap-b", "cheap-a"], "cheap-a"),
+		(["current", "cheap-b"], "cheap-b"),
+		(["current"], "current"),
+	],
+)
+def test_get_summary_model_prefers_cheap_models(available, expected):
+	"""The first available summary model is used, else the current one."""
+	engine = _engine([[_model(model_id) for model_id in available]])
+	engine.summary_model_ids = ("cheap-a", "cheap-b")
+	assert engine.get_summary_model("current") == expected
+
+
+@pytest.fixture
+def upload_engine(mocker):
+	"""Return an engine uploading PDF attachments, with uploads enabled."""
+	get_file_handle_cache.cache_clear()
+	conf = mocker.patch("basilisk.config.conf")
+	conf.return_value.conversation.upload_large_attachments = True
+	engine = _engine([])
+	engine.file_upload_formats = frozenset({"application/pdf"})
+	engine.upload_attachment = MagicMock(
+		return_value=FileHandle(file_id="file-1")
+	)
+	yield engine
+	get_file_handle_cache.cache_clear()
+
+
+def _pdf_attachment(tmp_path, size: int) -> AttachmentFile:
+	path = UPath(tmp_path) / "doc.pdf"
+	path.write_bytes(b"%PDF" + b"x" * size)
+	return AttachmentFile(location=path)
+
+
+def test_large_attachment_uploaded_once_per_account(upload_engine, tmp_path):
+	"""Large attachments are uploaded once and then referenced by handle."""
+	attachment = _pdf_attachment(tmp_path, UPLOAD_MIN_BYTES)
+	for _ in range(2):
+		handle = upload_engine.get_file_handle(attachment)
+		assert handle.file_id == "file-1"
+	upload_engine.upload_attachment.assert_called_once_with(attachment)
+
+
+def test_small_attachment_is_inlined(upload_engine, tmp_path):
+	"""Attachments below the size threshold are not uploaded."""
+	attachment = _pdf_attachment(tmp_path, 10)
+	assert upload_engine.get_file_handle(attachment) is None
+	upload_engine.upload_attachment.assert_not_called()
+
+
+def test_upload_disabled_in_settings(upload_engine, tmp_path, mocker):
+	"""Nothing is uploaded unless the setting is enabled."""
+	conf = mocker.patch("basilisk.config.conf")
+	conf.return_value.conversation.upload_large_attachments = False
+	attachment = _pdf_attachment(tmp_path, UPLOAD_MIN_BYTES)
+	assert upload_engine.get_file_handle(attachment) is None
+	upload_engine.upload_attachment.assert_not_called()
+
+
+def test_failed_upload_falls_back_to_inline(upload_engine, tmp_path):
+	"""An upload error is logged and the attachment is sent inline."""
+	upload_engine.upload_attachment.side_effect = RuntimeError("boom")
+	attachment = _pdf_attachment(tmp_path, UPLOAD_MIN_BYTES)
+	assert upload_engine.get_file_handle(attachment) is None
+
+
+def test_expired_uploads_are_deleted(upload_engine, tmp_path):
+	"""Expired uploads kept by the provider are deleted on the next upload."""
+	expired = FileHandle(file_id="old", expires_at=0.0, delete_on_expiry=True)
+	get_file_handle_cache().put(("acct-1", "old-hash"), expired)
+	upload_engine.delete_uploaded_file = MagicMock()
+	attachment = _pdf_attachment(tmp_path, UPLOAD_MIN_BYTES)
+	assert upload_engine.get_file_handle(attachment).file_id == "file-1"
+	upload_engine.delete_uploaded_file.assert_called_once_with(expired)
+
+
+def test_base_client_is_not_cached():
+	"""Reading the base client never caches a None client."""
+	engine = _engine([])
+	assert super(DummyEngine, engine).client is None
+	assert "client" not in engine.__dict__
+	assert engine.client is not None
@@ -0,0 +1,187 @@
+"""Tests for cancelling in-flight provider requests."""
+
+import json
+import select
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from openai import DefaultHttpxClient, OpenAI
+
+from basilisk.provider_engine.base_engine import BaseEngine
+from basilisk.provider_engine.cancellation import (
+	CancellationToken,
+	cancellable_event_hooks,
+	cancellation_scope,
+	current_cancellation_token,
+)
+
+CHUNK_INTERVAL = 0.2
+CLOSE_TIMEOUT = 2.0
+
+
+class SlowSSEHandler(BaseHTTPRequestHandler):
+	"""Stream chat completion chunks until the client closes the socket."""
+
+	protocol_version = "HTTP/1.1"
+
+	def log_message(self, format, *args):
+		"""Keep the test output quiet."""
+
+	def do_POST(self):
+		"""Send one chunk per interval and record the client disconnection."""
+		self.rfile.read(int(self.headers.get("Content-Length", 0)))
+		self.send_response(200)
+		self.send_header("Content-Type", "text/event-stream")
+		self.send_header("Transfer-Encoding", "chunked")
+		self.end_headers()
+		chunk = {
+			"id": "chatcmpl-1",
+			"object": "chat.completion.chunk",
+			"created": 0,
+			"model": "slow-model",
+			"choices": [
+				{
+					"index": 0,
+					"delta": {"content": "tick"},
+					"finish_reason": None,
+				}
+			],
+		}
+		payload = f"data: {json.dumps(chunk)}\n\n".encode()
+		deadline = time.monotonic() + 30
+		try:
+			while time.monotonic() < deadline:
+				self.wfile.write(b"%x\r\n%s\r\n" % (len(payload), payload))
+				self.wfile.flush()
+				readable, _, _ = select.select(
+					[self.connection], [], [], CHUNK_INTERVAL
+				)
+				if readable and not self.connection.recv(1):
+					break
+		except OSError:
+			pass
+		self.server.closed_at = time.monotonic()
+		self.server.client_closed.set()
+		self.close_connection = True
+
+
+@pytest.fixture
+def slow_server():
+	"""Start a local server streaming SSE chunks slowly."""
+	server = ThreadingHTTPServer(("127.0.0.1", 0), SlowSSEHandler)
+	server.daemon_threads = True
+	server.client_closed = threading.Event()
+	server.closed_at = None
+	thread = threading.Thread(target=server.serve_forever, daemon=True)
+	thread.start()
+	yield server
+	server.shutdown()
+	server.server_close()
+
+
+def _client(server, event_hooks=None) -> OpenAI:
+	host, port = server.server_address
+	return OpenAI(
+		api_key="test",
+		base_url=f"http://{host}:{port}/v1",
+		max_retries=0,
+		http_client=DefaultHttpxClient(event_hooks=event_hooks or {}),
+	)
+
+
+def _consume_in_thread(
+	open_stream, token: CancellationToken, first_chunk: threading.Event
+) -> threading.Thread:
+	def worker():
+		with cancellation_scope(token):
+			try:
+				for _ in open_stream():
+					first_chunk.set()
+			except Exception:
+				pass
+
+	thread = threading.Thread(target=worker, daemon=True)
+	thread.start()
+	return thread
+
+
+def _create_stream(client: OpenAI):
+	return client.chat.completions.create(
+		model="slow-model",
+		messages=[{"role": "user", "content": "hello"}],
+		stream=True,
+	)
+
+
+class TestCancellationToken:
+	"""Tests for CancellationToken callbacks."""
+
+	def test_callbacks_run_once(self):
+		"""Callbacks run on the first cancel only."""
+		token = CancellationToken()
+		calls = []
+		token.add_callback(lambda: calls.append("close"))
+		token.cancel()
+		token.cancel()
+		assert token.cancelled
+		assert calls == ["close"]
+
+	def test_callback_added_after_cancel_runs_immediately(self):
+		"""A resource opened after cancellation is closed right away."""
+		token = CancellationToken()
+		token.cancel()
+		calls = []
+		token.add_callback(lambda: calls.append("close"))
+		assert calls == ["close"]
+
+	def test_callback_errors_are_ignored(self):
+		"""A failing callback does not prevent the next ones."""
+		token = CancellationToken()
+		calls = []
+
+		def failing():
+			raise ValueError("generator already executing")
+
+		token.add_callback(failing)
+		token.add_callback(lambda: calls.append("close"))
+		token.cancel()
+		assert calls == ["close"]
+
+	def test_scope_sets_current_token(self):
+		"""The scoped token is current only inside the scope."""
+		token = CancellationToken()
+		with cancellation_scope(token):
+			assert current_cancellation_token() is token
+		assert current_cancellation_token() is None
+
+
+@pytest.mark.parametrize("use_event_hooks", [True, False])
+def test_cancel_closes_socket_within_bounded_time(slow_server, use_event_hooks):
+	"""Cancelling closes the stream socket without waiting for a chunk.
+
+	The response is tracked either by the client event hooks, as with the
+	Gemini and Ollama SDKs, or by binding the SDK stream to the token.
+	"""
+	token = CancellationToken()
+	first_chunk = threading.Event()
+	if use_event_hooks:
+		client = _client(slow_server, cancellable_event_hooks())
+
+		def open_stream():
+			return _create_stream(client)
+	else:
+		client = _client(slow_server)
+
+		def open_stream():
+			return BaseEngine._bind_cancellation(_create_stream(client), token)
+
+	thread = _consume_in_thread(open_stream, token, first_chunk)
+	assert first_chunk.wait(CLOSE_TIMEOUT)
+	cancelled_at = time.monotonic()
+	token.cancel()
+	thread.join(CLOSE_TIMEOUT)
+	assert not thread.is_alive()
+	assert slow_server.client_closed.wait(CLOSE_TIMEOUT)
+	assert slow_server.closed_at - cancelled_at < CLOSE_TIMEOUT
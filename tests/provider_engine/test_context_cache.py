@@ -0,0 +1,141 @@
+"""Tests for the registry of provider context caches."""
+
+from dataclasses import replace
+from unittest.mock import MagicMock
+
+import pytest
+
+from basilisk.provider_engine.context_cache import (
+	CONTEXT_CACHE_TTL_SECONDS,
+	FAILURE_BACKOFF_SECONDS,
+	RENEW_MARGIN_SECONDS,
+	ContextCache,
+	ContextCacheRegistry,
+)
+
+KEY = (1, "account-1")
+
+
+class FakeClock:
+	"""Clock advanced manually by the tests."""
+
+	def __init__(self):
+		"""Start the clock at zero."""
+		self.now = 0.0
+
+	def __call__(self) -> float:
+		"""Return the current time."""
+		return self.now
+
+
+@pytest.fixture
+def clock():
+	"""Return a manual clock."""
+	return FakeClock()
+
+
+@pytest.fixture
+def registry(clock):
+	"""Return an empty registry using the manual clock."""
+	return ContextCacheRegistry(clock)
+
+
+def _creator(clock, digest="digest", name="cachedContents/1"):
+	delete = MagicMock()
+	create = MagicMock(
+		return_value=ContextCache(
+			name=name,
+			digest=digest,
+			prefix_length=2,
+			expires_at=clock.now + CONTEXT_CACHE_TTL_SECONDS,
+			delete=delete,
+		)
+	)
+	return create, delete
+
+
+def _renew(clock):
+	return MagicMock(
+		side_effect=lambda cache: replace(
+			cache, expires_at=clock.now + CONTEXT_CACHE_TTL_SECONDS
+		)
+	)
+
+
+def test_cache_created_once_per_prefix(registry, clock):
+	"""The next requests with the same prefix reuse the cache."""
+	create, _ = _creator(clock)
+	renew = _renew(clock)
+	for _ in range(3):
+		cache = registry.get_or_create(KEY, "digest", create, renew)
+		assert cache.name == "cachedContents/1"
+	create.assert_called_once()
+	renew.assert_not_called()
+	assert (registry.creations, registry.hits) == (1, 2)
+
+
+def test_cache_renewed_before_expiry(registry, clock):
+	"""A cache close to its expiry is extended before it is referenced."""
+	create, _ = _creator(clock)
+	renew = _renew(clock)
+	registry.get_or_create(KEY, "digest", create, renew)
+	clock.now = CONTEXT_CACHE_TTL_SECONDS - RENEW_MARGIN_SECONDS
+	cache = registry.get_or_create(KEY, "digest", create, renew)
+	renew.assert_called_once()
+	assert cache.expires_at == clock.now + CONTEXT_CACHE_TTL_SECONDS
+	create.assert_called_once()
+
+
+def test_failed_renewal_is_not_referenced(registry, clock):
+	"""A cache that can no longer be extended is forgotten."""
+	create, _ = _creator(clock)
+	registry.get_or_create(KEY, "digest", create, _renew(clock))
+	clock.now = CONTEXT_CACHE_TTL_SECONDS
+	renew = MagicMock(side_effect=RuntimeError("not found"))
+	assert registry.get_or_create(KEY, "digest", create, renew) is None
+	assert len(registry) == 0
+
+
+def test_changed_prefix_replaces_cache(registry, clock):
+	"""The cache of a previous prefix is deleted when the prefix changes."""
+	create, delete = _creator(clock)
+	registry.get_or_create(KEY, "digest", create, _renew(clock))
+	create_new, _ = _creator(clock, "other", "cachedContents/2")
+	cache = registry.get_or_create(KEY, "other", create_new, _renew(clock))
+	assert cache.name == "cachedContents/2"
+	delete.assert_called_once()
+	assert len(registry) == 1
+
+
+def test_failed_creation_backs_off(registry, clock):
+	"""A prefix whose cache creation failed is sent uncached for a while."""
+	create = MagicMock(side_effect=RuntimeError("model not supported"))
+	renew = _renew(clock)
+	assert registry.get_or_create(KEY, "digest", create, renew) is None
+	assert registry.get_or_create(KEY, "digest", create, renew) is None
+	create.assert_called_once()
+	clock.now = FAILURE_BACKOFF_SECONDS
+	assert registry.get_or_create(KEY, "digest", create, renew) is None
+	assert create.call_count == 2
+	assert registry.failures == 2
+
+
+def test_release_deletes_conversation_caches(registry, clock):
+	"""Closing a conversation deletes its caches of every account."""
+	deletes = []
+	for key in [(1, "account-1"), (1, "account-2"), (2, "account-1")]:
+		create, delete = _creator(clock)
+		deletes.append(delete)
+		registry.get_or_create(key, "digest", create, _renew(clock))
+	assert registry.release(1) == 2
+	assert [delete.call_count for delete in deletes] == [1, 1, 0]
+	assert len(registry) == 1
+
+
+def test_failed_deletion_is_ignored(registry, clock):
+	"""A cache already deleted by the provider is released anyway."""
+	create, delete = _creator(clock)
+	delete.side_effect = RuntimeError("not found")
+	registry.get_or_create(KEY, "digest", create, _renew(clock))
+	assert registry.release(KEY[0]) == 1
+	assert len(registry) == 0
@@ -0,0 +1,143 @@
+"""Tests for the cache of uploaded attachment handles."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from basilisk.provider_engine.cancellation import OperationCancelledError
+from basilisk.provider_engine.file_handle_cache import (
+	EXPIRY_MARGIN_SECONDS,
+	FAILURE_BACKOFF_SECONDS,
+	FileHandle,
+	FileHandleCache,
+)
+
+KEY = ("acct-1", "hash-1")
+
+
+class FakeClock:
+	"""Clock advanced manually by the tests."""
+
+	def __init__(self):
+		"""Start the clock at zero."""
+		self.now = 0.0
+
+	def __call__(self) -> float:
+		"""Return the current time."""
+		return self.now
+
+
+@pytest.fixture
+def clock():
+	"""Return a manual clock."""
+	return FakeClock()
+
+
+@pytest.fixture
+def handle_cache(clock):
+	"""Return an empty cache driven by the manual clock."""
+	return FileHandleCache(clock=clock)
+
+
+def test_upload_once_then_hit(handle_cache):
+	"""A second request for the same key reuses the uploaded handle."""
+	upload = MagicMock(return_value=FileHandle(file_id="file-1"))
+	assert handle_cache.get_or_upload(KEY, upload).file_id == "file-1"
+	assert handle_cache.get_or_upload(KEY, upload).file_id == "file-1"
+	upload.assert_called_once()
+	assert handle_cache.uploads == 1
+	assert handle_cache.hits == 1
+	assert len(handle_cache) == 1
+
+
+def test_expiring_handle_is_uploaded_again(handle_cache, clock):
+	"""A handle close to its expiry is dropped and uploaded again."""
+	expires_at = 2 * EXPIRY_MARGIN_SECONDS
+	upload = MagicMock(
+		side_effect=[
+			FileHandle(file_id="file-1", expires_at=expires_at),
+			FileHandle(file_id="file-2", expires_at=2 * expires_at),
+		]
+	)
+	handle_cache.get_or_upload(KEY, upload)
+	clock.now = EXPIRY_MARGIN_SECONDS - 1
+	assert handle_cache.get(KEY).file_id == "file-1"
+	clock.now = EXPIRY_MARGIN_SECONDS
+	assert handle_cache.get(KEY) is None
+	assert handle_cache.get_or_upload(KEY, upload).file_id == "file-2"
+
+
+def test_failed_upload_is_not_retried_during_backoff(handle_cache, clock):
+	"""An upload failure is raised once, then skipped until the backoff ends."""
+	upload = MagicMock(
+		side_effect=[RuntimeError("no files API"), FileHandle(file_id="f")]
+	)
+	with pytest.raises(RuntimeError):
+		handle_cache.get_or_upload(KEY, upload)
+	assert handle_cache.get_or_upload(KEY, upload) is None
+	assert upload.call_count == 1
+	clock.now = FAILURE_BACKOFF_SECONDS
+	assert handle_cache.get_or_upload(KEY, upload).file_id == "f"
+	assert handle_cache.failures == 1
+
+
+def test_keys_are_independent(handle_cache):
+	"""Handles of other accounts or contents are not shared."""
+	handle_cache.put(KEY, FileHandle(file_id="file-1"))
+	assert handle_cache.get(("acct-2", "hash-1")) is None
+	handle_cache.invalidate(KEY)
+	assert handle_cache.get(KEY) is None
+
+
+def test_cancelled_upload_is_not_a_failure(handle_cache):
+	"""An upload abandoned by a stopped completion is tried again."""
+	upload = MagicMock(
+		side_effect=[OperationCancelledError(), FileHandle(file_id="f")]
+	)
+	with pytest.raises(OperationCancelledError):
+		handle_cache.get_or_upload(KEY, upload)
+	assert handle_cache.get_or_upload(KEY, upload).file_id == "f"
+	assert handle_cache.failures == 0
+
+
+def test_handles_saved_across_restarts(tmp_path, clock):
+	"""Handles saved to disk are reused by a new cache."""
+	path = tmp_path / "file_handles.json"
+	FileHandleCache(clock=clock, path=path).put(
+		KEY, FileHandle(file_id="file-1", mime_type="application/pdf")
+	)
+	restarted = FileHandleCache(clock=clock, path=path)
+	assert restarted.get(KEY) == FileHandle(
+		file_id="file-1", mime_type="application/pdf"
+	)
+
+
+def test_invalid_saved_file_is_dropped(tmp_path):
+	"""A corrupted file is discarded."""
+	path = tmp_path / "file_handles.json"
+	path.write_text("{not json", encoding="utf-8")
+	assert len(FileHandleCache(path=path)) == 0
+	assert not path.exists()
+
+
+def test_expired_kept_files_are_queued_for_deletion(tmp_path, clock):
+	"""Files the provider keeps are returned once to their account."""
+	path = tmp_path / "file_handles.json"
+	cache = FileHandleCache(clock=clock, path=path)
+	expires_at = EXPIRY_MARGIN_SECONDS + 10.0
+	kept = FileHandle(
+		file_id="kept", expires_at=expires_at, delete_on_expiry=True
+	)
+	cache.put(KEY, kept)
+	gone = FileHandle(file_id="gone", expires_at=expires_at)
+	cache.put(("acct-1", "hash-2"), gone)
+	assert cache.take_pending_deletions("acct-1") == []
+	assert len(cache) == 2
+	clock.now = kept.usable_until + 1
+	assert cache.take_pending_deletions("acct-2") == []
+	restarted = FileHandleCache(clock=clock, path=path)
+	assert restarted.take_pending_deletions("acct-1") == [kept]
+	assert restarted.take_pending_deletions("acct-1") == []
+	assert len(restarted) == 0
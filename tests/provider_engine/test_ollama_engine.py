@@ -0,0 +1,58 @@
+"""Tests for the model keep-alive of the Ollama engine."""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from basilisk.provider_engine.ollama_engine import OllamaEngine
+
+
+def _engine(keep_alive=None) -> OllamaEngine:
+	account = MagicMock()
+	account.custom_base_url = "http://localhost:11434"
+	account.keep_alive = keep_alive
+	engine = OllamaEngine(account)
+	engine.__dict__["client"] = MagicMock()
+	engine.get_messages = MagicMock(return_value=[])
+	return engine
+
+
+@pytest.mark.parametrize(
+	("keep_alive", "expected"),
+	[(None, None), ("", None), ("300", 300), ("-1", -1), ("10m", "10m")],
+)
+def test_keep_alive_sent_as_seconds_or_duration(keep_alive, expected):
+	"""Bare numbers are sent as seconds, other values as durations."""
+	assert _engine(keep_alive).keep_alive == expected
+
+
+def test_completion_params_carry_keep_alive(message_block, empty_conversation):
+	"""Every completion request keeps the model loaded as configured."""
+	params = _engine("1h").build_completion_params(
+		message_block, empty_conversation, None
+	)
+	assert params["keep_alive"] == "1h"
+	params = _engine().build_completion_params(
+		message_block, empty_conversation, None
+	)
+	assert "keep_alive" not in params
+
+
+def test_warm_up_sends_empty_generate():
+	"""Warming up a model loads it without generating anything."""
+	engine = _engine("-1")
+	engine.warm_up_model("llama3:latest")
+	engine.client.generate.assert_called_once_with(
+		model="llama3:latest", prompt="", keep_alive=-1
+	)
+
+
+def test_model_loaded_when_listed_by_ps():
+	"""A model is resident when the host lists it as running."""
+	engine = _engine()
+	engine.client.ps.return_value = SimpleNamespace(
+		models=[SimpleNamespace(model="llama3:latest", name="llama3:latest")]
+	)
+	assert engine.is_model_loaded("llama3:latest")
+	assert not engine.is_model_loaded("qwen:latest")
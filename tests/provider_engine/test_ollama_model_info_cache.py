@@ -0,0 +1,86 @@
+"""Tests for the digest-keyed cache of Ollama model details."""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from basilisk.provider_engine.ollama_engine import OllamaEngine
+from basilisk.provider_engine.ollama_model_info_cache import (
+	MAX_UNSEEN_SECONDS,
+	SEEN_REFRESH_SECONDS,
+	OllamaModelInfo,
+	read_model_info_cache,
+	update_model_info_cache,
+)
+
+INFO = OllamaModelInfo(modelinfo={"llama.context_length": 8192}, license="MIT")
+
+
+@pytest.fixture(autouse=True)
+def cache_root(monkeypatch, tmp_path):
+	"""Store the cache in a temporary directory."""
+	monkeypatch.setattr(
+		"basilisk.provider_engine.model_cache_registry.global_vars.user_data_path",
+		tmp_path,
+	)
+	return tmp_path / "cache"
+
+
+def test_store_and_read(cache_root):
+	"""Fetched details are read back by digest."""
+	update_model_info_cache({"abc": INFO}, ["abc"], now=0)
+	assert read_model_info_cache() == {"abc": INFO}
+	assert INFO.context_length == 8192
+
+
+def test_unseen_models_dropped():
+	"""Details of models no longer listed are eventually removed."""
+	update_model_info_cache({"old": INFO, "kept": INFO}, [], now=0)
+	update_model_info_cache({}, ["kept"], now=SEEN_REFRESH_SECONDS)
+	update_model_info_cache({}, [], now=MAX_UNSEEN_SECONDS)
+	assert list(read_model_info_cache()) == ["kept"]
+
+
+def test_invalid_file_ignored(cache_root):
+	"""A corrupted cache file is discarded."""
+	cache_root.mkdir(parents=True, exist_ok=True)
+	cache_file = cache_root / "ollama_model_info.json"
+	cache_file.write_text("{not json", encoding="utf-8")
+	assert read_model_info_cache() == {}
+	assert not cache_file.exists()
+
+
+def _engine(models):
+	account = MagicMock()
+	account.custom_base_url = "http://localhost:11434"
+	engine = OllamaEngine(account)
+	client = MagicMock()
+	client.list.return_value = SimpleNamespace(
+		models=[
+			SimpleNamespace(model=name, digest=digest)
+			for name, digest in models
+		]
+	)
+	client.show.side_effect = lambda name: SimpleNamespace(
+		modelinfo={"llama.context_length": len(name)}, license=None
+	)
+	engine.__dict__["client"] = client
+	return engine
+
+
+def test_only_new_or_changed_models_fetched():
+	"""Models whose digest is cached cost no round-trip."""
+	engine = _engine([("llama3", "d1"), ("qwen", "d2")])
+	models = engine._load_models()
+	assert [(m.id, m.context_window) for m in models] == [
+		("llama3", 6),
+		("qwen", 4),
+	]
+	assert engine.client.show.call_count == 2
+
+	engine = _engine([("llama3", "d1"), ("qwen", "d3"), ("mistral", None)])
+	models = engine._load_models()
+	assert [m.id for m in models] == ["llama3", "qwen", "mistral"]
+	fetched = sorted(call.args[0] for call in engine.client.show.call_args_list)
+	assert fetched == ["mistral", "qwen"]
@@ -0,0 +1,161 @@
+"""Tests for the server-side conversation state of the OpenAI engine."""
+
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+from openai import BadRequestError, NotFoundError
+
+from basilisk.conversation import (
+	Conversation,
+	Message,
+	MessageBlock,
+	MessageRoleEnum,
+	SystemMessage,
+)
+from basilisk.provider_ai_model import AIModelInfo
+from basilisk.provider_engine.openai_engine import OpenAIEngine
+
+MODEL = AIModelInfo(provider_id="openai", model_id="gpt-test")
+
+
+@pytest.fixture
+def store_responses(mocker):
+	"""Enable the server-side storage of the responses."""
+	conf = mocker.patch("basilisk.config.conf")
+	conf.return_value.conversation.store_responses_server_side = True
+	return conf.return_value.conversation
+
+
+@pytest.fixture
+def engine(mocker, store_responses) -> OpenAIEngine:
+	"""OpenAIEngine without model catalog nor network."""
+	mocker.patch.object(OpenAIEngine, "get_model", return_value=None)
+	account = MagicMock()
+	account.id = "account-1"
+	engine = OpenAIEngine(account)
+	engine.client = MagicMock()
+	return engine
+
+
+def _block(content: str, model: AIModelInfo = MODEL) -> MessageBlock:
+	return MessageBlock(
+		request=Message(role=MessageRoleEnum.USER, content=content), model=model
+	)
+
+
+def _answer(engine, conversation, block, system=None, response_id="resp"):
+	"""Complete a block as the provider would, and add it to the history."""
+	params = engine.build_completion_params(block, conversation, system)
+	content = f"answer {block.request.content}"
+	block.response = Message(role=MessageRoleEnum.ASSISTANT, content=content)
+	block.response_id = response_id
+	conversation.add_block(block)
+	return params
+
+
+@pytest.fixture
+def conversation(engine) -> Conversation:
+	"""Conversation whose only block was answered by a stored response."""
+	conversation = Conversation()
+	_answer(engine, conversation, _block("first"), response_id="resp_1")
+	return conversation
+
+
+def test_next_turn_continues_stored_response(engine, conversation):
+	"""Only the new message is sent after a stored response."""
+	params = engine.build_completion_params(
+		_block("second"), conversation, None
+	)
+	assert params["previous_response_id"] == "resp_1"
+	assert params["store"] is True
+	assert [item["content"][0]["text"] for item in params["input"]] == [
+		"second"
+	]
+
+
+def test_edited_block_breaks_chain(engine, conversation):
+	"""An edited block no longer matches its stored response."""
+	previous = conversation.messages[0]
+	previous.request.content = "edited"
+	previous.mark_edited()
+	assert previous.response_id is None
+	params = engine.build_completion_params(
+		_block("second"), conversation, None
+	)
+	assert "previous_response_id" not in params
+	assert len(params["input"]) == 3
+
+
+def test_changed_history_breaks_chain(engine, conversation):
+	"""A change before the previous block is detected by its digest."""
+	_answer(engine, conversation, _block("second"), response_id="resp_2")
+	conversation.remove_block(conversation.messages[0])
+	params = engine.build_completion_params(_block("third"), conversation, None)
+	assert "previous_response_id" not in params
+
+
+@pytest.mark.parametrize(
+	("model", "system"),
+	[
+		(AIModelInfo(provider_id="openai", model_id="gpt-other"), None),
+		(MODEL, SystemMessage(content="Be brief")),
+	],
+	ids=["model", "system-message"],
+)
+def test_switch_breaks_chain(engine, conversation, model, system):
+	"""Another model or system message sends the full history."""
+	params = engine.build_completion_params(
+		_block("second", model), conversation, system
+	)
+	assert "previous_response_id" not in params
+
+
+def test_storage_disabled(engine, conversation, store_responses):
+	"""Responses are neither stored nor continued unless enabled."""
+	store_responses.store_responses_server_side = False
+	block = _block("second")
+	params = engine.build_completion_params(block, conversation, None)
+	assert params["store"] is False
+	assert "previous_response_id" not in params
+	assert block.response_chain_digest is None
+
+
+def test_expired_response_falls_back_to_full_history(engine, conversation):
+	"""A stored response deleted by the provider is replaced by the history."""
+	request = httpx.Request("POST", "https://api.openai.com/v1/responses")
+	error = NotFoundError(
+		"Previous response not found",
+		response=httpx.Response(404, request=request),
+		body=None,
+	)
+	engine.client.responses.create.side_effect = [error, "response"]
+	response = engine.completion(_block("second"), conversation, None)
+	assert response == "response"
+	first, second = engine.client.responses.create.call_args_list
+	assert first.kwargs["previous_response_id"] == "resp_1"
+	assert "previous_response_id" not in second.kwargs
+	assert len(second.kwargs["input"]) == 3
+
+
+def test_other_errors_do_not_break_chain(engine, conversation):
+	"""A request rejected for another reason is not sent again."""
+	request = httpx.Request("POST", "https://api.openai.com/v1/responses")
+	error = BadRequestError(
+		"Unsupported parameter: 'temperature'",
+		response=httpx.Response(400, request=request),
+		body={"code": "unsupported_parameter", "param": "temperature"},
+	)
+	engine.client.responses.create.side_effect = [error, "response"]
+	with pytest.raises(BadRequestError):
+		engine.completion(_block("second"), conversation, None)
+	assert engine.client.responses.create.call_count == 1
+
+
+def test_batch_request_is_not_stored(engine, conversation):
+	"""Batch requests neither store nor continue responses."""
+	request = engine.build_batch_request(
+		"1", _block("second"), conversation, None
+	)
+	assert request.params["store"] is False
+	assert "previous_response_id" not in request.params
@@ -1,14 +1,24 @@
-"""Tests for OpenRouter model loading behavior."""
+"""Tests for OpenRouter model loading and request routing."""
 
+from types import SimpleNamespace
 from unittest.mock import MagicMock
 
 import httpx
 import pytest
 
+from basilisk.completion_metrics import CompletionTimer, metrics_scope
+from basilisk.conversation import (
+	Conversation,
+	Message,
+	MessageBlock,
+	MessageRoleEnum,
+)
+from basilisk.provider_ai_model import AIModelInfo
 from basilisk.provider_engine.dynamic_model_loader import (
 	CATALOG_SOURCE_OPENROUTER_API,
 )
 from basilisk.provider_engine.openrouter_engine import OpenRouterEngine
+from basilisk.provider_routing import ProviderRouting, RoutingSort
 
 
 def _make_engine(monkeypatch, tmp_path) -> OpenRouterEngine:
@@ -90,3 +100,56 @@ def test_models_non_200_response_raises(httpx_mock, monkeypatch, tmp_path):
 		httpx.HTTPStatusError, match="status=503.*upstream unavailable"
 	):
 		engine._load_models()
+
+
+def _block() -> MessageBlock:
+	return MessageBlock(
+		request=Message(role=MessageRoleEnum.USER, content="Hello"),
+		model=AIModelInfo(provider_id="openrouter", model_id="meta/llama"),
+	)
+
+
+def test_routing_preferences_sent_as_provider(monkeypatch, tmp_path, mocker):
+	"""Profile routing preferences are sent in the provider object."""
+	engine = _make_engine(monkeypatch, tmp_path)
+	mocker.patch.object(engine, "get_model", return_value=None)
+	routing = ProviderRouting(
+		sort=RoutingSort.THROUGHPUT, ignore=("Together",), allow_fallbacks=False
+	)
+	params = engine.build_completion_params(
+		_block(), Conversation(), None, provider_routing=routing
+	)
+	assert params["extra_body"]["provider"] == {
+		"sort": "throughput",
+		"ignore": ["Together"],
+		"allow_fallbacks": False,
+	}
+	assert "provider_routing" not in params
+
+
+def test_default_routing_not_sent(monkeypatch, tmp_path, mocker):
+	"""Default preferences leave the routing to OpenRouter."""
+	engine = _make_engine(monkeypatch, tmp_path)
+	mocker.patch.object(engine, "get_model", return_value=None)
+	params = engine.build_completion_params(
+		_block(), Conversation(), None, provider_routing=ProviderRouting()
+	)
+	assert "provider" not in params["extra_body"]
+
+
+def test_stream_records_upstream_provider(monkeypatch, tmp_path):
+	"""The upstream provider named by the chunks is kept in the metrics."""
+	engine = _make_engine(monkeypatch, tmp_path)
+	chunks = [
+		SimpleNamespace(
+			provider="Groq",
+			choices=[SimpleNamespace(delta=SimpleNamespace(content=text))],
+		)
+		for text in ("Hel", "lo")
+	]
+	timer = CompletionTimer()
+	with metrics_scope(timer):
+		text = "".join(engine.completion_response_with_stream(chunks))
+	assert text == "Hello"
+	assert timer.upstream_provider == "Groq"
+	assert timer.build_metrics(_block()).upstream_provider == "Groq"
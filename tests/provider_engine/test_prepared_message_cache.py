@@ -0,0 +1,188 @@
+"""Tests for memoized provider message preparation in BaseEngine."""
+
+from functools import cached_property
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from basilisk.conversation import (
+	Conversation,
+	Message,
+	MessageBlock,
+	MessageRoleEnum,
+)
+from basilisk.conversation.history_window import HistoryWindowPolicy
+from basilisk.provider_engine.base_engine import BaseEngine
+
+
+class CountingEngine(BaseEngine):
+	"""Engine recording every message it prepares."""
+
+	def __init__(self, account):
+		"""Initialize with an empty preparation log."""
+		super().__init__(account)
+		self.prepared: list[str] = []
+
+	@cached_property
+	def client(self):
+		"""Return a mock client object for abstract interface compliance."""
+		return MagicMock()
+
+	def prepare_message_request(self, message):
+		"""Record and wrap the request content."""
+		self.prepared.append(message.content)
+		return {"role": message.role.value, "content": message.content}
+
+	prepare_message_response = prepare_message_request
+
+	def completion(self, new_block, conversation, system_message, **kwargs):
+		"""Return placeholder completion for abstract interface compliance."""
+		return None
+
+	def completion_response_with_stream(self, stream, **kwargs):
+		"""Echo stream for abstract interface compliance."""
+		return stream
+
+	def completion_response_without_stream(self, response, new_block, **kwargs):
+		"""Echo new_block for abstract interface compliance."""
+		return new_block
+
+
+@pytest.fixture
+def engine():
+	"""Return a counting engine bound to a minimal account."""
+	account = SimpleNamespace(
+		id="acct-1",
+		custom_base_url=None,
+		provider=SimpleNamespace(id="dummy-provider"),
+	)
+	return CountingEngine(account)
+
+
+def _block(ai_model, index: int, with_response: bool = True) -> MessageBlock:
+	return MessageBlock(
+		request=Message(role=MessageRoleEnum.USER, content=f"q{index}"),
+		response=Message(role=MessageRoleEnum.ASSISTANT, content=f"a{index}")
+		if with_response
+		else None,
+		model=ai_model,
+	)
+
+
+@pytest.fixture
+def conversation(ai_model):
+	"""Return a conversation with three finished blocks."""
+	conv = Conversation()
+	for i in range(3):
+		conv.add_block(_block(ai_model, i))
+	return conv
+
+
+def test_history_prepared_once(engine, conversation, ai_model):
+	"""Only the new block is prepared on the following request."""
+	new_block = _block(ai_model, 3, with_response=False)
+	first = engine.get_messages(new_block, conversation)
+	assert engine.prepared == ["q0", "a0", "q1", "a1", "q2", "a2", "q3"]
+	new_block.response = Message(role=MessageRoleEnum.ASSISTANT, content="a3")
+	conversation.add_block(new_block)
+	engine.prepared.clear()
+	next_block = _block(ai_model, 4, with_response=False)
+	second = engine.get_messages(next_block, conversation)
+	assert engine.prepared == ["a3", "q4"]
+	assert second[: len(first)] == first
+
+
+def test_edited_block_is_prepared_again(engine, conversation, ai_model):
+	"""Marking a block as edited invalidates its prepared messages."""
+	new_block = _block(ai_model, 3, with_response=False)
+	engine.get_messages(new_block, conversation)
+	edited = conversation.messages[1]
+	edited.request.content = "edited"
+	edited.mark_edited()
+	engine.prepared.clear()
+	messages = engine.get_messages(new_block, conversation)
+	assert engine.prepared == ["edited", "a1"]
+	assert messages[2] == {"role": "user", "content": "edited"}
+
+
+def test_removed_block_is_invalidated(engine, conversation, ai_model):
+	"""Removing a block bumps its version so a re-added block is rebuilt."""
+	new_block = _block(ai_model, 3, with_response=False)
+	engine.get_messages(new_block, conversation)
+	removed = conversation.messages[0]
+	version = removed.edit_version
+	conversation.remove_block(removed)
+	assert removed.edit_version == version + 1
+	engine.prepared.clear()
+	engine.get_messages(new_block, conversation)
+	assert engine.prepared == []
+	conversation.messages.insert(0, removed)
+	engine.get_messages(new_block, conversation)
+	assert engine.prepared == ["q0", "a0"]
+
+
+def test_system_message_is_not_cached(engine, conversation, ai_model):
+	"""The system message is prepared on every request."""
+	new_block = _block(ai_model, 3, with_response=False)
+	system = Message(role=MessageRoleEnum.USER, content="system")
+	engine.get_messages(new_block, conversation, system)
+	engine.prepared.clear()
+	engine.get_messages(new_block, conversation, system)
+	assert engine.prepared == ["system"]
+
+
+def test_history_window_drops_oldest_blocks(
+	engine, conversation, ai_model, mocker
+):
+	"""A token budget keeps only the newest history blocks."""
+	mocker.patch.object(engine, "get_model", return_value=None)
+	new_block = _block(ai_model, 3, with_response=False)
+	full = engine.get_history_window(
+		new_block, conversation, history_window=HistoryWindowPolicy()
+	)
+	budget = full.estimated_tokens - 1
+	messages = engine.get_messages(
+		new_block,
+		conversation,
+		history_window=HistoryWindowPolicy(max_input_tokens=budget),
+	)
+	assert [m["content"] for m in messages] == ["q1", "a1", "q2", "a2", "q3"]
+
+
+def test_stubbed_request_is_cached_separately(
+	engine, conversation, ai_model, attachment, mocker
+):
+	"""Old attachments are replaced by a note without touching the block."""
+	mocker.patch.object(engine, "get_model", return_value=None)
+	old = conversation.messages[0]
+	old.request.attachments = [attachment]
+	new_block = _block(ai_model, 3, with_response=False)
+	full = engine.get_history_window(
+		new_block, conversation, history_window=HistoryWindowPolicy()
+	)
+	policy = HistoryWindowPolicy(max_input_tokens=full.estimated_tokens - 1)
+	messages = engine.get_messages(
+		new_block, conversation, history_window=policy
+	)
+	assert messages[0]["content"] == "q0\n[1 attachment(s) omitted]"
+	assert old.request.attachments == [attachment]
+	engine.prepared.clear()
+	messages = engine.get_messages(new_block, conversation)
+	assert engine.prepared == ["q0"]
+	assert messages[0]["content"] == "q0"
+
+
+def test_streamed_response_is_prepared_again(engine, conversation, ai_model):
+	"""A response prepared while streaming is not reused once complete."""
+	streaming = _block(ai_model, 3)
+	streaming.response.content = "partial"
+	conversation.add_block(streaming)
+	new_block = _block(ai_model, 4, with_response=False)
+	engine.get_messages(new_block, conversation)
+	streaming.response.content = "complete"
+	streaming.mark_stream_completed()
+	engine.prepared.clear()
+	messages = engine.get_messages(new_block, conversation)
+	assert engine.prepared == ["q3", "complete"]
+	assert messages[-2] == {"role": "assistant", "content": "complete"}
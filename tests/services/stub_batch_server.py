@@ -0,0 +1,415 @@
+"""Local stand-in for the OpenAI and Anthropic batch APIs.
+
+``StubBatchServer`` stores the submitted batches in memory and reports them
+in progress until they have been retrieved ``polls_until_done`` times. Each
+request is then answered with ``Answer: <prompt>``, except the requests
+whose prompt contains ``FAIL``, which are reported as errors.
+
+Routes:
+
+- ``POST /v1/files``, ``GET /v1/files/{id}/content``: OpenAI files
+- ``POST /v1/batches``, ``GET /v1/batches/{id}``,
+  ``POST /v1/batches/{id}/cancel``: OpenAI batches
+- ``POST /v1/messages/batches``, ``GET /v1/messages/batches/{id}``,
+  ``GET /v1/messages/batches/{id}/results``,
+  ``POST /v1/messages/batches/{id}/cancel``: Anthropic message batches
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import re
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+STUB_MODEL = "stub-model"
+FAIL_MARKER = "FAIL"
+_CREATED_AT = "2026-01-01T00:00:00Z"
+
+
+def answer_for(prompt: str) -> str:
+	"""Return the answer of the stub to a prompt."""
+	return f"Answer: {prompt}"
+
+
+def _openai_prompt(body: dict[str, Any]) -> str:
+	content = body["input"][-1]["content"]
+	return content if isinstance(content, str) else content[0]["text"]
+
+
+def _anthropic_prompt(params: dict[str, Any]) -> str:
+	content = params["messages"][-1]["content"]
+	return content if isinstance(content, str) else content[0]["text"]
+
+
+def _openai_response(custom_id: str, text: str) -> dict[str, Any]:
+	return {
+		"id": f"resp_{custom_id}",
+		"object": "response",
+		"created_at": 0,
+		"model": STUB_MODEL,
+		"status": "completed",
+		"output": [
+			{
+				"type": "message",
+				"id": f"msg_{custom_id}",
+				"role": "assistant",
+				"status": "completed",
+				"content": [
+					{"type": "output_text", "text": text, "annotations": []}
+				],
+			}
+		],
+		"parallel_tool_calls": True,
+		"tool_choice": "auto",
+		"tools": [],
+	}
+
+
+def _anthropic_message(custom_id: str, text: str) -> dict[str, Any]:
+	return {
+		"id": f"msg_{custom_id}",
+		"type": "message",
+		"role": "assistant",
+		"model": STUB_MODEL,
+		"content": [{"type": "text", "text": text}],
+		"stop_reason": "end_turn",
+		"stop_sequence": None,
+		"usage": {"input_tokens": 1, "output_tokens": 1},
+	}
+
+
+class StubBatchHandler(BaseHTTPRequestHandler):
+	"""Dispatch the batch API requests to the server."""
+
+	protocol_version = "HTTP/1.1"
+	server: StubBatchServer
+
+	def log_message(self, format, *args):
+		"""Keep the output quiet."""
+
+	def _send(self, status: int, payload: Any, content_type: str) -> None:
+		data = (
+			payload
+			if isinstance(payload, bytes)
+			else json.dumps(payload).encode()
+		)
+		self.send_response(status)
+		self.send_header("Content-Type", content_type)
+		self.send_header("Content-Length", str(len(data)))
+		self.end_headers()
+		self.wfile.write(data)
+
+	def _send_json(self, payload: Any, status: int = 200) -> None:
+		self._send(status, payload, "application/json")
+
+	def _body(self) -> bytes:
+		return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+	def do_GET(self):
+		"""Answer the retrieval requests."""
+		path = self.path.split("?", 1)[0]
+		server = self.server
+		if match := re.fullmatch(r"/v1/files/([^/]+)/content", path):
+			content = server.files.get(match[1])
+			if content is None:
+				self.send_error(404)
+				return
+			self._send(200, content, "application/octet-stream")
+		elif match := re.fullmatch(r"/v1/batches/([^/]+)", path):
+			self._send_json(server.retrieve_openai_batch(match[1]))
+		elif match := re.fullmatch(r"/v1/messages/batches/([^/]+)", path):
+			self._send_json(server.retrieve_anthropic_batch(match[1]))
+		elif match := re.fullmatch(
+			r"/v1/messages/batches/([^/]+)/results", path
+		):
+			self._send(
+				200, server.anthropic_results(match[1]), "application/x-jsonl"
+			)
+		else:
+			self.send_error(404)
+
+	def do_POST(self):
+		"""Answer the creation and cancellation requests."""
+		path = self.path.split("?", 1)[0]
+		server = self.server
+		body = self._body()
+		if path == "/v1/files":
+			message = BytesParser(policy=HTTP).parsebytes(
+				b"Content-Type: "
+				+ self.headers["Content-Type"].encode()
+				+ b"\r\n\r\n"
+				+ body
+			)
+			content = next(
+				part.get_payload(decode=True)
+				for part in message.iter_parts()
+				if part.get_param("name", header="content-disposition")
+				== "file"
+			)
+			self._send_json(server.add_file(content))
+		elif path == "/v1/batches":
+			self._send_json(server.create_openai_batch(json.loads(body)))
+		elif match := re.fullmatch(r"/v1/batches/([^/]+)/cancel", path):
+			server.cancel(match[1])
+			self._send_json(server.retrieve_openai_batch(match[1]))
+		elif path == "/v1/messages/batches":
+			self._send_json(server.create_anthropic_batch(json.loads(body)))
+		elif match := re.fullmatch(
+			r"/v1/messages/batches/([^/]+)/cancel", path
+		):
+			server.cancel(match[1])
+			self._send_json(server.retrieve_anthropic_batch(match[1]))
+		else:
+			self.send_error(404)
+
+
+class StubBatchServer(ThreadingHTTPServer):
+	"""HTTP server emulating the batch APIs of OpenAI and Anthropic.
+
+	Attributes:
+		polls_until_done: Number of retrievals after which a batch ends.
+		files: Uploaded and generated files by ID.
+		batches: Submitted batches by ID.
+	"""
+
+	daemon_threads = True
+
+	def __init__(
+		self,
+		polls_until_done: int = 1,
+		address: tuple[str, int] = ("127.0.0.1", 0),
+	):
+		"""Bind the server.
+
+		Args:
+			polls_until_done: Number of retrievals after which a batch ends.
+			address: Host and port, port 0 to pick a free one.
+		"""
+		super().__init__(address, StubBatchHandler)
+		self.polls_until_done = polls_until_done
+		self.files: dict[str, bytes] = {}
+		self.batches: dict[str, dict[str, Any]] = {}
+		self._ids = itertools.count(1)
+		self._lock = threading.Lock()
+
+	@property
+	def url(self) -> str:
+		"""Base URL of the server."""
+		host, port = self.server_address[:2]
+		return f"http://{host}:{port}"
+
+	def start(self) -> None:
+		"""Serve requests in a background thread."""
+		threading.Thread(target=self.serve_forever, daemon=True).start()
+
+	def stop(self) -> None:
+		"""Stop serving and close the socket."""
+		self.shutdown()
+		self.server_close()
+
+	def add_file(self, content: bytes) -> dict[str, Any]:
+		"""Store an uploaded file and return its OpenAI file object."""
+		with self._lock:
+			file_id = f"file-{next(self._ids)}"
+			self.files[file_id] = content
+		return {
+			"id": file_id,
+			"object": "file",
+			"bytes": len(content),
+			"created_at": 0,
+			"filename": "batch.jsonl",
+			"purpose": "batch",
+			"status": "processed",
+		}
+
+	def _new_batch(self, kind: str, requests: list[tuple[str, str]]) -> str:
+		with self._lock:
+			batch_id = f"batch_{next(self._ids)}"
+			self.batches[batch_id] = {
+				"kind": kind,
+				"requests": requests,
+				"polls": 0,
+				"cancelled": False,
+				"results": None,
+			}
+		return batch_id
+
+	def _poll(self, batch_id: str) -> Optional[list[tuple[str, str, bool]]]:
+		"""Count a retrieval and return the results once the batch ended.
+
+		Results are (custom ID, prompt, failed) tuples; a cancelled batch
+		has no processed request.
+		"""
+		with self._lock:
+			batch = self.batches[batch_id]
+			batch["polls"] += 1
+			if batch["results"] is None:
+				if batch["cancelled"]:
+					batch["results"] = []
+				elif batch["polls"] >= self.polls_until_done:
+					batch["results"] = [
+						(custom_id, prompt, FAIL_MARKER in prompt)
+						for custom_id, prompt in batch["requests"]
+					]
+			return batch["results"]
+
+	def cancel(self, batch_id: str) -> None:
+		"""Cancel a batch still in progress."""
+		with self._lock:
+			self.batches[batch_id]["cancelled"] = True
+
+	def create_openai_batch(self, params: dict[str, Any]) -> dict[str, Any]:
+		"""Create a batch from an uploaded JSONL file."""
+		lines = self.files[params["input_file_id"]].decode().splitlines()
+		requests = []
+		for line in lines:
+			request = json.loads(line)
+			requests.append(
+				(request["custom_id"], _openai_prompt(request["body"]))
+			)
+		batch_id = self._new_batch("openai", requests)
+		self.batches[batch_id]["input_file_id"] = params["input_file_id"]
+		return self._openai_batch(batch_id, None)
+
+	def retrieve_openai_batch(self, batch_id: str) -> dict[str, Any]:
+		"""Return an OpenAI batch, writing its output files once ended."""
+		results = self._poll(batch_id)
+		batch = self.batches[batch_id]
+		if results is not None and "output_file_id" not in batch:
+			output, errors = [], []
+			for custom_id, prompt, failed in results:
+				line = {"id": f"req_{custom_id}", "custom_id": custom_id}
+				if failed:
+					line["response"] = {
+						"status_code": 400,
+						"body": {"error": {"message": "stub failure"}},
+					}
+					errors.append(line)
+				else:
+					line["response"] = {
+						"status_code": 200,
+						"body": _openai_response(custom_id, answer_for(prompt)),
+					}
+					output.append(line)
+			batch["output_file_id"] = self._add_jsonl(output)
+			batch["error_file_id"] = self._add_jsonl(errors)
+		return self._openai_batch(batch_id, results)
+
+	def _add_jsonl(self, lines: list[dict[str, Any]]) -> Optional[str]:
+		if not lines:
+			return None
+		content = "".join(json.dumps(line) + "\n" for line in lines)
+		return self.add_file(content.encode())["id"]
+
+	def _openai_batch(
+		self, batch_id: str, results: Optional[list]
+	) -> dict[str, Any]:
+		batch = self.batches[batch_id]
+		total = len(batch["requests"])
+		if results is None:
+			status = "in_progress"
+			completed = failed = 0
+		else:
+			status = "cancelled" if batch["cancelled"] else "completed"
+			failed = sum(1 for *_, failed in results if failed)
+			completed = len(results) - failed
+		return {
+			"id": batch_id,
+			"object": "batch",
+			"endpoint": "/v1/responses",
+			"completion_window": "24h",
+			"created_at": 0,
+			"input_file_id": batch.get("input_file_id", ""),
+			"status": status,
+			"output_file_id": batch.get("output_file_id"),
+			"error_file_id": batch.get("error_file_id"),
+			"request_counts": {
+				"total": total,
+				"completed": completed,
+				"failed": failed,
+			},
+		}
+
+	def create_anthropic_batch(self, body: dict[str, Any]) -> dict[str, Any]:
+		"""Create a message batch from its inline requests."""
+		requests = [
+			(request["custom_id"], _anthropic_prompt(request["params"]))
+			for request in body["requests"]
+		]
+		batch_id = self._new_batch("anthropic", requests)
+		return self._anthropic_batch(batch_id, None)
+
+	def retrieve_anthropic_batch(self, batch_id: str) -> dict[str, Any]:
+		"""Return a message batch."""
+		return self._anthropic_batch(batch_id, self._poll(batch_id))
+
+	def _anthropic_batch(
+		self, batch_id: str, results: Optional[list]
+	) -> dict[str, Any]:
+		batch = self.batches[batch_id]
+		counts = {
+			"processing": 0,
+			"succeeded": 0,
+			"errored": 0,
+			"canceled": 0,
+			"expired": 0,
+		}
+		if results is None:
+			counts["processing"] = len(batch["requests"])
+		else:
+			counts["errored"] = sum(1 for *_, failed in results if failed)
+			counts["succeeded"] = len(results) - counts["errored"]
+			counts["canceled"] = len(batch["requests"]) - len(results)
+		return {
+			"id": batch_id,
+			"type": "message_batch",
+			"processing_status": "in_progress" if results is None else "ended",
+			"request_counts": counts,
+			"created_at": _CREATED_AT,
+			"expires_at": _CREATED_AT,
+			"ended_at": None if results is None else _CREATED_AT,
+			"archived_at": None,
+			"cancel_initiated_at": _CREATED_AT if batch["cancelled"] else None,
+			"results_url": None
+			if results is None
+			else f"{self.url}/v1/messages/batches/{batch_id}/results",
+		}
+
+	def anthropic_results(self, batch_id: str) -> bytes:
+		"""Return the JSONL results of an ended message batch."""
+		batch = self.batches[batch_id]
+		results = {
+			custom_id: (prompt, failed)
+			for custom_id, prompt, failed in batch["results"] or []
+		}
+		lines = []
+		for custom_id, _prompt in batch["requests"]:
+			if custom_id not in results:
+				result = {"type": "canceled"}
+			elif results[custom_id][1]:
+				result = {
+					"type": "errored",
+					"error": {
+						"type": "error",
+						"error": {
+							"type": "invalid_request_error",
+							"message": "stub failure",
+						},
+					},
+				}
+			else:
+				result = {
+					"type": "succeeded",
+					"message": _anthropic_message(
+						custom_id, answer_for(results[custom_id][0])
+					),
+				}
+			lines.append(
+				json.dumps({"custom_id": custom_id, "result": result}) + "\n"
+			)
+		return "".join(lines).encode()
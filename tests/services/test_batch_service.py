@@ -0,0 +1,192 @@
+"""Tests for BatchService against a local stub batch server."""
+
+from __future__ import annotations
+
+import time
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from anthropic import Anthropic
+from sqlalchemy import create_engine
+
+from basilisk.conversation import (
+	Message,
+	MessageBlock,
+	MessageRoleEnum,
+	SystemMessage,
+)
+from basilisk.conversation.database.manager import ConversationDatabase
+from basilisk.conversation.database.models import Base
+from basilisk.provider_ai_model import AIModelInfo, ProviderAIModel
+from basilisk.provider_engine.anthropic_engine import AnthropicEngine
+from basilisk.provider_engine.ollama_engine import OllamaEngine
+from basilisk.provider_engine.openai_engine import OpenAIEngine
+from basilisk.services.batch_service import BatchJobStatus, BatchService
+
+from .stub_batch_server import STUB_MODEL, StubBatchServer, answer_for
+
+PROMPTS = ["Describe image 1", "Describe image 2", "FAIL on purpose"]
+
+
+@pytest.fixture(autouse=True)
+def mock_conf(mocker):
+	"""Run the engines without reading the user config."""
+	conf = mocker.patch("basilisk.config.conf")
+	conf.return_value.network.use_system_cert_store = True
+	conf.return_value.conversation.store_responses_server_side = False
+	return conf
+
+
+@pytest.fixture
+def server():
+	"""Return a running stub batch server ending batches on second poll."""
+	server = StubBatchServer(polls_until_done=2)
+	server.start()
+	yield server
+	server.stop()
+
+
+@pytest.fixture
+def conv_db(tmp_path):
+	"""Return a conversation database stored in a temporary file."""
+	engine = create_engine(f"sqlite:///{tmp_path / 'conversations.db'}")
+	Base.metadata.create_all(engine)
+	yield ConversationDatabase.from_engine(engine)
+	engine.dispose()
+
+
+def _make_engine(provider_id: str, server_url: str):
+	account = MagicMock()
+	account.id = uuid4()
+	account.api_key.get_secret_value.return_value = "sk-stub"
+	account.active_organization_key = None
+	account.custom_base_url = f"{server_url}/v1"
+	account.provider.id = provider_id
+	engine_cls = AnthropicEngine if provider_id == "anthropic" else OpenAIEngine
+	engine = engine_cls(account)
+	engine.get_model = MagicMock(
+		return_value=ProviderAIModel(id=STUB_MODEL, max_output_tokens=1024)
+	)
+	if engine_cls is AnthropicEngine:
+		# The Anthropic client does not read the account base URL
+		engine.__dict__["client"] = Anthropic(
+			api_key="sk-stub", base_url=server_url
+		)
+	return engine
+
+
+def _blocks(provider_id: str) -> list[MessageBlock]:
+	return [
+		MessageBlock(
+			request=Message(role=MessageRoleEnum.USER, content=prompt),
+			model=AIModelInfo(provider_id=provider_id, model_id=STUB_MODEL),
+			stream=True,
+		)
+		for prompt in PROMPTS
+	]
+
+
+def _service(conv_db, engine, **kwargs) -> BatchService:
+	return BatchService(
+		lambda: conv_db, engine_getter=lambda account_id: engine, **kwargs
+	)
+
+
+@pytest.mark.parametrize("provider_id", ["openai", "anthropic"])
+def test_results_saved_as_conversations(server, conv_db, mocker, provider_id):
+	"""Each result of an ended batch is saved as a new conversation."""
+	mocker.patch.object(BatchService, "start")
+	engine = _make_engine(provider_id, server.url)
+	finished = MagicMock()
+	service = _service(conv_db, engine, on_job_finished=finished)
+
+	job_id = service.submit(
+		engine,
+		_blocks(provider_id),
+		SystemMessage(content="Be brief"),
+		name="Images",
+	)
+	job = conv_db.get_batch_job(job_id)
+	assert job["status"] == BatchJobStatus.SUBMITTED
+	assert job["item_count"] == len(PROMPTS)
+
+	status = service.poll(job_id)
+	assert not status.finished
+	status = service.poll(job_id)
+	assert status.finished
+	assert status.completed == 2
+	assert status.failed == 1
+	finished.assert_called_once_with(job_id, BatchJobStatus.COMPLETED)
+
+	job = conv_db.get_batch_job(job_id)
+	assert job["status"] == BatchJobStatus.COMPLETED
+	assert job["done_count"] == len(PROMPTS)
+	assert job["error_count"] == 1
+	conversations = conv_db.list_conversations()
+	assert sorted(conv["title"] for conv in conversations) == [
+		"Images #1",
+		"Images #2",
+	]
+	for conv in conversations:
+		conversation = conv_db.load_conversation(conv["id"])
+		block = conversation.messages[0]
+		assert block.response.content == answer_for(block.request.content)
+		assert not block.stream
+		assert conversation.systems[0].content == "Be brief"
+	# Finished jobs are not polled again
+	assert service.poll(job_id) is None
+
+
+def test_polling_resumes_after_restart(server, conv_db):
+	"""A job submitted before a restart is polled by the next service."""
+	engine = _make_engine("openai", server.url)
+	with patch.object(BatchService, "start"):
+		job_id = _service(conv_db, engine).submit(engine, _blocks("openai"))
+
+	service = _service(conv_db, engine, poll_interval=0.01)
+	assert service.resume() == 1
+	deadline = time.monotonic() + 10
+	while conv_db.get_batch_job(job_id)["status"] == BatchJobStatus.SUBMITTED:
+		assert time.monotonic() < deadline, "batch job was not resumed"
+		time.sleep(0.01)
+	service.stop(timeout=5)
+	assert conv_db.get_batch_job(job_id)["status"] == BatchJobStatus.COMPLETED
+	assert conv_db.get_conversation_count() == 2
+
+
+def test_cancelled_batch(server, conv_db, mocker):
+	"""A cancelled batch ends without saving its unprocessed requests."""
+	mocker.patch.object(BatchService, "start")
+	engine = _make_engine("anthropic", server.url)
+	service = _service(conv_db, engine)
+	job_id = service.submit(engine, _blocks("anthropic"))
+	service.cancel(job_id)
+	assert service.poll(job_id).finished
+	job = conv_db.get_batch_job(job_id)
+	assert job["status"] == BatchJobStatus.COMPLETED
+	assert job["error_count"] == len(PROMPTS)
+	assert conv_db.get_conversation_count() == 0
+
+
+def test_missing_account_fails_job(server, conv_db, mocker):
+	"""A job whose account was removed is marked failed."""
+	mocker.patch.object(BatchService, "start")
+	engine = _make_engine("openai", server.url)
+	job_id = _service(conv_db, engine).submit(engine, _blocks("openai"))
+
+	def missing_account(account_id):
+		raise KeyError(account_id)
+
+	service = BatchService(lambda: conv_db, engine_getter=missing_account)
+	assert service.poll_pending() == 0
+	job = conv_db.get_batch_job(job_id)
+	assert job["status"] == BatchJobStatus.FAILED
+	assert "not found" in job["error"]
+
+
+def test_engine_without_batch_api_rejected(conv_db):
+	"""Engines without the batch capability cannot submit jobs."""
+	engine = MagicMock(capabilities=OllamaEngine.capabilities)
+	with pytest.raises(ValueError, match="does not support batches"):
+		_service(conv_db, engine).submit(engine, _blocks("ollama"))
@@ -5,11 +5,15 @@ from unittest.mock import MagicMock
 import pytest
 
 from basilisk.conversation import (
+	PROMPT_SUMMARY,
 	Conversation,
+	ConversationSummary,
 	Message,
 	MessageBlock,
 	MessageRoleEnum,
 )
+from basilisk.conversation.conversation_helper import PROMPT_SUMMARY_UPDATE
+from basilisk.conversation.history_window import HistoryWindowPolicy
 from basilisk.provider_ai_model import AIModelInfo
 from basilisk.services.conversation_service import ConversationService
 
@@ -253,3 +257,141 @@ class TestGenerateTitle:
 		assert title is None
 		assert error is not None
 		assert str(error) == "API down"
+
+
+@pytest.fixture
+def long_conversation():
+	"""Return a conversation with six answered blocks."""
+	conv = Conversation()
+	for i in range(6):
+		conv.add_block(
+			MessageBlock(
+				request=Message(
+					role=MessageRoleEnum.USER, content=f"question {i} " * 20
+				),
+				response=Message(
+					role=MessageRoleEnum.ASSISTANT, content=f"answer {i} " * 20
+				),
+				model=AIModelInfo(provider_id="openai", model_id="test"),
+			)
+		)
+	return conv
+
+
+@pytest.fixture
+def summary_engine():
+	"""Return an engine stub streaming a summary."""
+	engine = MagicMock()
+	engine.completion_response_with_stream.side_effect = lambda _: iter(
+		["Short ", "summary"]
+	)
+	return engine
+
+
+SUMMARY_MODEL = AIModelInfo(provider_id="openai", model_id="cheap")
+SUMMARY_POLICY = HistoryWindowPolicy(
+	summarize=True, summary_threshold_tokens=100, summary_keep_blocks=2
+)
+
+
+class TestRollingSummary:
+	"""Tests for the rolling summary of long conversations."""
+
+	def test_block_count_below_threshold(self, long_conversation):
+		"""No summary is needed while the history is short."""
+		policy = HistoryWindowPolicy(
+			summarize=True, summary_threshold_tokens=100000
+		)
+		assert (
+			ConversationService.get_summary_block_count(
+				long_conversation, policy
+			)
+			is None
+		)
+
+	def test_block_count_keeps_newest_blocks(self, long_conversation):
+		"""Every block but the newest ones is summarized."""
+		assert (
+			ConversationService.get_summary_block_count(
+				long_conversation, SUMMARY_POLICY
+			)
+			== 4
+		)
+
+	def test_block_count_with_current_summary(
+		self, service, summary_engine, long_conversation
+	):
+		"""No update is needed right after a summary."""
+		long_conversation.summary = service.summarize_history(
+			summary_engine, long_conversation, 4, SUMMARY_MODEL
+		)
+		assert (
+			ConversationService.get_summary_block_count(
+				long_conversation, SUMMARY_POLICY
+			)
+			is None
+		)
+
+	def test_summarize_history(
+		self, service, summary_engine, long_conversation
+	):
+		"""The leading blocks are sent with the summary prompt."""
+		summary = service.summarize_history(
+			summary_engine, long_conversation, 4, SUMMARY_MODEL
+		)
+		assert summary.content == "Short summary"
+		assert summary.block_count == 4
+		assert summary.covers(long_conversation.messages)
+		kwargs = summary_engine.completion.call_args.kwargs
+		assert kwargs["conversation"].messages == long_conversation.messages[:4]
+		assert kwargs["new_block"].request.content == PROMPT_SUMMARY
+		assert kwargs["new_block"].model == SUMMARY_MODEL
+
+	def test_summarize_history_incremental(
+		self, service, summary_engine, long_conversation
+	):
+		"""A valid summary is updated with the blocks added since."""
+		long_conversation.summary = ConversationSummary(
+			content="Earlier summary",
+			block_count=2,
+			digest=ConversationSummary.compute_digest(
+				long_conversation.messages[:2]
+			),
+			model=SUMMARY_MODEL,
+		)
+		service.summarize_history(
+			summary_engine, long_conversation, 4, SUMMARY_MODEL
+		)
+		kwargs = summary_engine.completion.call_args.kwargs
+		assert kwargs["conversation"].messages == [
+			long_conversation.summary.as_block(),
+			*long_conversation.messages[2:4],
+		]
+		assert kwargs["new_block"].request.content == PROMPT_SUMMARY_UPDATE
+
+	def test_start_summary_update_saves_summary(
+		self, service, mock_conv_db, summary_engine, long_conversation
+	):
+		"""The summary is generated in the background and saved."""
+		service.db_conv_id = 42
+		assert service.start_summary_update(
+			summary_engine, long_conversation, SUMMARY_POLICY, SUMMARY_MODEL
+		)
+		service._summary_thread.join(5)
+		assert long_conversation.summary.content == "Short summary"
+		mock_conv_db.save_conversation_summary.assert_called_once_with(
+			42, long_conversation.summary
+		)
+
+	def test_failed_summary_is_not_stored(
+		self, service, mock_conv_db, summary_engine, long_conversation
+	):
+		"""A provider error leaves the conversation unchanged."""
+		service.db_conv_id = 42
+		summary_engine.completion.side_effect = RuntimeError("API down")
+		assert service.start_summary_update(
+			summary_engine, long_conversation, SUMMARY_POLICY, SUMMARY_MODEL
+		)
+		service._summary_thread.join(5)
+		assert long_conversation.summary is None
+		mock_conv_db.save_conversation_summary.assert_not_called()
@@ -0,0 +1,65 @@
+"""Tests for the shared asyncio loop thread."""
+
+import asyncio
+import threading
+
+import pytest
+
+from basilisk.async_loop import AsyncLoopThread
+from basilisk.provider_engine.cancellation import CancellationToken
+
+
+@pytest.fixture
+def loop_thread():
+	"""Return a loop thread stopped after the test."""
+	loop_thread = AsyncLoopThread(name="test-async-loop")
+	yield loop_thread
+	loop_thread.stop()
+
+
+class TestAsyncLoopThread:
+	"""Tests for AsyncLoopThread."""
+
+	def test_coroutines_share_one_thread(self, loop_thread):
+		"""Concurrent coroutines run on the same loop thread."""
+		thread_names = []
+
+		async def record():
+			await asyncio.sleep(0.01)
+			thread_names.append(threading.current_thread().name)
+
+		tasks = [loop_thread.submit(record()) for _ in range(5)]
+		for task in tasks:
+			task.join(2)
+			assert not task.is_alive()
+		assert thread_names == ["test-async-loop"] * 5
+
+	def test_cancel_token_cancels_task(self, loop_thread):
+		"""Cancelling the token cancels the awaiting coroutine."""
+		started = threading.Event()
+		cancelled = threading.Event()
+
+		async def wait_forever():
+			started.set()
+			try:
+				await asyncio.sleep(60)
+			except asyncio.CancelledError:
+				cancelled.set()
+				raise
+
+		token = CancellationToken()
+		task = loop_thread.submit(wait_forever(), cancel_token=token)
+		assert started.wait(2)
+		token.cancel()
+		task.join(2)
+		assert not task.is_alive()
+		assert cancelled.is_set()
+		assert task.future.cancelled()
+
+	def test_loop_restarts_after_stop(self, loop_thread):
+		"""Submitting after a stop starts a new loop."""
+		loop_thread.submit(asyncio.sleep(0)).join(2)
+		loop_thread.stop()
+		task = loop_thread.submit(asyncio.sleep(0, result="done"))
+		task.join(2)
+		assert task.future.result() == "done"
@@ -0,0 +1,263 @@
+"""Tests for the headless batch runner."""
+
+from __future__ import annotations
+
+import json
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine
+
+from basilisk.__main__ import parse_batch_args
+from basilisk.batch_runner import (
+	BatchInputError,
+	BatchPrompt,
+	BatchRunner,
+	read_prompts,
+	run_batch,
+	save_result,
+	submit_provider_batch,
+)
+from basilisk.config import RetrySettings
+from basilisk.conversation import Message, MessageRoleEnum
+from basilisk.conversation.database.manager import ConversationDatabase
+from basilisk.conversation.database.models import Base
+from basilisk.provider_ai_model import ProviderAIModel
+
+
+def _answer(block):
+	block.response = Message(
+		role=MessageRoleEnum.ASSISTANT,
+		content=f"answer to {block.request.content}",
+	)
+	return block
+
+
+@pytest.fixture
+def engine():
+	"""Return an engine answering each prompt with its own text."""
+	engine = MagicMock()
+	engine.account.provider.id = "openai"
+	engine.supported_attachment_formats = {"image/png"}
+	engine.get_model.return_value = ProviderAIModel(id="gpt-test")
+	engine.completion.side_effect = lambda new_block, **kwargs: new_block
+	engine.completion_response_without_stream.side_effect = (
+		lambda response, new_block: _answer(new_block)
+	)
+	return engine
+
+
+def test_read_prompts():
+	"""Prompts are read from objects or strings, skipping blank lines."""
+	lines = [
+		'{"id": "cat", "prompt": "Describe", "attachments": "cat.png"}\n',
+		"\n",
+		'"Hello"\n',
+	]
+	assert list(read_prompts(lines)) == [
+		BatchPrompt(id="cat", prompt="Describe", attachments=["cat.png"]),
+		BatchPrompt(id="3", prompt="Hello"),
+	]
+
+
+@pytest.mark.parametrize("line", ["{not json", '{"id": 1}', "[1, 2]"])
+def test_read_prompts_invalid_line(line):
+	"""An invalid line is reported with its number."""
+	with pytest.raises(BatchInputError, match="line 2"):
+		list(read_prompts(['"ok"', line]))
+
+
+def test_run_completes_every_prompt(engine):
+	"""Each prompt is completed without history, failures do not stop."""
+
+	def completion(new_block, **kwargs):
+		if new_block.request.content == "prompt 2":
+			raise RuntimeError("quota")
+		return new_block
+
+	engine.completion.side_effect = completion
+	runner = BatchRunner(engine, "gpt-test", system_prompt="Be brief")
+	prompts = [BatchPrompt(id=str(i), prompt=f"prompt {i}") for i in range(4)]
+	results = {result.prompt.id: result for result in runner.run(prompts)}
+	assert results["2"].error == "quota"
+	assert results["2"].block is None
+	assert results["1"].to_dict() == {
+		"id": "1",
+		"provider": "openai",
+		"model": "gpt-test",
+		"response": "answer to prompt 1",
+	}
+	kwargs = engine.completion.call_args.kwargs
+	assert kwargs["system_message"].content == "Be brief"
+	assert kwargs["conversation"].messages == []
+	assert not kwargs["stream"]
+
+
+def test_run_respects_concurrency(engine):
+	"""No more than the concurrency limit of requests run at a time."""
+	lock = threading.Lock()
+	running = 0
+	peak = 0
+	release = threading.Event()
+
+	def completion(new_block, **kwargs):
+		nonlocal running, peak
+		with lock:
+			running += 1
+			peak = max(peak, running)
+			if running == 2:
+				release.set()
+		release.wait(5)
+		with lock:
+			running -= 1
+		return new_block
+
+	engine.completion.side_effect = completion
+	runner = BatchRunner(engine, "gpt-test", concurrency=2)
+	prompts = [BatchPrompt(id=str(i), prompt="p") for i in range(6)]
+	assert len(list(runner.run(prompts))) == 6
+	assert peak == 2
+
+
+def test_stream_response_is_joined(engine):
+	"""Streamed chunks are joined into the response."""
+	engine.completion_response_with_stream.return_value = iter(
+		["Hel", "lo", ("citation", {"url": "https://example.com"})]
+	)
+	runner = BatchRunner(engine, "gpt-test", stream=True)
+	block = runner.complete(BatchPrompt(id="1", prompt="Hi"))
+	assert block.response.content == "Hello"
+	assert block.response.citations == [{"url": "https://example.com"}]
+	engine.completion_response_without_stream.assert_not_called()
+
+
+def test_unsupported_attachment_fails_prompt(engine, tmp_path):
+	"""A prompt with an unsupported attachment fails without a request."""
+	runner = BatchRunner(engine, "gpt-test", base_dir=tmp_path)
+	prompt = BatchPrompt(id="1", prompt="Read", attachments=["notes.zip"])
+	(result,) = runner.run([prompt])
+	assert "unsupported attachment" in result.error
+	engine.completion.assert_not_called()
+
+
+def test_unknown_model_rejected(engine):
+	"""The runner refuses a model the engine does not know."""
+	engine.get_model.return_value = None
+	with pytest.raises(BatchInputError):
+		BatchRunner(engine, "missing")
+
+
+def test_save_result(engine, tmp_path):
+	"""A result is saved as a conversation with its system message."""
+	db_engine = create_engine(f"sqlite:///{tmp_path / 'conversations.db'}")
+	Base.metadata.create_all(db_engine)
+	conv_db = ConversationDatabase.from_engine(db_engine)
+	runner = BatchRunner(engine, "gpt-test", system_prompt="Be brief")
+	prompt = BatchPrompt(id="cat", prompt="Describe")
+	(result,) = runner.run([prompt])
+	conv_id = save_result(conv_db, result, runner.system_message(prompt))
+	conversation = conv_db.load_conversation(conv_id)
+	assert conversation.title == "Batch cat"
+	assert conversation.messages[0].response.content == "answer to Describe"
+	assert conversation.systems[0].content == "Be brief"
+	db_engine.dispose()
+
+
+def test_run_batch_writes_jsonl(engine, tmp_path, mocker):
+	"""The batch command writes one JSON line per prompt."""
+	conf = mocker.patch("basilisk.config.conf")
+	conf.return_value.general.log_level.name = "WARNING"
+	conf.return_value.network.max_concurrent_requests = 4
+	conf.return_value.network.retry = RetrySettings()
+	conf.return_value.network.provider_retry = {}
+	mocker.patch("basilisk.localization.get_app_locale")
+	mocker.patch("basilisk.localization.setup_translation")
+	mocker.patch(
+		"basilisk.batch_runner.resolve_engine",
+		return_value=(engine, "gpt-test", None),
+	)
+	input_path = tmp_path / "prompts.jsonl"
+	input_path.write_text('"one"\n"two"\n', encoding="utf-8")
+	output_path = tmp_path / "results.jsonl"
+	args = parse_batch_args(
+		[str(input_path), "-a", "work", "-c", "1", "-o", str(output_path)]
+	)
+	assert run_batch(args) == 0
+	lines = output_path.read_text(encoding="utf-8").splitlines()
+	results = [json.loads(line) for line in lines]
+	assert [result["response"] for result in results] == [
+		"answer to one",
+		"answer to two",
+	]
+
+
+@pytest.mark.parametrize("system_locale", [("c", None), (None, None)])
+def test_run_batch_falls_back_to_default_language(
+	engine, tmp_path, mocker, capsys, system_locale
+):
+	"""A system locale babel cannot parse falls back to English."""
+	conf = mocker.patch("basilisk.config.conf")
+	conf.return_value.general.log_level.name = "WARNING"
+	conf.return_value.general.language = "auto"
+	conf.return_value.network.max_concurrent_requests = 4
+	conf.return_value.network.retry = RetrySettings()
+	conf.return_value.network.provider_retry = {}
+	mocker.patch("locale.getdefaultlocale", return_value=system_locale)
+	setup_translation = mocker.patch("basilisk.localization.setup_translation")
+	mocker.patch(
+		"basilisk.batch_runner.resolve_engine",
+		return_value=(engine, "gpt-test", None),
+	)
+	input_path = tmp_path / "prompts.jsonl"
+	input_path.write_text('"one"\n', encoding="utf-8")
+	args = parse_batch_args([str(input_path), "-a", "work"])
+	assert run_batch(args) == 0
+	assert str(setup_translation.call_args.args[0]) == "en"
+	errors = [
+		line
+		for line in capsys.readouterr().err.splitlines()
+		if line.startswith("error: ")
+	]
+	assert len(errors) == 1
+	assert errors[0].endswith("using en instead")
+
+
+def test_submit_provider_batch(engine):
+	"""The prompts are submitted as one job with the run system prompt."""
+	service = MagicMock()
+	service.submit.return_value = 7
+	runner = BatchRunner(engine, "gpt-test", system_prompt="Be brief")
+	prompts = [
+		BatchPrompt(id="1", prompt="one"),
+		BatchPrompt(id="2", prompt="two"),
+	]
+	assert submit_provider_batch(runner, prompts, service, name="run") == 7
+	(submitted_engine, blocks), kwargs = service.submit.call_args
+	assert submitted_engine is engine
+	assert [block.request.content for block in blocks] == ["one", "two"]
+	assert kwargs["system_message"].content == "Be brief"
+	assert kwargs["name"] == "run"
+
+
+def test_provider_batch_needs_one_system_prompt(engine):
+	"""Prompts with their own system prompt cannot share a provider batch."""
+	service = MagicMock()
+	runner = BatchRunner(engine, "gpt-test", system_prompt="Be brief")
+	prompts = [
+		BatchPrompt(id="1", prompt="one"),
+		BatchPrompt(id="2", prompt="two", system="Be verbose"),
+	]
+	with pytest.raises(BatchInputError, match="same system prompt"):
+		submit_provider_batch(runner, prompts, service)
+	service.submit.assert_not_called()
+
+
+def test_parse_batch_args():
+	"""Profile and account options cannot be combined."""
+	args = parse_batch_args(["in.jsonl", "-p", "Default", "--no-stream"])
+	assert args.profile == "Default"
+	assert args.stream is False
+	assert args.concurrency > 0
+	with pytest.raises(SystemExit):
+		parse_batch_args(["in.jsonl", "-p", "Default", "-a", "work"])
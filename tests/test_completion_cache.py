@@ -0,0 +1,208 @@
+"""Tests for the completion response cache."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from basilisk.completion_cache import (
+	CachedCompletion,
+	CompletionCache,
+	completion_cache_key,
+)
+from basilisk.conversation import (
+	Conversation,
+	Message,
+	MessageBlock,
+	MessageRoleEnum,
+	SystemMessage,
+)
+from basilisk.provider_ai_model import AIModelInfo
+
+
+def _block(content="Describe this", temperature=0.0, response=None):
+	return MessageBlock(
+		request=Message(role=MessageRoleEnum.USER, content=content),
+		response=(
+			Message(role=MessageRoleEnum.ASSISTANT, content=response)
+			if response
+			else None
+		),
+		model=AIModelInfo(provider_id="openai", model_id="gpt-4o"),
+		temperature=temperature,
+	)
+
+
+@pytest.fixture
+def engine():
+	"""Return an engine stub with a fixed endpoint."""
+	engine = MagicMock()
+	engine.api_base_url = "https://api.openai.com/v1"
+	return engine
+
+
+@pytest.fixture
+def history():
+	"""Return a conversation with two answered blocks."""
+	conversation = Conversation()
+	conversation.add_block(_block("first", response="one"))
+	conversation.add_block(_block("second", response="two"))
+	return conversation
+
+
+class TestCompletionCacheKey:
+	"""Tests for completion_cache_key."""
+
+	def _key(self, engine, conversation, block, **kwargs):
+		return completion_cache_key(
+			engine,
+			conversation=conversation,
+			new_block=block,
+			system_message=kwargs.pop("system_message", None),
+			**kwargs,
+		)
+
+	def test_identical_requests_share_key(self, engine, history):
+		"""Equal requests built separately have the same key."""
+		assert self._key(engine, history, _block()) == self._key(
+			engine, history, _block()
+		)
+
+	def test_stream_mode_is_ignored(self, engine, history):
+		"""Streaming does not change the response, so not the key."""
+		assert self._key(engine, history, _block(), stream=True) == self._key(
+			engine, history, _block(), stream=False
+		)
+
+	@pytest.mark.parametrize(
+		"kwargs",
+		[
+			{"system_message": SystemMessage(content="Be brief")},
+			{"web_search_mode": True},
+			{"stop_block_index": 1},
+		],
+	)
+	def test_request_options_change_key(self, engine, history, kwargs):
+		"""System message, options and history window are part of the key."""
+		assert self._key(engine, history, _block()) != self._key(
+			engine, history, _block(), **kwargs
+		)
+
+	def test_sampling_parameters_change_key(self, engine, history):
+		"""A different temperature gives a different key."""
+		assert self._key(engine, history, _block()) != self._key(
+			engine, history, _block(temperature=0.7)
+		)
+
+	def test_endpoint_changes_key(self, engine, history):
+		"""The same model behind another endpoint gives a different key."""
+		key = self._key(engine, history, _block())
+		engine.api_base_url = "http://localhost:8080/v1"
+		assert self._key(engine, history, _block()) != key
+
+	def test_unanswered_history_blocks_are_ignored(self, engine, history):
+		"""Blocks without response are not sent, so not part of the key."""
+		key = self._key(engine, history, _block())
+		history.add_block(_block("pending"))
+		assert self._key(engine, history, _block()) == key
+
+
+class TestCachedCompletion:
+	"""Tests for CachedCompletion."""
+
+	def test_iter_stream_replays_text_then_citations(self):
+		"""The text is split in chunks followed by the citations."""
+		citation = {"source_url": "https://example.com"}
+		cached = CachedCompletion("abcdefg", [citation])
+		assert list(cached.iter_stream(chunk_size=3)) == [
+			"abc",
+			"def",
+			"g",
+			("citation", citation),
+		]
+
+	def test_to_message(self):
+		"""The cached response becomes an assistant message."""
+		message = CachedCompletion("answer").to_message()
+		assert message.role == MessageRoleEnum.ASSISTANT
+		assert message.content == "answer"
+
+
+class TestCompletionCache:
+	"""Tests for CompletionCache."""
+
+	@pytest.fixture
+	def conf(self, mocker):
+		"""Enable the cache in a mocked configuration."""
+		conf = mocker.patch("basilisk.completion_cache.config.conf")
+		conversation_conf = conf.return_value.conversation
+		conversation_conf.completion_cache_enabled = True
+		conversation_conf.completion_cache_ttl_seconds = 3600
+		conversation_conf.completion_cache_max_entries = 10
+		return conf
+
+	@pytest.fixture
+	def conv_db(self):
+		"""Return a mock database with an empty cache."""
+		conv_db = MagicMock()
+		conv_db.get_cached_completion.return_value = None
+		return conv_db
+
+	def test_disabled_cache_skips_database(
+		self, conf, conv_db, engine, history
+	):
+		"""No key is computed and the database is untouched when disabled."""
+		conf.return_value.conversation.completion_cache_enabled = False
+		cache = CompletionCache(lambda: conv_db)
+		result = cache.lookup(
+			engine,
+			conversation=history,
+			new_block=_block(),
+			system_message=None,
+		)
+		assert result == (None, None)
+		conv_db.get_cached_completion.assert_not_called()
+
+	def test_miss_then_hit(self, conf, conv_db, engine, history):
+		"""A stored response is returned for the same key."""
+		cache = CompletionCache(lambda: conv_db)
+		request = {
+			"conversation": history,
+			"new_block": _block(),
+			"system_message": None,
+		}
+		key, cached = cache.lookup(engine, **request)
+		assert key
+		assert cached is None
+		conv_db.get_cached_completion.assert_called_once_with(key, 3600)
+
+		conv_db.get_cached_completion.return_value = ("answer", None)
+		assert cache.lookup(engine, **request) == (
+			key,
+			CachedCompletion("answer"),
+		)
+
+	def test_store_evicts_old_entries(self, conf, conv_db):
+		"""Storing a response prunes the cache with the configured limits."""
+		cache = CompletionCache(lambda: conv_db)
+		cache.store("key", _block(response="answer"))
+		conv_db.store_cached_completion.assert_called_once_with(
+			"key", "openai", "gpt-4o", "answer", None
+		)
+		conv_db.prune_completion_cache.assert_called_once_with(3600, 10)
+
+	def test_empty_response_is_not_stored(self, conf, conv_db):
+		"""Blocks without response text are not cached."""
+		CompletionCache(lambda: conv_db).store("key", _block())
+		conv_db.store_cached_completion.assert_not_called()
+
+	def test_database_errors_are_not_raised(self, conf, conv_db, engine):
+		"""A broken database is reported as a cache miss."""
+		conv_db.get_cached_completion.side_effect = RuntimeError("locked")
+		cache = CompletionCache(lambda: conv_db)
+		result = cache.lookup(
+			engine,
+			conversation=Conversation(),
+			new_block=_block(),
+			system_message=None,
+		)
+		assert result == (None, None)
@@ -0,0 +1,118 @@
+"""Tests for the completion latency instrumentation."""
+
+import pytest
+
+from basilisk.completion_metrics import (
+	CompletionTimer,
+	current_timer,
+	metrics_scope,
+	timed_phase,
+)
+from basilisk.conversation import Message, MessageBlock, MessageRoleEnum
+from basilisk.provider_ai_model import AIModelInfo
+
+
+class FakeClock:
+	"""Clock advanced manually by the tests."""
+
+	def __init__(self):
+		"""Start the clock at zero."""
+		self.now = 0.0
+
+	def __call__(self) -> float:
+		"""Return the current time."""
+		return self.now
+
+
+@pytest.fixture
+def clock():
+	"""Return a manual clock."""
+	return FakeClock()
+
+
+@pytest.fixture
+def block():
+	"""Return a block with a completed response."""
+	return MessageBlock(
+		request=Message(role=MessageRoleEnum.USER, content="Hi"),
+		response=Message(
+			role=MessageRoleEnum.ASSISTANT, content="Hello, world!"
+		),
+		model=AIModelInfo(provider_id="openai", model_id="gpt-4"),
+	)
+
+
+class TestCompletionTimer:
+	"""Tests for CompletionTimer."""
+
+	def test_streamed_request(self, clock, block):
+		"""Test the timings of a streamed response."""
+		timer = CompletionTimer(clock)
+		timer.add_phase("prepare", 0.01)
+		clock.now = 0.2
+		timer.mark_request_sent()
+		for now in (0.5, 0.6, 0.8, 1.2):
+			clock.now = now
+			timer.record_chunk()
+		timer.add_phase("ui", 0.004)
+		timer.add_phase("ui", 0.006)
+		clock.now = 1.5
+		timer.mark_end()
+
+		metrics = timer.build_metrics(block, "openai")
+		assert metrics.prepare_ms == 10
+		assert metrics.request_ms == 200
+		assert metrics.first_chunk_ms == 500
+		assert metrics.total_ms == 1500
+		assert metrics.chunk_count == 4
+		assert metrics.chunk_gap_mean_ms == pytest.approx(233.333)
+		assert metrics.chunk_gap_p95_ms == pytest.approx(400)
+		assert metrics.chunk_gap_max_ms == pytest.approx(400)
+		assert metrics.ui_apply_ms == 10
+		assert metrics.output_chars == len("Hello, world!")
+		assert metrics.output_tokens == 4
+		assert metrics.generation_ms == 1000
+		assert metrics.tokens_per_second == pytest.approx(4)
+		assert metrics.chars_per_second == pytest.approx(13)
+		assert not metrics.cached
+
+	def test_non_streamed_request(self, clock, block):
+		"""Test that a response without chunks has no chunk statistics."""
+		timer = CompletionTimer(clock)
+		clock.now = 2.0
+		timer.mark_request_sent()
+		timer.mark_end()
+
+		metrics = timer.build_metrics(block)
+		assert metrics.first_chunk_ms is None
+		assert metrics.chunk_count == 0
+		assert metrics.chunk_gap_mean_ms is None
+		assert metrics.ui_apply_ms is None
+		assert metrics.total_ms == 2000
+		assert metrics.generation_ms == 2000
+
+	def test_zero_duration_has_no_rate(self, clock, block):
+		"""Test that rates are not computed without elapsed time."""
+		metrics = CompletionTimer(clock).build_metrics(block)
+		assert metrics.tokens_per_second is None
+		assert metrics.chars_per_second is None
+
+
+class TestTimedPhase:
+	"""Tests for metrics_scope and timed_phase."""
+
+	def test_records_into_current_timer(self):
+		"""Test that a phase is added to the timer of the scope."""
+		timer = CompletionTimer()
+		with metrics_scope(timer):
+			assert current_timer() is timer
+			with timed_phase("prepare"):
+				pass
+		assert current_timer() is None
+		assert timer.prepare_seconds is not None
+
+	def test_without_timer_is_a_noop(self):
+		"""Test that a phase outside a completion records nothing."""
+		with timed_phase("prepare"):
+			pass
+		assert current_timer() is None
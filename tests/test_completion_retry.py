@@ -0,0 +1,236 @@
+"""Tests for the retry and hedging of completion requests."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+
+from basilisk.completion_retry import (
+	CompletionRetrier,
+	LatencyTracker,
+	is_transient_error,
+	retry_after,
+)
+from basilisk.config import RetrySettings
+from basilisk.conversation import Message, MessageBlock, MessageRoleEnum
+from basilisk.provider_ai_model import AIModelInfo
+from basilisk.provider_engine.cancellation import CancellationToken
+
+REQUEST = httpx.Request("POST", "https://api.example.com/v1/chat")
+
+
+def _status_error(status: int, headers: dict | None = None):
+	response = httpx.Response(status, headers=headers, request=REQUEST)
+	return httpx.HTTPStatusError("error", request=REQUEST, response=response)
+
+
+@pytest.fixture
+def engine():
+	"""Return an engine whose requests are set by each test."""
+	engine = MagicMock()
+	engine.account.provider.id = "openai"
+	return engine
+
+
+@pytest.fixture
+def request_kwargs():
+	"""Return the arguments of a completion request."""
+	block = MessageBlock(
+		request=Message(role=MessageRoleEnum.USER, content="Hi"),
+		model=AIModelInfo(provider_id="openai", model_id="gpt-test"),
+	)
+	return {
+		"new_block": block,
+		"conversation": MagicMock(),
+		"system_message": None,
+		"stream": True,
+	}
+
+
+def _retrier(engine, **kwargs):
+	settings = kwargs.pop(
+		"settings", RetrySettings(base_delay_seconds=0, max_delay_seconds=1)
+	)
+	return CompletionRetrier(
+		engine,
+		settings=settings,
+		tracker=kwargs.pop("tracker", LatencyTracker()),
+		rng=random.Random(0),
+		**kwargs,
+	)
+
+
+@pytest.mark.parametrize(
+	("error", "expected"),
+	[
+		(httpx.ConnectError("refused"), True),
+		(httpx.ReadTimeout("timeout"), True),
+		(ConnectionResetError(), True),
+		(_status_error(503), True),
+		(_status_error(429), True),
+		(_status_error(400), False),
+		(RuntimeError("Overloaded"), True),
+		(ValueError("invalid model"), False),
+	],
+)
+def test_is_transient_error(error, expected):
+	"""Connection, throttling and server errors are transient."""
+	assert is_transient_error(error) is expected
+
+
+def test_retry_after():
+	"""The retry-after headers of the error response are read."""
+	assert retry_after(_status_error(429, {"retry-after": "3"})) == 3
+	assert retry_after(_status_error(429, {"retry-after-ms": "1500"})) == 1.5
+	assert retry_after(_status_error(503)) is None
+	assert retry_after(RuntimeError()) is None
+
+
+def test_transient_failures_are_retried(engine, request_kwargs):
+	"""The request is sent again until it succeeds."""
+	engine.completion.side_effect = [
+		httpx.ConnectError("refused"),
+		_status_error(503),
+		"response",
+	]
+	on_retry = MagicMock()
+	retrier = _retrier(engine, on_retry=on_retry)
+	assert retrier.completion(**request_kwargs) == "response"
+	assert retrier.attempt == 3
+	assert [call.args[:2] for call in on_retry.call_args_list] == [
+		(1, 3),
+		(2, 3),
+	]
+
+
+def test_gives_up_after_max_attempts(engine, request_kwargs):
+	"""The last error is raised once every attempt failed."""
+	engine.completion.side_effect = httpx.ConnectError("refused")
+	settings = RetrySettings(max_attempts=2, base_delay_seconds=0)
+	retrier = _retrier(engine, settings=settings)
+	with pytest.raises(httpx.ConnectError):
+		retrier.completion(**request_kwargs)
+	assert engine.completion.call_count == 2
+
+
+@pytest.mark.parametrize(
+	"error",
+	[
+		_status_error(400),
+		# Waiting for longer than the maximum delay is not worth it
+		_status_error(429, {"retry-after": "120"}),
+	],
+)
+def test_error_raised_without_retry(engine, request_kwargs, error):
+	"""Permanent errors and long retry-after delays are not retried."""
+	engine.completion.side_effect = error
+	with pytest.raises(httpx.HTTPStatusError):
+		_retrier(engine).completion(**request_kwargs)
+	assert engine.completion.call_count == 1
+
+
+def test_cancel_during_backoff(engine, request_kwargs):
+	"""Stopping the completion ends the wait before the next attempt."""
+	engine.completion.side_effect = httpx.ConnectError("refused")
+	token = CancellationToken()
+	retrier = _retrier(
+		engine,
+		settings=RetrySettings(base_delay_seconds=60, max_delay_seconds=60),
+		cancel_token=token,
+		on_retry=lambda *args: token.cancel(),
+	)
+	with pytest.raises(httpx.ConnectError):
+		retrier.completion(**request_kwargs)
+	assert engine.completion.call_count == 1
+
+
+def _stream(response):
+	if response == "broken":
+		raise httpx.RemoteProtocolError("peer closed connection")
+	yield "Hel"
+	if response == "cut":
+		raise httpx.RemoteProtocolError("peer closed connection")
+	yield "lo"
+
+
+def _consume(stream, chunks: list) -> None:
+	for chunk in stream:
+		chunks.append(chunk)
+
+
+def test_stream_failing_before_first_chunk_is_retried(engine, request_kwargs):
+	"""A stream failing before any chunk is requested again."""
+	engine.completion.side_effect = ["broken", "ok"]
+	engine.completion_response_with_stream.side_effect = _stream
+	retrier = _retrier(engine)
+	response = retrier.completion(**request_kwargs)
+	assert list(retrier.iter_stream(response)) == ["Hel", "lo"]
+	assert engine.completion.call_count == 2
+
+
+def test_stream_not_retried_after_first_chunk(engine, request_kwargs):
+	"""Text already received is never mixed with another response."""
+	engine.completion.side_effect = ["cut", "ok"]
+	engine.completion_response_with_stream.side_effect = _stream
+	retrier = _retrier(engine)
+	response = retrier.completion(**request_kwargs)
+	chunks = []
+	with pytest.raises(httpx.RemoteProtocolError):
+		_consume(retrier.iter_stream(response), chunks)
+	assert chunks == ["Hel"]
+	assert engine.completion.call_count == 1
+
+
+def test_latency_tracker_needs_samples():
+	"""No percentile is known before enough requests were recorded."""
+	tracker = LatencyTracker()
+	for seconds in (1.0, 2.0, 3.0, 4.0):
+		tracker.record("key", seconds)
+	assert tracker.quantile("key", 0.95) is None
+	tracker.record("key", 10.0)
+	assert tracker.quantile("key", 0.95) == 10.0
+	assert tracker.quantile("other", 0.95) is None
+
+
+def test_slow_request_is_hedged(engine, request_kwargs):
+	"""A duplicate is sent after the usual latency, the loser cancelled."""
+	settings = RetrySettings(hedge=True, hedge_min_delay_seconds=0.05)
+	tracker = LatencyTracker()
+	retrier = _retrier(engine, settings=settings, tracker=tracker)
+	key = (str(engine.account.id), "gpt-test", True)
+	for _ in range(5):
+		tracker.record(key, 0.01)
+	tokens = []
+	slow_cancelled = threading.Event()
+
+	def completion(cancel_token, **kwargs):
+		tokens.append(cancel_token)
+		if len(tokens) == 1:
+			cancel_token.add_callback(slow_cancelled.set)
+			slow_cancelled.wait(5)
+			return "slow"
+		return "fast"
+
+	engine.completion.side_effect = completion
+	assert retrier.completion(**request_kwargs) == "fast"
+	assert slow_cancelled.wait(5)
+	assert not tokens[1].cancelled
+	# Stopping the completion cancels the winning request
+	retrier.cancel_token.cancel()
+	assert tokens[1].cancelled
+
+
+def test_async_retry(engine, request_kwargs):
+	"""Async requests are sent again after transient failures."""
+	engine.acompletion = AsyncMock(
+		side_effect=[httpx.ConnectError("refused"), "response"]
+	)
+	retrier = _retrier(engine)
+	response = asyncio.run(retrier.acompletion(**request_kwargs))
+	assert response == "response"
+	assert engine.acompletion.await_count == 2
@@ -0,0 +1,186 @@
+"""Tests for the completion scheduler."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from basilisk.completion_scheduler import (
+	DEFAULT_RETRY_AFTER,
+	CompletionScheduler,
+	QueueCancelledError,
+	TokenBucket,
+	observe_rate_limits,
+	parse_wait,
+)
+from basilisk.provider_engine.cancellation import CancellationToken
+
+KEY = "account-1"
+
+OPENAI_HEADERS = {
+	"x-ratelimit-limit-requests": "60",
+	"x-ratelimit-remaining-requests": "0",
+	"x-ratelimit-reset-requests": "1s",
+	"x-ratelimit-limit-tokens": "30000",
+	"x-ratelimit-remaining-tokens": "29000",
+	"x-ratelimit-reset-tokens": "2s",
+}
+
+
+class FakeClock:
+	"""Clock advanced manually by the tests."""
+
+	def __init__(self):
+		"""Start the clock at zero."""
+		self.now = 0.0
+
+	def __call__(self) -> float:
+		"""Return the current time."""
+		return self.now
+
+
+@pytest.fixture
+def clock():
+	"""Return a manual clock."""
+	return FakeClock()
+
+
+@pytest.mark.parametrize(
+	("value", "expected"),
+	[
+		("1.5", 1.5),
+		("6m0s", 360.0),
+		("1m30s", 90.0),
+		("20ms", 0.02),
+		("", None),
+		("soon", None),
+		("2000-01-01T00:00:00Z", 0.0),
+	],
+)
+def test_parse_wait(value, expected):
+	"""Durations, seconds and past timestamps are parsed."""
+	assert parse_wait(value) == pytest.approx(expected)
+
+
+def test_token_bucket_refills_per_minute(clock):
+	"""A bucket learned from headers refills at its per minute rate."""
+	bucket = TokenBucket(clock)
+	assert bucket.wait_time(10**6) == 0
+	bucket.configure(60, remaining=0)
+	assert bucket.wait_time(1) == pytest.approx(1.0)
+	clock.now = 1.0
+	assert bucket.wait_time(1) == 0
+	bucket.consume(1)
+	# Larger than the capacity: waits for a full bucket
+	assert bucket.wait_time(100) == pytest.approx(60.0)
+
+
+def test_headers_pause_exhausted_account(clock):
+	"""Exhausted request budget delays the next request until its reset."""
+	scheduler = CompletionScheduler(max_concurrency=2, clock=clock)
+	with scheduler.slot(KEY, "Work") as limiter:
+		scheduler.record_response(limiter, 200, OPENAI_HEADERS)
+	(stats,) = scheduler.stats()
+	assert stats.label == "Work"
+	assert stats.request_limit == 60
+	assert stats.token_limit == 30000
+	assert stats.paused_seconds == pytest.approx(1.0)
+	assert limiter.delay(100) == pytest.approx(1.0)
+	clock.now = 1.0
+	assert limiter.delay(100) == 0
+
+
+def test_throttled_response_pauses_account(clock):
+	"""A 429 response pauses the account for its retry-after delay."""
+	scheduler = CompletionScheduler(max_concurrency=2, clock=clock)
+	with scheduler.slot(KEY) as limiter:
+		scheduler.record_response(limiter, 429, {"retry-after": "7"})
+	assert limiter.delay(0) == pytest.approx(7.0)
+	scheduler.record_response(limiter, 429, {})
+	clock.now = 7.0
+	assert limiter.delay(0) == 0
+	scheduler.record_response(limiter, 429, {})
+	assert limiter.delay(0) == pytest.approx(DEFAULT_RETRY_AFTER)
+	assert scheduler.stats()[0].throttled == 3
+
+
+def test_concurrency_limit_queues_requests():
+	"""A request waits for a free slot, and records its wait."""
+	scheduler = CompletionScheduler(max_concurrency=1, poll_interval=0.01)
+	queued = threading.Event()
+	started = threading.Event()
+
+	def second_request():
+		with scheduler.slot(KEY, on_queued=lambda stats: queued.set()):
+			started.set()
+
+	with scheduler.slot(KEY):
+		thread = threading.Thread(target=second_request)
+		thread.start()
+		assert queued.wait(5)
+		assert not started.is_set()
+		assert scheduler.stats()[0].queued == 1
+	assert started.wait(5)
+	thread.join(5)
+	stats = scheduler.stats()[0]
+	assert (stats.active, stats.queued, stats.requests) == (0, 0, 2)
+	assert stats.waited == 1
+	assert stats.max_wait_seconds > 0
+
+
+def test_cancelled_request_leaves_queue():
+	"""Cancelling a queued request removes it without taking a slot."""
+	scheduler = CompletionScheduler(max_concurrency=1, poll_interval=0.01)
+	token = CancellationToken()
+	errors = []
+
+	def queued_request():
+		try:
+			scheduler.acquire(KEY, cancel_token=token)
+		except QueueCancelledError as e:
+			errors.append(e)
+
+	with scheduler.slot(KEY):
+		thread = threading.Thread(target=queued_request)
+		thread.start()
+		token.cancel()
+		thread.join(5)
+	assert len(errors) == 1
+	stats = scheduler.stats()[0]
+	assert (stats.active, stats.queued, stats.requests) == (0, 0, 1)
+
+
+def test_async_slot_waits_without_blocking_loop():
+	"""Async requests share the slots of the account."""
+	scheduler = CompletionScheduler(max_concurrency=1, poll_interval=0.01)
+	order = []
+
+	async def request(name):
+		async with scheduler.aslot(KEY):
+			order.append(f"{name} start")
+			await asyncio.sleep(0.02)
+			order.append(f"{name} end")
+
+	async def main():
+		await asyncio.gather(request("a"), request("b"))
+
+	asyncio.run(main())
+	assert order == ["a start", "a end", "b start", "b end"]
+
+
+def test_response_hook_updates_current_account(mocker, clock):
+	"""The httpx hook records headers into the account of the slot."""
+	scheduler = CompletionScheduler(max_concurrency=1, clock=clock)
+	mocker.patch(
+		"basilisk.completion_scheduler.get_completion_scheduler",
+		return_value=scheduler,
+	)
+	response = httpx.Response(429, headers={"retry-after": "3"})
+	observe_rate_limits(response)
+	assert scheduler.stats() == []
+	with scheduler.slot(KEY):
+		observe_rate_limits(response)
+	assert scheduler.stats()[0].paused_seconds == pytest.approx(3.0)
@@ -9,6 +9,11 @@ from basilisk.config.conversation_profile import (
 	ConversationProfileManager,
 	get_conversation_profile_config,
 )
+from basilisk.provider_routing import (
+	ProviderRouting,
+	RoutingSort,
+	parse_provider_names,
+)
 
 
 @pytest.fixture
@@ -377,6 +382,32 @@ class TestConversationProfile:
 		assert "Be helpful" in summary
 		assert "Model:" in summary
 
+	def test_provider_routing(self):
+		"""Test that the routing fields build the routing preferences."""
+		assert ConversationProfile(name="Test").provider_routing.is_default
+		profile = ConversationProfile(
+			name="Routed",
+			routing_sort=RoutingSort.LATENCY,
+			routing_only=["Groq", "Cerebras"],
+			routing_allow_fallbacks=False,
+		)
+		assert profile.provider_routing == ProviderRouting(
+			sort=RoutingSort.LATENCY,
+			only=("Groq", "Cerebras"),
+			allow_fallbacks=False,
+		)
+		summary = profile.to_summary_text()
+		assert "latency" in summary
+		assert "Groq, Cerebras" in summary
+
+	def test_parse_provider_names(self):
+		"""Test that provider names are split, trimmed and deduplicated."""
+		assert parse_provider_names(" Groq, ,Together,Groq ") == [
+			"Groq",
+			"Together",
+		]
+		assert parse_provider_names("") == []
+
 
 class TestConversationProfileManagerCollectionOperations:
 	"""Tests for ConversationProfileManager collection-like operations."""
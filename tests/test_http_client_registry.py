@@ -0,0 +1,144 @@
+"""Tests for the shared HTTP client registry."""
+
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from basilisk.completion_scheduler import observe_rate_limits
+from basilisk.http_client_registry import (
+	HttpClientRegistry,
+	async_event_hooks,
+	http_get,
+	url_origin,
+)
+
+
+@pytest.fixture(autouse=True)
+def mock_conf(mocker):
+	"""Use the system certificate store without reading the user config."""
+	conf = mocker.patch("basilisk.config.conf")
+	conf.return_value.network.use_system_cert_store = True
+	return conf
+
+
+@pytest.fixture
+def registry():
+	"""Return a registry closed after the test."""
+	registry = HttpClientRegistry(http2=False)
+	yield registry
+	registry.close_all()
+
+
+class TestUrlOrigin:
+	"""Tests for url_origin."""
+
+	@pytest.mark.parametrize(
+		("url", "expected"),
+		[
+			("https://api.openai.com/v1", "https://api.openai.com"),
+			("http://127.0.0.1:11434/api/chat", "http://127.0.0.1:11434"),
+			("https://example.com", "https://example.com"),
+			(None, None),
+			("", None),
+		],
+	)
+	def test_origin(self, url, expected):
+		"""The path is dropped and the port kept."""
+		assert url_origin(url) == expected
+
+
+class TestHttpClientRegistry:
+	"""Tests for HttpClientRegistry."""
+
+	def test_same_origin_shares_client(self, registry):
+		"""URLs of the same origin get the same client."""
+		first = registry.get_client("https://api.openai.com/v1")
+		second = registry.get_client("https://api.openai.com/v1/models")
+		assert first is second
+
+	def test_different_origins_get_different_clients(self, registry):
+		"""Each origin has its own client."""
+		openai = registry.get_client("https://api.openai.com/v1")
+		mistral = registry.get_client("https://api.mistral.ai")
+		assert openai is not mistral
+
+	def test_cert_store_setting_is_part_of_key(self, registry, mock_conf):
+		"""Changing the certificate store setting creates a new client."""
+		first = registry.get_client("https://api.openai.com")
+		mock_conf.return_value.network.use_system_cert_store = False
+		assert registry.get_client("https://api.openai.com") is not first
+
+	def test_closed_client_is_replaced(self, registry):
+		"""A client closed by close_all is recreated on the next request."""
+		client = registry.get_client("https://api.openai.com")
+		registry.close_all()
+		assert client.is_closed
+		new_client = registry.get_client("https://api.openai.com")
+		assert new_client is not client
+		assert not new_client.is_closed
+
+	def test_same_origin_shares_async_client(self, registry):
+		"""Async requests to the same origin share one pool."""
+		first = registry.get_async_client("https://api.openai.com/v1")
+		second = registry.get_async_client("https://api.openai.com/v1/chat")
+		assert first is second
+		assert first is not registry.get_client("https://api.openai.com/v1")
+		assert first is not registry.get_async_client("https://api.mistral.ai")
+
+	def test_async_client_has_shared_hooks(self, registry):
+		"""The async client tracks cancellation and observes rate limits."""
+		client = registry.get_async_client("https://api.openai.com/v1")
+		sync_hooks = registry.get_client("https://api.openai.com").event_hooks
+		assert len(client.event_hooks["response"]) == len(
+			sync_hooks["response"]
+		)
+		assert observe_rate_limits in sync_hooks["response"]
+
+	def test_close_all_drops_async_clients(self, registry):
+		"""A new async client is created after close_all."""
+		client = registry.get_async_client("https://api.openai.com")
+		registry.close_all()
+		assert registry.get_async_client("https://api.openai.com") is not client
+
+	def test_prewarm_sends_one_request_per_interval(self, registry, httpx_mock):
+		"""A second prewarm within the interval reuses the open connection."""
+		done = threading.Event()
+
+		def on_head(request: httpx.Request) -> httpx.Response:
+			done.set()
+			return httpx.Response(200)
+
+		httpx_mock.add_callback(
+			on_head, method="HEAD", url="https://api.example.com"
+		)
+		registry.prewarm("https://api.example.com/v1")
+		registry.prewarm("https://api.example.com/v1")
+		assert done.wait(2)
+		assert len(httpx_mock.get_requests()) == 1
+
+	def test_prewarm_without_url_does_nothing(self, registry):
+		"""No request is sent when the base URL is unknown."""
+		registry.prewarm(None)
+		assert registry._clients == {}
+
+
+def test_http_get_does_not_follow_redirects_by_default(httpx_mock):
+	"""http_get keeps the behaviour of httpx.get for redirects."""
+	httpx_mock.add_response(
+		url="https://example.com/old",
+		status_code=302,
+		headers={"Location": "https://example.com/new"},
+	)
+	response = http_get("https://example.com/old")
+	assert response.status_code == 302
+
+
+def test_async_event_hooks_call_the_sync_hooks():
+	"""The wrapped hooks run the original ones when awaited."""
+	calls = []
+	hooks = async_event_hooks({"response": [calls.append]})
+	response = httpx.Response(200)
+	asyncio.run(hooks["response"][0](response))
+	assert calls == [response]
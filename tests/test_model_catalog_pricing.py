@@ -0,0 +1,52 @@
+"""Tests for the cost of responses at catalog prices."""
+
+from __future__ import annotations
+
+import pytest
+
+from basilisk.conversation import TokenUsage
+from basilisk.model_catalog.pricing import compute_cost
+
+PRICING = {"prompt": "0.000002", "completion": "0.000008"}
+
+
+def test_cost_of_input_and_output() -> None:
+	"""Input and output tokens are billed at their own rate."""
+	usage = TokenUsage(input_tokens=1000, output_tokens=500)
+	assert compute_cost(PRICING, usage) == pytest.approx(0.006)
+
+
+def test_cached_input_billed_at_cache_read_rate() -> None:
+	"""Input tokens read from the cache use the cache read rate."""
+	pricing = PRICING | {"input_cache_read": "0.0000005"}
+	usage = TokenUsage(input_tokens=1000, cached_input_tokens=800)
+	assert compute_cost(pricing, usage) == pytest.approx(0.0008)
+
+
+def test_cached_input_without_cache_rate() -> None:
+	"""Cached input tokens fall back to the prompt rate."""
+	usage = TokenUsage(input_tokens=1000, cached_input_tokens=800)
+	assert compute_cost(PRICING, usage) == pytest.approx(0.002)
+
+
+def test_request_price_added() -> None:
+	"""A fixed price per request is added to the token cost."""
+	usage = TokenUsage(input_tokens=1000)
+	pricing = PRICING | {"request": "0.01"}
+	assert compute_cost(pricing, usage) == pytest.approx(0.012)
+
+
+@pytest.mark.parametrize(
+	"pricing",
+	[
+		None,
+		{},
+		{"prompt": "0.000002"},
+		{"prompt": "-1", "completion": "-1"},
+		{"prompt": "free", "completion": "0"},
+	],
+)
+def test_unknown_price(pricing) -> None:
+	"""Models without a usable input and output price have no cost."""
+	usage = TokenUsage(input_tokens=1000, output_tokens=500)
+	assert compute_cost(pricing, usage) is None
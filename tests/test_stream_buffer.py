@@ -0,0 +1,189 @@
+"""Tests for the streamed text coalescing buffer."""
+
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from basilisk.completion_cache import CachedCompletion
+from basilisk.completion_handler import CompletionHandler
+from basilisk.conversation import Message, MessageBlock, MessageRoleEnum
+from basilisk.provider_ai_model import AIModelInfo
+from basilisk.provider_engine.cancellation import CancellationToken
+from basilisk.stream_buffer import (
+	ChunkedText,
+	StreamCoalescingBuffer,
+	StreamFlushPolicy,
+)
+from basilisk.stream_ui_pump import StreamUIPump
+
+
+class FakeClock:
+	"""Manually advanced monotonic clock."""
+
+	def __init__(self):
+		"""Start the clock at zero."""
+		self.now = 0.0
+
+	def __call__(self) -> float:
+		"""Return the current time."""
+		return self.now
+
+
+@pytest.fixture
+def clock():
+	"""Return a fake clock."""
+	return FakeClock()
+
+
+class TestStreamFlushPolicy:
+	"""Tests for StreamFlushPolicy.should_flush."""
+
+	def test_boundary_in_chunk_flushes(self):
+		"""A boundary character in the new chunk triggers a flush."""
+		policy = StreamFlushPolicy()
+		assert policy.should_flush("end.", 4, 0.0)
+		assert not policy.should_flush("word", 4, 0.0)
+
+	def test_size_and_latency_flush(self):
+		"""Size and age limits trigger a flush without any boundary."""
+		policy = StreamFlushPolicy(latency_budget=0.05, max_buffer_chars=10)
+		assert policy.should_flush("x", 10, 0.0)
+		assert policy.should_flush("x", 1, 0.05)
+		assert not policy.should_flush("x", 9, 0.049)
+
+	def test_boundary_hint_can_be_disabled(self):
+		"""Without boundary hint only size and latency matter."""
+		policy = StreamFlushPolicy(boundary_hint=None)
+		assert not policy.should_flush(".", 1, 0.0)
+
+
+class TestStreamCoalescingBuffer:
+	"""Tests for StreamCoalescingBuffer."""
+
+	def test_text_held_until_latency_budget(self, clock):
+		"""Punctuation-free text is released once the budget elapsed."""
+		buffer = StreamCoalescingBuffer(
+			StreamFlushPolicy(latency_budget=0.05), clock=clock
+		)
+		assert buffer.append("def") is None
+		clock.now = 0.03
+		assert buffer.append("_foo") is None
+		assert len(buffer) == 7
+		clock.now = 0.06
+		assert buffer.append("()") == "def_foo()"
+		assert len(buffer) == 0
+
+	def test_max_buffer_chars(self, clock):
+		"""Reaching the size limit releases the buffer immediately."""
+		buffer = StreamCoalescingBuffer(
+			StreamFlushPolicy(max_buffer_chars=4, boundary_hint=None),
+			clock=clock,
+		)
+		assert buffer.append("ab") is None
+		assert buffer.append("cd") == "abcd"
+
+	def test_take_if_due(self, clock):
+		"""Pending text can be collected once it is older than the budget."""
+		buffer = StreamCoalescingBuffer(
+			StreamFlushPolicy(latency_budget=0.05), clock=clock
+		)
+		assert buffer.take_if_due() is None
+		buffer.append("abc")
+		assert buffer.take_if_due() is None
+		clock.now = 0.05
+		assert buffer.take_if_due() == "abc"
+
+	def test_flush_returns_remaining_text(self, clock):
+		"""Flushing releases everything and leaves the buffer empty."""
+		buffer = StreamCoalescingBuffer(clock=clock)
+		buffer.append("tail")
+		assert buffer.flush() == "tail"
+		assert buffer.flush() == ""
+
+	def test_empty_chunk_is_ignored(self, clock):
+		"""Empty chunks neither buffer nor flush anything."""
+		buffer = StreamCoalescingBuffer(clock=clock)
+		assert buffer.append("") is None
+		assert len(buffer) == 0
+
+
+class TestChunkedText:
+	"""Tests for ChunkedText."""
+
+	def test_join_on_read(self):
+		"""Chunks are joined when the text is read."""
+		text = ChunkedText()
+		text.append("Hello")
+		text.append("")
+		text.append(", world")
+		assert len(text) == 12
+		assert text.text == "Hello, world"
+		text.append("!")
+		assert str(text) == "Hello, world!"
+
+
+@pytest.mark.slow
+def test_benchmark_200k_character_stream(record_property):
+	"""Coalescing a 200k-character stream without punctuation stays linear."""
+	total_chars = 200_000
+	chunk = "abc"
+	clock = FakeClock()
+	buffer = StreamCoalescingBuffer(
+		StreamFlushPolicy(latency_budget=0.05), clock=clock
+	)
+	response = ChunkedText()
+	flushes = 0
+	start = time.perf_counter()
+	for _ in range(total_chars // len(chunk)):
+		# Simulate a provider emitting one chunk per millisecond
+		clock.now += 0.001
+		text = buffer.append(chunk)
+		if text:
+			flushes += 1
+			response.append(text)
+	response.append(buffer.flush())
+	content = response.text
+	elapsed = time.perf_counter() - start
+	record_property("elapsed_seconds", elapsed)
+	record_property("flushes", flushes)
+	assert len(content) == total_chars // len(chunk) * len(chunk)
+	# About one flush per 50 ms budget, i.e. every 50 chunks
+	assert 1000 <= flushes <= 1400
+	assert elapsed < 2.0
+
+
+class SmallChunkReplay(CachedCompletion):
+	"""Cached response replayed as two-character chunks."""
+
+	def iter_stream(self, chunk_size: int = 2):
+		"""Replay the response in chunks of two characters."""
+		return super().iter_stream(chunk_size)
+
+
+@pytest.mark.slow
+def test_benchmark_200k_character_stream_through_handler(
+	mocker, record_property
+):
+	"""Streaming 200k characters through CompletionHandler stays linear."""
+	mocker.patch("wx.CallAfter")
+	# Every chunk is flushed, the worst case for the response text
+	handler = CompletionHandler(
+		flush_policy=StreamFlushPolicy(max_buffer_chars=1),
+		ui_pump=StreamUIPump(),
+	)
+	block = MessageBlock(
+		request=Message(role=MessageRoleEnum.USER, content="Hi"),
+		model=AIModelInfo(provider_id="openai", model_id="gpt-test"),
+		stream=True,
+	)
+	response = SmallChunkReplay(content="ab" * 100_000)
+	start = time.perf_counter()
+	assert handler._handle_streaming_completion(
+		MagicMock(), response, block, None, CancellationToken()
+	)
+	elapsed = time.perf_counter() - start
+	record_property("elapsed_seconds", elapsed)
+	assert block.response.content == response.content
+	assert handler.streamed_text == response.content
+	assert elapsed < 2.0
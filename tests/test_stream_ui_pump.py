@@ -0,0 +1,93 @@
+"""Tests for the frame-rate-limited stream UI pump."""
+
+import pytest
+
+from basilisk.stream_ui_pump import StreamUIPump
+
+
+@pytest.fixture
+def mock_wx(mocker):
+	"""Patch wx scheduling functions used by the pump."""
+	return mocker.patch("basilisk.stream_ui_pump.wx")
+
+
+@pytest.fixture
+def pump(mock_wx):
+	"""Return a pump running at 30 frames per second."""
+	return StreamUIPump(frame_rate=30)
+
+
+class TestStreamUIPump:
+	"""Tests for StreamUIPump batching and scheduling."""
+
+	def test_posts_are_batched_per_key(self, pump, mock_wx):
+		"""Text posted between frames is applied in one call per key."""
+		applied_a = []
+		applied_b = []
+		pump.post("a", "Hello", applied_a.append)
+		pump.post("b", "x", applied_b.append)
+		pump.post("a", ", world", applied_a.append)
+		mock_wx.CallAfter.assert_called_once_with(pump._schedule_frame)
+		pump._run_frame()
+		assert applied_a == ["Hello, world"]
+		assert applied_b == ["x"]
+		assert pump.stats.frames == 1
+
+	def test_frame_schedules_next_only_while_busy(self, pump, mock_wx):
+		"""The pump stops scheduling frames once nothing is pending."""
+		pump.post("a", "text", lambda _text: None)
+		pump._schedule_frame()
+		mock_wx.CallLater.assert_called_once_with(33, pump._run_frame)
+		pump._run_frame()
+		assert mock_wx.CallLater.call_count == 1
+		pump.post("a", "more", lambda _text: None)
+		assert mock_wx.CallAfter.call_count == 2
+
+	def test_sources_are_polled_each_frame(self, pump, mock_wx):
+		"""Registered sources keep the pump running and may post text."""
+		applied = []
+		pump.register_source("a", lambda: pump.post("a", "due", applied.append))
+		pump._run_frame()
+		assert applied == ["due"]
+		assert mock_wx.CallLater.call_count == 1
+		pump.unregister_source("a")
+		pump._run_frame()
+		assert mock_wx.CallLater.call_count == 1
+
+	def test_flush_applies_immediately(self, pump):
+		"""Flushing a key applies its pending text without waiting."""
+		applied = []
+		pump.post("a", "now", applied.append)
+		pump.flush("a")
+		assert applied == ["now"]
+		pump._run_frame()
+		assert applied == ["now"]
+
+	def test_discard_drops_pending_text(self, pump):
+		"""Discarded text is never applied."""
+		applied = []
+		pump.post("a", "dropped", applied.append)
+		pump.discard("a")
+		pump._run_frame()
+		assert applied == []
+
+	def test_apply_error_does_not_stop_other_streams(self, pump):
+		"""An exception in one callback does not prevent the others."""
+		applied = []
+
+		def failing(_text):
+			raise RuntimeError("boom")
+
+		pump.post("a", "x", failing)
+		pump.post("b", "y", applied.append)
+		pump._run_frame()
+		assert applied == ["y"]
+
+	def test_slow_frames_are_counted(self, pump, mocker):
+		"""Frames longer than the frame interval are reported as slow."""
+		mock_time = mocker.patch("basilisk.stream_ui_pump.time")
+		mock_time.perf_counter.side_effect = [0.0, 0.05]
+		pump.post("a", "x", lambda _text: None)
+		pump._run_frame()
+		assert pump.stats.slow_frames == 1
+		assert pump.stats.max_apply_ms == pytest.approx(50.0)
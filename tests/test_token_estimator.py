@@ -0,0 +1,76 @@
+"""Tests for the local token estimator."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from basilisk.conversation import Message, MessageRoleEnum
+from basilisk.token_estimator import (
+	IMAGE_DEFAULT_TOKENS,
+	IMAGE_MAX_TOKENS,
+	MESSAGE_OVERHEAD_TOKENS,
+	estimate_attachment_tokens,
+	estimate_message_tokens,
+	estimate_text_tokens,
+)
+
+
+class TestEstimateTextTokens:
+	"""Tests for estimate_text_tokens."""
+
+	@pytest.mark.parametrize(
+		("text", "expected"),
+		[
+			("", 0),
+			("Hello, world!", 4),
+			("The quick brown fox jumps over the lazy dog.", 10),
+		],
+	)
+	def test_english_text(self, text, expected):
+		"""Short English words count as one token each."""
+		assert estimate_text_tokens(text) == expected
+
+	def test_non_ascii_text_counts_more_tokens(self):
+		"""Multi-byte characters take more tokens than ASCII ones."""
+		assert estimate_text_tokens("日本語のテキスト") > estimate_text_tokens(
+			"japanese"
+		)
+
+	def test_provider_calibration(self):
+		"""Providers with larger vocabularies count fewer tokens."""
+		text = "Summarize the following report in three bullet points. " * 20
+		assert (
+			estimate_text_tokens(text, "gemini")
+			< estimate_text_tokens(text)
+			< estimate_text_tokens(text, "anthropic")
+		)
+
+
+class TestEstimateAttachmentTokens:
+	"""Tests for estimate_attachment_tokens."""
+
+	def test_image_with_dimensions(self):
+		"""Image tokens grow with the pixel count up to a maximum."""
+		small = SimpleNamespace(dimensions=(300, 250))
+		huge = SimpleNamespace(dimensions=(8000, 6000))
+		assert estimate_attachment_tokens(small) == 100
+		assert estimate_attachment_tokens(huge) == IMAGE_MAX_TOKENS
+
+	def test_image_without_dimensions(self):
+		"""Images of unknown size use a default estimate."""
+		image = SimpleNamespace(dimensions=None, mime_type="image/png", size=1)
+		assert estimate_attachment_tokens(image) == IMAGE_DEFAULT_TOKENS
+
+	def test_text_file(self, attachment):
+		"""Text files count about four bytes per token."""
+		assert estimate_attachment_tokens(attachment) == 3
+
+
+def test_message_tokens_include_attachments(attachment):
+	"""Attachments are only counted when they are sent."""
+	message = Message(
+		role=MessageRoleEnum.USER, content="Read this", attachments=[attachment]
+	)
+	without = estimate_message_tokens(message, include_attachments=False)
+	assert without == MESSAGE_OVERHEAD_TOKENS + 2
+	assert estimate_message_tokens(message) == without + 3